@@ -1,9 +1,7 @@
-import numpy as np
 from typing import List, Tuple, Dict
-from qiskit import QuantumCircuit
-from qiskit_aer import AerSimulator
 from .cartas import QuantumCard
-from .quantum_random import QuantumRNG
+from .estado_cuantico import QuantumHandState
+from .quantum_random import create_rng
 
 class QuantumDeck:
     """
@@ -11,6 +9,9 @@ class QuantumDeck:
     Para esta versión "simple", el colapso siempre ocurre cuando se pide,
     y el entrelazamiento Rey-Pito se simula de forma CONSISTENTE:
     - se colapsa 1 vez por palo y queda cacheado.
+
+    Todos los pares de Bell de la baraja viven en un único QuantumHandState
+    (self.quantum_state), de modo que medir una carta colapsa su pareja en O(1).
     """
 
     PALOS = ['Oro', 'Copa', 'Espada', 'Basto']
@@ -29,7 +30,7 @@ class QuantumDeck:
         11: '1001', 12: '1010'
     }
 
-    def __init__(self, enable_king_pit_entanglement: bool = True, enable_two_three_entanglement: bool = None, game_mode='4'):
+    def __init__(self, enable_king_pit_entanglement: bool = True, enable_two_three_entanglement: bool = None, game_mode='4', rng=None):
         """
         Initialize QuantumDeck with entanglement options
         
@@ -37,6 +38,7 @@ class QuantumDeck:
             enable_king_pit_entanglement: Enable Rey-Pito entanglement
             enable_two_three_entanglement: Enable Tres-Dos entanglement (auto-set based on game_mode if None)
             game_mode: '4' for 4 reyes (only K/Pito entangled), '8' for 8 reyes (K/Pito and 3/2 entangled)
+            rng: Generator with the QuantumRNG interface (default: create_rng())
         """
         # Auto-configure entanglement based on game mode if not explicitly set
         if enable_two_three_entanglement is None:
@@ -46,13 +48,17 @@ class QuantumDeck:
         self.enable_king_pit_entanglement = enable_king_pit_entanglement
         self.enable_two_three_entanglement = enable_two_three_entanglement
         
+        # Use quantum RNG for all random operations (or the fast backend, see create_rng)
+        self.qrng = rng if rng is not None else create_rng()
+        
+        # Estado conjunto de todos los pares de Bell de esta baraja
+        self.quantum_state = QuantumHandState(bit_source=self.qrng.bell_bit_source)
+        # (palo, valor) -> índice del par en quantum_state
+        self.bell_pair_index: Dict[Tuple[str, int], int] = {}
+        
         # Initialize cards AFTER setting entanglement flags
         self.cards = self._create_deck()
         self.deck_index = 0
-        self.simulator = AerSimulator()
-        
-        # Use quantum RNG for all random operations
-        self.qrng = QuantumRNG()
 
         # Cache del colapso Rey-Pito: palo -> (estado_rey, estado_pito)
         # Estados en 6 bits (q0..q5): [palo(2)][valor(4)]
@@ -101,7 +107,9 @@ class QuantumDeck:
             card1 = card_map.get((palo, valor1))
             card2 = card_map.get((palo, valor2))
             if card1 and card2:
-                card1.create_bell_pair(card2)
+                card1.create_bell_pair(card2, hand_state=self.quantum_state)
+                self.bell_pair_index[(palo, valor1)] = card1.bell_pair_index
+                self.bell_pair_index[(palo, valor2)] = card1.bell_pair_index
         
         # Rey (12) ↔ As (1) - Siempre entrelazados en todos los palos
         if self.enable_king_pit_entanglement:
@@ -132,6 +140,7 @@ class QuantumDeck:
                 "Production code should use quantum shuffle (seed=None).",
                 UserWarning
             )
+            import numpy as np
             np.random.seed(seed)
             np.random.shuffle(self.cards)
         else:
@@ -151,16 +160,25 @@ class QuantumDeck:
         """Reset deck index"""
         self.deck_index = 0
     
+    def get_entanglement_stats(self) -> Dict[str, int]:
+        """Pares de Bell materializados / no medidos en la mano actual."""
+        return self.quantum_state.stats()
+
     def reset_entanglement_states(self):
         """
         Reset entanglement collapse caches for new hand - cards return to entangled state.
-        Recrea los estados de Bell para las cartas entrelazadas.
+        Devuelve todos los pares de Bell a |Φ+⟩ en el estado conjunto.
         """
         self.king_pit_collapsed = {}
         self.tres_dos_collapsed = {}
         
-        # Recrear estados de Bell para todas las cartas entrelazadas
-        self._create_bell_states(self.cards)
+        # Los pares ya están registrados: basta con reiniciar el estado conjunto
+        self.quantum_state.reset()
+        for card in self.cards:
+            if card.is_entangled:
+                card.is_collapsed = False
+                card.collapsed_value = None
+                card.collapse_reason = None
 
     def get_deck_info(self) -> dict:
         return {
@@ -195,8 +213,8 @@ class QuantumDeck:
         as_card = self.PALO_CODE[palo] + self.VALOR_CODE[1]
 
         # Colapso: o se quedan como (Rey,As) o se "intercambian identidades"
-        # Use quantum randomness instead of numpy
-        if self.qrng.random_float() < 0.5:
+        # Se mide el mismo par de Bell que usan las cartas (bit 1 = intercambio)
+        if self.quantum_state.measure(self.bell_pair_index[(palo, 12)]) == 0:
             pair = (rey, as_card)
         else:
             pair = (as_card, rey)
@@ -227,8 +245,8 @@ class QuantumDeck:
         tres = self.PALO_CODE[palo] + self.VALOR_CODE[3]
         dos = self.PALO_CODE[palo] + self.VALOR_CODE[2]
 
-        # Use quantum randomness instead of numpy
-        if self.qrng.random_float() < 0.5:
+        # Se mide el mismo par de Bell que usan las cartas (bit 1 = intercambio)
+        if self.quantum_state.measure(self.bell_pair_index[(palo, 3)]) == 0:
             pair = (tres, dos)
         else:
             pair = (dos, tres)
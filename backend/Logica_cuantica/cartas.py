@@ -1,7 +1,9 @@
-import numpy as np
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
-from qiskit_aer import AerSimulator
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from .estado_cuantico import QuantumHandState
+
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
 
 class QuantumCard:
     """
@@ -52,7 +54,6 @@ class QuantumCard:
         self.valor = valor
         self.card_id = card_id
         self.game_mode = game_mode
-        self.simulator = AerSimulator()
         self.measured_state: str | None = None  # 6 bits (q0..q5)
         
         # Quantum properties for compatibility with entanglement system
@@ -70,16 +71,18 @@ class QuantumCard:
         self.collapsed_value = None
         self.collapse_reason = None
         
-        # Bell State for entanglement (shared quantum circuit)
-        self.bell_circuit: Optional[QuantumCircuit] = None
+        # Bell State for entanglement (shared per-hand stabilizer state)
+        self.bell_state: Optional[QuantumHandState] = None
+        self.bell_pair_index: Optional[int] = None  # Index of the pair inside bell_state
         self.bell_qubit_index: Optional[int] = None  # 0 or 1 (which qubit in Bell pair)
         
         # Compatibility attributes for game logic
         self.value = valor  # Alias for English compatibility
         self.suit = palo    # Alias for English compatibility
 
-    def _create_circuit(self) -> QuantumCircuit:
+    def _create_circuit(self) -> 'QuantumCircuit':
         """Crea un circuito cuántico para la carta en estado base."""
+        from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister  # Sólo si se pide el circuito
         qr = QuantumRegister(6, f'card_{self.card_id}')
         cr = ClassicalRegister(6, f'c_{self.card_id}')
         circuit = QuantumCircuit(qr, cr)
@@ -103,27 +106,16 @@ class QuantumCard:
         """
         Mide la carta y colapsa el estado (una vez).
         Devuelve un string de 6 bits en el orden q0..q5.
+
+        El circuito de _create_circuit sólo aplica puertas X sobre |000000⟩,
+        así que es un estado de la base computacional y la medición es
+        determinista: no hace falta ejecutarlo en el simulador.
         """
         if self.measured_state is not None:
             return self.measured_state
 
-        circuit = self._create_circuit()
-        qr = circuit.qregs[0]
-        cr = circuit.cregs[0]
-
-        circuit.measure(qr, cr)
-
-        job = self.simulator.run(circuit, shots=1)
-        result = job.result()
-        counts = result.get_counts(circuit)
-
-        measured_state = list(counts.keys())[0]
-
-        # CLAVE: invertir para que [0] sea q0, etc.
-        measured_state = measured_state[::-1]
-
-        self.measured_state = measured_state
-        return measured_state
+        self.measured_state = self.PALO_CODE[self.palo] + self.VALOR_CODE[self.valor]
+        return self.measured_state
 
     # Alias por si queréis llamarlo explícitamente "collapse"
     def collapse(self, deterministic_value=None, collapse_seed=None) -> str:
@@ -137,7 +129,7 @@ class QuantumCard:
             return str(self.collapsed_value)
         
         # Si está en estado de Bell, usar colapso cuántico entrelazado
-        if self.is_entangled and self.bell_circuit:
+        if self.is_entangled and self.bell_state is not None:
             result_tuple = self.collapse_bell_pair()
             return str(self.collapsed_value)
         
@@ -162,29 +154,32 @@ class QuantumCard:
         self.is_collapsed = True
         self.collapsed_value = self.get_valor()
     
-    def create_bell_pair(self, partner_card: 'QuantumCard') -> None:
+    def create_bell_pair(self, partner_card: 'QuantumCard', hand_state: Optional[QuantumHandState] = None) -> None:
         """
         Crear un estado de Bell (entrelazamiento cuántico auténtico) con otra carta.
         Usa el estado |Φ+⟩ = (|00⟩ + |11⟩)/√2
         
         Cuando una carta colapsa, su pareja también colapsa instantáneamente (correlación cuántica).
+
+        Args:
+            partner_card: Carta con la que se entrelaza
+            hand_state: Estado conjunto de la mano donde se registra el par.
+                Si no se indica, el par usa un estado propio.
         """
         if self.is_entangled or partner_card.is_entangled:
             raise ValueError("Una o ambas cartas ya están entrelazadas")
         
-        # Crear circuito cuántico con 2 qubits para el par de Bell
-        qr = QuantumRegister(2, f'bell_{self.card_id}_{partner_card.card_id}')
-        cr = ClassicalRegister(2, f'c_bell_{self.card_id}_{partner_card.card_id}')
-        bell_circuit = QuantumCircuit(qr, cr)
+        if hand_state is None:
+            hand_state = QuantumHandState()
         
-        # Crear estado de Bell |Φ+⟩: Hadamard en q0, luego CNOT(q0, q1)
-        bell_circuit.h(qr[0])
-        bell_circuit.cx(qr[0], qr[1])
-        
-        # Ambas cartas comparten el mismo circuito de Bell
-        self.bell_circuit = bell_circuit
+        # Ambas cartas comparten el mismo par dentro del estado de la mano.
+        # Sólo se guarda el descriptor: el circuito se crea al medir (si hace falta)
+        pair_index = hand_state.add_pair(self.card_id, partner_card.card_id)
+        self.bell_state = hand_state
+        self.bell_pair_index = pair_index
         self.bell_qubit_index = 0
-        partner_card.bell_circuit = bell_circuit
+        partner_card.bell_state = hand_state
+        partner_card.bell_pair_index = pair_index
         partner_card.bell_qubit_index = 1
         
         # Marcar ambas cartas como entrelazadas
@@ -202,6 +197,13 @@ class QuantumCard:
         partner_card.coefficient_a = 0.7071
         partner_card.coefficient_b = 0.7071
     
+    @property
+    def bell_circuit(self) -> Optional['QuantumCircuit']:
+        """Circuito de Bell del par (se construye bajo demanda)."""
+        if self.bell_state is None:
+            return None
+        return self.bell_state.get_circuit(self.bell_pair_index)
+
     def collapse_bell_pair(self) -> Tuple[int, int]:
         """
         Colapsar el estado de Bell (medición cuántica).
@@ -210,7 +212,7 @@ class QuantumCard:
         Returns:
             Tupla (resultado_esta_carta, resultado_pareja)
         """
-        if not self.is_entangled or not self.bell_circuit:
+        if not self.is_entangled or self.bell_state is None:
             raise ValueError("Esta carta no está en un estado de Bell")
         
         if self.is_collapsed:
@@ -218,26 +220,12 @@ class QuantumCard:
             partner_collapsed = self.entangled_partner_card.collapsed_value if self.entangled_partner_card else None
             return (self.collapsed_value, partner_collapsed)
         
-        # Medir el estado de Bell
-        qr = self.bell_circuit.qregs[0]
-        cr = self.bell_circuit.cregs[0]
-        self.bell_circuit.measure(qr, cr)
-        
-        # Ejecutar la medición
-        job = self.simulator.run(self.bell_circuit, shots=1)
-        result = job.result()
-        counts = result.get_counts(self.bell_circuit)
-        measured_state = list(counts.keys())[0]
-        
-        # measured_state es "q1q0" en orden Qiskit (reverso)
-        # Invertir para obtener [q0, q1]
-        measured_state = measured_state[::-1]
-        
-        bit_0 = int(measured_state[0])  # Resultado de q0
-        bit_1 = int(measured_state[1])  # Resultado de q1
+        # Medir el par en el estado estabilizador de la mano (O(1), sin Aer)
+        bit = self.bell_state.measure(self.bell_pair_index)
         
         # En estado de Bell |Φ+⟩, ambos qubits colapsan al mismo valor
-        # bit_0 = bit_1 debido a la correlación cuántica
+        bit_0 = bit  # Resultado de q0
+        bit_1 = bit  # Resultado de q1
         
         # Esta carta usa su qubit correspondiente
         my_result = bit_0 if self.bell_qubit_index == 0 else bit_1
@@ -9,6 +9,10 @@ from .jugador import QuantumPlayer
 from .quantum_random import QuantumRNG
 
 
+def _valor_from_state(state6: str) -> int:
+    return QuantumCard.VALORES.get(state6[2:], -1)
+
+
 class QuantumDealer:
     """
     Gestiona la distribución de cartas y el flujo del juego.
@@ -31,6 +35,8 @@ class QuantumDealer:
 
         # Pares: key=frozenset({idA,idB}) -> colapsado (bool)
         self.pair_links: Dict[FrozenSet[int], bool] = {}
+        # Índice card_id -> par pendiente de colapsar (sólo pares no colapsados)
+        self._pending_links: Dict[int, FrozenSet[int]] = {}
 
         for i in range(num_players):
             self.players.append(QuantumPlayer(i, f"Jugador {i + 1}"))
@@ -41,21 +47,26 @@ class QuantumDealer:
     def register_pair_link(self, card_a: QuantumCard, card_b: QuantumCard) -> None:
         if card_a.card_id == card_b.card_id:
             raise ValueError("No puedes enlazar una carta consigo misma.")
+        for card in (card_a, card_b):
+            if card.card_id in self._pending_links:
+                raise ValueError(f"La carta {card.card_id} ya tiene un par pendiente de colapsar.")
         key = frozenset({card_a.card_id, card_b.card_id})
         self.pair_links[key] = False
+        self._pending_links[card_a.card_id] = key
+        self._pending_links[card_b.card_id] = key
 
-    def _collapse_pair_link_if_needed(self, hand_cards: List[QuantumCard], key: FrozenSet[int]) -> None:
-        if self.pair_links.get(key, True):
-            return
-
-        ids = list(key)
-        id_a, id_b = ids[0], ids[1]
+    def _collapse_pair_link_if_needed(self, hand_by_id: Dict[int, QuantumCard], card: QuantumCard) -> bool:
+        """Colapsa el par pendiente de la carta si su pareja está en la mano."""
+        key = self._pending_links.get(card.card_id)
+        if key is None:
+            return False
 
-        card_a = next((c for c in hand_cards if c.card_id == id_a), None)
-        card_b = next((c for c in hand_cards if c.card_id == id_b), None)
+        id_a, id_b = tuple(key)
+        card_a = hand_by_id.get(id_a)
+        card_b = hand_by_id.get(id_b)
 
         if card_a is None or card_b is None:
-            return
+            return False
 
         valores = [1, 2, 3, 4, 5, 6, 7, 10, 11, 12]
         # Use quantum random choice instead of numpy
@@ -74,30 +85,36 @@ class QuantumDealer:
         self.measured_states[card_b.card_id] = b_bits
 
         self.pair_links[key] = True
+        for card_id in key:
+            # Sólo se borra la entrada si sigue apuntando a este par
+            stored = self._pending_links.pop(card_id, None)
+            if stored is not None and stored != key:
+                self._pending_links[card_id] = stored
+        return True
 
     # ----------------------------------------
     # Colapso centralizado
     # ----------------------------------------
     def collapse_player_hand(self, player: QuantumPlayer) -> None:
+        """
+        Colapsa la mano en una sola pasada. Prioridad por carta:
+        1) par registrado (si la pareja está en la mano), 2) Rey-Pito,
+        3) Tres-Dos, 4) colapso normal.
+        """
         hand = player.hand
+        hand_by_id = {card.card_id: card for card in hand}
 
-        # 1) Pares registrados
-        for key in list(self.pair_links.keys()):
-            self._collapse_pair_link_if_needed(hand, key)
-
-        # 2) Rey-Pito si aparecen en la mano
         for card in hand:
+            # 1) Pares registrados
+            if self._pending_links and self._collapse_pair_link_if_needed(hand_by_id, card):
+                continue
+
             if card.measured_state is not None:
                 continue
 
-            if card.valor in (10, 12):  # Pito=10, Rey=12
+            if card.valor in (10, 12):  # 2) Rey-Pito: Pito=10, Rey=12
                 king_state, pit_state = self.deck.collapse_king_pit(card.palo)
-
-                def valor_from_state(state6: str) -> int:
-                    return QuantumCard.VALORES.get(state6[2:], -1)
-
-                ks_val = valor_from_state(king_state)
-                ps_val = valor_from_state(pit_state)
+                ks_val = _valor_from_state(king_state)
 
                 if card.valor == 12:
                     chosen = king_state if ks_val == 12 else pit_state
@@ -107,31 +124,18 @@ class QuantumDealer:
                 card.set_collapsed_state(chosen)
                 self.measured_states[card.card_id] = chosen
 
-        # 3) Tres-Dos si aparecen en la mano
-        for card in hand:
-            if card.measured_state is not None:
-                continue
-
-            if card.valor in (2, 3):
+            elif card.valor in (2, 3):  # 3) Tres-Dos
                 tres_state, dos_state = self.deck.collapse_tres_dos(card.palo)
 
-                def valor_from_state(state6: str) -> int:
-                    return QuantumCard.VALORES.get(state6[2:], -1)
-
-                ds_val = valor_from_state(dos_state)
-                ts_val = valor_from_state(tres_state)
-
                 if card.valor == 2:
-                    chosen = dos_state if ds_val == 2 else tres_state
+                    chosen = dos_state if _valor_from_state(dos_state) == 2 else tres_state
                 else:
-                    chosen = tres_state if ts_val == 3 else dos_state
+                    chosen = tres_state if _valor_from_state(tres_state) == 3 else dos_state
 
                 card.set_collapsed_state(chosen)
                 self.measured_states[card.card_id] = chosen
 
-        # 4) Resto: colapso normal
-        for card in hand:
-            if card.measured_state is None:
+            else:  # 4) Resto: colapso normal
                 state = card.measure()
                 self.measured_states[card.card_id] = state
 
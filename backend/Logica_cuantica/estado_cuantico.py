@@ -0,0 +1,196 @@
+"""
+Estado cuántico conjunto de una mano (motor estabilizador).
+
+Todos los pares de Bell |Φ+⟩ = (|00⟩ + |11⟩)/√2 de la baraja (4 en modo '4',
+8 en modo '8') se representan en un único estado compacto:
+
+- Antes de medir, cada par está estabilizado por X⊗X y Z⊗Z. Como los pares
+  son independientes entre sí, el tableau completo se reduce a saber qué
+  pares siguen sin medir.
+- Al medir Z en cualquiera de los dos qubits, el resultado es un bit
+  aleatorio uniforme y el par queda en |bb⟩: la pareja colapsa al mismo bit.
+
+Por eso basta con dos máscaras de bits (pares medidos / resultados) y cada
+medición es O(1). Qiskit sólo se usa como backend opcional de verificación.
+
+Los pares se registran como un descriptor ligero (ids de las dos cartas); el
+par sólo se "materializa" la primera vez que se mide (su bit en la máscara
+de medidos), y sólo entonces se construye su circuito si el backend es
+Qiskit. stats() indica cuántos pares de la mano se materializaron y cuántos
+se ahorraron.
+"""
+
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class OsEntropyBits:
+    """Fuente de bits aleatorios del sistema operativo, con reserva de 64 bits."""
+
+    __slots__ = ('_pool', '_left')
+
+    def __init__(self):
+        self._pool = 0
+        self._left = 0
+
+    def __call__(self) -> int:
+        if self._left == 0:
+            self._pool = int.from_bytes(os.urandom(8), 'little')
+            self._left = 64
+        bit = self._pool & 1
+        self._pool >>= 1
+        self._left -= 1
+        return bit
+
+
+class QuantumHandState:
+    """
+    Estado estabilizador de todos los pares de Bell de una mano.
+
+    Args:
+        bit_source: Callable sin argumentos que devuelve 0 o 1. Por defecto
+            usa entropía del sistema operativo (sin Aer).
+        backend: 'stabilizer' (por defecto) o 'qiskit'. Con 'qiskit' cada
+            medición ejecuta el circuito de Bell real en AerSimulator; sirve
+            sólo para contrastar el motor con Qiskit.
+    """
+
+    BACKENDS = ('stabilizer', 'qiskit')
+
+    def __init__(self, bit_source: Optional[Callable[[], int]] = None, backend: str = 'stabilizer'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend inválido: {backend}")
+        self.backend = backend
+        self._bit_source = bit_source or OsEntropyBits()
+        self._pairs: List[Tuple[int, int]] = []  # (card_id qubit 0, card_id qubit 1)
+        self._circuits: List[object] = []  # Circuito de Bell por par, construido bajo demanda
+        self._measured = 0  # bit i = par i ya medido
+        self._outcomes = 0  # bit i = resultado de la medición del par i
+        self._simulator = None
+
+    # -------------------------
+    # Registro de pares
+    # -------------------------
+    def add_pair(self, card_id_a: int, card_id_b: int) -> int:
+        """Registra un par |Φ+⟩ nuevo (sólo el descriptor) y devuelve su índice."""
+        self._pairs.append((card_id_a, card_id_b))
+        self._circuits.append(None)
+        return len(self._pairs) - 1
+
+    @property
+    def num_pairs(self) -> int:
+        return len(self._pairs)
+
+    def pair_cards(self, pair_index: int) -> Tuple[int, int]:
+        return self._pairs[pair_index]
+
+    # -------------------------
+    # Medición
+    # -------------------------
+    def is_measured(self, pair_index: int) -> bool:
+        return bool((self._measured >> pair_index) & 1)
+
+    def measure(self, pair_index: int) -> int:
+        """
+        Mide Z en el par indicado y devuelve el bit resultante.
+
+        En |Φ+⟩ ambos qubits dan el mismo resultado, así que el bit vale para
+        las dos cartas del par. Medir de nuevo devuelve el resultado guardado.
+        """
+        if not 0 <= pair_index < len(self._pairs):
+            raise IndexError(f"Par de Bell inexistente: {pair_index}")
+
+        mask = 1 << pair_index
+        if self._measured & mask:
+            return 1 if self._outcomes & mask else 0
+
+        if self.backend == 'qiskit':
+            bit = self._measure_with_qiskit(pair_index)
+        else:
+            bit = self._bit_source() & 1
+
+        self._measured |= mask
+        if bit:
+            self._outcomes |= mask
+        return bit
+
+    def reset(self) -> None:
+        """Devuelve todos los pares a |Φ+⟩ (nueva mano con la misma baraja)."""
+        self._measured = 0
+        self._outcomes = 0
+
+    def get_outcomes(self) -> Dict[int, int]:
+        """Resultados de los pares ya medidos: índice de par -> bit."""
+        return {
+            i: (self._outcomes >> i) & 1
+            for i in range(len(self._pairs))
+            if (self._measured >> i) & 1
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Pares materializados frente a pares que nunca se midieron en esta mano."""
+        materialized = bin(self._measured).count('1')
+        return {
+            'pairs': len(self._pairs),
+            'materialized': materialized,
+            'skipped': len(self._pairs) - materialized,
+        }
+
+    # -------------------------
+    # Backend Qiskit (verificación)
+    # -------------------------
+    def _get_simulator(self):
+        if self._simulator is None:
+            from qiskit_aer import AerSimulator
+            self._simulator = AerSimulator()
+        return self._simulator
+
+    def get_circuit(self, pair_index: int):
+        """Circuito de Bell del par, construido la primera vez que se pide."""
+        circuit = self._circuits[pair_index]
+        if circuit is None:
+            from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+            card_id_a, card_id_b = self._pairs[pair_index]
+            qr = QuantumRegister(2, f'bell_{card_id_a}_{card_id_b}')
+            cr = ClassicalRegister(2, f'c_bell_{card_id_a}_{card_id_b}')
+            circuit = QuantumCircuit(qr, cr)
+            # |Φ+⟩: Hadamard en q0, luego CNOT(q0, q1)
+            circuit.h(qr[0])
+            circuit.cx(qr[0], qr[1])
+            self._circuits[pair_index] = circuit
+        return circuit
+
+    def _measure_with_qiskit(self, pair_index: int) -> int:
+        circuit = self.get_circuit(pair_index).copy()
+        circuit.measure(circuit.qubits, circuit.clbits)
+        counts = self._get_simulator().run(circuit, shots=1).result().get_counts(circuit)
+        measured_state = list(counts.keys())[0].replace(' ', '')
+        return int(measured_state[-1])  # q0 (Qiskit invierte el orden)
+
+    def cross_check(self, shots: int = 256) -> Dict[int, Dict[str, int]]:
+        """
+        Ejecuta cada circuito de Bell en AerSimulator y comprueba que sólo
+        aparecen resultados correlacionados ('00' o '11'), igual que asume
+        el motor estabilizador.
+
+        Returns:
+            índice de par -> conteos de Qiskit
+
+        Raises:
+            AssertionError si algún par produce resultados no correlacionados.
+        """
+        simulator = self._get_simulator()
+        results = {}
+        for pair_index in range(len(self._pairs)):
+            circuit = self.get_circuit(pair_index).copy()
+            circuit.measure(circuit.qubits, circuit.clbits)
+            counts = simulator.run(circuit, shots=shots).result().get_counts(circuit)
+            counts = {state.replace(' ', ''): n for state, n in counts.items()}
+            if any(state not in ('00', '11') for state in counts):
+                raise AssertionError(f"Par {pair_index} no está en |Φ+⟩: {counts}")
+            results[pair_index] = counts
+        return results
+
+    def __repr__(self) -> str:
+        measured = bin(self._measured).count('1')
+        return f"QuantumHandState(pairs={len(self._pairs)}, measured={measured}, backend={self.backend})"
@@ -2,12 +2,16 @@
 Quantum Random Number Generator
 Uses Qiskit to generate truly quantum random numbers
 Falls back to classical if quantum fails
+
+For simulations and load tests, set_rng_backend('fast') swaps the quantum
+generator for a seeded classical one with the same interface.
+
+Qiskit is imported on the first quantum sample, not at module load, so the
+game engine imports without it.
 """
 
-from qiskit import QuantumCircuit
-from qiskit_aer import AerSimulator
-import numpy as np
-from typing import Optional
+import random
+from typing import Callable, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,14 +20,26 @@ logger = logging.getLogger(__name__)
 class QuantumRNG:
     """Quantum Random Number Generator using Qiskit with classical fallback"""
     
+    # Bell pairs keep their own OS-entropy bit source (see QuantumHandState)
+    bell_bit_source: Optional[Callable[[], int]] = None
+    
     def __init__(self):
-        self.simulator = AerSimulator()
+        self._simulator = None
         self.quantum_failures = 0
         self.max_failures_before_warning = 5
     
+    @property
+    def simulator(self):
+        """AerSimulator, created (and Qiskit imported) on first use"""
+        if self._simulator is None:
+            from qiskit_aer import AerSimulator
+            self._simulator = AerSimulator()
+        return self._simulator
+    
     def _generate_quantum_bits(self, num_bits: int) -> list[int]:
         """Generate random bits using quantum measurement with classical fallback"""
         try:
+            from qiskit import QuantumCircuit
             qc = QuantumCircuit(num_bits, num_bits)
             # Apply Hadamard to all qubits to create superposition
             for i in range(num_bits):
@@ -53,8 +69,8 @@ class QuantumRNG:
             if self.quantum_failures <= self.max_failures_before_warning:
                 logger.warning(f"Quantum RNG failed (attempt {self.quantum_failures}), using classical fallback: {e}")
             
-            # Use numpy for classical fallback
-            return [int(np.random.randint(0, 2)) for _ in range(num_bits)]
+            # Classical fallback
+            return [random.getrandbits(1) for _ in range(num_bits)]
     
     def random_int(self, min_val: int, max_val: int) -> int:
         """
@@ -132,6 +148,76 @@ class QuantumRNG:
         return shuffled
 
 
+class FastRNG:
+    """
+    Classical PRNG with the QuantumRNG interface.
+    
+    Used by the headless simulator: no circuits are executed and a seed makes
+    the whole hand (shuffle and Bell-pair collapses) reproducible.
+    """
+    
+    def __init__(self, seed: Optional[int] = None):
+        self._random = random.Random(seed)
+    
+    @property
+    def bell_bit_source(self) -> Callable[[], int]:
+        return self.random_bit
+    
+    def random_bit(self) -> int:
+        return self._random.getrandbits(1)
+    
+    def random_int(self, min_val: int, max_val: int) -> int:
+        if min_val > max_val:
+            raise ValueError("min_val must be <= max_val")
+        return self._random.randint(min_val, max_val)
+    
+    def random_float(self) -> float:
+        return self._random.random()
+    
+    def random_choice(self, items: list):
+        if not items:
+            raise ValueError("Cannot choose from empty list")
+        return self._random.choice(items)
+    
+    def shuffle(self, items: list) -> list:
+        shuffled = items.copy()
+        self._random.shuffle(shuffled)
+        return shuffled
+
+
+RNG_BACKENDS = ('quantum', 'fast')
+
+# Backend used by create_rng(); decks call it once each
+_rng_backend = 'quantum'
+_seed_source: Optional[random.Random] = None
+
+
+def set_rng_backend(backend: str, seed: Optional[int] = None) -> None:
+    """
+    Select the generator returned by create_rng().
+    
+    Args:
+        backend: 'quantum' (QuantumRNG, default) or 'fast' (FastRNG)
+        seed: With 'fast', seeds the sequence of generators handed out
+    """
+    global _rng_backend, _seed_source
+    if backend not in RNG_BACKENDS:
+        raise ValueError(f"Unknown RNG backend: {backend}")
+    _rng_backend = backend
+    _seed_source = random.Random(seed) if seed is not None else None
+
+
+def get_rng_backend() -> str:
+    return _rng_backend
+
+
+def create_rng():
+    """New generator for the configured backend"""
+    if _rng_backend == 'fast':
+        return FastRNG(_seed_source.getrandbits(64) if _seed_source is not None else None)
+    return QuantumRNG()
+
+
 # Global quantum RNG instance
 _qrng_instance: Optional[QuantumRNG] = None
 
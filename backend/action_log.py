@@ -0,0 +1,458 @@
+"""
+Action Log for Quantum Mus
+Event-sourced per-game log of accepted mutations, with periodic snapshots
+
+Every QuantumMusGame method that mutates the game (deal, discard, player
+action, declaration, collapse triggers...) is a command decorated with
+@logged. While an ActionLog is attached (game.action_log), each command that
+changed the game is appended as one event, with the random outputs it
+consumed and whether it raised, so replaying the command reproduces it
+exactly (a replay that raises differently is an error). Derived events
+(collapse records, score awards, the end of the game) are kept for audit and
+skipped on replay. State written directly by the server between commands
+(turn changes, phases...) is logged before the next command as a 'state'
+event holding only the fields that changed (state_delta.diff).
+
+Events are queued in memory and written to disk by a background flusher, so
+logging adds an append per command to handle_player_action. The first
+snapshot is taken when the log is opened; after that, a full snapshot is due
+every snapshot_every events and the flusher takes it, holding the log's lock
+(commands hold it too) so the snapshot falls between two commands.
+restore_game() rebuilds a game from the latest snapshot plus the tail of the
+log.
+
+Log file (<room_id>.log; opening a new game's log rotates an old one to
+<room_id>.log.1): one JSON array per line, [seq, kind, payload]
+- command:  [seq, 'action', [args, kwargs, random_outputs, raised]] (raised: exception name or null)
+- derived:  [seq, 'collapse', collapse_event] / [seq, 'score', {team: points}] / [seq, 'end', {}]
+- state:    [seq, 'state', [[path, value], [path], ...]] (state_delta changes)
+- snapshot: [seq, 'snapshot', base64 game_snapshot] (game after event seq)
+"""
+
+import base64
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Logica_cuantica.estado_cuantico import OsEntropyBits
+from Logica_cuantica.quantum_random import create_rng
+from state_delta import apply_delta, diff
+
+logger = logging.getLogger(__name__)
+
+# Events between two full snapshots
+DEFAULT_SNAPSHOT_EVERY = 64
+# Seconds between background flushes of the queued events
+DEFAULT_FLUSH_INTERVAL = 0.25
+
+DERIVED_KINDS = ('collapse', 'score', 'end')
+
+# Event kind -> QuantumMusGame method name (filled by @logged)
+COMMANDS: Dict[str, str] = {}
+
+
+class ActionLogError(Exception):
+    """A log cannot be restored or replayed"""
+
+
+# ==================== RANDOMNESS ====================
+
+class RecordableRNG:
+    """
+    QuantumRNG-interface wrapper shared by all decks of a game.
+
+    Records every output while tape is a list, and returns outputs from
+    replay (a deque) instead of the wrapped generator while replaying.
+    """
+
+    def __init__(self, inner=None):
+        self.inner = inner if inner is not None else create_rng()
+        self._bits = self.inner.bell_bit_source or OsEntropyBits()
+        self.tape: Optional[List] = None
+        self.replay: Optional[deque] = None
+        self.exhausted = False
+
+    def _output(self, generate):
+        if self.replay is not None:
+            if not self.replay:
+                self.exhausted = True
+                raise ActionLogError("Replay needs more random outputs than were recorded")
+            return self.replay.popleft()
+        value = generate()
+        if self.tape is not None:
+            self.tape.append(value)
+        return value
+
+    @property
+    def bell_bit_source(self):
+        return self.random_bit
+
+    def random_bit(self) -> int:
+        return self._output(lambda: self._bits() & 1)
+
+    def random_int(self, min_val: int, max_val: int) -> int:
+        return self._output(lambda: self.inner.random_int(min_val, max_val))
+
+    def random_float(self) -> float:
+        return self._output(self.inner.random_float)
+
+    def random_choice(self, items: list):
+        return items[self.random_int(0, len(items) - 1)] if items else self.inner.random_choice(items)
+
+    def shuffle(self, items: list) -> list:
+        order = self._output(lambda: self.inner.shuffle(list(range(len(items)))))
+        return [items[index] for index in order]
+
+
+# ==================== COMMANDS ====================
+
+def logged(kind: str):
+    """Mark a QuantumMusGame method as a logged command"""
+    def decorator(method):
+        COMMANDS[kind] = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(game, *args, **kwargs):
+            log = game.action_log
+            if log is None:
+                return method(game, *args, **kwargs)
+            return log.run(kind, method, args, kwargs)
+        return wrapper
+    return decorator
+
+
+class ActionLog:
+    """Event log of one game; attaches itself as game.action_log"""
+
+    def __init__(self, game, writer, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY, seq: int = 0):
+        self.game = game
+        self.writer = writer
+        self.snapshot_every = snapshot_every
+        self.seq = seq
+        self._since_snapshot = 0
+        self._version = game.state.version
+        self._state = _json_state(game)  # State as of the last event
+        self._depth = 0
+        self._notes: Optional[List[Tuple[str, object]]] = None
+        self.lock = threading.RLock()  # Held by commands and snapshots
+        game.action_log = self
+        self.take_snapshot()
+
+    def run(self, kind: str, method, args: tuple, kwargs: dict):
+        """Execute a command and log it if it changed the game"""
+        game = self.game
+        if self._depth:
+            return method(game, *args, **kwargs)  # Nested command: part of the outer one
+
+        with self.lock:
+            self.sync()
+            rng = game.rng
+            version = game.state.version
+            scores = {name: team.score for name, team in game.state.teams.items()}
+            rng.tape = tape = []
+            self._notes = notes = []
+            self._depth = 1
+            raised = None
+            try:
+                return method(game, *args, **kwargs)
+            except Exception as e:
+                raised = type(e).__name__
+                raise
+            finally:
+                self._depth = 0
+                rng.tape = None
+                self._notes = None
+                if game.state.version != version:
+                    self._append(kind, [list(args), kwargs, tape, raised])
+                    for note in notes:
+                        self._append(*note)
+                    awarded = {name: team.score - scores.get(name, 0)
+                               for name, team in game.state.teams.items()
+                               if team.score != scores.get(name, 0)}
+                    if awarded:
+                        self._append('score', awarded)
+                    self._version = game.state.version
+                    self._state = _json_state(game)
+                    if self._since_snapshot >= self.snapshot_every:
+                        self.snapshot()
+
+    def note(self, kind: str, payload) -> None:
+        """Derived event (e.g. a collapse record); logged after its command"""
+        if self._notes is not None:
+            self._notes.append((kind, payload))
+        else:
+            self._append(kind, payload)
+
+    def sync(self) -> None:
+        """Log the state fields written outside any command since the last event"""
+        if self.game.state.version != self._version:
+            state = _json_state(self.game)
+            changes = diff(self._state, state)
+            if changes:
+                self._append('state', changes)
+            self._state = state
+            self._version = self.game.state.version
+
+    def snapshot(self) -> None:
+        """Snapshot due: the writer's flusher takes it (writers without one take it now)"""
+        request = getattr(self.writer, 'request_snapshot', None)
+        if request is None:
+            self.take_snapshot()
+        else:
+            request(self)
+
+    def take_snapshot(self) -> None:
+        from game_snapshot import dump_game  # game_snapshot imports game_logic, which imports this module
+        with self.lock:
+            self.sync()
+            self.writer.write((self.seq, 'snapshot', dump_game(self.game)))
+            self._since_snapshot = 0
+
+    def close(self, ended: bool = False) -> None:
+        """Detach the log; ended marks the game as finished (not recovered at startup)"""
+        with self.lock:
+            self.sync()
+            if ended:
+                self._append('end', {})
+            if self.game.action_log is self:
+                self.game.action_log = None
+        self.writer.close()
+
+    def _append(self, kind: str, payload) -> None:
+        self.seq += 1
+        self._since_snapshot += 1
+        self.writer.write((self.seq, kind, payload))
+
+
+def _json_state(game) -> Dict:
+    """The game's state as it is logged (JSON types, string keys)"""
+    return json.loads(json.dumps(game.state.to_dict()))
+
+
+# ==================== WRITER ====================
+
+def encode_record(record: Tuple[int, str, object]) -> str:
+    seq, kind, payload = record
+    if kind == 'snapshot':
+        payload = base64.b64encode(payload).decode('ascii')
+    return json.dumps([seq, kind, payload], separators=(',', ':')) + '\n'  # Raises on non-JSON payloads
+
+
+def decode_record(line: str) -> Tuple[int, str, object]:
+    seq, kind, payload = json.loads(line)
+    if kind == 'snapshot':
+        payload = base64.b64decode(payload)
+    return seq, kind, payload
+
+
+class _Flusher:
+    """Single background thread that writes the queued events of every open log"""
+
+    def __init__(self, interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.interval = interval
+        self._writers = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, writer) -> None:
+        with self._lock:
+            self._writers.add(writer)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='action-log-flusher', daemon=True)
+                self._thread.start()
+
+    def remove(self, writer) -> None:
+        with self._lock:
+            self._writers.discard(writer)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                writers = list(self._writers)
+            for writer in writers:
+                try:
+                    writer.flush()
+                except Exception as e:
+                    logger.error(f"Action log flush failed for {writer.path}: {e}")
+
+
+_flusher = _Flusher()
+
+
+class BufferedLogWriter:
+    """
+    Appends records to a log file. write() only queues the record; encoding,
+    due snapshots and file I/O happen in the background flusher (or on
+    flush()/close()).
+
+    Args:
+        append: Continue an existing log (recovery); otherwise an existing
+            file is rotated to <path>.1 and a new log started
+    """
+
+    def __init__(self, path: str, append: bool = True):
+        self.path = path
+        self._pending = deque()
+        self._snapshot_due: Optional[ActionLog] = None
+        self._flush_lock = threading.Lock()
+        if not append and os.path.exists(path):
+            os.replace(path, path + '.1')
+        self._file = open(path, 'a', encoding='utf-8')
+        if self._file.tell() > 0:
+            self._file.write('\n')  # Terminate a record truncated by a crash
+        _flusher.add(self)
+
+    def write(self, record: Tuple[int, str, object]) -> None:
+        self._pending.append(record)
+
+    def request_snapshot(self, log: ActionLog) -> None:
+        self._snapshot_due = log
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            if self._file.closed:
+                return
+            log, self._snapshot_due = self._snapshot_due, None
+            if log is not None:
+                log.take_snapshot()
+            lines = []
+            while self._pending:
+                lines.append(encode_record(self._pending.popleft()))
+            if lines:
+                self._file.write(''.join(lines))
+                self._file.flush()
+
+    def close(self) -> None:
+        _flusher.remove(self)
+        self.flush()
+        self._file.close()
+
+
+def open_log(game, log_dir: str, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY, seq: int = 0) -> ActionLog:
+    """
+    Attach a buffered file log (<log_dir>/<room_id>.log) to a game.
+
+    A new game (seq 0) starts a new log; a recovered one (seq of its last
+    event) appends to its log.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    writer = BufferedLogWriter(log_path(log_dir, game.room_id), append=seq > 0)
+    return ActionLog(game, writer, snapshot_every, seq)
+
+
+def log_path(log_dir: str, room_id: str) -> str:
+    return os.path.join(log_dir, f'{room_id}.log')
+
+
+def unfinished_logs(log_dir: str) -> List[str]:
+    """Room ids of the logs in log_dir whose game did not end (their last record is not 'end')"""
+    room_ids = []
+    for name in sorted(os.listdir(log_dir)):
+        if not name.endswith('.log'):
+            continue
+        with open(os.path.join(log_dir, name), 'rb') as log_file:
+            log_file.seek(max(0, os.path.getsize(log_file.name) - 256))
+            tail = log_file.read().decode('utf-8', 'replace').rstrip().rsplit('\n', 1)[-1]
+        if ',"end",' not in tail:
+            room_ids.append(name[:-len('.log')])
+    return room_ids
+
+
+# ==================== RESTORE / REPLAY ====================
+
+def read_log(path: str) -> Iterator[Tuple[int, str, object]]:
+    """Records of a log file, in order (truncated records from a crash are skipped)"""
+    with open(path, encoding='utf-8') as log_file:
+        for line in log_file:
+            try:
+                yield decode_record(line)
+            except ValueError:
+                logger.warning(f"Ignoring truncated record in {path}: {line[:40]!r}")
+
+
+def _seat_keys(value):
+    """Undo JSON's string keys for seat-indexed dicts ({'0': x} -> {0: x})"""
+    if isinstance(value, dict):
+        return {(int(key) if isinstance(key, str) and key.isdigit() else key): _seat_keys(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_seat_keys(item) for item in value]
+    return value
+
+
+def apply_event(game, kind: str, payload) -> None:
+    """Replay one non-snapshot event on a game"""
+    if kind == 'state':
+        state = apply_delta(json.loads(json.dumps(game.state.to_dict())), payload)
+        for name in {change[0][0] for change in payload}:
+            game.state[name] = _seat_keys(state[name])
+        return
+    if kind in DERIVED_KINDS:
+        return
+    method_name = COMMANDS.get(kind)
+    if method_name is None:
+        raise ActionLogError(f"Unknown event kind: {kind}")
+
+    args, kwargs, outputs, raised = payload
+    rng = game.rng
+    rng.replay = deque(outputs)
+    rng.exhausted = False
+    replayed = None
+    try:
+        getattr(game, method_name)(*args, **kwargs)
+    except ActionLogError:
+        raise
+    except Exception as e:
+        replayed = type(e).__name__
+        logger.debug(f"Replayed {kind} raised {e!r}")
+    finally:
+        leftover = len(rng.replay)
+        rng.replay = None
+    if rng.exhausted or leftover:
+        raise ActionLogError(f"Replay of {kind} diverged from the recorded random outputs")
+    if replayed != raised:
+        raise ActionLogError(f"Replay of {kind} raised {replayed or 'nothing'}, "
+                             f"the original command raised {raised or 'nothing'}")
+
+
+def find_snapshot(records: List[Tuple[int, str, object]], upto: Optional[int] = None,
+                  first: bool = False) -> int:
+    """Index of the latest (or first) snapshot record at or before event upto"""
+    base = None
+    for index, (seq, kind, _) in enumerate(records):
+        if kind == 'snapshot' and (upto is None or seq <= upto):
+            base = index
+            if first:
+                break
+    if base is None:
+        raise ActionLogError("Log has no snapshot to restore from")
+    return base
+
+
+def restore_game(records: Iterable[Tuple[int, str, object]], upto: Optional[int] = None):
+    """
+    Rebuild a game from log records: latest snapshot (at or before upto)
+    plus the events after it.
+
+    Returns:
+        (game, seq of the last applied event)
+    """
+    from game_snapshot import load_game
+    records = list(records)
+    base = find_snapshot(records, upto)
+    last_seq, _, blob = records[base]
+    game = load_game(blob)
+    for seq, kind, payload in records[base + 1:]:
+        if upto is not None and seq > upto:
+            break
+        if kind == 'snapshot' or seq <= last_seq:
+            continue
+        apply_event(game, kind, payload)
+        last_seq = seq
+    return game, last_seq
@@ -0,0 +1,62 @@
+"""
+Card Rules for Quantum Mus
+Card values, ranks and points shared by the engine and the batch evaluator
+
+Pure Python (no NumPy) so the game engine imports quickly; hand_evaluator
+builds its NumPy lookup tables from these.
+
+Card values are the Logica_cuantica ones: 1 (As), 2, 3, 4, 5, 6, 7,
+10 (Sota), 11 (Caballo), 12 (Rey). In mode '8', 3 counts as Rey and 2 as
+As for GRANDE/CHICA/PARES, and their juego points follow (3 = 10, 2 = 1).
+"""
+
+from numbers import Integral
+
+PARES_NONE, PARES_PAR, PARES_MEDIAS, PARES_DUPLES = 0, 1, 2, 3
+PARES_CLASSES = ('none', 'par', 'medias', 'duples')
+
+CARD_VALUES = (1, 2, 3, 4, 5, 6, 7, 10, 11, 12)
+LETTER_VALUES = {'A': 1, 'J': 10, 'Q': 11, 'K': 12}
+GAME_MODES = ('4', '8')
+
+
+def _build_tables(game_mode: str):
+    """Rank (higher is better) and juego points, indexed by card value (0-12)"""
+    rank = [0] * 13
+    points = [0] * 13
+    for order, value in enumerate(CARD_VALUES):
+        rank[value] = order
+        points[value] = min(value, 10)
+    if game_mode == '8':
+        rank[2] = rank[1]
+        rank[3] = rank[12]
+        points[2] = 1
+        points[3] = 10
+    return tuple(rank), tuple(points)
+
+
+_TABLES = {mode: _build_tables(mode) for mode in GAME_MODES}
+CARD_RANKS = {mode: tables[0] for mode, tables in _TABLES.items()}
+CARD_POINTS = {mode: tables[1] for mode, tables in _TABLES.items()}
+
+# Juego sums from worst to best; a sum's rank is its position + 1 (0 = no juego)
+JUEGO_ORDER = (33, 34, 35, 36, 37, 40, 32, 31)
+
+
+def card_value(card) -> int:
+    """Value of a card object (its collapsed value once collapsed), card dict, int or letter"""
+    if card is None:
+        return 0
+    if isinstance(card, dict):
+        card = card.get('value', card.get('valor'))
+    elif not isinstance(card, (int, str, Integral)):  # Integral covers NumPy ints
+        if getattr(card, 'is_collapsed', False) and getattr(card, 'collapsed_value', None) is not None:
+            card = card.collapsed_value
+        else:
+            card = getattr(card, 'valor', getattr(card, 'value', None))
+    if isinstance(card, str):
+        card = LETTER_VALUES.get(card, card)
+    value = int(card)
+    if value not in CARD_VALUES:
+        raise ValueError(f"Invalid card value: {card}")
+    return value
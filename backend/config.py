@@ -29,6 +29,14 @@ class Config:
     DISCARD_TIMEOUT = 10  # seconds
     TURN_TIMEOUT = 10  # seconds
 
+    # Inbound limits: token buckets (events/s, burst) per socket and per room
+    SOCKET_RATE = 10
+    SOCKET_BURST = 20
+    ROOM_RATE = 30
+    ROOM_BURST = 60
+    ROOM_QUEUE_LIMIT = 32  # Handler jobs waiting per room
+    LOBBY_CACHE_SECONDS = 2  # Cache-Control max-age of GET /api/rooms
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
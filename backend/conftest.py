@@ -0,0 +1,17 @@
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+from entanglement_analytics import get_analytics
+
+
+@pytest.fixture(autouse=True)
+def retire_analytics_rooms():
+    """Games built directly by a test never reach GameManager.remove_game: retire their rooms"""
+    analytics = get_analytics()
+    before = set(analytics._rooms)
+    yield
+    for room_id in set(analytics._rooms) - before:
+        analytics.retire(room_id)
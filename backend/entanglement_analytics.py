@@ -0,0 +1,205 @@
+"""
+Entanglement Analytics for Quantum Mus
+Aggregates entanglement and collapse events across every game
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between merges of the per-room counters into the global totals
+DEFAULT_MERGE_INTERVAL = 10.0
+
+
+class RoomCounters:
+    """
+    Counters for a single room.
+
+    Only the room's own game writes to them, so recording an event is a
+    plain counter increment with no lock. The aggregator only reads them
+    when it merges.
+    """
+
+    __slots__ = ('hands', 'pairs_dealt', 'pairs_materialized', 'activations',
+                 'collapse_triggers', 'collapsed_cards', 'collapsed_values',
+                 'declarations', 'penalties', 'penalty_points')
+
+    def __init__(self):
+        self.hands = 0
+        self.pairs_dealt = 0
+        self.pairs_materialized = 0
+        self.activations = Counter()        # pair_id -> activations
+        self.collapse_triggers = Counter()  # trigger_type -> collapse events
+        self.collapsed_cards = Counter()    # trigger_type -> collapsed cards
+        self.collapsed_values = Counter()   # collapsed value -> count
+        self.declarations = Counter()       # round_name -> declarations
+        self.penalties = Counter()          # round_name -> penalized declarations
+        self.penalty_points = Counter()     # round_name -> points deducted
+
+    # -------------------------
+    # Recording (called by the game)
+    # -------------------------
+    def record_hand(self, num_pairs: int) -> None:
+        self.hands += 1
+        self.pairs_dealt += num_pairs
+
+    def record_bell_pairs(self, stats: Dict[str, int]) -> None:
+        """Materialized Bell pairs of a finished hand (QuantumDeck.get_entanglement_stats)"""
+        self.pairs_materialized += stats.get('materialized', 0)
+
+    def record_activation(self, pair_id: str) -> None:
+        self.activations[pair_id] += 1
+
+    def record_collapse(self, event) -> None:
+        """Record a quantum_collapse.CollapseEvent"""
+        self.collapse_triggers[event.trigger_type] += 1
+        self.collapsed_cards[event.trigger_type] += len(event.collapsed_cards)
+        for _, _, _, new_value in event.collapsed_cards:
+            self.collapsed_values[str(new_value)] += 1
+
+    def record_declaration(self, round_name: str, penalty_points: int) -> None:
+        self.declarations[round_name] += 1
+        if penalty_points:
+            self.penalties[round_name] += 1
+            self.penalty_points[round_name] += abs(penalty_points)
+
+    # -------------------------
+    # Merging (called by the aggregator)
+    # -------------------------
+    def merge_into(self, totals: 'RoomCounters') -> None:
+        totals.hands += self.hands
+        totals.pairs_dealt += self.pairs_dealt
+        totals.pairs_materialized += self.pairs_materialized
+        for name in ('activations', 'collapse_triggers', 'collapsed_cards', 'collapsed_values',
+                     'declarations', 'penalties', 'penalty_points'):
+            getattr(totals, name).update(_copy_counter(getattr(self, name)))
+
+
+def _copy_counter(counter: Counter) -> Dict:
+    """Copy a counter that its room may be updating concurrently"""
+    while True:
+        try:
+            return dict(counter)
+        except RuntimeError:
+            # A new key was added while copying (threading async mode); retry
+            continue
+
+
+class EntanglementAnalytics:
+    """
+    Streaming aggregator over every game's RoomCounters.
+
+    Games write to their own RoomCounters without locking. Totals are merged
+    from all rooms at most every merge_interval seconds when read; counters
+    of removed games are folded into a retired total so nothing is lost.
+    """
+
+    def __init__(self, merge_interval: float = DEFAULT_MERGE_INTERVAL):
+        self.merge_interval = merge_interval
+        self._rooms: Dict[str, RoomCounters] = {}
+        self._retired = RoomCounters()
+        self._merge_lock = threading.Lock()  # Only taken by merge/retire, never by games
+        self._snapshot: Optional[Dict] = None
+        self._merged_at = 0.0
+
+    def room(self, room_id: str) -> RoomCounters:
+        """Counters for a room (created on first use)"""
+        counters = self._rooms.get(room_id)
+        if counters is None:
+            counters = self._rooms.setdefault(room_id, RoomCounters())
+        return counters
+
+    def retire(self, room_id: str) -> None:
+        """Fold a removed game's counters into the retired totals"""
+        with self._merge_lock:
+            counters = self._rooms.pop(room_id, None)
+            if counters is not None:
+                counters.merge_into(self._retired)
+
+    def merge(self) -> Dict:
+        """Merge all room counters now and return the new snapshot"""
+        with self._merge_lock:
+            totals, active_rooms = self._totals()
+            self._merged_at = time.time()
+            self._snapshot = self._build_snapshot(totals, active_rooms)
+            return self._snapshot
+
+    def _totals(self) -> Tuple[RoomCounters, int]:
+        totals = RoomCounters()
+        self._retired.merge_into(totals)
+        rooms = list(self._rooms.values())
+        for counters in rooms:
+            counters.merge_into(totals)
+        return totals, len(rooms)
+
+    def totals(self) -> Tuple[RoomCounters, int]:
+        """Merged counters and active room count, to combine across processes"""
+        with self._merge_lock:
+            return self._totals()
+
+    def combine(self, parts: List[Tuple[RoomCounters, int]]) -> Dict:
+        """Snapshot of several processes' totals() (room shard workers)"""
+        totals = RoomCounters()
+        for counters, _ in parts:
+            counters.merge_into(totals)
+        self._merged_at = time.time()
+        return self._build_snapshot(totals, sum(active_rooms for _, active_rooms in parts))
+
+    def snapshot(self, force: bool = False) -> Dict:
+        """Latest merged totals, re-merged if older than merge_interval"""
+        if force or self._snapshot is None or time.time() - self._merged_at >= self.merge_interval:
+            return self.merge()
+        return self._snapshot
+
+    def _build_snapshot(self, totals: RoomCounters, active_rooms: int) -> Dict:
+        activations = sum(totals.activations.values())
+        declarations = sum(totals.declarations.values())
+        penalties = sum(totals.penalties.values())
+        return {
+            'merged_at': self._merged_at,
+            'merge_interval': self.merge_interval,
+            'active_rooms': active_rooms,
+            'hands': totals.hands,
+            'pairs': {
+                'dealt': totals.pairs_dealt,
+                'activated': activations,
+                'activation_rate': activations / totals.pairs_dealt if totals.pairs_dealt else 0.0,
+                'materialized': totals.pairs_materialized,
+                'by_pair': dict(totals.activations),
+            },
+            'collapses': {
+                'by_trigger': dict(totals.collapse_triggers),
+                'cards_by_trigger': dict(totals.collapsed_cards),
+                'value_distribution': dict(totals.collapsed_values),
+            },
+            'declarations': {
+                'total': declarations,
+                'penalized': penalties,
+                'penalty_frequency': penalties / declarations if declarations else 0.0,
+                'by_round': {
+                    round_name: {
+                        'declarations': count,
+                        'penalized': totals.penalties[round_name],
+                        'penalty_frequency': totals.penalties[round_name] / count,
+                        'points_deducted': totals.penalty_points[round_name],
+                    }
+                    for round_name, count in totals.declarations.items() if count
+                },
+            },
+        }
+
+
+# Global analytics shared by every game in this process
+_analytics: Optional[EntanglementAnalytics] = None
+
+
+def get_analytics() -> EntanglementAnalytics:
+    """Get or create the global analytics aggregator"""
+    global _analytics
+    if _analytics is None:
+        _analytics = EntanglementAnalytics()
+    return _analytics
@@ -4,10 +4,67 @@ Manages entangled card pairs between teammates
 """
 
 import logging
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+SUITS = (('Oro', 'oros'), ('Copa', 'copas'), ('Espada', 'espadas'), ('Basto', 'bastos'))
+
+
+class PairSpec(NamedTuple):
+    """Immutable description of one entangled pair (shared by every game)"""
+    id: str
+    card1: Tuple[str, str]  # (value, suit)
+    card2: Tuple[str, str]
+    players: Tuple[Optional[int], Optional[int]]
+    team: Optional[int]
+
+
+class EntanglementTopology:
+    """
+    Fixed pair layout for a game mode. Built once per mode and shared:
+    games only keep a small per-pair state list on top of it.
+    """
+
+    __slots__ = ('game_mode', 'pairs', 'card_to_index', 'card_to_pair', 'pair_index')
+
+    def __init__(self, game_mode: str):
+        pairs = []
+        # ===== REY ↔ AS - Siempre entrelazados en todos los palos =====
+        for suit_spanish, suit_english in SUITS:
+            pairs.append(PairSpec(f'pair_rey_as_{suit_english}', ('K', suit_english),
+                                  ('A', suit_english), (None, None), None))
+        # ===== DOS ↔ TRES - Entrelazados en modo 8 solamente =====
+        if game_mode == '8':
+            for suit_spanish, suit_english in SUITS:
+                pairs.append(PairSpec(f'pair_dos_tres_{suit_english}', ('2', suit_english),
+                                      ('3', suit_english), (None, None), None))
+
+        card_to_index = {}
+        for index, spec in enumerate(pairs):
+            card_to_index[spec.card1] = index
+            card_to_index[spec.card2] = index
+
+        self.game_mode = game_mode
+        self.pairs: Tuple[PairSpec, ...] = tuple(pairs)
+        self.card_to_index: Mapping[tuple, int] = MappingProxyType(card_to_index)
+        self.card_to_pair: Mapping[tuple, str] = MappingProxyType(
+            {card: pairs[index].id for card, index in card_to_index.items()})
+        self.pair_index: Mapping[str, int] = MappingProxyType(
+            {spec.id: index for index, spec in enumerate(pairs)})
+
+
+_TOPOLOGIES: Dict[str, EntanglementTopology] = {}
+
+
+def get_topology(game_mode: str) -> EntanglementTopology:
+    """Shared topology for a game mode (created on first use)"""
+    topology = _TOPOLOGIES.get(game_mode)
+    if topology is None:
+        topology = _TOPOLOGIES.setdefault(game_mode, EntanglementTopology(game_mode))
+    return topology
+
 
 class EntangledPair:
     """Represents a pair of entangled cards"""
@@ -50,6 +107,16 @@ class EntangledPair:
             'activated_card': self.activated_card
         }
 
+    @classmethod
+    def from_spec(cls, spec: PairSpec, activation: Optional[Tuple[int, int]]) -> 'EntangledPair':
+        """Snapshot of a shared pair combined with one game's activation state"""
+        pair = cls(spec.id, spec.card1[0], spec.card1[1], spec.card2[0], spec.card2[1],
+                   spec.players[0], spec.players[1], spec.team)
+        if activation is not None:
+            pair.state = 'collapsed'
+            pair.activated_by, pair.activated_card = activation
+        return pair
+
 
 class EntanglementSystem:
     """Manages quantum entanglement for the game"""
@@ -58,87 +125,62 @@ class EntanglementSystem:
         """
         Initialize the entanglement system
         
+        ENTRELAZAMIENTO CORRECTO:
+        - Rey (K/12) ↔ As (A/1) del MISMO palo
+        - Dos (2) ↔ Tres (3) del MISMO palo (solo en modo 8)
+        
+        La topología de pares es compartida por modo; cada partida sólo
+        guarda una lista con la activación de cada par: None mientras está
+        en superposición, (activated_by, activated_card) al colapsar.
+        
         Args:
             game_mode: '4' for 4 Kings (classic) or '8' for 8 Kings (advanced)
         """
         self.game_mode = game_mode
-        self.entangled_pairs: Dict[str, EntangledPair] = {}
-        self.card_to_pair: Dict[tuple, str] = {}  # Maps (value, suit) to pair_id
-        self._initialize_entangled_pairs()
+        self.topology = get_topology(game_mode)
+        self.card_to_pair = self.topology.card_to_pair  # Read-only (value, suit) -> pair_id
+        self._activations: List[Optional[Tuple[int, int]]] = [None] * len(self.topology.pairs)
         
         logger.info(f"Initialized entanglement system with mode {game_mode}")
     
-    def _initialize_entangled_pairs(self):
-        """
-        Set up entangled pairs based on game mode.
-        
-        ENTRELAZAMIENTO CORRECTO:
-        - Rey (K/12) ↔ As (A/1) del MISMO palo
-        - Dos (2) ↔ Tres (3) del MISMO palo (solo en modo 8)
-        
-        Cada palo tiene su propio par entrelazado.
-        """
-        pair_counter = 0
-        
-        # ===== REY ↔ AS - Siempre entrelazados en todos los palos =====
-        for suit_spanish, suit_english in [('Oro', 'oros'), ('Copa', 'copas'), 
-                                            ('Espada', 'espadas'), ('Basto', 'bastos')]:
-            pair_id = f'pair_rey_as_{suit_english}'
-            pair = EntangledPair(
-                pair_id, 
-                'K', suit_english,  # Rey
-                'A', suit_english,  # As
-                None, None, None    # No team assignment (same suit entanglement)
-            )
-            self.entangled_pairs[pair_id] = pair
-            self.card_to_pair[('K', suit_english)] = pair_id
-            self.card_to_pair[('A', suit_english)] = pair_id
-            pair_counter += 1
-        
-        # ===== DOS ↔ TRES - Entrelazados en modo 8 solamente =====
-        if self.game_mode == '8':
-            for suit_spanish, suit_english in [('Oro', 'oros'), ('Copa', 'copas'), 
-                                                ('Espada', 'espadas'), ('Basto', 'bastos')]:
-                pair_id = f'pair_dos_tres_{suit_english}'
-                pair = EntangledPair(
-                    pair_id,
-                    '2', suit_english,  # Dos
-                    '3', suit_english,  # Tres
-                    None, None, None    # No team assignment (same suit entanglement)
-                )
-                self.entangled_pairs[pair_id] = pair
-                self.card_to_pair[('2', suit_english)] = pair_id
-                self.card_to_pair[('3', suit_english)] = pair_id
-                pair_counter += 1
+    @property
+    def entangled_pairs(self) -> Dict[str, EntangledPair]:
+        """Snapshot of every pair with this game's state"""
+        return {
+            spec.id: EntangledPair.from_spec(spec, activation)
+            for spec, activation in zip(self.topology.pairs, self._activations)
+        }
     
     def is_card_entangled(self, value: str, suit: str) -> bool:
         """Check if a card is part of an entangled pair"""
-        return (value, suit) in self.card_to_pair
+        return (value, suit) in self.topology.card_to_index
     
     def get_entangled_pair_by_card(self, value: str, suit: str) -> Optional[EntangledPair]:
         """Get the entangled pair that contains this card"""
-        pair_id = self.card_to_pair.get((value, suit))
-        if pair_id:
-            return self.entangled_pairs[pair_id]
-        return None
+        index = self.topology.card_to_index.get((value, suit))
+        if index is None:
+            return None
+        return EntangledPair.from_spec(self.topology.pairs[index], self._activations[index])
     
     def get_partner_card(self, value: str, suit: str) -> Optional[Dict]:
         """Get the partner card of an entangled pair"""
-        pair = self.get_entangled_pair_by_card(value, suit)
-        if pair:
-            # Check which card this is and return the other
-            if pair.card1['value'] == value and pair.card1['suit'] == suit:
-                return pair.card2
-            else:
-                return pair.card1
-        return None
+        index = self.topology.card_to_index.get((value, suit))
+        if index is None:
+            return None
+        spec = self.topology.pairs[index]
+        # Check which card this is and return the other
+        partner = spec.card2 if spec.card1 == (value, suit) else spec.card1
+        return {'value': partner[0], 'suit': partner[1]}
     
     def get_partner_player(self, player_idx: int, value: str, suit: str) -> Optional[int]:
         """Get the teammate of a player when they play an entangled card"""
-        pair = self.get_entangled_pair_by_card(value, suit)
-        if pair and player_idx in pair.players:
+        index = self.topology.card_to_index.get((value, suit))
+        if index is None:
+            return None
+        players = self.topology.pairs[index].players
+        if player_idx in players:
             # Return the other player in the pair
-            return pair.players[1] if pair.players[0] == player_idx else pair.players[0]
+            return players[1] if players[0] == player_idx else players[0]
         return None
     
     def activate_entanglement(self, value: str, suit: str, player_idx: int) -> Optional[Dict]:
@@ -148,36 +190,28 @@ class EntanglementSystem:
         Returns:
             Dictionary with entanglement data or None if not entangled
         """
-        pair = self.get_entangled_pair_by_card(value, suit)
-        if not pair:
+        index = self.topology.card_to_index.get((value, suit))
+        if index is None:
             return None
+        spec = self.topology.pairs[index]
         
         # Mark the pair as activated
-        pair.state = 'collapsed'
-        pair.activated_by = player_idx
-        pair.activated_card = 1 if (pair.card1['value'] == value and pair.card1['suit'] == suit) else 2
-        
-        # Get partner info
-        partner_card = self.get_partner_card(value, suit)
-        partner_player = self.get_partner_player(player_idx, value, suit)
+        self._activations[index] = (player_idx, 1 if spec.card1 == (value, suit) else 2)
         
         return {
-            'pair_id': pair.id,
+            'pair_id': spec.id,
             'activated_by_player': player_idx,
             'card_played': {'value': value, 'suit': suit},
-            'partner_card': partner_card,
-            'partner_player': partner_player,
-            'team': pair.team,
+            'partner_card': self.get_partner_card(value, suit),
+            'partner_player': self.get_partner_player(player_idx, value, suit),
+            'team': spec.team,
             'effect': 'quantum_sync',
             'animation': 'particle_beam'
         }
     
     def reset_pair_states(self):
         """Reset all pairs to superposition at the start of a new hand"""
-        for pair in self.entangled_pairs.values():
-            pair.state = 'superposition'
-            pair.activated_by = None
-            pair.activated_card = None
+        self._activations = [None] * len(self.topology.pairs)
     
     def get_all_pairs(self) -> List[Dict]:
         """Get all entangled pairs as dictionaries"""
@@ -186,26 +220,23 @@ class EntanglementSystem:
     def get_pairs_for_player(self, player_idx: int) -> List[Dict]:
         """Get all entangled pairs involving a specific player"""
         return [
-            pair.to_dict() 
-            for pair in self.entangled_pairs.values() 
-            if player_idx in pair.players
+            EntangledPair.from_spec(spec, activation).to_dict()
+            for spec, activation in zip(self.topology.pairs, self._activations)
+            if player_idx in spec.players
         ]
     
     def get_pairs_for_team(self, team: int) -> List[Dict]:
         """Get all entangled pairs for a specific team"""
         return [
-            pair.to_dict() 
-            for pair in self.entangled_pairs.values() 
-            if pair.team == team
+            EntangledPair.from_spec(spec, activation).to_dict()
+            for spec, activation in zip(self.topology.pairs, self._activations)
+            if spec.team == team
         ]
     
     def get_statistics(self) -> Dict:
         """Get statistics about entanglement usage"""
-        total_pairs = len(self.entangled_pairs)
-        activated_pairs = sum(
-            1 for pair in self.entangled_pairs.values() 
-            if pair.state == 'collapsed'
-        )
+        total_pairs = len(self._activations)
+        activated_pairs = sum(1 for activation in self._activations if activation is not None)
         
         return {
             'total_pairs': total_pairs,
@@ -2,13 +2,21 @@
 Main Game Logic - Quantum Mus Game
 """
 
+import json
 import logging
 from Logica_cuantica.baraja import QuantumDeck
 from Logica_cuantica.dealer import QuantumDealer
 from Logica_cuantica.cartas import QuantumCard
+from action_log import RecordableRNG, logged
 from round_handlers import RoundHandler
 from quantum_collapse import QuantumCollapseManager
 from entanglement_system import EntanglementSystem
+from entanglement_analytics import get_analytics
+from outcome_probabilities import get_hand_probabilities, get_outcome_probabilities
+from hand_summary import HandSummaries
+from game_state import BetState, GameState
+from state_delta import StateDeltaStream
+from wire_json import RawJSON
 
 logger = logging.getLogger(__name__)
 
@@ -95,57 +103,45 @@ class QuantumMusGame:
         logger.info(f"Player order: {[p.get('character', 'unknown') for p in self.players]}")
         
         # Game state
-        self.state = {
-            'currentRound': 'MUS',
-            'currentPhase': 'DEALING',  # DEALING -> DECLARATION -> VALIDATION -> BETTING -> RESOLUTION
-            'manoIndex': 0,
-            'activePlayerIndex': 0,
-            'declarationComplete': False,  # Flag to track when declaration phase is done
-            'teams': teams,
-            'currentBet': {
-                'amount': 0,
-                'bettingTeam': None,
-                'betType': None,
-                'responses': {}
-            },
-            'roundActions': {},
-            'musPhaseActive': True,
-            'cardsDiscarded': {},
-            'waitingForDiscard': False,
-            'allPlayersPassed': False,
-            'grandePhase': None,  # Will be initialized when Grande starts
-            'chicaPhase': None,    # For Chica betting
-            'paresPhase': None,    # For Pares betting
-            'juegoPhase': None,    # For Juego betting
-            'deferredResults': [],  # Store results for end-of-hand comparison
-            'paresDeclarations': {},  # Player declarations for PARES round
-            'juegoDeclarations': {}   # Player declarations for JUEGO round
-        }
+        # Game state (typed, slotted; state.version increases on every mutation)
+        self.state = GameState(teams=teams)
+        
+        # Randomness of every deck of this game (recorded by the action log)
+        self.rng = RecordableRNG()
+        self.action_log = None  # ActionLog while the game is being logged
         
         # Initialize deck and hands
-        self.deck = QuantumDeck(game_mode=game_mode)
+        self.deck = QuantumDeck(game_mode=game_mode, rng=self.rng)
         self.deck.shuffle()
         self.hands = {i: [] for i in range(4)}
         self.discard_pile = []
+        self.hand_summaries = HandSummaries(self)  # Cached per-seat/per-team scoring data
+        self.last_hand_result = None  # calculate_final_scores() of the last finished hand
+        self._public_state_cache = None  # (cache key, public state dict, JSON text or None)
+        self.state_stream = StateDeltaStream()  # Public states broadcast as game_update deltas
         
         # Round handler
         self.round_handler = RoundHandler(self)
         
+        # Cross-game entanglement analytics (this room's counters)
+        self.analytics = get_analytics().room(room_id)
+        self._bell_pairs_deck = None  # Deck whose Bell pairs were last recorded
+        
         # Quantum collapse manager
-        self.collapse_manager = QuantumCollapseManager(self)
+        self.collapse_manager = QuantumCollapseManager(self, analytics=self.analytics)
         
         # Entanglement system
         self.entanglement = EntanglementSystem(game_mode)
         
-        # Track entanglement events this hand
-        self.state['entanglement_events'] = []
-        
         logger.info(f"Created game {room_id} with mode {game_mode}")
     
+    @logged('deal')
     def deal_cards(self):
         """Deal 4 cards to each active player using Qiskit-based QuantumDeck"""
+        # Bell pairs materialized vs. never measured in the hand that just ended
+        self._record_bell_pairs()
         # Always reset deck to 40 cards at the start of a new hand/game
-        self.deck = QuantumDeck(game_mode=self.game_mode)
+        self.deck = QuantumDeck(game_mode=self.game_mode, rng=self.rng)
         self.deck.shuffle()
         self.discard_pile = []
         cards_needed = 4 * self.num_players
@@ -155,11 +151,12 @@ class QuantumMusGame:
                 if not self.hands[player_idx] or len(self.hands[player_idx]) != 4:
                     logger.error(f"Failed to deal 4 cards to player {player_idx}")
                     return {'success': False, 'error': f'Failed to deal cards to player {player_idx}'}
-            print(f"DEBUG: Repartiendo cartas. Manos generadas: {self.hands}")
+            logger.debug(f"Repartiendo cartas. Manos generadas: {self.hands}")
             for player_idx in range(self.num_players, 4):
                 self.hands[player_idx] = []
+            self.hands_changed()
+            self.analytics.record_hand(len(self.entanglement.topology.pairs))
             logger.info(f"[QSKIT] Dealt cards quantumly to {self.num_players} players in game {self.room_id}")
-            print(f"[QSKIT] Dealt cards quantumly to {self.num_players} players in game {self.room_id}")
             return {'success': True}
         except Exception as e:
             logger.error(f"Qiskit QuantumDeck error: {e}")
@@ -178,15 +175,21 @@ class QuantumMusGame:
             print(f"[QSKIT] Collapsed entangled cards for player {player_index}: {collapsed}")
             return collapsed
     
+    def hands_changed(self, player_index=None):
+        """Call after cards were dealt, discarded or collapsed (hands live outside the state)"""
+        self.hand_summaries.invalidate(player_index)
+        self.state.touch()
+    
+    @logged('draw')
     def deal_new_cards(self):
         """Deal new cards to replace discarded ones, using leftover deck, then discards if needed"""
-        if not self.state['waitingForDiscard']:
+        if not self.state.waitingForDiscard:
             logger.error(f"deal_new_cards called when not waiting for discard")
             return {'success': False, 'error': 'Not waiting for discard'}
 
         # Validate all active players have discarded
-        if len(self.state['cardsDiscarded']) != self.num_players:
-            logger.warning(f"deal_new_cards called with only {len(self.state['cardsDiscarded'])}/{self.num_players} players ready")
+        if len(self.state.cardsDiscarded) != self.num_players:
+            logger.warning(f"deal_new_cards called with only {len(self.state.cardsDiscarded)}/{self.num_players} players ready")
             return {'success': False, 'error': f'Not all players ready: {len(self.state["cardsDiscarded"])}' + f'/{self.num_players}'}
 
         try:
@@ -208,13 +211,14 @@ class QuantumMusGame:
                         return []
 
             # Now deal new cards, using leftover deck, then discards if needed
-            for player_idx, card_indices in self.state['cardsDiscarded'].items():
+            for player_idx, card_indices in self.state.cardsDiscarded.items():
                 num_new = len(card_indices)
                 new_cards = _draw_from_deck(num_new)
                 if not new_cards or len(new_cards) != num_new:
                     logger.error(f"Failed to deal {num_new} cards to player {player_idx}")
                     return {'success': False, 'error': f'Insufficient cards in deck after reshuffling discards'}
                 self.hands[player_idx].extend(new_cards)
+            self.hands_changed()
 
             # Validate all active players still have 4 cards
             for player_idx in range(self.num_players):
@@ -223,10 +227,10 @@ class QuantumMusGame:
                     return {'success': False, 'error': f'Card count mismatch for player {player_idx}'}
 
             # Reset discard state
-            self.state['cardsDiscarded'] = {}
-            self.state['waitingForDiscard'] = False
-            self.state['roundActions'] = {}  # Reset so MUS round starts fresh
-            self.state['activePlayerIndex'] = self.state['manoIndex']  # Restart with mano
+            self.state.cardsDiscarded = {}
+            self.state.waitingForDiscard = False
+            self.state.roundActions = {}  # Reset so MUS round starts fresh
+            self.state.activePlayerIndex = self.state.manoIndex  # Restart with mano
 
             logger.info(f"Successfully dealt new cards in game {self.room_id}")
             return {'success': True}
@@ -234,21 +238,36 @@ class QuantumMusGame:
             logger.error(f"Error dealing new cards: {e}")
             return {'success': False, 'error': str(e)}
     
+    @logged('action')
     def process_action(self, player_index, action, extra_data=None):
         """Process a player action"""
         logger.info(f"Player {player_index} action: {action}")
         
-        if self.state['currentRound'] == 'MUS':
-            return self.round_handler.handle_mus_round(player_index, action, extra_data)
+        if self.state.currentRound == 'MUS':
+            result = self.round_handler.handle_mus_round(player_index, action, extra_data)
         else:
-            return self.round_handler.handle_betting_round(player_index, action, extra_data)
+            result = self.round_handler.handle_betting_round(player_index, action, extra_data)
+        if result.get('game_ended'):
+            # No next hand will be dealt (ordago): record the last one's Bell pairs now
+            self._record_bell_pairs()
+        return result
+    
+    def _record_bell_pairs(self):
+        """Record the current deck's Bell pairs in the analytics, once per dealt deck"""
+        if self.deck.deck_index == 0 or self._bell_pairs_deck is self.deck:
+            return
+        bell_stats = self.deck.get_entanglement_stats()
+        logger.debug(f"Bell pairs for hand in game {self.room_id}: {bell_stats}")
+        self.analytics.record_bell_pairs(bell_stats)
+        self._bell_pairs_deck = self.deck
     
+    @logged('discard')
     def discard_cards(self, player_index, card_indices):
         """Handle card discard during MUS phase"""
-        if not self.state['waitingForDiscard']:
+        if not self.state.waitingForDiscard:
             return {'success': False, 'error': 'Not in discard phase'}
 
-        if player_index in self.state['cardsDiscarded']:
+        if player_index in self.state.cardsDiscarded:
             return {'success': False, 'error': 'Player already discarded'}
 
         if not isinstance(card_indices, list) or len(card_indices) > 4:
@@ -262,12 +281,13 @@ class QuantumMusGame:
         for idx in sorted(card_indices, reverse=True):
             player_discards.append(player_hand.pop(idx))
         self.discard_pile.extend(player_discards)
+        self.hands_changed(player_index)
         
         # Record discarded cards
-        self.state['cardsDiscarded'][player_index] = card_indices
+        self.state.cardsDiscarded[player_index] = card_indices
         
         # Check if all players have discarded
-        all_discarded = len(self.state['cardsDiscarded']) == self.num_players
+        all_discarded = len(self.state.cardsDiscarded) == self.num_players
         
         return {
             'success': True,
@@ -275,40 +295,70 @@ class QuantumMusGame:
         }
     
     def get_public_state(self):
-        """Get public game state (without card details)"""
-        # Sync currentBet with the appropriate phase state
-        current_round = self.state['currentRound']
+        """
+        Get public game state (without card details).
+
+        Cached per state version: a new top-level dict is returned on every
+        call, but nested values are shared with the cache and must not be
+        mutated.
+        """
+        return dict(self._public_state_entry()[1])
+    
+    def get_public_state_json(self):
+        """get_public_state() serialized, cached per state version (embed as-is in emits)"""
+        entry = self._public_state_entry()
+        if entry[2] is None:
+            entry[2] = RawJSON(json.dumps(entry[1], separators=(',', ':')))
+        return entry[2]
+    
+    def get_public_state_delta(self):
+        """Changes to the public state since the last delta (see state_delta), for game_update"""
+        return self.state_stream.update(self._public_state_entry()[1])
+    
+    def get_public_state_sync(self):
+        """Public state at the current delta version, for clients that missed an update"""
+        return self.state_stream.sync(self._public_state_entry()[1])
+    
+    def _public_state_entry(self):
+        # Hand sizes are part of the key so direct edits of self.hands are noticed too
+        key = (self.state.version, tuple(len(cards) for cards in self.hands.values()))
+        entry = self._public_state_cache
+        if entry is not None and entry[0] == key:
+            return entry
+        
+        self._sync_current_bet()
+        key = (self.state.version, key[1])
+        self._public_state_cache = entry = [key, self._build_public_state(), None]
+        return entry
+    
+    def _sync_current_bet(self):
+        """Sync currentBet with the appropriate phase state"""
+        current_round = self.state.currentRound
         phase_key = f'{current_round.lower()}Phase'
         
         if current_round in ['GRANDE', 'CHICA', 'PARES', 'JUEGO'] and self.state.get(phase_key):
             phase = self.state[phase_key]
-            # Update currentBet to reflect the phase state
-            if phase['phaseState'] in ['BET_PLACED', 'WAITING_RESPONSE']:
-                self.state['currentBet'] = {
-                    'amount': phase['currentBetAmount'],
-                    'bettingTeam': phase['attackingTeam'],
-                    'betType': phase['betType'],
-                    'responses': {}
-                }
-            elif phase['phaseState'] == 'NO_BET':
-                self.state['currentBet'] = {
-                    'amount': 0,
-                    'bettingTeam': None,
-                    'betType': None,
-                    'responses': {}
-                }
-        
+            # Update currentBet to reflect the phase state (only on change, so reads keep the version)
+            bet = None
+            if phase.phaseState in ['BET_PLACED', 'WAITING_RESPONSE']:
+                bet = BetState(amount=phase.currentBetAmount, bettingTeam=phase.attackingTeam, betType=phase.betType)
+            elif phase.phaseState == 'NO_BET':
+                bet = BetState()
+            if bet is not None and bet != self.state.currentBet:
+                self.state.currentBet = bet
+    
+    def _build_public_state(self):
         return {
             'room_id': self.room_id,
             'game_mode': self.game_mode,
             'num_players': self.num_players,
             'state': {
-                'currentRound': self.state['currentRound'],
-                'activePlayerIndex': self.state['activePlayerIndex'],
-                'manoIndex': self.state['manoIndex'],
-                'teams': self.state['teams'],
-                'currentBet': self.state['currentBet'],
-                'waitingForDiscard': self.state['waitingForDiscard']
+                'currentRound': self.state.currentRound,
+                'activePlayerIndex': self.state.activePlayerIndex,
+                'manoIndex': self.state.manoIndex,
+                'teams': {name: team.to_dict() for name, team in self.state.teams.items()},
+                'currentBet': self.state.currentBet.to_dict(),
+                'waitingForDiscard': self.state.waitingForDiscard
             },
             'players': self.players,
             'hand_sizes': {i: len(cards) for i, cards in self.hands.items()}
@@ -355,7 +405,7 @@ class QuantumMusGame:
         if not my_team:
             return {'has_entangled_pair': False, 'my_cards': [], 'pairs': []}
         
-        team_players = self.state['teams'][my_team]['players']
+        team_players = self.state.teams[my_team].players
         teammate_index = None
         for p in team_players:
             if p != player_index:
@@ -421,7 +471,7 @@ class QuantumMusGame:
     
     def get_player_team(self, player_index):
         """Get team for a player"""
-        if player_index in self.state['teams']['team1']['players']:
+        if player_index in self.state.teams['team1'].players:
             return 'team1'
         return 'team2'
     
@@ -432,66 +482,95 @@ class QuantumMusGame:
     def get_next_player_index(self, current_index=None):
         """Get next player index (counterclockwise/right in seating order)."""
         if current_index is None:
-            current_index = self.state['activePlayerIndex']
+            current_index = self.state.activePlayerIndex
         return (current_index - 1) % self.num_players
 
     def next_player(self):
         """Move to next player (counterclockwise/right in seating order)."""
-        self.state['activePlayerIndex'] = self.get_next_player_index()
-        return self.state['activePlayerIndex']
+        self.state.activePlayerIndex = self.get_next_player_index()
+        return self.state.activePlayerIndex
     
     def set_phase(self, phase):
         """Set the current phase of the game"""
-        self.state['currentPhase'] = phase
+        self.state.currentPhase = phase
         logger.info(f"Game {self.room_id} phase set to: {phase}")
     
     def complete_declaration_phase(self):
         """Mark declaration phase as complete and reset active player to mano"""
-        self.state['declarationComplete'] = True
-        self.state['activePlayerIndex'] = self.state['manoIndex']
-        logger.info(f"Declaration phase complete for game {self.room_id}, active player reset to mano {self.state['manoIndex']}")
+        self.state.declarationComplete = True
+        self.state.activePlayerIndex = self.state.manoIndex
+        logger.info(f"Declaration phase complete for game {self.room_id}, active player reset to mano {self.state.manoIndex}")
+    
+    @logged('declaration')
+    def record_declaration(self, player_index, round_name, declaration):
+        """Store a PARES/JUEGO declaration (True/False/'puede'/'tengo_after_penalty')"""
+        key = 'paresDeclarations' if round_name == 'PARES' else 'juegoDeclarations'
+        self.state[key][player_index] = declaration
+        return self.state[key]
+    
+    def get_declaration_summary(self, round_name):
+        """
+        Count PARES/JUEGO declarations per team and decide what follows them.
+        
+        Betting is ONLY skipped if one team has interest (tengo/puede) and
+        both players of the other team said "no tengo".
+        """
+        declarations = self.state.get('paresDeclarations' if round_name == 'PARES' else 'juegoDeclarations') or {}
+        summary = {}
+        for team in ('team1', 'team2'):
+            team_players = self.state.teams[team].players
+            values = [declarations.get(p) for p in team_players]
+            summary[team] = {
+                'tengo': sum(1 for v in values if v in [True, 'tengo_after_penalty']),
+                'puede': sum(1 for v in values if v == 'puede'),
+                'no_tengo': sum(1 for v in values if v == False)
+            }
+        team1, team2 = summary['team1'], summary['team2']
+        team1_has_interest = team1['tengo'] + team1['puede'] >= 1
+        team2_has_interest = team2['tengo'] + team2['puede'] >= 1
+        summary['skip_betting'] = ((team1_has_interest and team2['no_tengo'] == 2) or
+                                   (team2_has_interest and team1['no_tengo'] == 2))
+        summary['everyone_puede'] = team1['puede'] == 2 and team2['puede'] == 2
+        summary['no_one_has'] = not team1_has_interest and not team2_has_interest
+        return summary
     
     def reset_round_state(self):
         """Reset round-specific state"""
-        self.state['roundActions'] = {}
-        self.state['currentBet'] = {
-            'amount': 0,
-            'bettingTeam': None,
-            'betType': None,
-            'responses': {}
-        }
-        self.state['allPlayersPassed'] = False
+        self.state.roundActions = {}
+        self.state.currentBet = BetState()
+        self.state.allPlayersPassed = False
     
+    @logged('next_round')
     def move_to_next_round(self):
         """Progress to the next round"""
         round_order = ['MUS', 'GRANDE', 'CHICA', 'PARES', 'JUEGO']
         
         # Special handling for PUNTO round (which follows JUEGO)
-        if self.state['currentRound'] == 'PUNTO':
+        if self.state.currentRound == 'PUNTO':
             # PUNTO is the final betting round - move to CONTEO
             logger.info("PUNTO round complete - resolving comparisons and starting new hand")
             self._resolve_deferred_comparisons()
             self.start_new_hand()
             return True  # Hand ended
         
-        current_idx = round_order.index(self.state['currentRound'])
+        current_idx = round_order.index(self.state.currentRound)
         
         if current_idx < len(round_order) - 1:
-            self.state['currentRound'] = round_order[current_idx + 1]
+            self.state.currentRound = round_order[current_idx + 1]
             self.reset_round_state()
-            self.state['activePlayerIndex'] = self.state['manoIndex']
+            self.state.activePlayerIndex = self.state.manoIndex
             
             # Initialize the appropriate betting handler for each round
-            if self.state['currentRound'] == 'GRANDE':
+            if self.state.currentRound == 'GRANDE':
                 self.round_handler.grande_handler.initialize_grande_phase()
-            elif self.state['currentRound'] == 'CHICA':
+            elif self.state.currentRound == 'CHICA':
                 self.round_handler.chica_handler.initialize_round()
-            elif self.state['currentRound'] == 'PARES':
+            elif self.state.currentRound == 'PARES':
                 self.round_handler.pares_handler.initialize_round()
-            elif self.state['currentRound'] == 'JUEGO':
+            elif self.state.currentRound == 'JUEGO':
                 self.round_handler.juego_handler.initialize_round()
             
-            logger.info(f"Advanced to round {self.state['currentRound']}")
+            logger.info(f"Advanced to round {self.state.currentRound}")
             return False  # Game continues
         else:
             # All rounds complete - resolve deferred comparisons and new hand
@@ -499,45 +578,42 @@ class QuantumMusGame:
             self.start_new_hand()
             return True  # Hand ended
     
+    @logged('new_hand')
     def start_new_hand(self):
         """Start a new hand"""
         # Validate current state before resetting
-        if self.state['currentRound'] not in ['MUS', 'GRANDE', 'CHICA', 'PARES', 'JUEGO', 'PUNTO']:
-            logger.warning(f"Invalid round state before new hand: {self.state['currentRound']}")
+        if self.state.currentRound not in ['MUS', 'GRANDE', 'CHICA', 'PARES', 'JUEGO', 'PUNTO']:
+            logger.warning(f"Invalid round state before new hand: {self.state.currentRound}")
         
         # Rotate mano to next player (counterclockwise/right)
-        old_mano = self.state['manoIndex']
-        self.state['manoIndex'] = self.get_next_player_index(self.state['manoIndex'])
-        self.state['activePlayerIndex'] = self.state['manoIndex']
+        old_mano = self.state.manoIndex
+        self.state.manoIndex = self.get_next_player_index(self.state.manoIndex)
+        self.state.activePlayerIndex = self.state.manoIndex
         
         # Reset round state
-        self.state['currentRound'] = 'MUS'
-        self.state['musPhaseActive'] = True
+        self.state.currentRound = 'MUS'
+        self.state.musPhaseActive = True
         self.reset_round_state()
         
         # Reset phase states
-        self.state['grandePhase'] = None
-        self.state['chicaPhase'] = None
-        self.state['paresPhase'] = None
-        self.state['juegoPhase'] = None
-        self.state['deferredResults'] = []
-        self.state['cardsDiscarded'] = {}
-        self.state['waitingForDiscard'] = False
+        self.state.grandePhase = None
+        self.state.chicaPhase = None
+        self.state.paresPhase = None
+        self.state.juegoPhase = None
+        self.state.deferredResults = []
+        self.state.cardsDiscarded = {}
+        self.state.waitingForDiscard = False
         
         # Reset entanglement for new hand (BEFORE creating new deck)
         self.reset_entanglement_for_new_hand()
         
-        # Create new deck and shuffle
-        self.deck = QuantumDeck(game_mode=self.game_mode)
-        self.deck.shuffle()
-        
-        # Deal new cards
+        # Deal new cards (deal_cards creates and shuffles the new deck)
         deal_result = self.deal_cards()
         if not deal_result['success']:
             logger.error(f"Failed to deal cards for new hand: {deal_result['error']}")
             return deal_result
         
-        logger.info(f"Started new hand in game {self.room_id}: mano rotated from {old_mano} to {self.state['manoIndex']}")
+        logger.info(f"Started new hand in game {self.room_id}: mano rotated from {old_mano} to {self.state.manoIndex}")
         return {'success': True}
     
     def _resolve_deferred_comparisons(self):
@@ -547,6 +623,7 @@ class QuantumMusGame:
         """
         logger.info("Resolving deferred comparisons for all phases...")
         result = self.calculate_final_scores()
+        self.last_hand_result = result
         logger.info("All deferred comparisons resolved.")
         return result
 
@@ -554,9 +631,8 @@ class QuantumMusGame:
         """
         Resolve pending bets in order: Grande -> Chica -> Pares -> Juego -> Punto.
         Pares/Juego only score teams with at least one player who declared yes.
+        Hands are compared through self.hand_summaries (ties go to the mano's team).
         """
-        from card_deck import get_highest_card, get_lowest_card, compare_cards
-
         results = []
         deferred = self.state.get('deferredResults') or []
 
@@ -574,132 +650,50 @@ class QuantumMusGame:
             }.get(round_name)
             phase = self.state.get(phase_key)
             if phase and phase.get('result'):
-                phase_result = phase['result']
+                phase_result = phase.result
                 if phase_result.get('comparison') == 'deferred' and not phase_result.get('resolved'):
                     phase_result['resolved'] = True
                     return phase_result.get('betAmount', 1)
 
             return None
 
-        def get_team_cards(team_players):
-            cards = []
-            for player_idx in team_players:
-                cards.extend([card.to_dict() for card in self.hands.get(player_idx, [])])
-            return cards
-
         def get_declarations(round_name):
             key = 'paresDeclarations' if round_name == 'PARES' else 'juegoDeclarations'
             return self.state.get(key) or {}
 
         def eligible_team_players(round_name, team):
             declarations = get_declarations(round_name)
-            team_players = self.state['teams'][team]['players']
+            team_players = self.state.teams[team].players
             # Include players who declared True or 'tengo_after_penalty'
             eligible = [p for p in team_players if declarations.get(p) in [True, 'tengo_after_penalty']]
             return eligible
 
-        def calculate_pares(cards):
-            game_mode = self.game_mode
-            value_counts = {}
-            for card in cards:
-                value = card['value']
-                value_counts[value] = value_counts.get(value, 0) + 1
-
-            counts = sorted(value_counts.values(), reverse=True)
-            values = list(value_counts.keys())
-
-            if len(counts) > 0 and counts[0] == 3:
-                triplet_value = next(v for v in values if value_counts[v] == 3)
-                return {'rank': 2, 'values': [triplet_value]}
-            if len(counts) > 1 and counts[0] == 2 and counts[1] == 2:
-                order = ['A', '2', '4', '5', '6', '7', 'J', 'Q', 'K'] if game_mode == '8' else ['A', '2', '3', '4', '5', '6', '7', 'J', 'Q', 'K']
-                pair_values = [v for v in values if value_counts[v] == 2]
-                pair_values.sort(key=lambda x: order.index(x) if x in order else -1, reverse=True)
-                return {'rank': 3, 'values': pair_values}
-            if len(counts) > 0 and counts[0] == 2:
-                pair_value = next(v for v in values if value_counts[v] == 2)
-                return {'rank': 1, 'values': [pair_value]}
-
-            return {'rank': 0, 'values': []}
-
-        def calculate_juego(cards):
-            def get_card_points(val):
-                if val == 'A':
-                    return 1
-                if val == '2':
-                    return 1
-                if val == '3':
-                    return 3 if self.game_mode == '4' else 10
-                if val in ['J', 'Q', 'K']:
-                    return 10
-                try:
-                    return int(val)
-                except ValueError:
-                    return 0
-
-            sum_points = sum(get_card_points(card['value']) for card in cards)
-            return {'sum': sum_points, 'hasJuego': sum_points >= 31}
-
         def award_points(winner_team, points, round_name):
             if winner_team:
-                self.state['teams'][winner_team]['score'] += points
+                self.state.teams[winner_team].score += points
                 results.append({'round': round_name, 'winner': winner_team, 'points': points})
 
+        def award_comparison(round_name, bet_amount, team1_seats=None, team2_seats=None):
+            result = self.hand_summaries.compare(round_name, team1_seats, team2_seats)
+            if result > 0:
+                award_points('team1', bet_amount, round_name)
+            elif result < 0:
+                award_points('team2', bet_amount, round_name)
+            else:
+                award_points(self.get_player_team(self.state.manoIndex), bet_amount, round_name)
+
         # GRANDE
-        bet_amount = get_pending_bet('GRANDE') or 1
-        team1_cards = get_team_cards(self.state['teams']['team1']['players'])
-        team2_cards = get_team_cards(self.state['teams']['team2']['players'])
-        team1_best = get_highest_card(team1_cards, self.game_mode)
-        team2_best = get_highest_card(team2_cards, self.game_mode)
-        result = compare_cards(
-            team1_best['value'] if team1_best else 'A',
-            team2_best['value'] if team2_best else 'A',
-            self.game_mode
-        )
-        if result > 0:
-            award_points('team1', bet_amount, 'GRANDE')
-        elif result < 0:
-            award_points('team2', bet_amount, 'GRANDE')
-        else:
-            award_points(self.get_player_team(self.state['manoIndex']), bet_amount, 'GRANDE')
+        award_comparison('GRANDE', get_pending_bet('GRANDE') or 1)
 
         # CHICA
-        bet_amount = get_pending_bet('CHICA') or 1
-        team1_best = get_lowest_card(team1_cards, self.game_mode)
-        team2_best = get_lowest_card(team2_cards, self.game_mode)
-        result = compare_cards(
-            team1_best['value'] if team1_best else 'K',
-            team2_best['value'] if team2_best else 'K',
-            self.game_mode,
-            lower_wins=True
-        )
-        if result > 0:
-            award_points('team1', bet_amount, 'CHICA')
-        elif result < 0:
-            award_points('team2', bet_amount, 'CHICA')
-        else:
-            award_points(self.get_player_team(self.state['manoIndex']), bet_amount, 'CHICA')
+        award_comparison('CHICA', get_pending_bet('CHICA') or 1)
 
         # PARES
         bet_amount = get_pending_bet('PARES') or 1
         team1_eligible = eligible_team_players('PARES', 'team1')
         team2_eligible = eligible_team_players('PARES', 'team2')
         if team1_eligible or team2_eligible:
-            team1_pares = calculate_pares(get_team_cards(team1_eligible))
-            team2_pares = calculate_pares(get_team_cards(team2_eligible))
-            if team1_pares['rank'] > team2_pares['rank']:
-                award_points('team1', bet_amount, 'PARES')
-            elif team2_pares['rank'] > team1_pares['rank']:
-                award_points('team2', bet_amount, 'PARES')
-            else:
-                team1_high = max(team1_pares['values']) if team1_pares['values'] else ''
-                team2_high = max(team2_pares['values']) if team2_pares['values'] else ''
-                if team1_high > team2_high:
-                    award_points('team1', bet_amount, 'PARES')
-                elif team2_high > team1_high:
-                    award_points('team2', bet_amount, 'PARES')
-                else:
-                    award_points(self.get_player_team(self.state['manoIndex']), bet_amount, 'PARES')
+            award_comparison('PARES', bet_amount, team1_eligible, team2_eligible)
 
         # JUEGO or PUNTO
         bet_amount = get_pending_bet('JUEGO') or 1
@@ -711,25 +705,10 @@ class QuantumMusGame:
             elif team2_eligible and not team1_eligible:
                 award_points('team2', bet_amount, 'JUEGO')
             else:
-                team1_juego = calculate_juego(get_team_cards(team1_eligible))
-                team2_juego = calculate_juego(get_team_cards(team2_eligible))
-                if team1_juego['sum'] > team2_juego['sum']:
-                    award_points('team1', bet_amount, 'JUEGO')
-                elif team2_juego['sum'] > team1_juego['sum']:
-                    award_points('team2', bet_amount, 'JUEGO')
-                else:
-                    award_points(self.get_player_team(self.state['manoIndex']), bet_amount, 'JUEGO')
+                award_comparison('JUEGO', bet_amount, team1_eligible, team2_eligible)
         else:
             # Punto: no team declared juego
-            bet_amount = get_pending_bet('PUNTO') or 1
-            team1_punto = calculate_juego(team1_cards)
-            team2_punto = calculate_juego(team2_cards)
-            if team1_punto['sum'] > team2_punto['sum']:
-                award_points('team1', bet_amount, 'PUNTO')
-            elif team2_punto['sum'] > team1_punto['sum']:
-                award_points('team2', bet_amount, 'PUNTO')
-            else:
-                award_points(self.get_player_team(self.state['manoIndex']), bet_amount, 'PUNTO')
+            award_comparison('PUNTO', get_pending_bet('PUNTO') or 1)
 
         win_check = self.check_win_condition()
         return {
@@ -741,15 +720,16 @@ class QuantumMusGame:
         """Check if any team has won"""
         WIN_SCORE = 40
         
-        if self.state['teams']['team1']['score'] >= WIN_SCORE:
+        if self.state.teams['team1'].score >= WIN_SCORE:
             return {'game_ended': True, 'winner': 'team1'}
-        elif self.state['teams']['team2']['score'] >= WIN_SCORE:
+        elif self.state.teams['team2'].score >= WIN_SCORE:
             return {'game_ended': True, 'winner': 'team2'}
         
         return {'game_ended': False}
     
     # ============ ENTANGLEMENT METHODS ============
     
+    @logged('play_card')
     def play_card_and_check_entanglement(self, player_index, card_index):
         """
         Play a card and check if it triggers entanglement
@@ -777,9 +757,10 @@ class QuantumMusGame:
             )
             if entanglement_data:
                 result['entanglement'] = entanglement_data
+                self.analytics.record_activation(entanglement_data['pair_id'])
                 # Log the entanglement event
-                self.state['entanglement_events'].append({
-                    'round': self.state['currentRound'],
+                self.state.entanglement_events.append({
+                    'round': self.state.currentRound,
                     'player': player_index,
                     'data': entanglement_data
                 })
@@ -819,12 +800,12 @@ class QuantumMusGame:
     def reset_entanglement_for_new_hand(self):
         """Reset entanglement states for a new hand"""
         self.entanglement.reset_pair_states()
-        self.state['entanglement_events'] = []
+        self.state.entanglement_events = []
         logger.info("Entanglement states reset for new hand")
     
     def get_player_entangled_cards(self, player_index):
         """Get list of cards in player's hand that are entangled with their teammate"""
-        teammate = self.state['teams']['team1']['players'][1] if player_index in self.state['teams']['team1']['players'] else self.state['teams']['team2']['players'][1]
+        teammate = self.state.teams['team1'].players[1] if player_index in self.state.teams['team1'].players else self.state.teams['team2'].players[1]
         
         player_hand = self.hands.get(player_index, [])
         entangled_cards = []
@@ -842,6 +823,7 @@ class QuantumMusGame:
     
     # ============ COLLAPSE METHODS ============
     
+    @logged('declaration_collapse')
     def trigger_collapse_on_declaration(self, player_index, declaration, round_name):
         """
         Trigger collapse when a player makes a declaration
@@ -877,6 +859,7 @@ class QuantumMusGame:
             }
         }
     
+    @logged('bet_collapse')
     def trigger_collapse_on_bet_acceptance(self, player_index, round_name):
         """
         Trigger collapse when a player accepts a bet
@@ -897,6 +880,7 @@ class QuantumMusGame:
             }
         }
     
+    @logged('final_collapse')
     def trigger_final_collapse(self):
         """
         Trigger final collapse of all remaining entangled cards
@@ -942,249 +926,141 @@ class QuantumMusGame:
         Returns True (tengo), False (no tengo), or None (uncertain, needs manual)
         """
         hand = self.hands.get(player_index, [])
-        if not hand:
-            return None
-        
-        # Check if player has any uncollapsed entangled cards
-        has_uncollapsed_entangled = any(getattr(card, 'is_entangled', False) and not getattr(card, 'is_collapsed', False) for card in hand)
-        
-        if not has_uncollapsed_entangled:
-            # No uncollapsed entangled cards - simple case
-            if round_name == 'PARES':
-                return self._has_pares(hand)
-            elif round_name == 'JUEGO':
-                return self._has_juego(hand)
+        if not hand or round_name not in ('PARES', 'JUEGO'):
             return None
         
-        # Has uncollapsed entangled cards - check all possible combinations
-        if round_name == 'PARES':
-            return self._check_certain_pares_outcome(hand)
-        elif round_name == 'JUEGO':
-            return self._check_certain_juego_outcome(hand)
-        
+        # Certain outcomes are the ones with probability 0 or 1 over the uncollapsed pairs
+        probability = get_hand_probabilities(hand, self.game_mode)[round_name.lower()]
+        if probability == 1.0:
+            return True
+        if probability == 0.0:
+            return False
         return None
     
-    def _has_pares(self, hand):
-        """Check if a hand has pares (all cards must be collapsed)
-        
-        In mode 8, applies value equivalence:
-        - A and 2 are equivalent (form pairs together)
-        - 3 and K are equivalent (form pairs together)
+    # ============ DECLARATION FLOW ============
+    # Shared by the server's declaration handlers and the headless simulator
+    
+    def declaration_key(self, round_name):
+        """State key holding a round's declarations (created empty if missing)"""
+        key = 'paresDeclarations' if round_name == 'PARES' else 'juegoDeclarations'
+        if self.state.get(key) is None:
+            self.state[key] = {}
+        return key
+    
+    def declare(self, player_index, round_name, declaration, is_auto_declared=False):
         """
-        def normalizeValueForPares(val):
-            """Normalize card values for pair checking in mode 8"""
-            if self.game_mode == '8':
-                if val == 'A': return '2'  # A and 2 form pairs
-                if val == '3': return 'K'  # 3 and K form pairs
-            return val
-        
-        value_counts = {}
-        for card in hand:
-            value = getattr(card, 'value', None)
-            if value is None:
-                continue
-            # Normalize value for mode 8
-            normalized_value = normalizeValueForPares(value)
-            value_counts[normalized_value] = value_counts.get(normalized_value, 0) + 1
-        
-        return any(count >= 2 for count in value_counts.values())
+        The active player's PARES/JUEGO declaration (True, False or 'puede').
+        'puede' and auto-declarations pass the turn; tengo/no tengo keep it
+        until collapse_declaration().
+        """
+        if self.state.get('currentPhase') != 'DECLARATION':
+            self.set_phase('DECLARATION')
+        if player_index != self.state.activePlayerIndex:
+            return {'success': False, 'error': 'Not your turn'}
+        
+        key = self.declaration_key(round_name)
+        self.record_declaration(player_index, round_name, declaration)
+        advance_turn = declaration == 'puede' or is_auto_declared
+        if advance_turn:
+            self.next_player()
+        return {
+            'success': True,
+            'declarations': self.state[key],
+            'next_player': self.state.activePlayerIndex if advance_turn else None
+        }
     
-    def _has_juego(self, hand):
-        """Check if a hand has juego (all cards must be collapsed)"""
-        def get_card_points(val):
-            if val == 'A':
-                return 1
-            if val == '2':
-                return 2 if self.game_mode == '4' else 1
-            if val == '3':
-                return 3 if self.game_mode == '4' else 10
-            if val in ['J', 'Q', 'K']:
-                return 10
-            try:
-                return int(val)
-            except ValueError:
-                return 0
-        
-        sum_points = sum(get_card_points(getattr(card, 'value', '')) for card in hand)
-        return sum_points >= 31
+    def collapse_declaration(self, player_index, declaration, round_name):
+        """
+        Collapse the cards behind a tengo/no tengo declaration and pass the turn.
+        A penalized 'tengo' is kept as 'tengo_after_penalty'.
+        """
+        if player_index != self.state.activePlayerIndex:
+            return {'success': False, 'error': 'Not your turn'}
+        
+        result = self.trigger_collapse_on_declaration(player_index, declaration, round_name)
+        if result['success']:
+            if declaration == 'tengo' and result['penalty']:
+                self.record_declaration(player_index, round_name, 'tengo_after_penalty')
+            self.next_player()
+            result['next_player'] = self.state.activePlayerIndex
+        return result
     
-    def _check_certain_pares_outcome(self, hand):
+    def auto_declare_next(self, round_name):
         """
-        Check if PARES outcome is certain despite having entangled cards
-        Returns True (always has pares), False (never has pares), or None (uncertain)
+        Declare for the next player who has not declared yet, if their
+        outcome is certain.
         
-        Entanglement: A↔K and 2↔3 (mode 8) within same suit
-        
-        Value equivalence for PARES in mode 8:
-        - A and 2 are equivalent (form pairs together)
-        - 3 and K are equivalent (form pairs together)
+        Returns:
+            (player_index, declaration), or None if that player has to
+            declare themselves (or everyone has declared)
         """
-        def normalizeValueForPares(val):
-            """Normalize card values for pair checking in mode 8"""
-            if self.game_mode == '8':
-                if val == 'A': return '2'  # A and 2 form pairs
-                if val == '3': return 'K'  # 3 and K form pairs
-            return val
-        
-        # Get entangled cards and their possible values
-        entangled_cards = []
-        collapsed_cards = []
-        
-        for card in hand:
-            is_entangled = getattr(card, 'is_entangled', False)
-            is_collapsed = getattr(card, 'is_collapsed', False)
-            card_value = getattr(card, 'value', '')
-            
-            if is_collapsed or not is_entangled:
-                # Card has collapsed or is not entangled - use its current value
-                collapsed_cards.append(card_value)
-            else:
-                # Card is entangled and uncollapsed - determine possible values
-                # A↔K entanglement (always active)
-                if card_value == 'K':
-                    entangled_cards.append(['K', 'A'])
-                elif card_value == 'A':
-                    entangled_cards.append(['A', 'K'])
-                # 2↔3 entanglement (only in mode 8)
-                elif self.game_mode == '8' and card_value == '2':
-                    entangled_cards.append(['2', '3'])
-                elif self.game_mode == '8' and card_value == '3':
-                    entangled_cards.append(['3', '2'])
-                else:
-                    # Should not reach here - entangled but not A/K/2/3
-                    logger.warning(f"Card {card_value} marked as entangled but not A/K/2/3")
-                    return None
-        
-        if not entangled_cards:
-            # All cards collapsed, check directly with normalization
-            normalized_values = [normalizeValueForPares(v) for v in collapsed_cards]
-            value_counts = {}
-            for v in normalized_values:
-                value_counts[v] = value_counts.get(v, 0) + 1
-            return any(count >= 2 for count in value_counts.values())
-        
-        # Check all possible combinations
-        can_have_pares = False
-        can_not_have_pares = False
-        
-        def check_combination(values):
-            """Check if a combination of values has pares (with normalization)"""
-            all_values = collapsed_cards + values
-            # Normalize values for mode 8
-            normalized_values = [normalizeValueForPares(v) for v in all_values]
-            value_counts = {}
-            for v in normalized_values:
-                value_counts[v] = value_counts.get(v, 0) + 1
-            return any(count >= 2 for count in value_counts.values())
-        
-        def generate_combinations(idx, current):
-            nonlocal can_have_pares, can_not_have_pares
-            if idx == len(entangled_cards):
-                has_pares = check_combination(current)
-                if has_pares:
-                    can_have_pares = True
-                else:
-                    can_not_have_pares = True
-                return
-            
-            for value in entangled_cards[idx]:
-                generate_combinations(idx + 1, current + [value])
+        declarations = self.state[self.declaration_key(round_name)]
+        for _ in range(4):
+            if len(declarations) >= 4:
+                return None
+            player_index = self.state.activePlayerIndex
+            if player_index is None:
+                return None
+            if player_index not in declarations:
+                break
+            self.next_player()
+        else:
+            return None
         
-        generate_combinations(0, [])
+        if not self.should_auto_declare(player_index, round_name):
+            return None
+        auto_value = self.get_auto_declaration_value(player_index, round_name)
+        if auto_value is None:
+            return None
         
-        # If outcome is certain across all combinations
-        if can_have_pares and not can_not_have_pares:
-            return True
-        elif not can_have_pares and can_not_have_pares:
-            return False
-        else:
-            return None  # Uncertain
+        # Auto-declarations don't require collapse
+        self.record_declaration(player_index, round_name, auto_value)
+        self.next_player()
+        logger.info(f"Auto-declared for player {player_index} in {round_name}: {auto_value}")
+        return player_index, auto_value
     
-    def _check_certain_juego_outcome(self, hand):
+    def finish_declarations(self, round_name):
         """
-        Check if JUEGO outcome is certain despite having entangled cards
-        Returns True (always has juego), False (never has juego), or None (uncertain)
+        Everyone declared: start the round's betting or move on.
         
-        Entanglement: A↔K and 2↔3 (mode 8) within same suit
+        Returns:
+            {'round': round now played, 'betting': bool, 'reason': why betting was skipped}
         """
-        def get_card_points(val):
-            if val == 'A':
-                return 1
-            if val == '2':
-                return 2 if self.game_mode == '4' else 1
-            if val == '3':
-                return 3 if self.game_mode == '4' else 10
-            if val in ['J', 'Q', 'K']:
-                return 10
-            try:
-                return int(val)
-            except ValueError:
-                return 0
-        
-        # Get entangled cards and their possible values
-        entangled_cards = []
-        collapsed_points = 0
+        self.complete_declaration_phase()
+        self.set_phase('VALIDATION')
+        summary = self.get_declaration_summary(round_name)
+        logger.info(f"{round_name} declarations complete - Team1: {summary['team1']} | Team2: {summary['team2']}")
         
-        for card in hand:
-            is_entangled = getattr(card, 'is_entangled', False)
-            is_collapsed = getattr(card, 'is_collapsed', False)
-            card_value = getattr(card, 'value', '')
-            
-            if is_collapsed or not is_entangled:
-                # Card has collapsed or is not entangled - use its current value
-                collapsed_points += get_card_points(card_value)
-            else:
-                # Card is entangled and uncollapsed - determine possible values
-                # A↔K entanglement (always active)
-                if card_value == 'K':
-                    entangled_cards.append(['K', 'A'])
-                elif card_value == 'A':
-                    entangled_cards.append(['A', 'K'])
-                # 2↔3 entanglement (only in mode 8)
-                elif self.game_mode == '8' and card_value == '2':
-                    entangled_cards.append(['2', '3'])
-                elif self.game_mode == '8' and card_value == '3':
-                    entangled_cards.append(['3', '2'])
-                else:
-                    # Should not reach here - entangled but not A/K/2/3
-                    logger.warning(f"Card {card_value} marked as entangled but not A/K/2/3")
-                    return None
-        
-        if not entangled_cards:
-            # All collapsed
-            return collapsed_points >= 31
-        
-        # Check all possible combinations
-        can_have_juego = False
-        can_not_have_juego = False
-        
-        def check_combination(values):
-            """Check if a combination of values has juego"""
-            total = collapsed_points + sum(get_card_points(v) for v in values)
-            return total >= 31
-        
-        def generate_combinations(idx, current):
-            nonlocal can_have_juego, can_not_have_juego
-            if idx == len(entangled_cards):
-                has_juego = check_combination(current)
-                if has_juego:
-                    can_have_juego = True
-                else:
-                    can_not_have_juego = True
-                return
-            
-            for value in entangled_cards[idx]:
-                generate_combinations(idx + 1, current + [value])
-        
-        generate_combinations(0, [])
-        
-        # If outcome is certain across all combinations
-        if can_have_juego and not can_not_have_juego:
-            return True
-        elif not can_have_juego and can_not_have_juego:
-            return False
+        if round_name == 'PARES':
+            if not summary['skip_betting']:
+                self.set_phase('BETTING')
+                self.state.currentBet = BetState()
+                return {'round': 'PARES', 'betting': True, 'reason': None}
+            # Only one team can win PARES: on to the JUEGO declarations
+            self.move_to_next_round()
+            self.state.juegoDeclarations = {}
+            self.set_phase('DECLARATION')
+            return {'round': 'JUEGO', 'betting': False, 'reason': 'pares_complete_no_betting'}
+        
+        if summary['everyone_puede']:
+            reason = 'everyone_puede'
+        elif summary['no_one_has']:
+            reason = 'no_juego'
+        elif summary['skip_betting']:
+            reason = 'one_team_interest'  # No competition for JUEGO
         else:
-            return None  # Uncertain
+            self.set_phase('BETTING')
+            return {'round': 'JUEGO', 'betting': True, 'reason': None}
+        self.state.currentRound = 'PUNTO'
+        self.set_phase('BETTING')
+        return {'round': 'PUNTO', 'betting': False, 'reason': reason}
+    
+    def get_outcome_probabilities(self, player_index):
+        """
+        Exact probabilities for a player: pares, juego, and winning
+        Grande/Chica for their team (see outcome_probabilities)
+        """
+        return get_outcome_probabilities(self, player_index)
     
     def _get_card_value_by_id(self, card_id):
         """Get card value by card ID from all hands"""
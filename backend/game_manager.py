@@ -2,8 +2,16 @@
 Game Manager - Handles active game instances
 """
 
+import json
 import logging
+import os
+import uuid
+import state_store
+from action_log import log_path, open_log, read_log, restore_game, unfinished_logs
 from game_logic import QuantumMusGame
+from game_snapshot import dump_game, load_game
+from entanglement_analytics import get_analytics
+from state_delta import StateDeltaStream
 
 logger = logging.getLogger(__name__)
 
@@ -11,35 +19,146 @@ logger = logging.getLogger(__name__)
 class GameManager:
     """Manages all active game instances"""
     
-    def __init__(self):
-        self.games = {}  # room_id -> QuantumMusGame
+    def __init__(self, log_dir=None, store=None):
+        self.games = {}  # room_id -> QuantumMusGame (a cache of the store's games when it is shared)
+        self.log_dir = log_dir  # Action logs (<log_dir>/<room_id>.log) are kept when set
+        self.store = store or state_store.MemoryStore()
+        self._versions = {}  # room_id -> store version of the cached game
     
     def create_game(self, room_id, players, game_mode='8', teams=None):
         """Create a new game instance"""
-        if room_id in self.games:
+        if self.get_game(room_id) is not None:
             logger.warning(f"Game already exists for room {room_id}")
             return self.games[room_id]
         
         game = QuantumMusGame(room_id, players, game_mode, teams=teams)
+        if self.log_dir and not self.store.shared:
+            # With a shared store the store is the durable copy: any worker may play the next action
+            open_log(game, self.log_dir)
         self.games[room_id] = game
+        if self.store.shared:
+            self._save(room_id)  # Visible to get_game at once; later changes are saved on commit
+            self._touch(room_id)
         
         logger.info(f"Created game for room {room_id} with {len(players)} players")
         return game
     
     def get_game(self, room_id):
         """Get game instance by room ID"""
+        if self.store.shared:
+            self._sync(room_id)
         return self.games.get(room_id)
     
+    def _sync(self, room_id):
+        """Lock the room (inside a transaction) and reload the game if another worker changed it"""
+        state_store.hold(self.store, state_store.room_lock(room_id))
+        version = self.store.get(f'gamever/{room_id}')
+        if version is None:
+            self._forget(room_id)
+            return
+        if self._versions.get(room_id) != version:
+            snapshot, stream = self.store.get(f'game/{room_id}'), self.store.get(f'stream/{room_id}')
+            if snapshot is None or stream is None:
+                self._forget(room_id)
+                return
+            game = load_game(snapshot)
+            game.state_stream = StateDeltaStream.from_dict(json.loads(stream))
+            self.games[room_id] = game
+            self._versions[room_id] = version
+        self._touch(room_id)
+    
+    def _touch(self, room_id):
+        """Save the game when the current transaction returns (now, outside one)"""
+        if not state_store.on_commit(self.store, ('game', room_id), lambda: self._save(room_id),
+                                     abort=lambda: self._versions.pop(room_id, None)):
+            self._save(room_id)
+    
+    def _save(self, room_id):
+        game = self.games.get(room_id)
+        if game is None:
+            return
+        version = uuid.uuid4().hex.encode()
+        self.store.set(f'game/{room_id}', dump_game(game))
+        self.store.set(f'stream/{room_id}', json.dumps(game.state_stream.to_dict(), separators=(',', ':')).encode())
+        self.store.set(f'gamever/{room_id}', version)
+        self._versions[room_id] = version
+    
+    def _forget(self, room_id):
+        game = self.games.pop(room_id, None)
+        self._versions.pop(room_id, None)
+        if game is not None and game.action_log is not None:
+            game.action_log.close()
+    
     def remove_game(self, room_id):
         """Remove a game instance"""
+        if self.store.shared and self.get_game(room_id) is not None:
+            self.store.delete(f'gamever/{room_id}', f'game/{room_id}', f'stream/{room_id}')
+            self._versions.pop(room_id, None)
         if room_id in self.games:
-            del self.games[room_id]
+            game = self.games.pop(room_id)
+            if game.action_log is not None:
+                game.action_log.close(ended=True)
+            # Keep the finished game's entanglement stats in the global totals
+            get_analytics().retire(room_id)
             logger.info(f"Removed game for room {room_id}")
             return True
         return False
     
+    def recover_game(self, room_id):
+        """Rebuild a game from its action log (e.g. after a restart) and keep logging it"""
+        if self.store.shared:
+            return self.get_game(room_id)  # The store outlives the workers
+        if room_id in self.games:
+            return self.games[room_id]
+        if not self.log_dir or not os.path.exists(log_path(self.log_dir, room_id)):
+            return None
+        game, last_seq = restore_game(read_log(log_path(self.log_dir, room_id)))
+        open_log(game, self.log_dir, seq=last_seq)
+        self.games[room_id] = game
+        logger.info(f"Recovered game for room {room_id} from its action log (event {last_seq})")
+        return game
+    
+    def recover_games(self):
+        """Recover every game whose action log did not end (at startup). Returns the room ids"""
+        if self.store.shared or not self.log_dir or not os.path.isdir(self.log_dir):
+            return []
+        recovered = []
+        for room_id in unfinished_logs(self.log_dir):
+            try:
+                if self.recover_game(room_id) is not None:
+                    recovered.append(room_id)
+            except Exception as e:
+                logger.error(f"Could not recover game for room {room_id}: {e}")
+        return recovered
+    
+    def export_game(self, room_id):
+        """Remove a game to move it to another process: (snapshot, delta stream) or None"""
+        game = self.games.get(room_id)
+        if game is None:
+            return None
+        record = (dump_game(game), game.state_stream.to_dict())
+        self.remove_game(room_id)
+        return record
+    
+    def import_game(self, room_id, record):
+        """Install a game exported by export_game"""
+        snapshot, stream = record
+        game = load_game(snapshot)
+        game.state_stream = StateDeltaStream.from_dict(stream)
+        self.games[room_id] = game
+        return game
+    
+    def count_games(self):
+        if self.store.shared:
+            return len(self.store.keys('gamever/'))
+        return len(self.games)
+    
     def get_active_games(self):
         """Get list of all active games"""
+        if self.store.shared:
+            room_ids = [key[len('gamever/'):] for key in self.store.keys('gamever/')]
+            games = {room_id: self.get_game(room_id) for room_id in room_ids}
+            return {room_id: game.get_public_state() for room_id, game in games.items() if game is not None}
         return {
             room_id: game.get_public_state()
             for room_id, game in self.games.items()
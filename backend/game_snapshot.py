@@ -0,0 +1,312 @@
+"""
+Game Snapshots for Quantum Mus
+Compact binary snapshot and restore of a live QuantumMusGame
+
+A game is mostly derived structure: the 40 cards, their Bell pairs and the
+round/betting handlers are the same for every game of a mode. A snapshot only
+stores what play changes:
+- seats (players), teams, scores and phase state (state.to_dict())
+- per card: measured_state, is_collapsed, collapsed_value, collapse_reason
+- deck order and position, Bell-pair measurement masks and collapse caches
+- hands and discard pile as card ids
+- collapse history, entanglement activations and the last hand result
+
+Everything else is rebuilt on restore: cards are cloned from a per-mode
+template deck and relinked to their partners and the hand state, handlers
+and managers are constructed for the restored game.
+
+Format: MAGIC + interpreter tag + marshal.dumps(tuple of plain values).
+marshal only handles plain Python values, is implemented in C and keeps int
+dict keys, which makes it smaller and several times faster than pickle or
+JSON here. Like pickle, it must only be used for snapshots this server wrote
+itself. Its format is only stable within one Python version, so the tag
+(Python major.minor and marshal.version) is checked on load and snapshots
+written by another interpreter are rejected.
+
+Benchmark (per-game snapshot and restore time):
+    python game_snapshot.py --games 200 --mode 8
+"""
+
+import argparse
+import json
+import logging
+import marshal
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from Logica_cuantica.baraja import QuantumDeck
+from Logica_cuantica.cartas import QuantumCard
+from Logica_cuantica.estado_cuantico import QuantumHandState
+from Logica_cuantica.quantum_random import FastRNG, get_rng_backend, set_rng_backend
+from action_log import RecordableRNG
+from entanglement_analytics import RoomCounters, get_analytics
+from entanglement_system import EntanglementSystem
+from game_logic import QuantumMusGame
+from game_state import GameState
+from hand_summary import HandSummaries
+from quantum_collapse import CollapseEvent, QuantumCollapseManager
+from round_handlers import RoundHandler
+from state_delta import StateDeltaStream
+
+MAGIC = b'QMG\x02'  # Format version 2
+# Interpreter that wrote the payload: marshal data only loads reliably on the same one
+INTERPRETER = bytes((sys.version_info.major, sys.version_info.minor, marshal.version))
+
+# Card attributes that change during play; everything else comes from the template
+CARD_FIELDS = ('measured_state', 'is_collapsed', 'collapsed_value', 'collapse_reason')
+_CARD_LINKS = ('entangled_partner_card', 'bell_state')
+
+
+class SnapshotError(ValueError):
+    """Data is not a game snapshot this version can restore"""
+
+
+class _DeckTemplate:
+    """Static part of a freshly built deck for one game mode"""
+
+    __slots__ = ('card_fields', 'partners', 'pairs', 'bell_pair_index', 'deck_fields')
+
+    def __init__(self, game_mode: str):
+        deck = QuantumDeck(game_mode=game_mode, rng=FastRNG(0))
+        cards = sorted(deck.cards, key=lambda card: card.card_id)
+        if [card.card_id for card in cards] != list(range(len(cards))):
+            raise SnapshotError("Deck card ids are not 0..n-1")
+        skip = set(CARD_FIELDS) | set(_CARD_LINKS)
+        self.card_fields = tuple({name: value for name, value in vars(card).items() if name not in skip}
+                                 for card in cards)
+        self.partners = tuple(card.entangled_partner_card.card_id if card.entangled_partner_card else None
+                              for card in cards)
+        self.pairs = tuple(deck.quantum_state._pairs)
+        self.bell_pair_index = dict(deck.bell_pair_index)
+        self.deck_fields = {'game_mode': deck.game_mode,
+                            'enable_king_pit_entanglement': deck.enable_king_pit_entanglement,
+                            'enable_two_three_entanglement': deck.enable_two_three_entanglement}
+
+
+_templates: Dict[str, _DeckTemplate] = {}
+
+
+def _template(game_mode: str) -> _DeckTemplate:
+    template = _templates.get(game_mode)
+    if template is None:
+        template = _templates.setdefault(game_mode, _DeckTemplate(game_mode))
+    return template
+
+
+# ==================== SNAPSHOT ====================
+
+def _dump_deck(game) -> Tuple[tuple, tuple]:
+    deck = game.deck
+    cards = {card.card_id: card for card in deck.cards}
+    for hand in game.hands.values():
+        cards.update((card.card_id, card) for card in hand)
+    cards.update((card.card_id, card) for card in game.discard_pile)
+    card_states = tuple(
+        (card.measured_state, card.is_collapsed, card.collapsed_value, card.collapse_reason)
+        for _, card in sorted(cards.items())
+    )
+    hand_state = deck.quantum_state
+    deck_state = (
+        tuple(card.card_id for card in deck.cards), deck.deck_index,
+        dict(deck.king_pit_collapsed), dict(deck.tres_dos_collapsed),
+        hand_state.backend, hand_state._measured, hand_state._outcomes,
+    )
+    return card_states, deck_state
+
+
+def dump_game(game: QuantumMusGame) -> bytes:
+    """Compact binary snapshot of a game"""
+    card_states, deck_state = _dump_deck(game)
+    payload = (
+        game.room_id, game.game_mode, game.players,
+        game.state.to_dict(), game.state.version,
+        card_states, deck_state,
+        tuple(tuple(card.card_id for card in game.hands.get(seat, [])) for seat in range(4)),
+        tuple(card.card_id for card in game.discard_pile),
+        tuple((event.trigger_type, event.player_index, event.round_name,
+               event.collapsed_cards, event.penalties)
+              for event in game.collapse_manager.collapse_history),
+        list(game.entanglement._activations),
+        game.last_hand_result,
+    )
+    return MAGIC + INTERPRETER + marshal.dumps(payload)
+
+
+# ==================== RESTORE ====================
+
+def _restore_deck(game_mode: str, card_states: tuple, deck_state: tuple, rng) -> Tuple[QuantumDeck, list]:
+    template = _template(game_mode)
+    if len(card_states) != len(template.card_fields):
+        raise SnapshotError(f"Snapshot has {len(card_states)} cards, mode {game_mode} has "
+                            f"{len(template.card_fields)}")
+    (order, deck_index, king_pit_collapsed, tres_dos_collapsed,
+     backend, measured, outcomes) = deck_state
+
+    hand_state = QuantumHandState(bit_source=rng.bell_bit_source, backend=backend)
+    hand_state._pairs = list(template.pairs)
+    hand_state._circuits = [None] * len(template.pairs)
+    hand_state._measured, hand_state._outcomes = measured, outcomes
+
+    cards = []
+    new_card = QuantumCard.__new__
+    for fields, state in zip(template.card_fields, card_states):
+        card = new_card(QuantumCard)
+        attributes = card.__dict__
+        attributes.update(fields)
+        attributes.update(zip(CARD_FIELDS, state))
+        attributes['bell_state'] = hand_state if fields['bell_pair_index'] is not None else None
+        cards.append(card)
+    for card, partner in zip(cards, template.partners):
+        card.entangled_partner_card = cards[partner] if partner is not None else None
+
+    deck = QuantumDeck.__new__(QuantumDeck)
+    deck.__dict__.update(template.deck_fields)
+    deck.qrng = rng
+    deck.quantum_state = hand_state
+    deck.bell_pair_index = dict(template.bell_pair_index)
+    deck.cards = [cards[card_id] for card_id in order]
+    deck.deck_index = deck_index
+    deck.king_pit_collapsed = king_pit_collapsed
+    deck.tres_dos_collapsed = tres_dos_collapsed
+    return deck, cards
+
+
+def load_game(data: bytes, analytics: bool = True) -> QuantumMusGame:
+    """
+    Rebuild a game (with a fresh RNG, no action log) from dump_game() output.
+
+    With analytics=False the game counts into private counters instead of its
+    room's (replays of events the live game already counted).
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise SnapshotError("Not a Quantum Mus game snapshot (or an unsupported version)")
+    header = len(MAGIC) + len(INTERPRETER)
+    written_by = data[len(MAGIC):header]
+    if written_by != INTERPRETER:
+        raise SnapshotError(f"Snapshot written by another Python version (tag {list(written_by)}), "
+                            f"this is Python {sys.version_info.major}.{sys.version_info.minor} "
+                            f"(marshal {marshal.version})")
+    (room_id, game_mode, players, state, version, card_states, deck_state, hands, discard_pile,
+     collapse_history, activations, last_hand_result) = marshal.loads(data[header:])
+
+    game = QuantumMusGame.__new__(QuantumMusGame)
+    game.room_id = room_id
+    game.players = players
+    game.game_mode = game_mode
+    game.num_players = len(players)
+    game.state = GameState.from_dict(state)
+    game.state._version = version
+    game.rng = RecordableRNG()
+    game.action_log = None
+    game.deck, cards = _restore_deck(game_mode, card_states, deck_state, game.rng)
+    game.hands = {seat: [cards[card_id] for card_id in ids] for seat, ids in enumerate(hands)}
+    game.discard_pile = [cards[card_id] for card_id in discard_pile]
+    game.hand_summaries = HandSummaries(game)
+    game.last_hand_result = last_hand_result
+    game._public_state_cache = None
+    game.state_stream = StateDeltaStream()  # Clients resync with the restored game
+    game.round_handler = RoundHandler(game)
+    game.analytics = get_analytics().room(room_id) if analytics else RoomCounters()
+    # A finished game recorded its last hand's Bell pairs before it was saved
+    game._bell_pairs_deck = game.deck if game.check_win_condition()['game_ended'] else None
+    game.collapse_manager = QuantumCollapseManager(game, analytics=game.analytics)
+    for trigger_type, player_index, round_name, collapsed_cards, penalties in collapse_history:
+        event = CollapseEvent(trigger_type, player_index, round_name)
+        event.collapsed_cards = collapsed_cards
+        event.penalties = penalties
+        game.collapse_manager.collapse_history.append(event)
+    game.entanglement = EntanglementSystem(game_mode)
+    game.entanglement._activations = activations
+    return game
+
+
+# ==================== BENCHMARK ====================
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'mean_us': round(sum(samples) / len(samples) * 1e6, 1),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1),
+        'max_us': round(samples[-1] * 1e6, 1),
+    }
+
+
+def _timed(function, argument, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function(argument)
+    return (time.perf_counter() - started) / repeat
+
+
+def benchmark(games: int = 200, game_mode: str = '8', seed: int = None, repeat: int = 20) -> Dict:
+    """
+    Snapshot and restore games played to random points by the simulator.
+
+    Half of the games get a final collapse so collapsed cards and collapse
+    history are part of the measured snapshots.
+    """
+    from simulator import HeadlessSimulator, RandomPolicy, SimulationStats
+
+    rng = random.Random(seed)
+    backend = get_rng_backend()
+    set_rng_backend('fast', seed=seed)
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        simulator = HeadlessSimulator(RandomPolicy(rng), RandomPolicy(rng), game_mode=game_mode)
+        stats = SimulationStats()
+        sample = []
+        for number in range(games):
+            players = [{'id': f'bench_{number}_p{i}', 'name': f'Bot {i}', 'team': 1 if i % 2 == 0 else 2}
+                       for i in range(4)]
+            game = QuantumMusGame(f'snapshot_bench_{number}', players, game_mode=game_mode)
+            game.deal_cards()
+            for _ in range(rng.randint(0, 3)):
+                if simulator._play_hand(game, stats):
+                    break
+            if number % 2:
+                game.trigger_final_collapse()
+            sample.append(game)
+
+        _template(game_mode)  # Built once per process, not part of a restore
+        sizes, dump_times, load_times, mismatches = [], [], [], 0
+        for game in sample:
+            data = dump_game(game)
+            restored = load_game(data)
+            if (restored.state.to_dict() != game.state.to_dict() or
+                    [c.to_dict() for h in restored.hands.values() for c in h] !=
+                    [c.to_dict() for h in game.hands.values() for c in h]):
+                mismatches += 1
+            sizes.append(len(data))
+            dump_times.append(_timed(dump_game, game, repeat))
+            load_times.append(_timed(load_game, data, repeat))
+            get_analytics().retire(game.room_id)
+    finally:
+        logging.disable(previous_disable)
+        set_rng_backend(backend)
+
+    return {
+        'games': games,
+        'game_mode': game_mode,
+        'bytes': {'mean': round(sum(sizes) / len(sizes)), 'max': max(sizes)},
+        'snapshot': _percentiles(dump_times),
+        'restore': _percentiles(load_times),
+        'mismatches': mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantum Mus game snapshot/restore benchmark')
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--mode', choices=['4', '8'], default='8')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per game')
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.games, args.mode, args.seed, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,386 @@
+"""
+Typed Game State for Quantum Mus
+Slotted records for QuantumMusGame.state, with a version counter
+
+The state used to be a nested dict mutated by string key from game_logic,
+the round/betting handlers and the server. It is now a tree of slotted
+dataclasses (GameState, TeamState, BetState, PhaseState):
+- Fields are read and written as attributes (state.manoIndex,
+  phase.phaseState). The mapping interface (state['manoIndex'], .get(),
+  'key' in state) is kept for string-keyed callers such as
+  state[f'{round}Phase'].
+- Dicts stored in a typed field become that record (e.g. assigning a dict to
+  grandePhase builds a PhaseState). Other dicts and lists anywhere in the
+  tree become TrackedDict/TrackedList.
+- Every mutation anywhere in the tree increments GameState.version, so caches
+  and diffs can be keyed on the version instead of comparing state.
+
+Records are not JSON serializable; payloads use to_dict(). Tracked
+containers are dict/list subclasses and serialize as-is.
+"""
+
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field, fields
+from typing import ClassVar, Dict, List, Optional
+
+ROUND_PHASE_KEYS = ('grandePhase', 'chicaPhase', 'paresPhase', 'juegoPhase')
+_SCALAR_TYPES = frozenset((int, float, str, bool, type(None)))
+_set_slot = object.__setattr__  # Bypasses StateRecord.__setattr__
+
+
+def _attach(value, root, record_type=None):
+    """Make a value part of the tree of root (wrap dicts/lists, adopt records)"""
+    if type(value) in _SCALAR_TYPES:
+        return value
+    if isinstance(value, StateRecord):
+        value._adopt(root)
+        return value
+    if record_type is not None and isinstance(value, dict) and not isinstance(value, record_type):
+        return record_type.from_dict(value, root)
+    if isinstance(value, (TrackedDict, TrackedList)):
+        value._adopt(root)
+        return value
+    if isinstance(value, dict):
+        return TrackedDict(root, value)
+    if isinstance(value, list):
+        return TrackedList(root, value)
+    return value
+
+
+def _plain(value):
+    """Copy of a value with records and tracked containers as plain dicts/lists"""
+    if type(value) in _SCALAR_TYPES:
+        return value
+    if isinstance(value, StateRecord):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _rebuild(cls, data, version=0):
+    """Unpickle/deepcopy helper: records are rebuilt through their constructor"""
+    value = cls(**data) if issubclass(cls, StateRecord) else cls(None, data)
+    if version:
+        value._version = version
+    return value
+
+
+def _bump(root) -> None:
+    if root is not None:
+        _set_slot(root, '_version', root._version + 1)
+
+
+# ==================== CONTAINERS ====================
+
+class TrackedDict(dict):
+    """dict that bumps the owning GameState's version when mutated"""
+
+    __slots__ = ('_root',)
+
+    def __init__(self, root=None, data=()):
+        super().__init__()
+        self._root = root
+        for key, value in dict(data).items():
+            dict.__setitem__(self, key, _attach(value, root))
+
+    def _adopt(self, root) -> None:
+        self._root = root
+        for value in self.values():
+            _attach(value, root)
+
+    def __reduce__(self):
+        return _rebuild, (type(self), dict(self))
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, _attach(value, self._root))
+        _bump(self._root)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        _bump(self._root)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            dict.__setitem__(self, key, _attach(value, self._root))
+        _bump(self._root)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        value = dict.pop(self, key, *default)
+        _bump(self._root)
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        _bump(self._root)
+        return item
+
+    def clear(self):
+        dict.clear(self)
+        _bump(self._root)
+
+
+class TrackedList(list):
+    """list that bumps the owning GameState's version when mutated"""
+
+    __slots__ = ('_root',)
+
+    def __init__(self, root=None, data=()):
+        super().__init__(_attach(value, root) for value in data)
+        self._root = root
+
+    def _adopt(self, root) -> None:
+        self._root = root
+        for value in self:
+            _attach(value, root)
+
+    def __reduce__(self):
+        return _rebuild, (type(self), list(self))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [_attach(item, self._root) for item in value]
+        else:
+            value = _attach(value, self._root)
+        list.__setitem__(self, index, value)
+        _bump(self._root)
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        _bump(self._root)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, count):
+        list.__imul__(self, count)
+        _bump(self._root)
+        return self
+
+    def append(self, value):
+        list.append(self, _attach(value, self._root))
+        _bump(self._root)
+
+    def extend(self, values):
+        list.extend(self, [_attach(value, self._root) for value in values])
+        _bump(self._root)
+
+    def insert(self, index, value):
+        list.insert(self, index, _attach(value, self._root))
+        _bump(self._root)
+
+    def pop(self, index=-1):
+        value = list.pop(self, index)
+        _bump(self._root)
+        return value
+
+    def remove(self, value):
+        list.remove(self, value)
+        _bump(self._root)
+
+    def clear(self):
+        list.clear(self)
+        _bump(self._root)
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        _bump(self._root)
+
+    def reverse(self):
+        list.reverse(self)
+        _bump(self._root)
+
+
+# ==================== RECORDS ====================
+
+class StateRecord(MutableMapping):
+    """
+    Base of the slotted state records.
+
+    Attribute writes are tracked; the mapping interface reads and writes the
+    same fields by name.
+    """
+
+    __slots__ = ('_root',)
+    FIELD_NAMES: ClassVar[tuple] = ()  # Public fields, set by @_record
+    FIELD_SET: ClassVar[frozenset] = frozenset()
+    RECORD_FIELDS: ClassVar[Dict[str, type]] = {}  # field -> record type built from dicts
+
+    def __setattr__(self, name, value):
+        if name[0] == '_':
+            object.__setattr__(self, name, value)
+            return
+        root = getattr(self, '_root', None)
+        if type(value) not in _SCALAR_TYPES:
+            value = _attach(value, root, self.RECORD_FIELDS.get(name))
+        _set_slot(self, name, value)
+        if root is not None:
+            _set_slot(root, '_version', root._version + 1)
+
+    def _adopt(self, root) -> None:
+        object.__setattr__(self, '_root', root)
+        for name in self.field_names():
+            _attach(getattr(self, name), root)
+
+    @classmethod
+    def field_names(cls) -> tuple:
+        return cls.FIELD_NAMES
+
+    @classmethod
+    def from_dict(cls, data: Dict, root=None):
+        unknown = set(data) - cls.FIELD_SET
+        if unknown:
+            raise KeyError(f"Unknown {cls.__name__} fields: {sorted(unknown)}")
+        record = cls(**data)
+        if root is not None:
+            record._adopt(root)
+        return record
+
+    def __reduce__(self):
+        return _rebuild, (type(self), {name: getattr(self, name) for name in self.field_names()})
+
+    def to_dict(self) -> Dict:
+        return {name: _plain(getattr(self, name)) for name in self.field_names()}
+
+    # Mapping interface
+    def __getitem__(self, key):
+        if key not in self.FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELD_SET:
+            raise KeyError(f"Unknown {type(self).__name__} field: {key}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError(f"{type(self).__name__} fields cannot be deleted")
+
+    def __contains__(self, key):
+        return key in self.FIELD_SET
+
+    def __iter__(self):
+        return iter(self.field_names())
+
+    def __len__(self):
+        return len(self.field_names())
+
+
+def _record(cls):
+    """Make a StateRecord subclass a slotted dataclass"""
+    cls = dataclass(eq=False, slots=True)(cls)
+    cls.FIELD_NAMES = tuple(f.name for f in fields(cls) if not f.name.startswith('_'))
+    cls.FIELD_SET = frozenset(cls.FIELD_NAMES)
+    return cls
+
+
+@_record
+class TeamState(StateRecord):
+    players: List[int] = field(default_factory=list)
+    score: int = 0
+    name: str = ''
+
+
+@_record
+class BetState(StateRecord):
+    amount: int = 0
+    bettingTeam: Optional[str] = None
+    betType: Optional[str] = None
+    responses: Dict = field(default_factory=dict)
+    previousAmount: int = 0
+    isRaise: bool = False
+
+
+@_record
+class PhaseState(StateRecord):
+    """Betting state of one of Grande/Chica/Pares/Juego"""
+    phaseState: str = 'NO_BET'  # NO_BET, BET_PLACED, WAITING_RESPONSE, RESOLVED
+    attackingTeam: Optional[str] = None
+    defendingTeam: Optional[str] = None
+    currentBetAmount: int = 0
+    betType: Optional[str] = None  # 'envido', 'ordago'
+    lastBettingTeam: Optional[str] = None
+    defendersResponded: List[int] = field(default_factory=list)
+    allPassed: bool = True
+    result: Optional[Dict] = None  # {'winner': team, 'points': X, 'comparison': 'deferred'}
+    previousBetAmount: int = 0  # Bet amount before the current raise
+    raiseCount: int = 0  # Number of raises (for rejection logic)
+    isFirstBet: bool = True  # First bet of the phase (for the 1pt rejection rule)
+
+
+class TeamMap(TrackedDict):
+    """'team1'/'team2' -> TeamState"""
+
+    __slots__ = ()
+
+    def __init__(self, root=None, data=()):
+        super().__init__(root, {name: _attach(team, root, TeamState) for name, team in dict(data).items()})
+
+    @classmethod
+    def from_dict(cls, data: Dict, root=None):
+        return cls(root, data)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, _attach(value, self._root, TeamState))
+
+
+@_record
+class GameState(StateRecord):
+    """
+    Root of a game's state. version starts at 0 and increases with every
+    mutation of any field or nested container.
+    """
+    currentRound: str = 'MUS'
+    currentPhase: str = 'DEALING'  # DEALING -> DECLARATION -> VALIDATION -> BETTING -> RESOLUTION
+    manoIndex: int = 0
+    activePlayerIndex: int = 0
+    declarationComplete: bool = False  # Flag to track when declaration phase is done
+    teams: Dict[str, TeamState] = field(default_factory=dict)
+    currentBet: BetState = field(default_factory=BetState)
+    roundActions: Dict = field(default_factory=dict)
+    musPhaseActive: bool = True
+    cardsDiscarded: Dict = field(default_factory=dict)
+    waitingForDiscard: bool = False
+    allPlayersPassed: bool = False
+    grandePhase: Optional[PhaseState] = None  # Initialized when Grande starts
+    chicaPhase: Optional[PhaseState] = None
+    paresPhase: Optional[PhaseState] = None
+    juegoPhase: Optional[PhaseState] = None
+    deferredResults: List[Dict] = field(default_factory=list)  # Results for end-of-hand comparison
+    paresDeclarations: Dict = field(default_factory=dict)  # Player declarations for PARES round
+    juegoDeclarations: Dict = field(default_factory=dict)  # Player declarations for JUEGO round
+    entanglement_events: List = field(default_factory=list)
+    _version: int = field(default=0, init=False, repr=False)
+
+    RECORD_FIELDS: ClassVar[Dict[str, type]] = {
+        'teams': TeamMap,
+        'currentBet': BetState,
+        **{key: PhaseState for key in ROUND_PHASE_KEYS},
+    }
+
+    def __post_init__(self):
+        self._adopt(self)
+        self._version = 0
+
+    def __reduce__(self):
+        return _rebuild, (GameState, {name: getattr(self, name) for name in self.FIELD_NAMES}, self._version)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def touch(self) -> None:
+        """Bump the version for a change kept outside the state (e.g. hands)"""
+        _set_slot(self, '_version', self._version + 1)
@@ -5,6 +5,8 @@ Following traditional Mus betting rules with precise turn order and betting logi
 
 import logging
 
+from game_state import PhaseState
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,25 +27,12 @@ class GenericBettingHandler:
         Mano speaks first. No bet exists yet.
         """
         round_key = self.round_type.lower()
-        self.game.state[f'{round_key}Phase'] = {
-            'phaseState': 'NO_BET',  # NO_BET, BET_PLACED, WAITING_RESPONSE, RESOLVED
-            'attackingTeam': None,
-            'defendingTeam': None,
-            'currentBetAmount': 0,
-            'betType': None,  # 'envido', 'ordago'
-            'lastBettingTeam': None,
-            'defendersResponded': [],  # List of defender player indices who responded
-            'allPassed': True,  # Track if all players pass
-            'result': None,  # Will store: {'winner': team, 'points': X, 'comparison': 'deferred'}
-            'previousBetAmount': 0,  # Track bet amount before the current raise
-            'raiseCount': 0,  # Track number of raises (for rejection logic)
-            'isFirstBet': True  # Track if this is the first bet (for 1pt rejection rule)
-        }
+        self.game.state[f'{round_key}Phase'] = PhaseState()  # NO_BET, no attacking team yet
 
         # Active player is Mano
-        self.game.state['activePlayerIndex'] = self.game.state['manoIndex']
+        self.game.state.activePlayerIndex = self.game.state.manoIndex
 
-        logger.info(f"{self.round_type} phase initialized. Mano (Player {self.game.state['manoIndex']}) speaks first.")
+        logger.info(f"{self.round_type} phase initialized. Mano (Player {self.game.state.manoIndex}) speaks first.")
 
     def handle_action(self, player_index, action, extra_data=None):
         """
@@ -59,34 +48,34 @@ class GenericBettingHandler:
         """
 
         # Validate turn
-        if player_index != self.game.state['activePlayerIndex']:
+        if player_index != self.game.state.activePlayerIndex:
             phase = self.game.state.get(f'{self.round_type.lower()}Phase', {})
             logger.warning(
-                f"[{self.round_type}] Player {player_index} tried to act but it's Player {self.game.state['activePlayerIndex']}'s turn. "
+                f"[{self.round_type}] Player {player_index} tried to act but it's Player {self.game.state.activePlayerIndex}'s turn. "
                 f"Phase: {phase.get('phaseState')}, AttackingTeam: {phase.get('attackingTeam')}, "
                 f"DefendingTeam: {phase.get('defendingTeam')}, DefendersResponded: {phase.get('defendersResponded', [])}"
             )
-            return {'success': False, 'error': f"Not your turn (active player: {self.game.state['activePlayerIndex']})"}
+            return {'success': False, 'error': f"Not your turn (active player: {self.game.state.activePlayerIndex})"}
 
         phase = self.game.state[f'{self.round_type.lower()}Phase']
         player_team = self.game.get_player_team(player_index)
         
-        logger.info(f"[{self.round_type}] Player {player_index} (Team {player_team}) action: {action} (Phase: {phase['phaseState']})")
+        logger.info(f"[{self.round_type}] Player {player_index} (Team {player_team}) action: {action} (Phase: {phase.phaseState})")
 
         # Route to appropriate handler based on phase state
-        if phase['phaseState'] == 'NO_BET':
+        if phase.phaseState == 'NO_BET':
             return self._handle_no_bet_action(player_index, player_team, action, extra_data)
 
-        elif phase['phaseState'] in ['BET_PLACED', 'WAITING_RESPONSE']:
+        elif phase.phaseState in ['BET_PLACED', 'WAITING_RESPONSE']:
             return self._handle_response_to_bet(player_index, player_team, action, extra_data)
 
-        elif phase['phaseState'] == 'RESOLVED':
+        elif phase.phaseState == 'RESOLVED':
             # Phase already resolved, ignore action
             logger.info(f"[{self.round_type}] Phase already resolved, ignoring action from player {player_index}")
             return {'success': False, 'error': 'Round already resolved', 'already_resolved': True}
 
         else:
-            logger.error(f"[{self.round_type}] Invalid phase state: {phase['phaseState']}")
+            logger.error(f"[{self.round_type}] Invalid phase state: {phase.phaseState}")
             return {'success': False, 'error': 'Invalid phase state'}
 
     def _handle_no_bet_action(self, player_index, player_team, action, extra_data):
@@ -104,25 +93,25 @@ class GenericBettingHandler:
             next_player = self._get_next_player_counterclockwise(player_index)
 
             # Check if we've completed a full circle (back to mano)
-            if next_player == self.game.state['manoIndex'] and player_index != self.game.state['manoIndex']:
+            if next_player == self.game.state.manoIndex and player_index != self.game.state.manoIndex:
                 # All 4 players have acted
-                if phase['allPassed']:
+                if phase.allPassed:
                     # All passed - round ends with no bet, defer to scoring
                     return self._resolve_all_pass()
 
-            self.game.state['activePlayerIndex'] = next_player
+            self.game.state.activePlayerIndex = next_player
             return {'success': True, 'next_player': next_player}
 
         elif action == 'envido':
             # Place first bet
             bet_amount = extra_data.get('amount', 2) if extra_data else 2
-            phase['allPassed'] = False
+            phase.allPassed = False
 
             return self._place_bet(player_index, player_team, 'envido', bet_amount)
 
         elif action == 'ordago':
             # Place órdago bet
-            phase['allPassed'] = False
+            phase.allPassed = False
             return self._place_bet(player_index, player_team, 'ordago', 40)
 
         else:
@@ -135,20 +124,20 @@ class GenericBettingHandler:
         """
         phase = self.game.state[f'{self.round_type.lower()}Phase']
 
-        phase['phaseState'] = 'BET_PLACED'
-        phase['attackingTeam'] = betting_team
-        phase['defendingTeam'] = self.game.get_opponent_team(betting_team)
-        phase['currentBetAmount'] = bet_amount
-        phase['betType'] = bet_type
-        phase['lastBettingTeam'] = betting_team
-        phase['defendersResponded'] = []
-        phase['isFirstBet'] = False  # No longer the first bet
+        phase.phaseState = 'BET_PLACED'
+        phase.attackingTeam = betting_team
+        phase.defendingTeam = self.game.get_opponent_team(betting_team)
+        phase.currentBetAmount = bet_amount
+        phase.betType = bet_type
+        phase.lastBettingTeam = betting_team
+        phase.defendersResponded = []
+        phase.isFirstBet = False  # No longer the first bet
 
         logger.info(f"Player {player_index} ({betting_team}) placed {bet_type} bet: {bet_amount} points")
 
         # Find first defender to respond (closest counterclockwise from betting player)
         first_defender = self._get_next_defender_counterclockwise(player_index)
-        self.game.state['activePlayerIndex'] = first_defender
+        self.game.state.activePlayerIndex = first_defender
 
         return {
             'success': True,
@@ -168,35 +157,35 @@ class GenericBettingHandler:
         phase = self.game.state[f'{self.round_type.lower()}Phase']
 
         # Verify this player is on the defending team
-        if player_team != phase['defendingTeam']:
+        if player_team != phase.defendingTeam:
             return {'success': False, 'error': 'Only defending team can respond to bet'}
 
-        defending_team = phase['defendingTeam']
-        defending_players = self.game.state['teams'][defending_team]['players']
+        defending_team = phase.defendingTeam
+        defending_players = self.game.state.teams[defending_team].players
 
         if action == 'paso':
             # Reject the bet
             logger.info(f"Player {player_index} (Team {player_team}) rejects the bet in {self.round_type}")
             
             # Add to responded list if not already there
-            if player_index not in phase['defendersResponded']:
-                phase['defendersResponded'].append(player_index)
+            if player_index not in phase.defendersResponded:
+                phase.defendersResponded.append(player_index)
 
             # Check if both defenders have rejected
-            if len(phase['defendersResponded']) >= 2:
+            if len(phase.defendersResponded) >= 2:
                 # Both defenders rejected - attacking team wins 1 point
-                logger.info(f"Both defenders rejected in {self.round_type}. {phase['lastBettingTeam']} wins 1 point.")
-                return self._resolve_rejection(phase['lastBettingTeam'])
+                logger.info(f"Both defenders rejected in {self.round_type}. {phase.lastBettingTeam} wins 1 point.")
+                return self._resolve_rejection(phase.lastBettingTeam)
 
             # First defender rejected, check partner
             partner_index = self._get_partner(player_index)
             logger.info(f"First defender (Player {player_index}) rejected in {self.round_type}. Partner is Player {partner_index}.")
 
-            if partner_index not in phase['defendersResponded']:
+            if partner_index not in phase.defendersResponded:
                 # Partner hasn't responded yet, give them a chance
                 # Keep phase state as WAITING_RESPONSE to indicate we're waiting for partner
-                phase['phaseState'] = 'WAITING_RESPONSE'
-                self.game.state['activePlayerIndex'] = partner_index
+                phase.phaseState = 'WAITING_RESPONSE'
+                self.game.state.activePlayerIndex = partner_index
                 logger.info(f"Setting active player to partner (Player {partner_index}) in {self.round_type} - they must respond now.")
 
                 return {
@@ -210,7 +199,7 @@ class GenericBettingHandler:
             else:
                 # Partner already rejected - both rejected
                 logger.info(f"Partner (Player {partner_index}) already rejected in {self.round_type}. Both defenders rejected.")
-                return self._resolve_rejection(phase['lastBettingTeam'])
+                return self._resolve_rejection(phase.lastBettingTeam)
 
         elif action == 'accept':
             # Accept the bet
@@ -219,7 +208,7 @@ class GenericBettingHandler:
 
         elif action == 'envido':
             # Raise the bet
-            new_bet_amount = extra_data.get('amount', phase['currentBetAmount'] + 2) if extra_data else phase['currentBetAmount'] + 2
+            new_bet_amount = extra_data.get('amount', phase.currentBetAmount + 2) if extra_data else phase.currentBetAmount + 2
             return self._handle_raise(player_index, player_team, new_bet_amount)
 
         elif action == 'ordago':
@@ -237,27 +226,27 @@ class GenericBettingHandler:
         phase = self.game.state[f'{self.round_type.lower()}Phase']
 
         # Save current bet amount as previous (before this raise)
-        phase['previousBetAmount'] = phase['currentBetAmount']
-        phase['raiseCount'] = phase.get('raiseCount', 0) + 1
-        logger.info(f"Saving previous bet amount: {phase['currentBetAmount']}, raise count: {phase['raiseCount']}")
+        phase.previousBetAmount = phase.currentBetAmount
+        phase.raiseCount = phase.get('raiseCount', 0) + 1
+        logger.info(f"Saving previous bet amount: {phase.currentBetAmount}, raise count: {phase.raiseCount}")
 
         # Update bet
-        phase['currentBetAmount'] = new_bet_amount
-        phase['betType'] = 'ordago' if is_ordago else 'envido'
+        phase.currentBetAmount = new_bet_amount
+        phase.betType = 'ordago' if is_ordago else 'envido'
 
         # Switch roles: raising team becomes attacking, other becomes defending
-        old_attacking_team = phase['attackingTeam']
-        phase['attackingTeam'] = raising_team
-        phase['defendingTeam'] = old_attacking_team
-        phase['lastBettingTeam'] = raising_team
-        phase['defendersResponded'] = []  # Reset defenders list for new bet
-        phase['phaseState'] = 'BET_PLACED'  # New bet placed, waiting for response
+        old_attacking_team = phase.attackingTeam
+        phase.attackingTeam = raising_team
+        phase.defendingTeam = old_attacking_team
+        phase.lastBettingTeam = raising_team
+        phase.defendersResponded = []  # Reset defenders list for new bet
+        phase.phaseState = 'BET_PLACED'  # New bet placed, waiting for response
 
         logger.info(f"Player {player_index} (Team {raising_team}) raises to {new_bet_amount} in {self.round_type} ({'ÓRDAGO' if is_ordago else 'ENVIDO'})")
 
         # Find first defender from new defending team (counterclockwise from raiser)
         first_defender = self._get_next_defender_counterclockwise(player_index)
-        self.game.state['activePlayerIndex'] = first_defender
+        self.game.state.activePlayerIndex = first_defender
         logger.info(f"After raise in {self.round_type}, first defender is Player {first_defender} (Team {old_attacking_team})")
 
         return {
@@ -280,7 +269,7 @@ class GenericBettingHandler:
         Round phase ends.
         """
         phase = self.game.state[f'{self.round_type.lower()}Phase']
-        phase['phaseState'] = 'RESOLVED'
+        phase.phaseState = 'RESOLVED'
         
         raise_count = phase.get('raiseCount', 0)
         
@@ -296,7 +285,7 @@ class GenericBettingHandler:
                 points_awarded = 1  # Safety fallback
             logger.info(f"Bet rejected after {raise_count} raise(s) in {self.round_type} - awarding previous bet amount: {points_awarded}")
         
-        phase['result'] = {
+        phase.result = {
             'winner': winning_team,
             'points': points_awarded,
             'reason': 'rejection',
@@ -304,7 +293,7 @@ class GenericBettingHandler:
         }
 
         # Award points immediately
-        self.game.state['teams'][winning_team]['score'] += points_awarded
+        self.game.state.teams[winning_team].score += points_awarded
 
         logger.info(f"{winning_team} wins {points_awarded} points (both defenders rejected)")
 
@@ -324,60 +313,23 @@ class GenericBettingHandler:
         - If normal bet: Round phase ends, hand comparison is DEFERRED until after all 4 phases.
         """
         phase = self.game.state[f'{self.round_type.lower()}Phase']
-        phase['phaseState'] = 'RESOLVED'
+        phase.phaseState = 'RESOLVED'
 
         # Check if this is an ordago (all-in bet)
-        is_ordago = phase['betType'] == 'ordago'
+        is_ordago = phase.betType == 'ordago'
         
         if is_ordago:
             # ORDAGO: Immediate resolution - game ends now
-            # Get best cards from each team for this round
-            from card_deck import get_highest_card, get_lowest_card, compare_cards
-            
-            team1_cards = []
-            team2_cards = []
-            
-            for player_idx, hand in self.game.hands.items():
-                if player_idx in self.game.state['teams']['team1']['players']:
-                    team1_cards.extend([card.to_dict() for card in hand])
-                else:
-                    team2_cards.extend([card.to_dict() for card in hand])
-            
             winner_team = None
             
-            if self.round_type == 'GRANDE':
-                # Higher cards win
-                team1_best = get_highest_card(team1_cards, self.game.game_mode)
-                team2_best = get_highest_card(team2_cards, self.game.game_mode)
-                
-                # Default to 'A' (Ace) if no cards found - shouldn't happen in normal gameplay
-                result = compare_cards(
-                    team1_best['value'] if team1_best else 'A',
-                    team2_best['value'] if team2_best else 'A',
-                    self.game.game_mode
-                )
+            if self.round_type in ('GRANDE', 'CHICA'):
+                # Best (GRANDE) or lowest (CHICA) card of each team
+                result = self.game.hand_summaries.compare(self.round_type)
                 
-                # Ties go to team1 for GRANDE ordago resolution
+                # Ties go to team1 for GRANDE/CHICA ordago resolution
                 # (In normal deferred resolution, ties go to Mano's team)
                 winner_team = 'team1' if result >= 0 else 'team2'
                 
-            elif self.round_type == 'CHICA':
-                # Lower cards win
-                team1_best = get_lowest_card(team1_cards, self.game.game_mode)
-                team2_best = get_lowest_card(team2_cards, self.game.game_mode)
-                
-                # Default to 'K' (King - highest card) for CHICA fallback
-                # In CHICA, lower is better, so defaulting to highest card (worst possible)
-                result = compare_cards(
-                    team1_best['value'] if team1_best else 'K',
-                    team2_best['value'] if team2_best else 'K',
-                    self.game.game_mode,
-                    lower_wins=True
-                )
-                
-                # Ties go to team1 for CHICA ordago resolution
-                winner_team = 'team1' if result >= 0 else 'team2'
-                
             elif self.round_type == 'PARES':
                 # Pairs scoring
                 winner_team = self._compare_pares_hands()
@@ -387,9 +339,9 @@ class GenericBettingHandler:
                 winner_team = self._compare_juego_hands()
             
             # Award 40 points immediately (ordago value)
-            self.game.state['teams'][winner_team]['score'] += 40
+            self.game.state.teams[winner_team].score += 40
             
-            phase['result'] = {
+            phase.result = {
                 'winner': winner_team,
                 'points': 40,
                 'betType': 'ordago',
@@ -408,8 +360,8 @@ class GenericBettingHandler:
                 'bet_accepted': True,
                 'bet_amount': 40,
                 'bet_type': 'ordago',
-                'attacking_team': phase['attackingTeam'],
-                'defending_team': phase['defendingTeam'],
+                'attacking_team': phase.attackingTeam,
+                'defending_team': phase.defendingTeam,
                 'reveal_cards': True,
                 'collapse_all_cards': True,
                 'card_info': card_info,
@@ -420,11 +372,11 @@ class GenericBettingHandler:
             }
         else:
             # Normal bet: Store the bet for later comparison (deferred)
-            phase['result'] = {
-                'attackingTeam': phase['attackingTeam'],
-                'defendingTeam': phase['defendingTeam'],
-                'betAmount': phase['currentBetAmount'],
-                'betType': phase['betType'],
+            phase.result = {
+                'attackingTeam': phase.attackingTeam,
+                'defendingTeam': phase.defendingTeam,
+                'betAmount': phase.currentBetAmount,
+                'betType': phase.betType,
                 'comparison': 'deferred',
                 'resolved': False
             }
@@ -432,15 +384,15 @@ class GenericBettingHandler:
             # Get card information for revelation (without determining winner yet)
             card_info = self._get_round_card_info()
 
-            logger.info(f"Bet accepted. {phase['currentBetAmount']} points at stake. Comparison deferred.")
+            logger.info(f"Bet accepted. {phase.currentBetAmount} points at stake. Comparison deferred.")
 
             return {
                 'success': True,
                 'round_ended': True,
                 'bet_accepted': True,
-                'bet_amount': phase['currentBetAmount'],
-                'attacking_team': phase['attackingTeam'],
-                'defending_team': phase['defendingTeam'],
+                'bet_amount': phase.currentBetAmount,
+                'attacking_team': phase.attackingTeam,
+                'defending_team': phase.defendingTeam,
                 'comparison_deferred': True,
                 'move_to_next_round': True,
                 'reveal_cards': True,
@@ -454,8 +406,8 @@ class GenericBettingHandler:
         Comparison is deferred.
         """
         phase = self.game.state[f'{self.round_type.lower()}Phase']
-        phase['phaseState'] = 'RESOLVED'
-        phase['result'] = {
+        phase.phaseState = 'RESOLVED'
+        phase.result = {
             'betAmount': 1,
             'comparison': 'deferred',
             'allPassed': True,
@@ -490,8 +442,8 @@ class GenericBettingHandler:
         Search counterclockwise until we find a player on the defending team.
         """
         phase = self.game.state[f'{self.round_type.lower()}Phase']
-        defending_team = phase['defendingTeam']
-        defending_players = self.game.state['teams'][defending_team]['players']
+        defending_team = phase.defendingTeam
+        defending_players = self.game.state.teams[defending_team].players
 
         # Start from next player counterclockwise
         check_player = self._get_next_player_counterclockwise(current_player)
@@ -510,8 +462,8 @@ class GenericBettingHandler:
         Get the first team member counterclockwise/right from Mano.
         Used when finding who should respond after a raise.
         """
-        team_players = self.game.state['teams'][team]['players']
-        mano = self.game.state['manoIndex']
+        team_players = self.game.state.teams[team].players
+        mano = self.game.state.manoIndex
 
         # Check in counterclockwise/right order starting from mano
         for offset in range(4):
@@ -525,7 +477,7 @@ class GenericBettingHandler:
     def _get_partner(self, player_index):
         """Get the partner of a player (same team, different player)"""
         player_team = self.game.get_player_team(player_index)
-        team_players = self.game.state['teams'][player_team]['players']
+        team_players = self.game.state.teams[player_team].players
 
         for p in team_players:
             if p != player_index:
@@ -535,35 +487,23 @@ class GenericBettingHandler:
 
     def _get_round_card_info(self):
         """Get card information for the current round type"""
-        from card_deck import get_highest_card, get_lowest_card
-        
+        if self.round_type in ('GRANDE', 'CHICA'):
+            # Lowest card of each team for CHICA, highest for GRANDE
+            return self.game.hand_summaries.best_cards(self.round_type)
+
+        # For PARES and JUEGO, return all cards
         team1_cards = []
         team2_cards = []
         
         for player_idx, hand in self.game.hands.items():
-            if player_idx in self.game.state['teams']['team1']['players']:
+            if player_idx in self.game.state.teams['team1'].players:
                 team1_cards.extend([card.to_dict() for card in hand])
             else:
                 team2_cards.extend([card.to_dict() for card in hand])
         
-        if self.round_type == 'CHICA':
-            # Lower cards win in CHICA
-            team1_best = get_lowest_card(team1_cards, self.game.game_mode)
-            team2_best = get_lowest_card(team2_cards, self.game.game_mode)
-        elif self.round_type == 'GRANDE':
-            # Higher cards win in GRANDE (shouldn't happen here, but included for completeness)
-            team1_best = get_highest_card(team1_cards, self.game.game_mode)
-            team2_best = get_highest_card(team2_cards, self.game.game_mode)
-        else:
-            # For PARES and JUEGO, return all cards
-            return {
-                'team1_cards': team1_cards,
-                'team2_cards': team2_cards
-            }
-        
         return {
-            'team1_best': team1_best,
-            'team2_best': team2_best
+            'team1_cards': team1_cards,
+            'team2_cards': team2_cards
         }
 
     def compare_and_resolve_round(self):
@@ -573,53 +513,16 @@ class GenericBettingHandler:
         """
         phase = self.game.state[f'{self.round_type.lower()}Phase']
 
-        if phase['result']['resolved']:
+        if phase.result['resolved']:
             return None  # Already resolved
 
-        if phase['result'].get('reason') == 'rejection':
+        if phase.result.get('reason') == 'rejection':
             return None  # Already scored
 
-        # Get best cards from each team for this round
-        from card_deck import get_highest_card, get_lowest_card
-
-        team1_cards = []
-        team2_cards = []
-
-        for player_idx, hand in self.game.hands.items():
-            if player_idx in self.game.state['teams']['team1']['players']:
-                team1_cards.extend([card.to_dict() for card in hand])
-            else:
-                team2_cards.extend([card.to_dict() for card in hand])
-
         winner_team = None
 
-        if self.round_type == 'GRANDE':
-            # Higher cards win
-            team1_best = get_highest_card(team1_cards, self.game.game_mode)
-            team2_best = get_highest_card(team2_cards, self.game.game_mode)
-
-            from card_deck import compare_cards
-            result = compare_cards(
-                team1_best['value'] if team1_best else 'A',
-                team2_best['value'] if team2_best else 'A',
-                self.game.game_mode
-            )
-
-            winner_team = 'team1' if result >= 0 else 'team2'
-
-        elif self.round_type == 'CHICA':
-            # Lower cards win
-            team1_best = get_lowest_card(team1_cards, self.game.game_mode)
-            team2_best = get_lowest_card(team2_cards, self.game.game_mode)
-
-            from card_deck import compare_cards
-            result = compare_cards(
-                team1_best['value'] if team1_best else 'K',
-                team2_best['value'] if team2_best else 'K',
-                self.game.game_mode,
-                lower_wins=True
-            )
-
+        if self.round_type in ('GRANDE', 'CHICA'):
+            result = self.game.hand_summaries.compare(self.round_type)
             winner_team = 'team1' if result >= 0 else 'team2'
 
         elif self.round_type == 'PARES':
@@ -631,12 +534,12 @@ class GenericBettingHandler:
             winner_team = self._compare_juego_hands()
 
         # Award points
-        points = phase['result'].get('betAmount', 1)
-        self.game.state['teams'][winner_team]['score'] += points
+        points = phase.result.get('betAmount', 1)
+        self.game.state.teams[winner_team].score += points
 
-        phase['result']['winner'] = winner_team
-        phase['result']['points'] = points
-        phase['result']['resolved'] = True
+        phase.result['winner'] = winner_team
+        phase.result['points'] = points
+        phase.result['resolved'] = True
 
         logger.info(f"{winner_team} wins {points} points in {self.round_type}")
 
@@ -647,137 +550,17 @@ class GenericBettingHandler:
         }
 
     def _compare_pares_hands(self):
-        """Compare PARES hands between teams"""
-        # Get pairs for each team
-        team1_pairs = self._get_team_pares('team1')
-        team2_pairs = self._get_team_pares('team2')
-
-        # Compare pair ranks
-        if team1_pairs['rank'] > team2_pairs['rank']:
-            return 'team1'
-        elif team2_pairs['rank'] > team1_pairs['rank']:
-            return 'team2'
-        else:
-            # Tie - compare highest cards in pairs
-            team1_high = max(team1_pairs['values']) if team1_pairs['values'] else 0
-            team2_high = max(team2_pairs['values']) if team2_pairs['values'] else 0
-
-            if team1_high > team2_high:
-                return 'team1'
-            elif team2_high > team1_high:
-                return 'team2'
-            else:
-                # Complete tie - Mano's team wins
-                mano_team = self.game.get_player_team(self.game.state['manoIndex'])
-                return mano_team
-
-    def _get_team_pares(self, team):
-        """Get the best PARES for a team"""
-        team_players = self.game.state['teams'][team]['players']
-        all_cards = []
-
-        for player_idx in team_players:
-            all_cards.extend([card.to_dict() for card in self.game.hands[player_idx]])
-
-        # Calculate pairs
-        pares_result = self._calculate_pares(all_cards)
-        return pares_result
-
-    def _calculate_pares(self, cards):
-        """Calculate PARES from cards"""
-        game_mode = self.game.game_mode
-
-        # For PARES, do NOT normalize values - cards must match physically
-        # A 3 and a K are different cards (even though 3=K for GRANDE/CHICA)
-        # An A and a 2 are different cards
-        value_counts = {}
-        for card in cards:
-            value = card['value']  # Use actual card value, no normalization
-            value_counts[value] = value_counts.get(value, 0) + 1
-
-        # Sort counts in descending order
-        counts = sorted(value_counts.values(), reverse=True)
-        values = list(value_counts.keys())
-
-        if len(counts) > 0 and counts[0] == 3:
-            # Triplet
-            triplet_value = next(v for v in values if value_counts[v] == 3)
-            return {'type': 'triplet', 'value': triplet_value, 'rank': 2, 'values': [triplet_value]}
-        elif len(counts) > 1 and counts[0] == 2 and counts[1] == 2:
-            # Double pair
-            order = ['A', '2', '4', '5', '6', '7', 'J', 'Q', 'K'] if game_mode == '8' else ['A', '2', '3', '4', '5', '6', '7', 'J', 'Q', 'K']
-            pair_values = [v for v in values if value_counts[v] == 2]
-            pair_values.sort(key=lambda x: order.index(x) if x in order else -1, reverse=True)
-            return {'type': 'double_pair', 'value': pair_values[0], 'rank': 3, 'values': pair_values}
-        elif len(counts) > 0 and counts[0] == 2:
-            # Single pair
-            pair_value = next(v for v in values if value_counts[v] == 2)
-            return {'type': 'pair', 'value': pair_value, 'rank': 1, 'values': [pair_value]}
-
-        return {'type': 'none', 'rank': 0, 'values': []}
+        """Compare PARES hands between teams (pooled team cards, matching physically; ties to Mano's team)"""
+        return self._winner_or_mano(self.game.hand_summaries.compare('PARES'))
 
     def _compare_juego_hands(self):
-        """Compare JUEGO hands between teams"""
-        # Get juego points for each team
-        team1_juego = self._get_team_juego('team1')
-        team2_juego = self._get_team_juego('team2')
+        """Compare JUEGO hands between teams (higher pooled point sum; ties to Mano's team)"""
+        return self._winner_or_mano(self.game.hand_summaries.compare('JUEGO'))
 
-        # Compare total points
-        if team1_juego['sum'] > team2_juego['sum']:
+    def _winner_or_mano(self, result):
+        if result > 0:
             return 'team1'
-        elif team2_juego['sum'] > team1_juego['sum']:
+        if result < 0:
             return 'team2'
-        else:
-            # Tie - Mano's team wins
-            mano_team = self.game.get_player_team(self.game.state['manoIndex'])
-            return mano_team
-
-    def _get_team_juego(self, team):
-        """Get the JUEGO points for a team"""
-        team_players = self.game.state['teams'][team]['players']
-        all_cards = []
-
-        for player_idx in team_players:
-            all_cards.extend([card.to_dict() for card in self.game.hands[player_idx]])
-
-        # Calculate juego
-        juego_result = self._calculate_juego(all_cards)
-        return juego_result
-
-    def _calculate_juego(self, cards):
-        """Calculate JUEGO points from cards"""
-        game_mode = self.game.game_mode
-
-        def get_card_points(val):
-            if val == 'A':
-                return 1
-            elif val == '2':
-                return 1
-            elif val == '3':
-                return 3 if game_mode == '4' else 10
-            elif val in ['J', 'Q', 'K']:
-                return 10
-            else:
-                try:
-                    return int(val)
-                except ValueError:
-                    return 0
-
-        sum_points = sum(get_card_points(card['value']) for card in cards)
-
-        has_juego = sum_points >= 31
-        if has_juego:
-            if sum_points == 31:
-                rank = 100
-            elif sum_points == 40:
-                rank = 99
-            else:
-                rank = 100 - sum_points + 31
-        else:
-            rank = 30 - sum_points
-
-        return {
-            'sum': sum_points,
-            'hasJuego': has_juego,
-            'rank': rank
-        }
+        # Complete tie - Mano's team wins
+        return self.game.get_player_team(self.game.state.manoIndex)
@@ -5,6 +5,8 @@ Following traditional Mus "Grande" phase rules with precise turn order and betti
 
 import logging
 
+from game_state import PhaseState
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,25 +27,12 @@ class GrandeBettingHandler:
         Initialize the Grande phase.
         Mano speaks first. No bet exists yet.
         """
-        self.game.state['grandePhase'] = {
-            'phaseState': 'NO_BET',  # NO_BET, BET_PLACED, WAITING_RESPONSE, RESOLVED
-            'attackingTeam': None,
-            'defendingTeam': None,
-            'currentBetAmount': 0,
-            'betType': None,  # 'envido', 'ordago'
-            'lastBettingTeam': None,
-            'defendersResponded': [],  # List of defender player indices who responded
-            'allPassed': True,  # Track if all players pass
-            'result': None,  # Will store: {'winner': team, 'points': X, 'comparison': 'deferred'}
-            'previousBetAmount': 0,  # Track bet amount before the current raise
-            'raiseCount': 0,  # Track number of raises (for rejection logic)
-            'isFirstBet': True  # Track if this is the first bet (for 1pt rejection rule)
-        }
+        self.game.state.grandePhase = PhaseState()  # NO_BET, no attacking team yet
         
         # Active player is Mano
-        self.game.state['activePlayerIndex'] = self.game.state['manoIndex']
+        self.game.state.activePlayerIndex = self.game.state.manoIndex
         
-        logger.info(f"Grande phase initialized. Mano (Player {self.game.state['manoIndex']}) speaks first.")
+        logger.info(f"Grande phase initialized. Mano (Player {self.game.state.manoIndex}) speaks first.")
     
     def handle_action(self, player_index, action, extra_data=None):
         """
@@ -59,34 +48,34 @@ class GrandeBettingHandler:
         """
         
         # Validate turn
-        if player_index != self.game.state['activePlayerIndex']:
+        if player_index != self.game.state.activePlayerIndex:
             phase = self.game.state.get('grandePhase', {})
             logger.warning(
-                f"[GRANDE] Player {player_index} tried to act but it's Player {self.game.state['activePlayerIndex']}'s turn. "
+                f"[GRANDE] Player {player_index} tried to act but it's Player {self.game.state.activePlayerIndex}'s turn. "
                 f"Phase: {phase.get('phaseState')}, AttackingTeam: {phase.get('attackingTeam')}, "
                 f"DefendingTeam: {phase.get('defendingTeam')}, DefendersResponded: {phase.get('defendersResponded', [])}"
             )
-            return {'success': False, 'error': f"Not your turn (active player: {self.game.state['activePlayerIndex']})"}
+            return {'success': False, 'error': f"Not your turn (active player: {self.game.state.activePlayerIndex})"}
         
-        phase = self.game.state['grandePhase']
+        phase = self.game.state.grandePhase
         player_team = self.game.get_player_team(player_index)
         
-        logger.info(f"[GRANDE] Player {player_index} (Team {player_team}) action: {action} (Phase: {phase['phaseState']})")
+        logger.info(f"[GRANDE] Player {player_index} (Team {player_team}) action: {action} (Phase: {phase.phaseState})")
         
         # Route to appropriate handler based on phase state
-        if phase['phaseState'] == 'NO_BET':
+        if phase.phaseState == 'NO_BET':
             return self._handle_no_bet_action(player_index, player_team, action, extra_data)
         
-        elif phase['phaseState'] in ['BET_PLACED', 'WAITING_RESPONSE']:
+        elif phase.phaseState in ['BET_PLACED', 'WAITING_RESPONSE']:
             return self._handle_response_to_bet(player_index, player_team, action, extra_data)
         
-        elif phase['phaseState'] == 'RESOLVED':
+        elif phase.phaseState == 'RESOLVED':
             # Phase already resolved, ignore action
             logger.info(f"[GRANDE] Phase already resolved, ignoring action from player {player_index}")
             return {'success': False, 'error': 'Round already resolved', 'already_resolved': True}
         
         else:
-            logger.error(f"[GRANDE] Invalid phase state: {phase['phaseState']}")
+            logger.error(f"[GRANDE] Invalid phase state: {phase.phaseState}")
             return {'success': False, 'error': 'Invalid phase state'}
     
     def _handle_no_bet_action(self, player_index, player_team, action, extra_data):
@@ -94,7 +83,7 @@ class GrandeBettingHandler:
         Handle action when NO_BET has been placed yet.
         Players can: pass (check) or place a bet (envido/órdago)
         """
-        phase = self.game.state['grandePhase']
+        phase = self.game.state.grandePhase
         
         if action == 'paso':
             # Player passes (checks)
@@ -104,25 +93,25 @@ class GrandeBettingHandler:
             next_player = self._get_next_player_clockwise(player_index)
             
             # Check if we've completed a full circle (back to mano)
-            if next_player == self.game.state['manoIndex'] and player_index != self.game.state['manoIndex']:
+            if next_player == self.game.state.manoIndex and player_index != self.game.state.manoIndex:
                 # All 4 players have acted
-                if phase['allPassed']:
+                if phase.allPassed:
                     # All passed - Grande ends with no bet, defer to scoring
                     return self._resolve_all_pass()
             
-            self.game.state['activePlayerIndex'] = next_player
+            self.game.state.activePlayerIndex = next_player
             return {'success': True, 'next_player': next_player}
         
         elif action == 'envido':
             # Place first bet
             bet_amount = extra_data.get('amount', 2) if extra_data else 2
-            phase['allPassed'] = False
+            phase.allPassed = False
             
             return self._place_bet(player_index, player_team, 'envido', bet_amount)
         
         elif action == 'ordago':
             # Place órdago bet
-            phase['allPassed'] = False
+            phase.allPassed = False
             return self._place_bet(player_index, player_team, 'ordago', 40)
         
         else:
@@ -133,22 +122,22 @@ class GrandeBettingHandler:
         Place a bet (first bet or raise).
         The betting team becomes the attacking team.
         """
-        phase = self.game.state['grandePhase']
+        phase = self.game.state.grandePhase
         
-        phase['phaseState'] = 'BET_PLACED'
-        phase['attackingTeam'] = betting_team
-        phase['defendingTeam'] = self.game.get_opponent_team(betting_team)
-        phase['currentBetAmount'] = bet_amount
-        phase['betType'] = bet_type
-        phase['lastBettingTeam'] = betting_team
-        phase['defendersResponded'] = []
-        phase['isFirstBet'] = False  # No longer the first bet
+        phase.phaseState = 'BET_PLACED'
+        phase.attackingTeam = betting_team
+        phase.defendingTeam = self.game.get_opponent_team(betting_team)
+        phase.currentBetAmount = bet_amount
+        phase.betType = bet_type
+        phase.lastBettingTeam = betting_team
+        phase.defendersResponded = []
+        phase.isFirstBet = False  # No longer the first bet
         
         logger.info(f"Player {player_index} ({betting_team}) placed {bet_type} bet: {bet_amount} points")
         
         # Find first defender to respond (closest to Mano counterclockwise/right who is on defending team)
         first_defender = self._get_next_defender_clockwise(player_index)
-        self.game.state['activePlayerIndex'] = first_defender
+        self.game.state.activePlayerIndex = first_defender
         
         return {
             'success': True,
@@ -165,38 +154,38 @@ class GrandeBettingHandler:
         Handle a defender's response to a bet.
         Defender can: reject (paso), accept (implicit), raise (envido), or órdago
         """
-        phase = self.game.state['grandePhase']
+        phase = self.game.state.grandePhase
         
         # Verify this player is on the defending team
-        if player_team != phase['defendingTeam']:
+        if player_team != phase.defendingTeam:
             return {'success': False, 'error': 'Only defending team can respond to bet'}
         
-        defending_team = phase['defendingTeam']
-        defending_players = self.game.state['teams'][defending_team]['players']
+        defending_team = phase.defendingTeam
+        defending_players = self.game.state.teams[defending_team].players
         
         if action == 'paso':
             # Reject the bet
             logger.info(f"Player {player_index} (Team {player_team}) rejects the bet")
             
             # Add to responded list if not already there
-            if player_index not in phase['defendersResponded']:
-                phase['defendersResponded'].append(player_index)
+            if player_index not in phase.defendersResponded:
+                phase.defendersResponded.append(player_index)
             
             # Check if both defenders have rejected
-            if len(phase['defendersResponded']) >= 2:
+            if len(phase.defendersResponded) >= 2:
                 # Both defenders rejected - attacking team wins 1 point
-                logger.info(f"Both defenders rejected. {phase['lastBettingTeam']} wins 1 point.")
-                return self._resolve_rejection(phase['lastBettingTeam'])
+                logger.info(f"Both defenders rejected. {phase.lastBettingTeam} wins 1 point.")
+                return self._resolve_rejection(phase.lastBettingTeam)
             
             # First defender rejected, check partner
             partner_index = self._get_partner(player_index)
             logger.info(f"First defender (Player {player_index}) rejected. Partner is Player {partner_index}.")
             
-            if partner_index not in phase['defendersResponded']:
+            if partner_index not in phase.defendersResponded:
                 # Partner hasn't responded yet, give them a chance
                 # Keep phase state as WAITING_RESPONSE to indicate we're waiting for partner
-                phase['phaseState'] = 'WAITING_RESPONSE'
-                self.game.state['activePlayerIndex'] = partner_index
+                phase.phaseState = 'WAITING_RESPONSE'
+                self.game.state.activePlayerIndex = partner_index
                 logger.info(f"Setting active player to partner (Player {partner_index}) - they must respond now.")
                 
                 return {
@@ -210,7 +199,7 @@ class GrandeBettingHandler:
             else:
                 # Partner already rejected - both rejected
                 logger.info(f"Partner (Player {partner_index}) already rejected. Both defenders rejected.")
-                return self._resolve_rejection(phase['lastBettingTeam'])
+                return self._resolve_rejection(phase.lastBettingTeam)
         
         elif action == 'accept':
             # Accept the bet
@@ -219,7 +208,7 @@ class GrandeBettingHandler:
         
         elif action == 'envido':
             # Raise the bet
-            new_bet_amount = extra_data.get('amount', phase['currentBetAmount'] + 2) if extra_data else phase['currentBetAmount'] + 2
+            new_bet_amount = extra_data.get('amount', phase.currentBetAmount + 2) if extra_data else phase.currentBetAmount + 2
             return self._handle_raise(player_index, player_team, new_bet_amount)
         
         elif action == 'ordago':
@@ -234,30 +223,30 @@ class GrandeBettingHandler:
         Handle a raise (re-envido or órdago response).
         Control switches back to the original betting team.
         """
-        phase = self.game.state['grandePhase']
+        phase = self.game.state.grandePhase
         
         # Save current bet amount as previous (before this raise)
-        phase['previousBetAmount'] = phase['currentBetAmount']
-        phase['raiseCount'] = phase.get('raiseCount', 0) + 1
-        logger.info(f"Saving previous bet amount: {phase['currentBetAmount']}, raise count: {phase['raiseCount']}")
+        phase.previousBetAmount = phase.currentBetAmount
+        phase.raiseCount = phase.get('raiseCount', 0) + 1
+        logger.info(f"Saving previous bet amount: {phase.currentBetAmount}, raise count: {phase.raiseCount}")
         
         # Update bet
-        phase['currentBetAmount'] = new_bet_amount
-        phase['betType'] = 'ordago' if is_ordago else 'envido'
+        phase.currentBetAmount = new_bet_amount
+        phase.betType = 'ordago' if is_ordago else 'envido'
         
         # Switch roles: raising team becomes attacking, other becomes defending
-        old_attacking_team = phase['attackingTeam']
-        phase['attackingTeam'] = raising_team
-        phase['defendingTeam'] = old_attacking_team
-        phase['lastBettingTeam'] = raising_team
-        phase['defendersResponded'] = []  # Reset defenders list for new bet
-        phase['phaseState'] = 'BET_PLACED'  # New bet placed, waiting for response
+        old_attacking_team = phase.attackingTeam
+        phase.attackingTeam = raising_team
+        phase.defendingTeam = old_attacking_team
+        phase.lastBettingTeam = raising_team
+        phase.defendersResponded = []  # Reset defenders list for new bet
+        phase.phaseState = 'BET_PLACED'  # New bet placed, waiting for response
         
         logger.info(f"Player {player_index} (Team {raising_team}) raises to {new_bet_amount} ({'ÓRDAGO' if is_ordago else 'ENVIDO'})")
         
         # Find first defender from new defending team (closest counterclockwise/right from raiser)
         first_defender = self._get_next_defender_clockwise(player_index)
-        self.game.state['activePlayerIndex'] = first_defender
+        self.game.state.activePlayerIndex = first_defender
         logger.info(f"After raise, first defender is Player {first_defender} (Team {old_attacking_team})")
         
         return {
@@ -279,8 +268,8 @@ class GrandeBettingHandler:
         - Any raise rejected: award the bet before the last raise (previousBetAmount)
         Grande phase ends.
         """
-        phase = self.game.state['grandePhase']
-        phase['phaseState'] = 'RESOLVED'
+        phase = self.game.state.grandePhase
+        phase.phaseState = 'RESOLVED'
         
         raise_count = phase.get('raiseCount', 0)
         
@@ -296,7 +285,7 @@ class GrandeBettingHandler:
                 points_awarded = 1  # Safety fallback
             logger.info(f"Bet rejected after {raise_count} raise(s) - awarding previous bet amount: {points_awarded}")
         
-        phase['result'] = {
+        phase.result = {
             'winner': winning_team,
             'points': points_awarded,
             'reason': 'rejection',
@@ -304,7 +293,7 @@ class GrandeBettingHandler:
         }
         
         # Award points immediately
-        self.game.state['teams'][winning_team]['score'] += points_awarded
+        self.game.state.teams[winning_team].score += points_awarded
         
         logger.info(f"{winning_team} wins {points_awarded} points (both defenders rejected)")
         
@@ -324,36 +313,17 @@ class GrandeBettingHandler:
         - If ordago (40 points): Game ends immediately, cards collapse, winner determined
         - If normal bet: Grande phase ends, hand comparison is DEFERRED until after all 4 phases.
         """
-        from card_deck import get_highest_card, compare_cards
-        
-        phase = self.game.state['grandePhase']
-        phase['phaseState'] = 'RESOLVED'
+        phase = self.game.state.grandePhase
+        phase.phaseState = 'RESOLVED'
         
         # Check if this is an ordago (all-in bet)
-        is_ordago = phase['betType'] == 'ordago'
+        is_ordago = phase.betType == 'ordago'
         
         if is_ordago:
             # ORDAGO: Immediate resolution - game ends now
-            # Get best cards from each team for Grande
-            team1_cards = []
-            team2_cards = []
-            
-            for player_idx, hand in self.game.hands.items():
-                if player_idx in self.game.state['teams']['team1']['players']:
-                    team1_cards.extend([card.to_dict() for card in hand])
-                else:
-                    team2_cards.extend([card.to_dict() for card in hand])
-            
-            team1_best = get_highest_card(team1_cards, self.game.game_mode)
-            team2_best = get_highest_card(team2_cards, self.game.game_mode)
-            
-            # Default to 'A' (Ace) if no cards found - shouldn't happen in normal gameplay
-            # but provides safe fallback for edge cases
-            result = compare_cards(
-                team1_best['value'] if team1_best else 'A',
-                team2_best['value'] if team2_best else 'A',
-                self.game.game_mode
-            )
+            # Compare the best card of each team for Grande
+            summaries = self.game.hand_summaries
+            result = summaries.compare('GRANDE')
             
             # Determine winner (ties go to Mano's team)
             if result > 0:
@@ -362,14 +332,14 @@ class GrandeBettingHandler:
                 winner_team = 'team2'
             else:
                 # Tie - Mano's team wins
-                mano_team = self.game.get_player_team(self.game.state['manoIndex'])
+                mano_team = self.game.get_player_team(self.game.state.manoIndex)
                 winner_team = mano_team
                 logger.info(f"Grande (ordago) tied. Mano's team ({mano_team}) wins.")
             
             # Award 40 points immediately (ordago value)
-            self.game.state['teams'][winner_team]['score'] += 40
+            self.game.state.teams[winner_team].score += 40
             
-            phase['result'] = {
+            phase.result = {
                 'winner': winner_team,
                 'points': 40,
                 'betType': 'ordago',
@@ -386,14 +356,11 @@ class GrandeBettingHandler:
                 'bet_accepted': True,
                 'bet_amount': 40,
                 'bet_type': 'ordago',
-                'attacking_team': phase['attackingTeam'],
-                'defending_team': phase['defendingTeam'],
+                'attacking_team': phase.attackingTeam,
+                'defending_team': phase.defendingTeam,
                 'reveal_cards': True,
                 'collapse_all_cards': True,
-                'card_info': {
-                    'team1_best': team1_best,
-                    'team2_best': team2_best
-                },
+                'card_info': summaries.best_cards('GRANDE'),
                 'winner_team': winner_team,
                 'points': 40,
                 'game_ended': True,  # Signal that game is over
@@ -401,43 +368,27 @@ class GrandeBettingHandler:
             }
         else:
             # Normal bet: Store the bet for later comparison (deferred)
-            phase['result'] = {
-                'attackingTeam': phase['attackingTeam'],
-                'defendingTeam': phase['defendingTeam'],
-                'betAmount': phase['currentBetAmount'],
-                'betType': phase['betType'],
+            phase.result = {
+                'attackingTeam': phase.attackingTeam,
+                'defendingTeam': phase.defendingTeam,
+                'betAmount': phase.currentBetAmount,
+                'betType': phase.betType,
                 'comparison': 'deferred',
                 'resolved': False
             }
             
-            # Get card information for display
-            team1_cards = []
-            team2_cards = []
-            
-            for player_idx, hand in self.game.hands.items():
-                if player_idx in self.game.state['teams']['team1']['players']:
-                    team1_cards.extend([card.to_dict() for card in hand])
-                else:
-                    team2_cards.extend([card.to_dict() for card in hand])
-            
-            team1_best = get_highest_card(team1_cards, self.game.game_mode)
-            team2_best = get_highest_card(team2_cards, self.game.game_mode)
-            
-            logger.info(f"Bet accepted. {phase['currentBetAmount']} points at stake. Comparison deferred.")
+            logger.info(f"Bet accepted. {phase.currentBetAmount} points at stake. Comparison deferred.")
             
             return {
                 'success': True,
                 'round_ended': True,
                 'grande_ended': True,
                 'bet_accepted': True,
-                'bet_amount': phase['currentBetAmount'],
-                'attacking_team': phase['attackingTeam'],
-                'defending_team': phase['defendingTeam'],
+                'bet_amount': phase.currentBetAmount,
+                'attacking_team': phase.attackingTeam,
+                'defending_team': phase.defendingTeam,
                 'reveal_cards': True,
-                'card_info': {
-                    'team1_best': team1_best,
-                    'team2_best': team2_best
-                },
+                'card_info': self.game.hand_summaries.best_cards('GRANDE'),
                 'comparison_deferred': True,
                 'move_to_next_round': True
             }
@@ -448,30 +399,15 @@ class GrandeBettingHandler:
         Grande is played with no bet (1 point to winner).
         Comparison is deferred.
         """
-        from card_deck import get_highest_card
-        
-        phase = self.game.state['grandePhase']
-        phase['phaseState'] = 'RESOLVED'
-        phase['result'] = {
+        phase = self.game.state.grandePhase
+        phase.phaseState = 'RESOLVED'
+        phase.result = {
             'betAmount': 1,
             'comparison': 'deferred',
             'allPassed': True,
             'resolved': False
         }
         
-        # Get card information for display
-        team1_cards = []
-        team2_cards = []
-        
-        for player_idx, hand in self.game.hands.items():
-            if player_idx in self.game.state['teams']['team1']['players']:
-                team1_cards.extend([card.to_dict() for card in hand])
-            else:
-                team2_cards.extend([card.to_dict() for card in hand])
-        
-        team1_best = get_highest_card(team1_cards, self.game.game_mode)
-        team2_best = get_highest_card(team2_cards, self.game.game_mode)
-        
         logger.info("All players passed. Grande will be compared for 1 point.")
         
         return {
@@ -481,10 +417,7 @@ class GrandeBettingHandler:
             'all_passed': True,
             'points_at_stake': 1,
             'reveal_cards': True,
-            'card_info': {
-                'team1_best': team1_best,
-                'team2_best': team2_best
-            },
+            'card_info': self.game.hand_summaries.best_cards('GRANDE'),
             'comparison_deferred': True,
             'move_to_next_round': True
         }
@@ -500,9 +433,9 @@ class GrandeBettingHandler:
         Get the next defender counterclockwise/right from current player.
         Search counterclockwise/right until we find a player on the defending team.
         """
-        phase = self.game.state['grandePhase']
-        defending_team = phase['defendingTeam']
-        defending_players = self.game.state['teams'][defending_team]['players']
+        phase = self.game.state.grandePhase
+        defending_team = phase.defendingTeam
+        defending_players = self.game.state.teams[defending_team].players
         
         # Start from next player counterclockwise/right
         check_player = self._get_next_player_clockwise(current_player)
@@ -521,8 +454,8 @@ class GrandeBettingHandler:
         Get the first team member counterclockwise/right from Mano.
         Used when finding who should respond after a raise.
         """
-        team_players = self.game.state['teams'][team]['players']
-        mano = self.game.state['manoIndex']
+        team_players = self.game.state.teams[team].players
+        mano = self.game.state.manoIndex
         
         # Check in counterclockwise/right order starting from mano
         for offset in range(4):
@@ -536,7 +469,7 @@ class GrandeBettingHandler:
     def _get_partner(self, player_index):
         """Get the partner of a player (same team, different player)"""
         player_team = self.game.get_player_team(player_index)
-        team_players = self.game.state['teams'][player_team]['players']
+        team_players = self.game.state.teams[player_team].players
         
         for p in team_players:
             if p != player_index:
@@ -549,34 +482,16 @@ class GrandeBettingHandler:
         Compare Grande hands and determine winner.
         Called after all 4 phases (Grande, Chica, Pares, Juego) complete.
         """
-        phase = self.game.state['grandePhase']
+        phase = self.game.state.grandePhase
         
-        if phase['result']['resolved']:
+        if phase.result['resolved']:
             return None  # Already resolved
         
-        if phase['result'].get('reason') == 'rejection':
+        if phase.result.get('reason') == 'rejection':
             return None  # Already scored
         
-        # Get best cards from each team for Grande
-        from card_deck import get_highest_card, compare_cards
-        
-        team1_cards = []
-        team2_cards = []
-        
-        for player_idx, hand in self.game.hands.items():
-            if player_idx in self.game.state['teams']['team1']['players']:
-                team1_cards.extend([card.to_dict() for card in hand])
-            else:
-                team2_cards.extend([card.to_dict() for card in hand])
-        
-        team1_best = get_highest_card(team1_cards, self.game.game_mode)
-        team2_best = get_highest_card(team2_cards, self.game.game_mode)
-        
-        result = compare_cards(
-            team1_best['value'] if team1_best else 'A',
-            team2_best['value'] if team2_best else 'A',
-            self.game.game_mode
-        )
+        # Compare the best card of each team for Grande
+        result = self.game.hand_summaries.compare('GRANDE')
         
         # Determine winner (ties go to Mano's team)
         if result > 0:
@@ -585,23 +500,22 @@ class GrandeBettingHandler:
             winner_team = 'team2'
         else:
             # Tie - Mano's team wins
-            mano_team = self.game.get_player_team(self.game.state['manoIndex'])
+            mano_team = self.game.get_player_team(self.game.state.manoIndex)
             winner_team = mano_team
             logger.info(f"Grande tied. Mano's team ({mano_team}) wins.")
         
         # Award points
-        points = phase['result'].get('betAmount', 1)
-        self.game.state['teams'][winner_team]['score'] += points
+        points = phase.result.get('betAmount', 1)
+        self.game.state.teams[winner_team].score += points
         
-        phase['result']['winner'] = winner_team
-        phase['result']['points'] = points
-        phase['result']['resolved'] = True
+        phase.result['winner'] = winner_team
+        phase.result['points'] = points
+        phase.result['resolved'] = True
         
         logger.info(f"{winner_team} wins {points} points in Grande")
         
         return {
             'winner': winner_team,
             'points': points,
-            'team1_best': team1_best,
-            'team2_best': team2_best
+            **self.game.hand_summaries.best_cards('GRANDE')
         }
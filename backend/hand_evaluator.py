@@ -0,0 +1,239 @@
+"""
+Vectorized Hand Evaluator for Quantum Mus
+Scores many deals at once with NumPy, for the simulator and offline analysis
+
+Deals are int arrays of shape (N hands, 4 seats, 4 cards) holding card
+values as the Logica_cuantica deck stores them: 1 (As), 2, 3, 4, 5, 6, 7,
+10 (Sota), 11 (Caballo), 12 (Rey). 0 marks an empty slot. Suits do not
+matter for scoring, so they are not encoded.
+
+Rules follow the game engine:
+- GRANDE/CHICA: each team's best (highest/lowest) card decides, as in
+  calculate_final_scores. In mode '8', 3 counts as Rey and 2 as As.
+- PARES: per seat, with the same equivalences as the declarations
+  (_has_pares): 1 = par, 2 = medias, 3 = duples (four of a kind counts as
+  duples). The best seat wins.
+- JUEGO: per seat sums as in _has_juego (2 is worth 2 points in mode '4',
+  1 in mode '8'; 3 is worth 10 in mode '8'). 31 or more is juego; ranking is
+  31 > 32 > 40 > 37 > 36 > 35 > 34 > 33.
+- PUNTO: only when nobody has juego; the highest sum wins.
+
+Ties always go to the team of the mano, and seats 0/2 are team1, 1/3 team2
+(the default seating). Winners are returned as team indices: 0 = team1,
+1 = team2, -1 = nobody plays the round.
+
+Usage:
+    python hand_evaluator.py --hands 1000000 --mode 8
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from card_rules import (  # Re-exported: scalar rules shared with the engine
+    CARD_POINTS, CARD_RANKS, CARD_VALUES, GAME_MODES, JUEGO_ORDER, LETTER_VALUES,
+    PARES_CLASSES, PARES_DUPLES, PARES_MEDIAS, PARES_NONE, PARES_PAR, card_value,
+)
+
+TEAM1, TEAM2, NO_WINNER = 0, 1, -1
+TEAM_NAMES = ('team1', 'team2')
+SEAT_TEAMS = np.array([TEAM1, TEAM2, TEAM1, TEAM2], dtype=np.int8)
+
+_TABLES = {mode: (np.array(CARD_RANKS[mode], dtype=np.int8), np.array(CARD_POINTS[mode], dtype=np.int8))
+           for mode in GAME_MODES}
+
+_JUEGO_RANK = np.zeros(41, dtype=np.int16)
+for _position, _total in enumerate(JUEGO_ORDER):
+    _JUEGO_RANK[_total] = _position + 1
+
+
+# ==================== ENCODING ====================
+
+def encode_hands(deals: Sequence) -> np.ndarray:
+    """
+    Encode deals as an (N, 4, 4) int8 array.
+
+    Args:
+        deals: Sequence of deals, each a sequence of 4 hands. Cards may be
+            Logica_cuantica cards, card dicts (to_dict), ints or letters.
+            Short hands are padded with empty slots.
+    """
+    encoded = np.zeros((len(deals), 4, 4), dtype=np.int8)
+    for i, deal in enumerate(deals):
+        for seat, hand in enumerate(deal):
+            for slot, card in enumerate(hand):
+                encoded[i, seat, slot] = card_value(card)
+    return encoded
+
+
+def encode_game_hands(game) -> np.ndarray:
+    """Encode a QuantumMusGame's current hands as a (1, 4, 4) array"""
+    return encode_hands([[game.hands.get(seat, []) for seat in range(4)]])
+
+
+def random_deals(num_hands: int, game_mode: str = '4',
+                 rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Deal num_hands independent hands of 16 cards from a 40-card deck"""
+    if game_mode not in GAME_MODES:
+        raise ValueError(f"Invalid game mode: {game_mode}")
+    rng = rng or np.random.default_rng()
+    deck = np.repeat(np.array(CARD_VALUES, dtype=np.int8), 4)
+    order = np.argsort(rng.random((num_hands, deck.size)), axis=1)[:, :16]
+    return deck[order].reshape(num_hands, 4, 4)
+
+
+# ==================== EVALUATION ====================
+
+def _mano_teams(mano, num_hands: int) -> np.ndarray:
+    mano = np.broadcast_to(np.asarray(mano, dtype=np.int64), (num_hands,))
+    return SEAT_TEAMS[mano % 4]
+
+
+def _team_winner(team1: np.ndarray, team2: np.ndarray, mano_team: np.ndarray) -> np.ndarray:
+    """team1/team2 are scores (higher wins); ties go to the mano's team"""
+    return np.where(team1 > team2, TEAM1, np.where(team2 > team1, TEAM2, mano_team)).astype(np.int8)
+
+
+def _sorted_ranks(ranks: np.ndarray, empty: np.ndarray) -> np.ndarray:
+    """Ranks sorted per seat; empty slots get distinct negative ranks so they never match"""
+    if empty.any():
+        ranks = np.where(empty, -np.arange(1, 5, dtype=ranks.dtype), ranks)
+    return np.sort(ranks, axis=-1)
+
+
+def _pares(ordered: np.ndarray):
+    """Per-seat pares class and strength (class, high pair rank, low pair rank)"""
+    first, second, third, fourth = ordered[..., 0], ordered[..., 1], ordered[..., 2], ordered[..., 3]
+    eq01, eq12, eq23 = first == second, second == third, third == fourth
+
+    classes = (eq01 | eq12 | eq23).astype(np.int8)  # PARES_PAR
+    classes[(eq01 & eq12) | (eq12 & eq23)] = PARES_MEDIAS
+    classes[(eq01 & eq23)] = PARES_DUPLES  # Includes four of a kind
+
+    # With the hand sorted, the highest matched card is the last equal neighbour
+    high = np.where(eq23, third, np.where(eq12, second, first)).astype(np.int16)
+    low = np.where(classes == PARES_DUPLES, first, 0).astype(np.int16)
+    strength = np.where(classes > PARES_NONE, classes.astype(np.int16) * 256 + high * 16 + low, 0)
+    return classes, strength.astype(np.int16)
+
+
+def evaluate_batch(deals: np.ndarray, game_mode: str = '4', mano=0) -> Dict[str, np.ndarray]:
+    """
+    Score a batch of deals.
+
+    Args:
+        deals: (N, 4, 4) card values (see encode_hands)
+        game_mode: '4' or '8'
+        mano: Mano seat, one for all hands or an (N,) array
+
+    Returns:
+        Dict of arrays:
+        - grande, chica: (N,) winning team
+        - pares: (N, 4) pares class per seat
+        - pares_strength: (N, 4) comparable pares strength (0 = none)
+        - pares_winner: (N,) winning team, -1 if nobody has pares
+        - juego: (N, 4) juego sum per seat
+        - has_juego: (N, 4) bool
+        - juego_winner: (N,) winning team, -1 if nobody has juego
+        - punto_winner: (N,) winning team when nobody has juego, else -1
+    """
+    if game_mode not in GAME_MODES:
+        raise ValueError(f"Invalid game mode: {game_mode}")
+    deals = np.asarray(deals)
+    if deals.ndim != 3 or deals.shape[1:] != (4, 4):
+        raise ValueError(f"Expected deals of shape (N, 4, 4), got {deals.shape}")
+
+    rank_table, points_table = _TABLES[game_mode]
+    num_hands = deals.shape[0]
+    empty = deals == 0
+    ordered = _sorted_ranks(rank_table[deals], empty)
+    points = points_table[deals]
+    mano_team = _mano_teams(mano, num_hands)
+    team1_seats, team2_seats = SEAT_TEAMS == TEAM1, SEAT_TEAMS == TEAM2
+
+    # GRANDE / CHICA: best card of each team
+    high = ordered[..., 3]
+    low = ordered[..., 0]
+    if empty.any():
+        low = np.where(ordered < 0, 99, ordered).min(axis=-1)
+    grande = _team_winner(high[:, team1_seats].max(axis=1), high[:, team2_seats].max(axis=1), mano_team)
+    chica = _team_winner(-low[:, team1_seats].min(axis=1), -low[:, team2_seats].min(axis=1), mano_team)
+
+    # PARES
+    pares, pares_strength = _pares(ordered)
+    team1_pares = pares_strength[:, team1_seats].max(axis=1)
+    team2_pares = pares_strength[:, team2_seats].max(axis=1)
+    pares_winner = np.where((team1_pares > 0) | (team2_pares > 0),
+                            _team_winner(team1_pares, team2_pares, mano_team), NO_WINNER).astype(np.int8)
+
+    # JUEGO / PUNTO
+    juego = (points[..., 0] + points[..., 1] + points[..., 2] + points[..., 3]).astype(np.int16)
+    has_juego = juego >= 31
+    juego_rank = _JUEGO_RANK[np.clip(juego, 0, 40)]
+    team1_juego = juego_rank[:, team1_seats].max(axis=1)
+    team2_juego = juego_rank[:, team2_seats].max(axis=1)
+    anyone_juego = has_juego.any(axis=1)
+    juego_winner = np.where(anyone_juego, _team_winner(team1_juego, team2_juego, mano_team),
+                            NO_WINNER).astype(np.int8)
+    punto_winner = np.where(anyone_juego, NO_WINNER,
+                            _team_winner(juego[:, team1_seats].max(axis=1), juego[:, team2_seats].max(axis=1),
+                                         mano_team)).astype(np.int8)
+
+    return {
+        'grande': grande,
+        'chica': chica,
+        'pares': pares,
+        'pares_strength': pares_strength,
+        'pares_winner': pares_winner,
+        'juego': juego,
+        'has_juego': has_juego,
+        'juego_winner': juego_winner,
+        'punto_winner': punto_winner,
+    }
+
+
+def summarize(evaluation: Dict[str, np.ndarray]) -> Dict:
+    """Frequencies over an evaluate_batch result (JSON-serializable)"""
+    num_hands = int(evaluation['grande'].shape[0])
+
+    def team_rates(winners):
+        return {name: float(np.mean(winners == team)) if num_hands else 0.0
+                for team, name in enumerate(TEAM_NAMES)}
+
+    pares_counts = np.bincount(evaluation['pares'].ravel(), minlength=len(PARES_CLASSES))
+    seats = max(evaluation['pares'].size, 1)
+    return {
+        'hands': num_hands,
+        'grande': team_rates(evaluation['grande']),
+        'chica': team_rates(evaluation['chica']),
+        'pares_classes': {name: float(count / seats) for name, count in zip(PARES_CLASSES, pares_counts)},
+        'pares': team_rates(evaluation['pares_winner']),
+        'juego_seat_rate': float(evaluation['has_juego'].mean()) if num_hands else 0.0,
+        'juego': team_rates(evaluation['juego_winner']),
+        'punto': team_rates(evaluation['punto_winner']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vectorized Quantum Mus hand evaluator benchmark')
+    parser.add_argument('--hands', type=int, default=1_000_000)
+    parser.add_argument('--mode', choices=GAME_MODES, default='8')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    deals = random_deals(args.hands, args.mode, np.random.default_rng(args.seed))
+    start = time.perf_counter()
+    evaluation = evaluate_batch(deals, args.mode)
+    elapsed = time.perf_counter() - start
+
+    report = summarize(evaluation)
+    report['elapsed'] = round(elapsed, 3)
+    report['hands_per_second'] = round(args.hands / elapsed) if elapsed else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
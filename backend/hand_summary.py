@@ -0,0 +1,179 @@
+"""
+Incremental Hand Summaries for Quantum Mus
+Per-seat and per-team scoring data, recomputed only when a hand changes
+
+Scoring paths (órdago acceptance, deferred comparisons, the card info sent
+to clients and calculate_final_scores) read these summaries instead of
+rebuilding card dicts for all 16 cards. A seat is recomputed only after
+the game invalidates it (deal, discard, collapse) or when its hand list was
+replaced or resized.
+
+Cards are scored by their collapsed value once collapsed (card_value). A
+team is scored on the pooled cards of the seats that count (all of them, or
+the ones that declared pares/juego): Grande/Chica on the best/worst card,
+juego and punto on the raw sum of the pooled points (higher wins), and pares
+on physically matching values: a 3 is not a Rey and a 2 is not an As, even
+in mode '8'.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from card_rules import CARD_POINTS, CARD_RANKS, PARES_DUPLES, PARES_MEDIAS, PARES_NONE, PARES_PAR, card_value
+
+TEAMS = ('team1', 'team2')
+NO_RANK_HIGH = -1  # Best rank of an empty hand
+NO_RANK_LOW = 99   # Worst rank of an empty hand
+
+
+def pares_class(counts: Counter) -> int:
+    """PARES class of a set of card values (three of a kind is checked before two pairs)"""
+    most = sorted(counts.values(), reverse=True)
+    if not most or most[0] < 2:
+        return PARES_NONE
+    if most[0] >= 4:
+        return PARES_DUPLES
+    if most[0] == 3:
+        return PARES_MEDIAS
+    if len(most) > 1 and most[1] == 2:
+        return PARES_DUPLES
+    return PARES_PAR
+
+
+class SeatSummary:
+    """Scoring data of one hand"""
+
+    __slots__ = ('values', 'best_rank', 'worst_rank', 'best_card', 'worst_card', 'pares', 'juego')
+
+    def __init__(self, hand, game_mode: str):
+        ranks, points = CARD_RANKS[game_mode], CARD_POINTS[game_mode]
+        self.values = tuple(card_value(card) for card in hand)
+
+        # Best/worst card: the first card holding the extreme rank (as get_highest_card)
+        self.best_rank, self.worst_rank = NO_RANK_HIGH, NO_RANK_LOW
+        self.best_card = self.worst_card = None
+        for card, value in zip(hand, self.values):
+            rank = ranks[value]
+            if rank > self.best_rank:
+                self.best_rank, self.best_card = rank, card
+            if rank < self.worst_rank:
+                self.worst_rank, self.worst_card = rank, card
+
+        self.pares = pares_class(Counter(self.values))
+        self.juego = sum(points[value] for value in self.values)
+
+    @property
+    def has_pares(self) -> bool:
+        return self.pares != PARES_NONE
+
+    @property
+    def has_juego(self) -> bool:
+        return self.juego >= 31
+
+
+class TeamSummary:
+    """Pooled cards of some of a team's seats"""
+
+    __slots__ = ('seats', 'best_rank', 'worst_rank', 'best_card', 'worst_card', 'pares', 'pares_high', 'juego')
+
+    def __init__(self, seats: Iterable[SeatSummary]):
+        self.seats = tuple(seats)
+        self.best_rank, self.worst_rank = NO_RANK_HIGH, NO_RANK_LOW
+        self.best_card = self.worst_card = None
+        counts = Counter()
+        for seat in self.seats:
+            if seat.best_rank > self.best_rank:
+                self.best_rank, self.best_card = seat.best_rank, seat.best_card
+            if seat.worst_rank < self.worst_rank:
+                self.worst_rank, self.worst_card = seat.worst_rank, seat.worst_card
+            counts.update(seat.values)
+
+        # PARES ties are broken by the highest matched value only
+        self.pares = pares_class(counts)
+        matched = 3 if self.pares == PARES_MEDIAS else 2
+        self.pares_high = max((value for value, count in counts.items() if count >= matched), default=0)
+        self.juego = sum(seat.juego for seat in self.seats)
+
+    @property
+    def pares_strength(self) -> int:
+        return self.pares * 16 + self.pares_high if self.pares != PARES_NONE else 0
+
+
+class HandSummaries:
+    """
+    Cached summaries for one game's hands.
+
+    Seat summaries are keyed by the hand list they were built from; the game
+    calls invalidate() when cards are dealt, discarded or collapsed.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self._seats: Dict[int, tuple] = {}  # seat -> (hand list, length, SeatSummary)
+        self._teams: Dict[Tuple[int, ...], TeamSummary] = {}  # Pooled seats -> summary
+        self.rebuilds = 0  # Seat summaries computed (for profiling)
+
+    def invalidate(self, seat: Optional[int] = None) -> None:
+        """Drop the summary of a seat (or of every seat)"""
+        if seat is None:
+            self._seats.clear()
+        else:
+            self._seats.pop(seat, None)
+
+    def seat(self, seat: int) -> SeatSummary:
+        hand = self.game.hands.get(seat, [])
+        entry = self._seats.get(seat)
+        if entry is not None and entry[0] is hand and entry[1] == len(hand):
+            return entry[2]
+        summary = SeatSummary(hand, self.game.game_mode)
+        self._seats[seat] = (hand, len(hand), summary)
+        self.rebuilds += 1
+        return summary
+
+    def team(self, team: str, seats: Optional[Iterable[int]] = None) -> TeamSummary:
+        """Summary of the pooled cards of a team's seats (all of them by default)"""
+        if seats is None:
+            seats = self.game.state.teams[team].players
+        seats = tuple(seats)
+        summaries = tuple(self.seat(seat) for seat in seats)
+        summary = self._teams.get(seats)
+        if summary is None or any(a is not b for a, b in zip(summary.seats, summaries)):
+            summary = self._teams[seats] = TeamSummary(summaries)
+        return summary
+
+    # -------------------------
+    # Comparisons
+    # -------------------------
+    def team_score(self, team: str, round_name: str, seats: Optional[Iterable[int]] = None) -> int:
+        """
+        Comparable score of a team in a round (higher is better).
+
+        Args:
+            seats: Only pool these seats (e.g. players who declared pares/juego)
+        """
+        summary = self.team(team, seats)
+        if round_name == 'GRANDE':
+            return summary.best_rank
+        if round_name == 'CHICA':
+            return -summary.worst_rank
+        if round_name == 'PARES':
+            return summary.pares_strength
+        if round_name in ('JUEGO', 'PUNTO'):
+            return summary.juego
+        raise ValueError(f"Unknown round: {round_name}")
+
+    def compare(self, round_name: str, team1_seats: Optional[Iterable[int]] = None,
+                team2_seats: Optional[Iterable[int]] = None) -> int:
+        """1 if team1 wins the round, -1 if team2 wins, 0 on a tie"""
+        team1 = self.team_score('team1', round_name, team1_seats)
+        team2 = self.team_score('team2', round_name, team2_seats)
+        return (team1 > team2) - (team1 < team2)
+
+    def best_cards(self, round_name: str) -> Dict[str, Optional[Dict]]:
+        """Each team's best card for GRANDE (highest) or CHICA (lowest), as card dicts"""
+        result = {}
+        for team in TEAMS:
+            summary = self.team(team)
+            card = summary.worst_card if round_name == 'CHICA' else summary.best_card
+            result[f'{team}_best'] = card.to_dict() if card is not None else None
+        return result
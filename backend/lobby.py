@@ -0,0 +1,153 @@
+"""
+Lobby Index for Quantum Mus
+The joinable rooms, kept up to date as rooms change, for /api/rooms and the lobby feed
+
+GET /api/rooms used to scan every room and return the full room dicts,
+socket ids included. RoomManager now keeps a LobbyIndex instead: every time
+a room is saved the index updates that room's public summary (no socket
+ids) and drops rooms that stopped being joinable (full, playing, removed).
+Summaries are bucketed by game mode and open seats, so a filtered query
+only merges the buckets it asks for.
+
+Pages (page()) are cached until the index changes and carry an ETag (a hash
+of the body), so an unchanged lobby costs a 304.
+
+Every change bumps the index version and is passed to the listener as a
+delta: {'version': 7, 'upsert': [summary, ...], 'remove': [room_id, ...]}.
+Changes to different rooms commute and one room's changes arrive in order,
+so a client applies every delta newer than the snapshot it started from
+(lobby_snapshot / page 'version'), whatever order they arrive in.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+PAGE_CACHE_SIZE = 64  # Distinct queries cached per index version
+
+
+def summary(room: Dict) -> Dict:
+    """Public lobby view of a room (no socket ids)"""
+    players = room['players']
+    return {
+        'id': room['id'],
+        'code': room['code'],
+        'name': room['name'],
+        'game_mode': room['game_mode'],
+        'max_players': room['max_players'],
+        'players': len(players),
+        'open_seats': room['max_players'] - len(players),
+        'player_names': [player['name'] for player in players],
+        'created_at': room['created_at'],
+    }
+
+
+def joinable(room: Dict) -> bool:
+    return room['status'] == 'waiting' and len(room['players']) < room['max_players']
+
+
+class LobbyIndex:
+    """Joinable room summaries by (game mode, open seats), with a change feed"""
+
+    def __init__(self, listener: Callable[[Dict], None] = None):
+        self.listener = listener
+        self.version = 0
+        self._rooms: Dict[str, Dict] = {}  # Room id -> summary
+        self._buckets: Dict[Tuple[str, int], Dict[str, None]] = {}
+        self._pages: Dict[tuple, Tuple[bytes, str]] = {}  # Query -> (body, etag), for this version
+        self._mutex = threading.Lock()
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def update(self, room: Dict, notify: bool = True) -> None:
+        """Room was saved: index it if it is joinable, else drop it"""
+        if joinable(room):
+            self.put(summary(room), notify)
+        else:
+            self.discard(room['id'], notify)
+
+    def put(self, entry: Dict, notify: bool = True) -> None:
+        with self._mutex:
+            old = self._rooms.get(entry['id'])
+            if old == entry:
+                return
+            if old is not None:
+                self._unbucket(old)
+            self._rooms[entry['id']] = entry
+            self._buckets.setdefault((entry['game_mode'], entry['open_seats']), {})[entry['id']] = None
+            self._changed({'upsert': [entry], 'remove': []}, notify)
+
+    def discard(self, room_id: str, notify: bool = True) -> None:
+        with self._mutex:
+            old = self._rooms.pop(room_id, None)
+            if old is None:
+                return
+            self._unbucket(old)
+            self._changed({'upsert': [], 'remove': [room_id]}, notify)
+
+    def apply(self, delta: Dict) -> None:
+        """Fold in another index's delta (a shard worker's, on the front)"""
+        for entry in delta['upsert']:
+            self.put(entry)
+        for room_id in delta['remove']:
+            self.discard(room_id)
+
+    def _unbucket(self, entry):
+        key = (entry['game_mode'], entry['open_seats'])
+        bucket = self._buckets[key]
+        del bucket[entry['id']]
+        if not bucket:
+            del self._buckets[key]
+
+    def _changed(self, delta, notify):
+        # Under the mutex, so the listener sees versions in order
+        self.version += 1
+        self._pages.clear()
+        if notify and self.listener is not None:
+            self.listener(dict(delta, version=self.version))
+
+    def query(self, game_mode: str = None, min_seats: int = 1) -> List[Dict]:
+        """Joinable rooms of game_mode (any if None) with at least min_seats open, oldest first"""
+        with self._mutex:
+            return self._query(game_mode, min_seats)
+
+    def _query(self, game_mode, min_seats):
+        entries = [self._rooms[room_id] for (mode, seats), bucket in self._buckets.items()
+                   if (game_mode is None or mode == game_mode) and seats >= min_seats for room_id in bucket]
+        entries.sort(key=lambda entry: (entry['created_at'], entry['id']))
+        return entries
+
+    def snapshot(self) -> Dict:
+        """Every joinable room and the version they are at (the lobby feed's starting point)"""
+        with self._mutex:
+            return {'version': self.version, 'rooms': self._query(None, 0)}
+
+    def page(self, game_mode: str = None, min_seats: int = 1, offset: int = 0,
+             limit: int = PAGE_SIZE) -> Tuple[bytes, str]:
+        """JSON body and ETag of one page of query(); cached until the index changes"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        key = (game_mode, min_seats, offset, limit)
+        with self._mutex:
+            cached = self._pages.get(key)
+            if cached is not None:
+                return cached
+            entries = self._query(game_mode, min_seats)
+            next_offset: Optional[int] = offset + limit if offset + limit < len(entries) else None
+            body = json.dumps({
+                'version': self.version,
+                'rooms': entries[offset:offset + limit],
+                'total': len(entries),
+                'offset': offset,
+                'limit': limit,
+                'next_offset': next_offset,
+            }, separators=(',', ':')).encode('utf-8')
+            cached = (body, hashlib.blake2b(body, digest_size=12).hexdigest())
+            if len(self._pages) >= PAGE_CACHE_SIZE:
+                self._pages.clear()
+            self._pages[key] = cached
+            return cached
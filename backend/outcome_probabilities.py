@@ -0,0 +1,276 @@
+"""
+Exact Outcome Probabilities for Quantum Mus
+Chance of pares/juego and of winning Grande/Chica while pairs are uncollapsed
+
+Every uncollapsed pair of the EntanglementSystem topology is one |Φ+⟩ bit:
+0 keeps both cards' values, 1 swaps them, each with probability 1/2. A hand
+is reduced to a signature with one (value if 0, value if 1, pair index)
+entry per card, and the 2^k assignments of its k pairs are enumerated as a
+bitmask. Two cards of the same pair share one bit, so a hand holding both
+the Rey and the As of a suit is counted correctly.
+
+Grande/Chica are computed from what one seat can see: its own hand, the
+collapsed cards of every hand (collapse events are public) and the pair
+constraints of its own entangled cards. The other seats' unseen cards are
+drawn from the cards the seat cannot see; the pool holds each unseen card
+with its nominal value, except the partner of a visible card, whose value
+follows that card's pair bit (or its collapse). For each assignment of the
+seat's pair bits the best (Grande) and worst (Chica) card of the partner's
+and the opponents' draws are counted hypergeometrically.
+
+Results are memoized per signature: a hand state that was already seen is
+answered with a dictionary lookup.
+"""
+
+from functools import lru_cache
+from math import comb
+from typing import Dict, Iterable, List, Tuple
+
+from entanglement_system import SUITS, get_topology
+from card_rules import CARD_POINTS, CARD_RANKS, CARD_VALUES, card_value
+
+NO_PAIR = -1
+CACHE_SIZE = 65536
+
+# Spanish suit names (Logica_cuantica) -> topology suit names
+SUIT_NAMES = {spanish: english for spanish, english in SUITS}
+VALUE_LETTERS = {1: 'A', 10: 'J', 11: 'Q', 12: 'K'}
+
+CardOutcome = Tuple[int, int, int]  # (value if bit 0, value if bit 1, pair index)
+
+
+def card_outcomes(card, game_mode: str) -> CardOutcome:
+    """Possible values of a card and the pair bit that decides between them"""
+    if getattr(card, 'is_collapsed', False) and getattr(card, 'collapsed_value', None) is not None:
+        value = card_value(card.collapsed_value)
+        return value, value, NO_PAIR
+
+    value = card_value(card.value)
+    if not getattr(card, 'is_entangled', False):
+        return value, value, NO_PAIR
+
+    key = _topology_key(value, SUIT_NAMES.get(card.suit, card.suit))
+    partner = _partner(game_mode, key)
+    if partner is None:
+        return value, value, NO_PAIR
+    (partner_value, _), index = partner
+    return value, card_value(partner_value), index
+
+
+def _topology_key(value: int, suit: str) -> Tuple[str, str]:
+    return VALUE_LETTERS.get(value, str(value)), suit
+
+
+def _partner(game_mode: str, key: Tuple[str, str]):
+    """(partner's topology key, pair index) of a card, or None if it is not in a pair"""
+    topology = get_topology(game_mode)
+    index = topology.card_to_index.get(key)
+    if index is None:
+        return None
+    spec = topology.pairs[index]
+    return (spec.card2 if spec.card1 == key else spec.card1), index
+
+
+def hand_signature(hand: Iterable, game_mode: str) -> Tuple[CardOutcome, ...]:
+    return tuple(card_outcomes(card, game_mode) for card in hand)
+
+
+def _pair_bits(signatures: Iterable[Tuple[CardOutcome, ...]]) -> Dict[int, int]:
+    """Pair index -> bit in the enumeration mask"""
+    bits = {}
+    for signature in signatures:
+        for _, _, pair in signature:
+            if pair != NO_PAIR and pair not in bits:
+                bits[pair] = 1 << len(bits)
+    return bits
+
+
+# ==================== ENUMERATION ====================
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _seat_probabilities(game_mode: str, signature: Tuple[CardOutcome, ...]) -> Tuple[float, float]:
+    """(P(pares), P(juego)) for one hand"""
+    ranks, points = CARD_RANKS[game_mode], CARD_POINTS[game_mode]
+    bits = _pair_bits((signature,))
+    total = 1 << len(bits)
+    pares = juego = 0
+    for mask in range(total):
+        values = [v1 if pair != NO_PAIR and mask & bits[pair] else v0 for v0, v1, pair in signature]
+        card_ranks = {ranks[v] for v in values}
+        if len(card_ranks) < len(values):
+            pares += 1
+        if sum(points[v] for v in values) >= 31:
+            juego += 1
+    return pares / total, juego / total
+
+
+def _draw_extremes(counts: List[int], team_draws: int, opponent_draws: int):
+    """
+    Joint distribution of the best rank drawn by the partner (team_draws
+    cards) and by the opponents (opponent_draws cards) from a pool with
+    counts[rank] cards of each rank. Rank -1 means no card was drawn.
+
+    Returns:
+        ({(partner best, opponents best): deals}, total deals)
+    """
+    below = [0]
+    for count in counts:
+        below.append(below[-1] + count)  # below[r + 1]: cards ranked r or lower
+    pool = below[-1]
+    deals = comb(pool, team_draws) * comb(pool - team_draws, opponent_draws)
+
+    def ways(team_top, opponent_top):
+        """Deals where every partner card ranks <= team_top and every opponent card <= opponent_top"""
+        if team_top < -1 or opponent_top < -1:
+            return 0
+        team_pool, opponent_pool = below[team_top + 1], below[opponent_top + 1]
+        if team_pool < team_draws:
+            return 0
+        if team_top <= opponent_top:
+            return comb(team_pool, team_draws) * comb(opponent_pool - team_draws, opponent_draws)
+        # Partner cards above opponent_top are not available to the opponents anyway
+        return sum(comb(opponent_pool, shared) * comb(team_pool - opponent_pool, team_draws - shared) *
+                   comb(opponent_pool - shared, opponent_draws)
+                   for shared in range(min(team_draws, opponent_pool) + 1))
+
+    levels = range(-1, len(counts))
+    extremes = {}
+    for team_top in levels:
+        for opponent_top in levels:
+            count = (ways(team_top, opponent_top) - ways(team_top - 1, opponent_top) -
+                     ways(team_top, opponent_top - 1) + ways(team_top - 1, opponent_top - 1))
+            if count:
+                extremes[(team_top, opponent_top)] = count
+    return extremes, deals
+
+
+def _win_probability(counts, team_best, opponent_best, team_draws, opponent_draws, mano_on_team) -> float:
+    """P(the team's best card beats the opponents'), ties to the mano"""
+    extremes, deals = _draw_extremes(counts, team_draws, opponent_draws)
+    wins = 0
+    for (team_top, opponent_top), count in extremes.items():
+        team, opponents = max(team_best, team_top), max(opponent_best, opponent_top)
+        if team > opponents or (team == opponents and mano_on_team):
+            wins += count
+    return wins / deals
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _team_probabilities(game_mode: str, own: Tuple[CardOutcome, ...], team_fixed: Tuple[int, ...],
+                        opponent_fixed: Tuple[int, ...], pool: Tuple[int, ...], pool_partners: Tuple[CardOutcome, ...],
+                        team_draws: int, opponent_draws: int, mano_on_team: bool) -> Tuple[float, float]:
+    """
+    (P(the seat's team wins Grande), P(it wins Chica)) from the seat's view.
+
+    own is the seat's signature; team_fixed/opponent_fixed are the visible
+    (collapsed) ranks of the other seats; pool counts the unseen cards by
+    rank, except pool_partners, the unseen partners of the seat's entangled
+    cards (value if bit 0, value if bit 1, pair index).
+    """
+    ranks = CARD_RANKS[game_mode]
+    top = len(pool) - 1
+    bits = _pair_bits((own,))
+    total = 1 << len(bits)
+    grande = chica = 0.0
+    for mask in range(total):
+        team = [ranks[v1 if pair != NO_PAIR and mask & bits[pair] else v0] for v0, v1, pair in own]
+        team.extend(team_fixed)
+        counts = list(pool)
+        for v0, v1, pair in pool_partners:
+            counts[ranks[v1 if mask & bits[pair] else v0]] += 1
+        grande += _win_probability(counts, max(team), max(opponent_fixed, default=-1),
+                                   team_draws, opponent_draws, mano_on_team)
+        # Chica is Grande with the ranks reversed
+        chica += _win_probability(counts[::-1], top - min(team), top - min(opponent_fixed, default=top + 1),
+                                  team_draws, opponent_draws, mano_on_team)
+    return grande / total, chica / total
+
+
+# ==================== API ====================
+
+def get_hand_probabilities(hand: Iterable, game_mode: str) -> Dict:
+    """
+    Probabilities that only depend on the player's own hand (safe to show
+    the player as a hint).
+
+    Returns:
+        {'pares': P(pares), 'juego': P(juego), 'uncollapsed_pairs': k}
+    """
+    signature = hand_signature(hand, game_mode)
+    pares, juego = _seat_probabilities(game_mode, signature)
+    return {
+        'pares': pares,
+        'juego': juego,
+        'uncollapsed_pairs': len(_pair_bits((signature,))),
+    }
+
+
+def get_outcome_probabilities(game, player_index: int) -> Dict:
+    """
+    Exact outcome probabilities for a seat, from what that seat can see.
+
+    Returns:
+        get_hand_probabilities() plus 'grande' and 'chica': probability that
+        the player's team wins the round
+    """
+    game_mode = game.game_mode
+    ranks = CARD_RANKS[game_mode]
+    own_hand = game.hands.get(player_index, [])
+    result = get_hand_probabilities(own_hand, game_mode)
+    own = hand_signature(own_hand, game_mode)
+
+    # Cards the seat can see: its own hand and every collapsed card
+    visible = {_card_key(card): card for card in own_hand}
+    team = game.get_player_team(player_index)
+    team_fixed, opponent_fixed = [], []
+    team_draws = opponent_draws = 0
+    for seat, hand in game.hands.items():
+        if seat == player_index or not hand:
+            continue
+        same_team = game.get_player_team(seat) == team
+        for card in hand:
+            if getattr(card, 'is_collapsed', False) and getattr(card, 'collapsed_value', None) is not None:
+                visible[_card_key(card)] = card
+                (team_fixed if same_team else opponent_fixed).append(ranks[card_value(card)])
+            elif same_team:
+                team_draws += 1
+            else:
+                opponent_draws += 1
+
+    # The unseen cards, by rank; partners of the seat's entangled cards follow their pair bit
+    pool = [0] * (max(ranks) + 1)
+    pool_partners = []
+    entangled = {pair for _, _, pair in own if pair != NO_PAIR}
+    for _, suit in SUITS:
+        for value in CARD_VALUES:
+            if (value, suit) in visible:
+                continue
+            partner = _partner(game_mode, _topology_key(value, suit))
+            if partner is not None:
+                (partner_value, partner_suit), pair = partner
+                partner_value = card_value(partner_value)
+                if pair in entangled:
+                    pool_partners.append((value, partner_value, pair))
+                    continue
+                seen = visible.get((partner_value, partner_suit))
+                if seen is not None and card_value(seen) != partner_value:
+                    value = partner_value  # Its partner collapsed swapped: so did it
+            pool[ranks[value]] += 1
+
+    mano_on_team = game.get_player_team(game.state.manoIndex) == team
+    result['grande'], result['chica'] = _team_probabilities(
+        game_mode, own, tuple(sorted(team_fixed)), tuple(sorted(opponent_fixed)), tuple(pool),
+        tuple(sorted(pool_partners)), team_draws, opponent_draws, mano_on_team)
+    return result
+
+
+def _card_key(card) -> Tuple[int, str]:
+    """(nominal value, topology suit) of a physical card"""
+    return card_value(card.value), SUIT_NAMES.get(card.suit, card.suit)
+
+
+def cache_info() -> Dict:
+    return {
+        'seat': _seat_probabilities.cache_info()._asdict(),
+        'team': _team_probabilities.cache_info()._asdict(),
+    }
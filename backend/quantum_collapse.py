@@ -6,6 +6,8 @@ Handles the collapse of entangled cards and associated penalties
 import logging
 import hashlib
 
+from outcome_probabilities import get_hand_probabilities
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,10 +39,19 @@ class CollapseEvent:
 class QuantumCollapseManager:
     """Manages quantum collapse events in the game"""
     
-    def __init__(self, game):
+    def __init__(self, game, analytics=None):
         self.game = game
+        self.analytics = analytics  # entanglement_analytics.RoomCounters (optional)
         self.collapse_history = []  # Track all collapses
     
+    def _record(self, event):
+        self.collapse_history.append(event)
+        self.game.hands_changed()  # Collapsed cards change their scoring value
+        if self.analytics is not None:
+            self.analytics.record_collapse(event)
+        if self.game.action_log is not None:
+            self.game.action_log.note('collapse', event.to_dict())
+    
     def find_entangled_card_in_hand(self, player_index, original_value, partner_value):
         """Find an entangled card in a player's hand"""
         hand = self.game.hands[player_index]
@@ -63,7 +74,7 @@ class QuantumCollapseManager:
 
         # Generate deterministic seed for this collapse
         # This ensures all clients in the game collapse the same way
-        collapse_seed = f"{self.game.room_id}|collapse|{self.game.state['currentRound']}|{player_index}|{card_index}"
+        collapse_seed = f"{self.game.room_id}|collapse|{self.game.state.currentRound}|{player_index}|{card_index}"
 
         # Determine which value this card will collapse to
         if chosen_value:
@@ -78,7 +89,7 @@ class QuantumCollapseManager:
         card.collapse_reason = 'player_declaration'
 
         old_value = card.value
-        event = CollapseEvent('manual', player_index, self.game.state['currentRound'])
+        event = CollapseEvent('manual', player_index, self.game.state.currentRound)
         event.collapsed_cards.append((player_index, card_index, old_value, collapsed_value))
 
         # Find and collapse the entangled partner in other players' hands
@@ -101,7 +112,7 @@ class QuantumCollapseManager:
                 logger.info(f"Collapsed partner card: Player {other_player}, Card {partner_idx}: {old_partner_value} -> {partner_collapsed_value}")
                 break
 
-        self.collapse_history.append(event)
+        self._record(event)
         return event
     
     def collapse_on_declaration(self, player_index, declaration, round_name):
@@ -162,7 +173,9 @@ class QuantumCollapseManager:
             event.penalties.append((player_index, penalty_amount, f"Predicción incorrecta en {round_name}"))
             logger.info(f"Player {player_index} incurred {penalty_amount} penalty for wrong {round_name} prediction")
         
-        self.collapse_history.append(event)
+        self._record(event)
+        if self.analytics is not None:
+            self.analytics.record_declaration(round_name, penalty_points)
         return event, penalty_points
     
     def collapse_on_bet_acceptance(self, player_index, round_name):
@@ -203,7 +216,7 @@ class QuantumCollapseManager:
                         event.collapsed_cards.append((other_player, partner_idx, old_partner, partner_value))
                         break
         
-        self.collapse_history.append(event)
+        self._record(event)
         return event
     
     def collapse_all_remaining(self):
@@ -217,14 +230,14 @@ class QuantumCollapseManager:
             for idx, card in enumerate(hand):
                 if card.is_entangled and not card.is_collapsed:
                     # Generate deterministic seed for final collapse
-                    collapse_seed = f"{self.game.room_id}|final_reveal|{self.game.state['manoIndex']}|{player_idx}|{idx}"
+                    collapse_seed = f"{self.game.room_id}|final_reveal|{self.game.state.manoIndex}|{player_idx}|{idx}"
                     
                     old_value = card.value
                     new_value = card.collapse(collapse_seed=collapse_seed)
                     card.collapse_reason = 'final_reveal'
                     event.collapsed_cards.append((player_idx, idx, old_value, new_value))
         
-        self.collapse_history.append(event)
+        self._record(event)
         return event
     
     def _check_hand_after_collapse(self, player_index, round_name):
@@ -232,57 +245,9 @@ class QuantumCollapseManager:
         Check if player has what they declared after collapse
         round_name: 'PARES' or 'JUEGO'
         """
-        hand = self.game.hands[player_index]
-        card_values = [card.value for card in hand]
-        
-        if round_name == 'PARES':
-            return self._has_pares(card_values)
-        elif round_name == 'JUEGO':
-            return self._has_juego(card_values)
-        
-        return False
-    
-    def _has_pares(self, card_values):
-        """
-        Check if hand has pares (pairs)
-        Uses game mode to apply value equivalence rules
-        """
-        def normalize_value_for_pares(val):
-            """Normalize card values for pair checking in mode 8"""
-            if self.game.game_mode == '8':
-                if val == 'A': return '2'  # A and 2 form pairs
-                if val == '3': return 'K'  # 3 and K form pairs
-            return val
-        
-        # Normalize values according to game mode
-        normalized_values = [normalize_value_for_pares(v) for v in card_values]
-        
-        value_counts = {}
-        for value in normalized_values:
-            value_counts[value] = value_counts.get(value, 0) + 1
-        
-        # Pares = at least one pair
-        return any(count >= 2 for count in value_counts.values())
-    
-    def _has_juego(self, card_values):
-        """
-        Check if hand has juego (31 or more points)
-        Uses correct point values based on game mode
-        """
-        def get_card_points(val, game_mode):
-            """Calculate points for a card value based on game mode"""
-            if val == 'A':
-                return 1
-            if val == '2':
-                return 2 if game_mode == '4' else 1
-            if val == '3':
-                return 3 if game_mode == '4' else 10
-            if val in ['J', 'Q', 'K']:
-                return 10
-            try:
-                return int(val)
-            except ValueError:
-                return 0
+        if round_name not in ('PARES', 'JUEGO'):
+            return False
         
-        points = sum(get_card_points(value, self.game.game_mode) for value in card_values)
-        return points >= 31
+        # Uses the collapsed values; with the hand collapsed the probability is 0 or 1
+        hand = self.game.hands[player_index]
+        return get_hand_probabilities(hand, self.game.game_mode)[round_name.lower()] == 1.0
@@ -0,0 +1,100 @@
+"""
+Rate Limiting for Quantum Mus
+Token buckets per socket and per room, and overload counters
+
+Every inbound room event costs tokens from two buckets: the sending
+socket's and the room's. A bucket refills at `rate` tokens per second up to
+`burst`; an event that finds too few tokens is refused (the client gets a
+rate_limited event with how long to wait) instead of queueing more work on
+the room. Events that simulate or collapse quantum state cost more than
+plain actions.
+
+A RateLimiter keeps one bucket per key and drops buckets that have refilled
+completely (an idle socket or room costs nothing). OverloadStats counts
+what was refused and why, for GET /api/load.
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Hashable
+
+
+class TokenBucket:
+    """rate tokens/s, up to burst"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'stamp')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = now
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return self.tokens
+
+    def take(self, cost: float, now: float) -> float:
+        """Take cost tokens; returns 0 if they were there, else the seconds until they will be"""
+        if self.refill(now) >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """One TokenBucket per key"""
+
+    PRUNE_EVERY = 1024  # take() calls between sweeps of refilled buckets
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._mutex = threading.Lock()
+        self._calls = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key: Hashable, cost: float = 1.0) -> float:
+        """0 if key may go ahead (its tokens are spent), else the seconds to wait"""
+        now = self._clock()
+        with self._mutex:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            wait = bucket.take(cost, now)
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            return wait
+
+    def forget(self, key: Hashable) -> None:
+        with self._mutex:
+            self._buckets.pop(key, None)
+
+    def _prune(self, now: float) -> None:
+        for key in [key for key, bucket in self._buckets.items() if bucket.refill(now) >= bucket.burst]:
+            del self._buckets[key]
+
+
+class OverloadStats:
+    """Refused inbound events, by reason ('socket', 'room', 'queue') and by event"""
+
+    def __init__(self):
+        self._reasons = Counter()
+        self._events = Counter()
+        self._mutex = threading.Lock()
+
+    def refused(self, reason: str, event: str) -> None:
+        with self._mutex:
+            self._reasons[reason] += 1
+            self._events[event] += 1
+
+    def snapshot(self) -> Dict:
+        with self._mutex:
+            return {'refused': dict(self._reasons), 'refused_by_event': dict(self._events)}
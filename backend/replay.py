@@ -0,0 +1,194 @@
+"""
+Offline Replay and Profiling for Quantum Mus
+Replays a recorded action log through QuantumMusGame, with no network
+
+Takes the <room_id>.log written by the action log (ACTION_LOG_DIR), loads a
+snapshot and re-executes every command (process_action, discard_cards,
+deal_new_cards, collapse triggers...) with the random outputs recorded in the
+log, so the replay is deterministic. Later snapshots in the log are used as
+checkpoints: the replayed game must match them.
+
+Each pass replays from the same snapshot:
+- timing: per-event wall time, summarized per event kind, plus the slowest events
+- profile (--profile FILE): cProfile of the replay, dumped for pstats/snakeviz
+- allocations (--alloc): tracemalloc peak and top allocation sites
+
+Usage:
+    python replay.py logs/room123.log --profile room123.prof --alloc
+    python replay.py logs/room123.log --from-latest --upto 400 --json
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from action_log import DERIVED_KINDS, apply_event, find_snapshot, read_log
+from game_snapshot import load_game
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_EVENTS = 10
+
+
+def _view(game) -> Tuple:
+    """What a checkpoint snapshot must agree on"""
+    return (game.state.to_dict(),
+            {seat: [card.to_dict() for card in hand] for seat, hand in game.hands.items()},
+            [card.card_id for card in game.deck.cards], game.deck.deck_index)
+
+
+def _replay(records: List[Tuple[int, str, object]], base: int, upto: Optional[int],
+            timings: Optional[List] = None, checkpoints: Optional[List] = None):
+    """Load records[base] and apply the events after it. Returns the game."""
+    game = load_game(records[base][2], analytics=False)
+    for seq, kind, payload in records[base + 1:]:
+        if upto is not None and seq > upto:
+            break
+        if kind == 'snapshot':
+            if checkpoints is not None:
+                checkpoints.append((seq, _view(load_game(payload, analytics=False)) == _view(game)))
+            continue
+        if kind in DERIVED_KINDS:
+            continue
+        if timings is None:
+            apply_event(game, kind, payload)
+        else:
+            started = time.perf_counter()
+            apply_event(game, kind, payload)
+            timings.append((seq, kind, time.perf_counter() - started))
+    return game
+
+
+def _summarize(timings: List[Tuple[int, str, float]]) -> Dict:
+    per_kind = defaultdict(list)
+    for _, kind, elapsed in timings:
+        per_kind[kind].append(elapsed)
+    kinds = {}
+    for kind, samples in sorted(per_kind.items()):
+        samples.sort()
+        kinds[kind] = {
+            'count': len(samples),
+            'total_ms': round(sum(samples) * 1e3, 3),
+            'mean_us': round(sum(samples) / len(samples) * 1e6, 1),
+            'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+            'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1),
+            'max_us': round(samples[-1] * 1e6, 1),
+        }
+    slowest = sorted(timings, key=lambda item: item[2], reverse=True)[:SLOWEST_EVENTS]
+    return {
+        'events': len(timings),
+        'total_ms': round(sum(item[2] for item in timings) * 1e3, 3),
+        'per_kind': kinds,
+        'slowest': [{'seq': seq, 'kind': kind, 'us': round(elapsed * 1e6, 1)} for seq, kind, elapsed in slowest],
+    }
+
+
+def replay_log(path: str, upto: Optional[int] = None, from_latest: bool = False,
+               profile_path: Optional[str] = None, profile_top: int = 20,
+               alloc_top: int = 0) -> Dict:
+    """
+    Replay a log file and report timing (and optionally profile/allocations).
+
+    Args:
+        upto: Stop after this event seq
+        from_latest: Start at the latest snapshot (before upto) instead of the first
+        profile_path: Write a cProfile dump of a replay pass here
+        alloc_top: Report this many top allocation sites from a tracemalloc pass
+    """
+    records = list(read_log(path))
+    base = find_snapshot(records, upto, first=not from_latest)
+
+    timings, checkpoints = [], []
+    game = _replay(records, base, upto, timings, checkpoints)
+    report = {
+        'log': path,
+        'room_id': game.room_id,
+        'start_seq': records[base][0],
+        'end_seq': timings[-1][0] if timings else records[base][0],
+        'scores': {name: team.score for name, team in game.state.teams.items()},
+        'checkpoints': {'checked': len(checkpoints),
+                        'mismatched': [seq for seq, matched in checkpoints if not matched]},
+        'timing': _summarize(timings),
+    }
+
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _replay(records, base, upto)
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(profile_top)
+        report['profile'] = {'path': profile_path, 'top': text.getvalue()}
+
+    if alloc_top:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            _replay(records, base, upto)
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        report['allocations'] = {
+            'current_kb': round(current / 1024, 1),
+            'peak_kb': round(peak / 1024, 1),
+            'top': [{'site': str(stat.traceback), 'kb': round(stat.size_diff / 1024, 1), 'count': stat.count_diff}
+                    for stat in after.compare_to(before, 'lineno')[:alloc_top]],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay and profile a recorded Quantum Mus action log')
+    parser.add_argument('log', help='Action log file (<ACTION_LOG_DIR>/<room_id>.log)')
+    parser.add_argument('--upto', type=int, default=None, help='Stop after this event seq')
+    parser.add_argument('--from-latest', action='store_true',
+                        help='Start at the latest snapshot instead of the first')
+    parser.add_argument('--profile', default=None, help='Write a cProfile dump to this file')
+    parser.add_argument('--profile-top', type=int, default=20, help='Functions to print from the profile')
+    parser.add_argument('--alloc', action='store_true', help='Report a tracemalloc allocation summary')
+    parser.add_argument('--alloc-top', type=int, default=15, help='Allocation sites to report')
+    parser.add_argument('--json', action='store_true', help='Print the raw JSON report')
+    args = parser.parse_args()
+
+    # Game logic logs every action; the report has what matters here
+    logging.disable(logging.WARNING)
+    report = replay_log(args.log, args.upto, args.from_latest, args.profile, args.profile_top,
+                        args.alloc_top if args.alloc else 0)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    timing = report['timing']
+    print(f"Room {report['room_id']}: replayed events {report['start_seq'] + 1}..{report['end_seq']} "
+          f"({timing['events']} events, {timing['total_ms']} ms)")
+    print(f"Scores: {report['scores']}")
+    checkpoints = report['checkpoints']
+    print(f"Checkpoints: {checkpoints['checked']} checked, mismatched: {checkpoints['mismatched'] or 'none'}")
+    print(f"{'kind':<22}{'count':>7}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for kind, stats in timing['per_kind'].items():
+        print(f"{kind:<22}{stats['count']:>7}{stats['mean_us']:>10}{stats['p50_us']:>10}"
+              f"{stats['p99_us']:>10}{stats['max_us']:>10}")
+    print("Slowest events:")
+    for event in timing['slowest']:
+        print(f"  #{event['seq']:<6} {event['kind']:<22} {event['us']} us")
+    if 'profile' in report:
+        print(f"\nProfile written to {report['profile']['path']}")
+        print(report['profile']['top'])
+    if 'allocations' in report:
+        allocations = report['allocations']
+        print(f"Allocations: peak {allocations['peak_kb']} KB, retained {allocations['current_kb']} KB")
+        for site in allocations['top']:
+            print(f"  {site['kb']:>9} KB {site['count']:>7} blocks  {site['site']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,14 @@
 Room Manager - Handles game rooms and lobbies
 """
 
+import json
 import uuid
 import logging
 import string
 from datetime import datetime
 from Logica_cuantica.quantum_random import get_quantum_rng
+import state_store
+from lobby import LobbyIndex
 
 logger = logging.getLogger(__name__)
 
@@ -14,23 +17,58 @@ logger = logging.getLogger(__name__)
 class RoomManager:
     """Manages game rooms and player lobbies"""
     
-    def __init__(self):
-        self.rooms = {}  # room_id -> room_data
+    def __init__(self, store=None, owns=None, code_prefix=''):
+        self.rooms = {}  # room_id -> room_data (a cache of the store's rooms when it is shared)
         self.player_rooms = {}  # socket_id -> room_id
         self.room_codes = {}  # room_code -> room_id (for easy lookup)
+        self.store = store or state_store.MemoryStore()
+        # Room sharding (room_sharding.py): new ids must hash to this worker and
+        # codes start with the worker's own prefix, so they are unique across workers
+        self.owns = owns
+        self.code_prefix = code_prefix
+        # Joinable rooms of this process, updated on every save (lobby.py)
+        self.lobby = LobbyIndex()
+    
+    # ==================== SHARED STORE ====================
+    # With a shared store every method reads the room from the store (locking
+    # it inside a transaction) and writes it back; otherwise the dicts above
+    # are the only copy.
+    
+    def _load(self, room_id):
+        if not self.store.shared or room_id is None:
+            return self.rooms.get(room_id)
+        state_store.hold(self.store, state_store.room_lock(room_id))
+        data = self.store.get(f'room/{room_id}')
+        if data is None:
+            self.rooms.pop(room_id, None)
+            return None
+        room = self.rooms[room_id] = json.loads(data)
+        return room
+    
+    def _save(self, room):
+        self.lobby.update(room)
+        if self.store.shared:
+            self.store.set(f'room/{room["id"]}', json.dumps(room, separators=(',', ':')).encode())
+    
+    def _code_taken(self, code):
+        if self.store.shared:
+            return self.store.get(f'code/{code}') is not None
+        return code in self.room_codes
     
     def _generate_room_code(self):
         """Generate a unique 4-character room code using quantum randomness"""
         qrng = get_quantum_rng()
         chars = string.ascii_uppercase + string.digits
         while True:
-            code = ''.join(qrng.random_choice(list(chars)) for _ in range(4))
-            if code not in self.room_codes:
+            code = self.code_prefix + ''.join(qrng.random_choice(list(chars)) for _ in range(4 - len(self.code_prefix)))
+            if not self._code_taken(code):
                 return code
     
     def create_room(self, name, game_mode='8', max_players=4):
         """Create a new game room"""
         room_id = str(uuid.uuid4())[:8]
+        while self.owns is not None and not self.owns(room_id):
+            room_id = str(uuid.uuid4())[:8]
         room_code = self._generate_room_code()
         
         room = {
@@ -46,31 +84,47 @@ class RoomManager:
         
         self.rooms[room_id] = room
         self.room_codes[room_code] = room_id
+        self._save(room)
+        if self.store.shared:
+            self.store.set(f'code/{room_code}', room_id.encode())
         logger.info(f"Created room {room_id} with code {room_code}: {name}")
         
         return room
     
     def get_room(self, room_id):
         """Get room by ID"""
-        return self.rooms.get(room_id)
+        return self._load(room_id)
     
     def get_room_by_code(self, room_code):
         """Get room by code"""
-        room_id = self.room_codes.get(room_code)
+        if self.store.shared:
+            room_id = self.store.get(f'code/{room_code}')
+            room_id = room_id.decode() if room_id is not None else None
+        else:
+            room_id = self.room_codes.get(room_code)
         if room_id:
-            return self.rooms.get(room_id)
+            return self._load(room_id)
         return None
     
     def get_available_rooms(self):
-        """Get list of rooms that can be joined"""
-        return [
-            room for room in self.rooms.values()
-            if room['status'] == 'waiting' and len(room['players']) < room['max_players']
-        ]
+        """Lobby summaries of the rooms that can be joined, oldest first"""
+        if not self.store.shared:
+            return self.lobby.query()
+        # Other workers' changes do not reach this process's index: scan the store
+        lobby = LobbyIndex()
+        for data in (self.store.get(key) for key in self.store.keys('room/')):
+            if data is not None:
+                lobby.update(json.loads(data), notify=False)
+        return lobby.query()
+    
+    def count_rooms(self):
+        if self.store.shared:
+            return len(self.store.keys('room/'))
+        return len(self.rooms)
     
     def add_player(self, room_id, socket_id, player_name, character=None):
         """Add a player to a room. character puede ser None si aún no ha elegido."""
-        room = self.rooms.get(room_id)
+        room = self._load(room_id)
         
         if not room:
             return {'success': False, 'error': 'Room not found'}
@@ -96,6 +150,9 @@ class RoomManager:
         
         room['players'].append(player)
         self.player_rooms[socket_id] = room_id
+        self._save(room)
+        if self.store.shared:
+            self.store.set(f'player/{socket_id}', room_id.encode())
         
         logger.info(f"Player {player_name} joined room {room_id}")
         
@@ -107,7 +164,7 @@ class RoomManager:
     
     def remove_player(self, room_id, socket_id):
         """Remove a player from a room"""
-        room = self.rooms.get(room_id)
+        room = self._load(room_id)
         
         if not room:
             return False
@@ -116,25 +173,34 @@ class RoomManager:
         
         if socket_id in self.player_rooms:
             del self.player_rooms[socket_id]
+        if self.store.shared:
+            self.store.delete(f'player/{socket_id}')
         
         # Remove empty rooms
         if len(room['players']) == 0:
             del self.rooms[room_id]
+            self.lobby.discard(room_id)
+            if self.store.shared:
+                self.store.delete(f'room/{room_id}', f'code/{room["code"]}')
             logger.info(f"Removed empty room {room_id}")
         else:
             # Reindex remaining players
             for idx, player in enumerate(room['players']):
                 player['index'] = idx
+            self._save(room)
         
         return True
     
     def get_player_room(self, socket_id):
         """Get room ID for a player"""
+        if self.store.shared:
+            room_id = self.store.get(f'player/{socket_id}')
+            return room_id.decode() if room_id is not None else None
         return self.player_rooms.get(socket_id)
 
     def set_player_character(self, room_id, socket_id, character, team=None):
         """Update character and team for a player already in the room"""
-        room = self.rooms.get(room_id)
+        room = self._load(room_id)
         if not room:
             return False
         for player in room['players']:
@@ -144,13 +210,41 @@ class RoomManager:
                     player['team'] = team
                 elif character is None:
                     player.pop('team', None)
+                self._save(room)
                 return True
         return False
     
+    def export_room(self, room_id):
+        """Remove a room to move it to another process (its code stays reserved here)"""
+        room = self.rooms.pop(room_id, None)
+        if room is not None:
+            for player in room['players']:
+                self.player_rooms.pop(player['socket_id'], None)
+            self.lobby.discard(room_id, notify=False)  # Moving, not closing: the new owner re-announces it
+        return room
+    
+    def import_room(self, room):
+        """Install a room exported by export_room"""
+        self.rooms[room['id']] = room
+        self.room_codes[room['code']] = room['id']
+        for player in room['players']:
+            self.player_rooms[player['socket_id']] = room['id']
+        self.lobby.update(room)
+    
+    def set_game_mode(self, room_id, game_mode):
+        """Update the room's game mode"""
+        room = self._load(room_id)
+        if room:
+            room['game_mode'] = game_mode
+            self._save(room)
+            return True
+        return False
+    
     def set_room_status(self, room_id, status):
         """Update room status"""
-        room = self.rooms.get(room_id)
+        room = self._load(room_id)
         if room:
             room['status'] = status
+            self._save(room)
             return True
         return False
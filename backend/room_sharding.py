@@ -0,0 +1,430 @@
+"""
+Room Sharding for Quantum Mus
+Consistent-hash room affinity across local game-worker processes
+
+The alternative to a shared state store (state_store.py): with GAME_SHARDS=N
+the server process becomes a front that owns the sockets, and N worker
+processes own the rooms. A room lives on exactly one worker, which runs its
+socket handlers against plain in-process RoomManager/GameManager objects
+(no locks, no reloads); the front only forwards the inbound message and
+sends the events the handler produced.
+
+Routing:
+- room ids hash onto a ring of workers (HashRing, with virtual nodes). A
+  worker creating a room draws ids until one hashes to itself, so an id
+  routes to its owner without any lookup.
+- room codes are looked up in the router's code table (filled from the
+  room_created replies); each worker draws codes with its own first
+  character, so codes never collide across workers.
+- adding a worker (ShardRouter.add_worker) rebalances: the rooms the new
+  ring assigns to it are exported from their old workers (room dict plus
+  game_snapshot) and imported into the new one.
+
+Front and workers talk over localhost sockets: 4-byte length + pickle
+frames (the processes are the server's own, never a remote peer). Workers
+also push events of their own timers (turn/discard timeouts).
+
+Per-shard metrics (ShardRouter.metrics, GET /api/shards): requests, errors,
+latency and the rooms/games/players each worker holds.
+"""
+
+import bisect
+import hashlib
+import itertools
+import logging
+import os
+import pickle
+import socket
+import string
+import struct
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+VIRTUAL_NODES = 64  # Ring points per worker
+CODE_CHARS = string.ascii_uppercase + string.digits  # Room code alphabet (RoomManager)
+MAX_WORKERS = len(CODE_CHARS)  # One code prefix per worker
+WORKER_START_TIMEOUT = 60.0
+CALL_TIMEOUT = 30.0
+
+_FRAME = struct.Struct('>I')
+
+
+class ShardError(RuntimeError):
+    """A shard worker failed or could not be reached"""
+
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash of keys onto workers (ints)"""
+
+    def __init__(self, workers=(), replicas: int = VIRTUAL_NODES):
+        self.replicas = replicas
+        self.workers: List[int] = []
+        self._points: List[int] = []
+        self._owners: List[int] = []
+        for worker in workers:
+            self.add(worker)
+
+    def add(self, worker: int) -> None:
+        self.workers.append(worker)
+        for replica in range(self.replicas):
+            point = _point(f'{worker}#{replica}')
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, worker)
+
+    def owner(self, key: str) -> int:
+        if not self._points:
+            raise ShardError("No shard workers")
+        index = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._owners[index]
+
+    def copy(self) -> 'HashRing':
+        ring = HashRing(replicas=self.replicas)
+        ring.workers, ring._points, ring._owners = list(self.workers), list(self._points), list(self._owners)
+        return ring
+
+
+def code_prefix(worker: int) -> str:
+    """First character of the room codes a worker draws"""
+    return CODE_CHARS[worker]
+
+
+# ==================== WIRE ====================
+
+def _send(sock, message) -> None:
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_FRAME.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise EOFError("shard connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv(sock):
+    size, = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+    return pickle.loads(_recv_exactly(sock, size))
+
+
+# ==================== FRONT ====================
+
+class _Gate:
+    """Calls pass concurrently; rebalancing closes the gate and waits for the calls in flight"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = 0
+        self._closed = False
+
+    @contextmanager
+    def call(self):
+        with self._cond:
+            while self._closed:
+                self._cond.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            while self._closed:
+                self._cond.wait()
+            self._closed = True
+            while self._active:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._closed = False
+                self._cond.notify_all()
+
+
+class _Shard:
+    """Front-side connection to one worker process"""
+
+    def __init__(self, worker: int, process, sock):
+        self.worker = worker
+        self.process = process
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        self.pending: Dict[int, list] = {}  # request id -> [threading.Event, reply]
+        self.requests = 0
+        self.errors = 0
+        self.busy = 0.0  # Seconds spent waiting on this worker
+        self.max_latency = 0.0
+
+
+class ShardRouter:
+    """
+    Starts the worker processes and routes room requests to their owners.
+    on_push(rooms, events) receives the events a worker emitted on its own
+    (timers); it is called from the router's reader threads.
+    """
+
+    def __init__(self, workers: int, on_push=None, env: Dict[str, str] = None):
+        if not 1 <= workers <= MAX_WORKERS:
+            raise ShardError(f"GAME_SHARDS must be between 1 and {MAX_WORKERS}")
+        self.on_push = on_push
+        self.env = env
+        self.ring = HashRing()
+        self.room_codes: Dict[str, str] = {}  # room code -> room id
+        self.moved_rooms = 0
+        self._shards: Dict[int, _Shard] = {}
+        self._ids = itertools.count(1)
+        self._gate = _Gate()
+        self._listener = socket.create_server(('127.0.0.1', 0))
+        self._start(list(range(workers)))
+        for worker in range(workers):
+            self.ring.add(worker)
+        self._publish_ring()
+
+    # -------------------- processes --------------------
+
+    def _start(self, workers: List[int]) -> None:
+        """Spawn worker processes and wait until each has connected back"""
+        port = self._listener.getsockname()[1]
+        processes = {
+            worker: subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--worker', str(worker), '--port', str(port)],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                env=dict(os.environ, **(self.env or {})),
+            )
+            for worker in workers
+        }
+        self._listener.settimeout(WORKER_START_TIMEOUT)
+        try:
+            for _ in workers:
+                sock, _ = self._listener.accept()
+                sock.settimeout(None)
+                hello, worker = _recv(sock)
+                if hello != 'ready' or worker not in processes:
+                    raise ShardError(f"Unexpected hello from shard worker: {(hello, worker)!r}")
+                shard = self._shards[worker] = _Shard(worker, processes[worker], sock)
+                threading.Thread(target=self._read_loop, args=(shard,), daemon=True,
+                                 name=f'shard-{worker}-reader').start()
+                logger.info(f"Shard worker {worker} started (pid {shard.process.pid})")
+        except (socket.timeout, EOFError) as e:
+            for process in processes.values():
+                process.kill()
+            raise ShardError(f"Shard workers did not start: {e}") from e
+
+    def _read_loop(self, shard: _Shard) -> None:
+        try:
+            while True:
+                request_id, ok, result = _recv(shard.sock)
+                if request_id is None:
+                    if self.on_push is not None:
+                        try:
+                            self.on_push(*result)
+                        except Exception:
+                            logger.exception(f"Failed to deliver events pushed by shard {shard.worker}")
+                    continue
+                waiter = shard.pending.pop(request_id, None)
+                if waiter is not None:
+                    waiter[1] = (ok, result)
+                    waiter[0].set()
+        except (EOFError, OSError) as e:
+            logger.error(f"Lost shard worker {shard.worker}: {e}")
+            for waiter in list(shard.pending.values()):
+                waiter[1] = (False, f"shard worker {shard.worker} exited")
+                waiter[0].set()
+            shard.pending.clear()
+
+    def close(self) -> None:
+        for shard in self._shards.values():
+            try:
+                shard.sock.close()
+            finally:
+                shard.process.terminate()
+        for shard in self._shards.values():
+            shard.process.wait(10)
+        self._listener.close()
+
+    # -------------------- calls --------------------
+
+    def _call(self, worker: int, op: str, *args):
+        shard = self._shards[worker]
+        request_id = next(self._ids)
+        waiter = shard.pending[request_id] = [threading.Event(), None]
+        started = time.perf_counter()
+        with shard.send_lock:
+            _send(shard.sock, (request_id, op, args))
+        if not waiter[0].wait(CALL_TIMEOUT):
+            shard.pending.pop(request_id, None)
+            shard.errors += 1
+            raise ShardError(f"Shard worker {worker} timed out on {op}")
+        elapsed = time.perf_counter() - started
+        shard.requests += 1
+        shard.busy += elapsed
+        shard.max_latency = max(shard.max_latency, elapsed)
+        ok, result = waiter[1]
+        if not ok:
+            shard.errors += 1
+            raise ShardError(f"Shard worker {worker} failed on {op}: {result}")
+        return result
+
+    def owner(self, room_id: str) -> int:
+        return self.ring.owner(room_id)
+
+    def room_for_code(self, code: str) -> Optional[str]:
+        return self.room_codes.get(code)
+
+    def call_room(self, room_id: Optional[str], op: str, *args):
+        """Run op on the worker owning room_id (any worker for unknown rooms)"""
+        with self._gate.call():
+            return self._call(self.ring.owner(room_id or ''), op, *args)
+
+    def call_new_room(self, op: str, *args):
+        """Run a room-creating op on the least loaded worker"""
+        with self._gate.call():
+            worker = min(self._shards.values(), key=lambda shard: (len(shard.pending), shard.requests)).worker
+            return self._call(worker, op, *args)
+
+    def collect(self, op: str, *args) -> List:
+        """Run op on every worker; the results in worker order"""
+        with self._gate.call():
+            return [self._call(worker, op, *args) for worker in sorted(self._shards)]
+
+    def learn_room(self, room: Dict) -> None:
+        if room and room.get('code'):
+            self.room_codes[room['code']] = room['id']
+
+    # -------------------- rebalancing --------------------
+
+    def _publish_ring(self) -> None:
+        for worker in sorted(self._shards):
+            self._call(worker, 'set_ring', self.ring.workers)
+
+    def add_worker(self) -> int:
+        """Start one more worker and move the rooms the new ring gives it; returns the rooms moved"""
+        with self._gate.exclusive():
+            worker = len(self._shards)
+            if worker >= MAX_WORKERS:
+                raise ShardError(f"At most {MAX_WORKERS} shard workers")
+            self._start([worker])
+            ring = self.ring.copy()
+            ring.add(worker)
+            moved = 0
+            for old in sorted(self._shards):
+                if old == worker:
+                    continue
+                room_ids = [room_id for room_id in self._call(old, 'room_ids') if ring.owner(room_id) == worker]
+                if room_ids:
+                    records = self._call(old, 'export_rooms', room_ids)
+                    self._call(worker, 'import_rooms', records)
+                    moved += len(records)
+            self.ring = ring
+            self._publish_ring()
+            self.moved_rooms += moved
+            logger.info(f"Added shard worker {worker}; moved {moved} rooms")
+            return moved
+
+    # -------------------- metrics --------------------
+
+    def metrics(self) -> Dict:
+        counts = self.collect('counts')
+        shards = []
+        for (worker, shard), held in zip(sorted(self._shards.items()), counts):
+            shards.append(dict(
+                held,
+                worker=worker,
+                pid=shard.process.pid,
+                requests=shard.requests,
+                errors=shard.errors,
+                in_flight=len(shard.pending),
+                avg_latency_ms=round(shard.busy / shard.requests * 1000, 3) if shard.requests else 0.0,
+                max_latency_ms=round(shard.max_latency * 1000, 3),
+            ))
+        return {
+            'workers': len(shards),
+            'rooms': sum(shard['rooms'] for shard in shards),
+            'games': sum(shard['games'] for shard in shards),
+            'moved_rooms': self.moved_rooms,
+            'shards': shards,
+        }
+
+
+# ==================== WORKER ====================
+
+_ring: Optional[HashRing] = None
+_worker: Optional[int] = None
+
+
+def worker_index() -> Optional[int]:
+    """This process's shard index (None outside a shard worker)"""
+    return _worker
+
+
+def owns(room_id: str) -> bool:
+    """Whether the current ring assigns room_id to this worker"""
+    return _ring is None or _ring.owner(room_id) == _worker
+
+
+def run_worker(worker: int, port: int) -> None:
+    """Shard worker main loop: one request at a time, in arrival order"""
+    global _ring, _worker
+    _worker = worker
+    os.environ['GAME_SHARD_WORKER'] = str(worker)
+    import server  # Server handlers in worker mode (see server.GAME_SHARD_WORKER)
+
+    sock = socket.create_connection(('127.0.0.1', port))
+    send_lock = threading.Lock()
+
+    def reply(message):
+        with send_lock:
+            _send(sock, message)
+
+    server.set_shard_push(lambda rooms, events: reply((None, True, (rooms, events))))
+    reply(('ready', worker))
+    ops = server.shard_ops()
+    while True:
+        try:
+            request_id, op, args = _recv(sock)
+        except EOFError:
+            return
+        if op == 'set_ring':
+            _ring = HashRing(args[0])
+            reply((request_id, True, None))
+            continue
+        try:
+            result = (True, ops[op](*args))
+        except Exception as e:
+            logger.exception(f"Shard op {op} failed")
+            result = (False, f"{type(e).__name__}: {e}")
+        reply((request_id,) + result)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Quantum Mus room shard worker (started by the server)')
+    parser.add_argument('--worker', type=int, required=True)
+    parser.add_argument('--port', type=int, required=True)
+    args = parser.parse_args()
+    import room_sharding  # Not __main__: server imports room_sharding and must see the worker's ring
+    room_sharding.run_worker(args.worker, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -33,7 +33,7 @@ class RoundHandler:
         return any(count >= 2 for count in value_counts.values())
 
     def _is_player_eligible_for_round(self, player_index):
-        if self.game.state['currentRound'] != 'PARES':
+        if self.game.state.currentRound != 'PARES':
             return True
         return self._player_has_pares(player_index)
 
@@ -42,7 +42,7 @@ class RoundHandler:
         current_index = start_index
         for _ in range(self.game.num_players):
             current_index = self.game.get_next_player_index(current_index)
-            if team and current_index not in self.game.state['teams'][team]['players']:
+            if team and current_index not in self.game.state.teams[team].players:
                 continue
             if require_eligible and not self._is_player_eligible_for_round(current_index):
                 continue
@@ -65,26 +65,26 @@ class RoundHandler:
             return {'success': False, 'error': f'Invalid action: {action}'}
         
         # Validate it's this player's turn
-        if self.game.state['activePlayerIndex'] != player_index:
-            logger.warning(f"Player {player_index} tried to act out of turn (active: {self.game.state['activePlayerIndex']})")
+        if self.game.state.activePlayerIndex != player_index:
+            logger.warning(f"Player {player_index} tried to act out of turn (active: {self.game.state.activePlayerIndex})")
             return {'success': False, 'error': 'Not your turn'}
         
         # Validate player hasn't already acted this round
-        if player_index in self.game.state['roundActions']:
+        if player_index in self.game.state.roundActions:
             logger.warning(f"Player {player_index} tried to act twice in MUS round")
             return {'success': False, 'error': 'You have already acted this round'}
         
-        self.game.state['roundActions'][player_index] = action
+        self.game.state.roundActions[player_index] = action
 
         if action == 'mus':
             # Check if all players chose mus
-            all_mus = (len(self.game.state['roundActions']) == 4 and
-                       all(a == 'mus' for a in self.game.state['roundActions'].values()))
+            all_mus = (len(self.game.state.roundActions) == 4 and
+                       all(a == 'mus' for a in self.game.state.roundActions.values()))
 
             if all_mus:
                 # Start discard phase
-                self.game.state['waitingForDiscard'] = True
-                self.game.state['roundActions'] = {}
+                self.game.state.waitingForDiscard = True
+                self.game.state.roundActions = {}
                 logger.info("All players chose MUS - starting discard phase")
 
                 return {
@@ -109,35 +109,35 @@ class RoundHandler:
                 betting_team = self.game.get_player_team(player_index)
                 logger.info(f"Player {player_index} bet {bet_amount} points ({action}) during MUS")
 
-            self.game.state['musPhaseActive'] = False
-            self.game.state['currentRound'] = 'GRANDE'
-            self.game.state['roundActions'] = {}
-            self.game.state['allPlayersPassed'] = False
-            self.game.state['waitingForDiscard'] = False
+            self.game.state.musPhaseActive = False
+            self.game.state.currentRound = 'GRANDE'
+            self.game.state.roundActions = {}
+            self.game.state.allPlayersPassed = False
+            self.game.state.waitingForDiscard = False
 
             # Initialize Grande phase
             self.grande_handler.initialize_grande_phase()
             
             # If there was a bet during MUS, set it up in Grande phase
             if betting_team:
-                phase = self.game.state['grandePhase']
-                phase['phaseState'] = 'BET_PLACED'
-                phase['attackingTeam'] = betting_team
-                phase['defendingTeam'] = self.game.get_opponent_team(betting_team)
-                phase['currentBetAmount'] = bet_amount
-                phase['betType'] = bet_type
-                phase['lastBettingTeam'] = betting_team
-                phase['defendersResponded'] = []
-                phase['allPassed'] = False
+                phase = self.game.state.grandePhase
+                phase.phaseState = 'BET_PLACED'
+                phase.attackingTeam = betting_team
+                phase.defendingTeam = self.game.get_opponent_team(betting_team)
+                phase.currentBetAmount = bet_amount
+                phase.betType = bet_type
+                phase.lastBettingTeam = betting_team
+                phase.defendersResponded = []
+                phase.allPassed = False
                 
                 # Find first defender (counterclockwise from betting player)
                 first_defender = self.grande_handler._get_next_defender_clockwise(player_index)
-                self.game.state['activePlayerIndex'] = first_defender
+                self.game.state.activePlayerIndex = first_defender
                 
                 logger.info(f"Grande phase starts with bet from MUS: {bet_amount} points, first defender is Player {first_defender}")
             else:
                 # No bet - mano starts
-                self.game.state['activePlayerIndex'] = self.game.state['manoIndex']
+                self.game.state.activePlayerIndex = self.game.state.manoIndex
 
             return {
                 'success': True,
@@ -151,7 +151,7 @@ class RoundHandler:
     def handle_betting_round(self, player_index, action, extra_data=None):
         """Handle betting rounds (GRANDE, CHICA, PARES, JUEGO)"""
         
-        current_round = self.game.state['currentRound']
+        current_round = self.game.state.currentRound
         
         # Route to the appropriate betting handler based on the current round
         if current_round == 'GRANDE':
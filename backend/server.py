@@ -9,14 +9,19 @@ Quantum Mus - Backend Server
 Flask + Socket.IO for real-time multiplayer game
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, copy_current_request_context
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit, join_room, leave_room
+from flask_socketio import SocketIO, join_room, leave_room
 import logging
 import os
 from datetime import datetime
 import time
 import threading
+import atexit
+import functools
+import json
+import uuid
+from contextlib import contextmanager
 
 # Directorio del frontend (para servir archivos estáticos si aplica)
 FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'frontend'))
@@ -26,8 +31,28 @@ FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'fr
 # En desarrollo, usar * para pruebas locales
 CORS_ORIGINS = os.environ.get('ALLOWED_ORIGINS', '*')
 
+# Scale-out (gunicorn -w N): every worker must share room/game state and emits
+# STATE_STORE_URL: redis://host:6379/0 (any Redis-protocol server); unset = in-process
+# SOCKETIO_MESSAGE_QUEUE: Socket.IO message queue (e.g. redis://host:6379/1); unset = single worker
+STATE_STORE_URL = os.environ.get('STATE_STORE_URL')
+MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+# Room sharding (alternative): GAME_SHARDS=N worker processes own the rooms, this
+# process forwards room events to them (room_sharding.py). Workers run with GAME_SHARD_WORKER
+GAME_SHARD_WORKER = os.environ.get('GAME_SHARD_WORKER')
+GAME_SHARDS = 0 if GAME_SHARD_WORKER else int(os.environ.get('GAME_SHARDS') or 0)
+
 # Import game modules
 from game_manager import GameManager
+from entanglement_analytics import get_analytics
+from game_state import BetState
+import wire_json
+import wire_msgpack
+import state_store
+import room_sharding
+from timing_wheel import TimingWheel
+from room_executor import RoomBusy, RoomExecutor
+import rate_limit
+from lobby import LobbyIndex
 from room_manager import RoomManager
 from models import db, Game, Player, GameHistory
 from Logica_cuantica.baraja import QuantumDeck
@@ -59,7 +84,9 @@ socketio = SocketIO(
     engineio_logger=False,  # Desactivar logs verbose de engineio en producción
     #logger=False,  # Desactivar logs verbose de socketio en producción
     allow_upgrades=True,  # Permitir upgrades de polling a WebSocket
-    transports=['websocket', 'http_long_polling']  # WebSocket primero, fallback a polling
+    transports=['websocket', 'http_long_polling'],  # WebSocket primero, fallback a polling
+    json=wire_json,  # Embeds cached public-state JSON without re-encoding
+    message_queue=MESSAGE_QUEUE  # Emits reach sockets connected to other workers
 )
 
 # Timeouts (server-authoritative for online mode)
@@ -67,7 +94,25 @@ CONFIG = get_config()
 TURN_TIMEOUT = getattr(CONFIG, 'TURN_TIMEOUT', 10)
 DISCARD_TIMEOUT = getattr(CONFIG, 'DISCARD_TIMEOUT', 10)
 
-# Room -> timeout handle (eventlet GreenThread or threading.Timer)
+# Room -> timeout handle (timing_wheel.TimerHandle); one wheel drives them all
+timers = TimingWheel()
+# Inbound limits (see rate_limit): a room event costs tokens from its socket's
+# and its room's bucket; quantum simulations/collapses cost more
+SOCKET_RATE, SOCKET_BURST = getattr(CONFIG, 'SOCKET_RATE', 10), getattr(CONFIG, 'SOCKET_BURST', 20)
+ROOM_RATE, ROOM_BURST = getattr(CONFIG, 'ROOM_RATE', 30), getattr(CONFIG, 'ROOM_BURST', 60)
+ROOM_QUEUE_LIMIT = getattr(CONFIG, 'ROOM_QUEUE_LIMIT', 32)
+HEAVY_EVENT_COST = 4
+HEAVY_EVENTS = {'get_entanglement_state', 'get_outcome_probabilities', 'play_card_with_entanglement',
+                'trigger_declaration_collapse', 'trigger_bet_collapse', 'trigger_final_collapse'}
+# Reads a socket may repeat before they are answered: a repeat joins the queued one
+IDEMPOTENT_READS = {'get_game_state', 'request_state_sync', 'get_entanglement_state', 'get_player_entanglement',
+                    'get_outcome_probabilities'}
+socket_limiter = rate_limit.RateLimiter(SOCKET_RATE, SOCKET_BURST)
+room_limiter = rate_limit.RateLimiter(ROOM_RATE, ROOM_BURST)
+overload = rate_limit.OverloadStats()
+
+# Every handler and timeout of a room runs on that room's actor, one at a time
+room_actors = RoomExecutor(max_pending=ROOM_QUEUE_LIMIT)
 turn_timeouts = {}
 discard_timeouts = {}
 
@@ -75,75 +120,449 @@ discard_timeouts = {}
 db.init_app(app)
 
 # Initialize managers
-room_manager = RoomManager()
-game_manager = GameManager()
+store = state_store.open_store(STATE_STORE_URL)
+if store.shared and not MESSAGE_QUEUE:
+    logger.warning("STATE_STORE_URL is shared but SOCKETIO_MESSAGE_QUEUE is not set: "
+                   "emits only reach sockets on this worker")
+if GAME_SHARD_WORKER:
+    room_manager = RoomManager(store=store, owns=room_sharding.owns,
+                               code_prefix=room_sharding.code_prefix(int(GAME_SHARD_WORKER)))
+else:
+    room_manager = RoomManager(store=store)
+game_manager = GameManager(log_dir=os.environ.get('ACTION_LOG_DIR'), store=store)
+_recovered = game_manager.recover_games()  # Games left running by the last process
+if _recovered:
+    logger.info(f"Recovered {len(_recovered)} game(s) from their action logs: {', '.join(_recovered)}")
+
+# Lobby (see lobby.py): joinable rooms for GET /api/rooms, and lobby_delta pushes to
+# the sockets in LOBBY_ROOM. A sharded front keeps its own index, fed by the workers'
+# deltas; with a shared store each worker only sees its own changes, so no feed
+LOBBY_ROOM = 'lobby'
+LOBBY_CACHE_SECONDS = getattr(CONFIG, 'LOBBY_CACHE_SECONDS', 2)
+lobby = LobbyIndex() if GAME_SHARDS else room_manager.lobby
+
+
+# Sockets that negotiated the MessagePack wire encoding (see wire_msgpack)
+msgpack_sids = set()
 
 
-def _cancel_timeout(handle):
-    if not handle:
+# Events buffered while handling one inbound message (see _coalesced_emits)
+_outbox = threading.local()
+
+
+def _emit(event, data, room=None, **kwargs):
+    """
+    Emit event to room. Inside _coalesced_emits the event is buffered and
+    sent with the rest of the handler's events when it returns.
+    """
+    events = getattr(_outbox, 'events', None)
+    if events is not None and room is not None and not kwargs:
+        events.append((event, data, room))
         return
-    try:
-        handle.cancel()
+    _send(event, data, room=room, **kwargs)
+
+
+def emit(event, data=None):
+    """Reply to the socket being handled (buffered with the handler's other events)"""
+    _emit(event, data, room=request.sid)
+
+
+def _join_room(room):
+    rooms = getattr(_outbox, 'rooms', None)
+    if rooms is not None:  # Shard worker: the front owns the sockets
+        rooms.append(('join', request.sid, room))
+    else:
+        join_room(room)
+
+
+def _leave_room(room):
+    rooms = getattr(_outbox, 'rooms', None)
+    if rooms is not None:
+        rooms.append(('leave', request.sid, room))
+    else:
+        leave_room(room)
+
+
+def _send(event, data, room=None, **kwargs):
+    """
+    socketio.emit with the per-connection wire encoding: sockets that
+    negotiated MessagePack get the payload as one binary argument (packed
+    once for all of them), the rest get JSON. room may be a list of sids.
+    """
+    binary = [sid for sid, _ in socketio.server.manager.get_participants('/', room)
+              if sid in msgpack_sids] if msgpack_sids and room is not None else []
+    if not binary:
+        socketio.emit(event, data, room=room, **kwargs)
+        return
+    socketio.emit(event, data, room=room, skip_sid=binary, **kwargs)
+    packed = wire_msgpack.packb(data)
+    for sid in binary:
+        socketio.emit(event, packed, room=sid, **kwargs)
+
+
+
+@contextmanager
+def _coalesced_emits():
+    """
+    Buffer the _emit calls made while handling one inbound message and flush
+    them when it returns: every socket gets its events, in order, as a
+    single 'batch' frame ([[event, data], ...]), or as the bare event when
+    it only has one. Nested uses flush with the outermost.
+    """
+    if getattr(_outbox, 'events', None) is not None:
+        yield
         return
-    except Exception:
-        pass
+    _outbox.events = []
     try:
-        handle.kill()
-    except Exception:
-        pass
+        yield
+    finally:
+        events, _outbox.events = _outbox.events, None
+        _flush_emits(events)
+
+
+def _flush_emits(events):
+    if _shard_push is not None:
+        _shard_push([], events)  # Shard worker timer: the front sends them
+        return
+    if len(events) == 1:
+        event, data, room = events[0]
+        _send(event, data, room=room)
+        return
+    if MESSAGE_QUEUE:
+        # Rooms span workers, so this worker cannot slice per socket: batch
+        # consecutive events to the same room instead, which keeps each
+        # socket's order
+        start = 0
+        for index in range(1, len(events) + 1):
+            if index == len(events) or events[index][2] != events[start][2]:
+                run = events[start:index]
+                if len(run) == 1:
+                    _send(run[0][0], run[0][1], room=run[0][2])
+                else:
+                    _send('batch', [[event, data] for event, data, _ in run], room=run[0][2])
+                start = index
+        return
+    # Each socket's slice of the buffer; sockets with the same slice (the
+    # room's broadcasts, no private events) share one frame
+    slices = {}
+    for index, (_, _, room) in enumerate(events):
+        for sid, _ in socketio.server.manager.get_participants('/', room):
+            slices.setdefault(sid, []).append(index)
+    recipients = {}
+    for sid, indices in slices.items():
+        recipients.setdefault(tuple(indices), []).append(sid)
+    for indices, sids in recipients.items():
+        if len(indices) == 1:
+            event, data, _ = events[indices[0]]
+            _send(event, data, room=sids)
+        else:
+            _send('batch', [[events[index][0], events[index][1]] for index in indices], room=sids)
+
+
+def coalesced(handler):
+    """
+    Run handler (a socket handler or timer callback) inside _coalesced_emits
+    and a state store transaction: rooms it touches stay locked and games it
+    touched are saved before its events are sent.
+    """
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        with _coalesced_emits(), state_store.transaction(store):
+            return handler(*args, **kwargs)
+    return wrapper
+
+
+def serialized(handler):
+    """
+    Room socket handler that runs on the room's actor (room_actors): handlers
+    and timeouts of one room never overlap, different rooms run in parallel.
+    The caller waits for it; the request context and any events being
+    captured for a shard front are handed over to the actor's thread.
+    """
+    event = _event_name(handler)
+
+    @functools.wraps(handler)
+    def wrapper(data):
+        room_id = _actor_key(handler.__name__, data or {})
+        if room_id is None or room_actors.current() == room_id:
+            return handler(data)
+        run = copy_current_request_context(handler)
+        captured = getattr(_outbox, 'events', None), getattr(_outbox, 'rooms', None)
+        key = (event, request.sid, json.dumps(data, sort_keys=True)) if event in IDEMPOTENT_READS else None
+
+        def job():
+            _outbox.events, _outbox.rooms = captured
+            try:
+                return run(data)
+            finally:
+                _outbox.events = _outbox.rooms = None
+        try:
+            return room_actors.call(room_id, job, key=key)
+        except RoomBusy:
+            _refuse('queue', event)
+    return wrapper
+
+
+def throttled(handler):
+    """
+    Room socket handler admitted through token buckets: the socket's, then
+    the room's. A refused event gets rate_limited back and does no work.
+    """
+    event = _event_name(handler)
+    cost = HEAVY_EVENT_COST if event in HEAVY_EVENTS else 1
+
+    @functools.wraps(handler)
+    def wrapper(data=None):
+        wait = socket_limiter.take(request.sid, cost)
+        if wait:
+            return _refuse('socket', event, wait)
+        room_key = (data or {}).get('room_id') or (data or {}).get('room_code')
+        wait = room_limiter.take(room_key, cost) if room_key else 0
+        if wait:
+            return _refuse('room', event, wait)
+        return handler(data)
+    return wrapper
+
+
+def _event_name(handler):
+    name = handler.__name__
+    return name[len('handle_'):] if name.startswith('handle_') else name
+
+
+def _refuse(reason, event, retry_after=None):
+    """Tell the socket its event was dropped: reason 'socket'/'room' (rate limit) or 'queue' (room backlog)"""
+    overload.refused(reason, event)
+    emit('rate_limited', {
+        'event': event,
+        'reason': reason,
+        'retry_after': round(retry_after, 3) if retry_after else None
+    })
+
+
+def _actor_key(name, data):
+    if name == 'handle_join_room_by_code':
+        room = room_manager.get_room_by_code(str(data.get('room_code', '')).upper())
+        return room['id'] if room else None
+    if name == '_release_player':
+        return data.get('room_id') or room_manager.get_player_room(request.sid)
+    return data.get('room_id')
+
+
+def _publish_lobby_delta(delta):
+    """Lobby index changed: send the delta to the lobby feed (a shard worker hands it to its front)"""
+    if _shard_push is not None and getattr(_outbox, 'events', None) is None:
+        _shard_push([], [('lobby_delta', delta, LOBBY_ROOM)])
+    else:
+        _emit('lobby_delta', delta, room=LOBBY_ROOM)
+
+
+if not store.shared:
+    lobby.listener = _publish_lobby_delta
+
+
+# ==================== ROOM SHARDING ====================
+
+_shard_handlers = {}  # handler name -> function, for shard workers
+_shard_push = None  # Shard worker: sends timer events to the front
+shard_router = None  # Front: room_sharding.ShardRouter when GAME_SHARDS is set
+
 
+def sharded(handler):
+    """
+    Room socket handler that runs on the room's shard worker when the server
+    is sharded: the front forwards the message and sends the events (and
+    room joins/leaves) the handler produced there.
+    """
+    _shard_handlers[handler.__name__] = handler
+
+    @functools.wraps(handler)
+    def wrapper(data):
+        if shard_router is None:
+            return handler(data)
+        if handler.__name__ == 'handle_create_room':
+            rooms, events = shard_router.call_new_room('handler', handler.__name__, request.sid, data)
+        else:
+            rooms, events = shard_router.call_room(_shard_key(handler.__name__, data), 'handler',
+                                                   handler.__name__, request.sid, data)
+        _apply_shard_events(rooms, events)
+    return wrapper
+
+
+def _shard_key(name, data):
+    if name == 'handle_join_room_by_code':
+        return shard_router.room_for_code(data.get('room_code', '').upper())
+    return data.get('room_id')
+
+
+def _apply_shard_events(rooms, events):
+    """Front: apply a worker's room joins/leaves, then send its events"""
+    for action, sid, room in rooms:
+        if action == 'join':
+            socketio.server.enter_room(sid, room, namespace='/')
+        else:
+            socketio.server.leave_room(sid, room, namespace='/')
+    with _coalesced_emits():
+        for event, data, room in events:
+            if event == 'room_created' and data.get('success'):
+                shard_router.learn_room(data['room'])
+            if event == 'lobby_delta' and room == LOBBY_ROOM:
+                lobby.apply(data)  # Re-versioned by the front's index, which sends it on
+                continue
+            _emit(event, data, room=room)
+
+
+def _run_shard_handler(name, sid, data):
+    """Shard worker: run a forwarded handler as socket sid; returns its (rooms, events)"""
+    with app.test_request_context('/'):
+        request.sid = sid
+        request.namespace = '/'
+        _outbox.events, _outbox.rooms = [], []
+        try:
+            _shard_handlers[name](data)
+        except Exception as e:
+            default_error_handler(e)
+        finally:
+            events, rooms = _outbox.events, _outbox.rooms
+            _outbox.events = _outbox.rooms = None
+    return rooms, events
+
+
+def _export_rooms(room_ids):
+    return [room_actors.call(room_id, _export_room, room_id) for room_id in room_ids]
+
+
+def _export_room(room_id):
+    _replace_timeout(turn_timeouts, room_id, None)
+    _replace_timeout(discard_timeouts, room_id, None)
+    return room_manager.export_room(room_id), game_manager.export_game(room_id)
+
+
+def _import_rooms(records):
+    for room, game in records:
+        room_manager.import_room(room)
+        if game is not None:
+            game_manager.import_game(room['id'], game)
+            _schedule_turn_timeout(room['id'])
+
+
+def _shard_counts():
+    return {
+        'rooms': len(room_manager.rooms),
+        'games': len(game_manager.games),
+        'players': len(room_manager.player_rooms),
+    }
+
+
+def set_shard_push(push):
+    global _shard_push
+    _shard_push = push
+
+
+def shard_ops():
+    """Operations a shard worker serves (see room_sharding.run_worker)"""
+    return {
+        'handler': _run_shard_handler,
+        'create_room': lambda name, game_mode: room_manager.create_room(name, game_mode, 4),
+        'counts': _shard_counts,
+        'room_ids': lambda: list(room_manager.rooms),
+        'export_rooms': _export_rooms,
+        'import_rooms': _import_rooms,
+        'analytics': get_analytics().totals,
+        'load': _load,
+    }
+
+
+def _timeout_token(kind, room_id, delay_seconds):
+    """
+    Register a new kind ('turn'/'discard') timeout for room. Only the latest
+    one may fire: the timer of a worker that did not handle the next action
+    cannot be cancelled, so it checks its token instead.
+    """
+    token = uuid.uuid4().hex.encode()
+    store.set(f'timeout/{kind}/{room_id}', token, ttl=delay_seconds + 60)
+    return token
+
+
+def _timeout_is_current(kind, room_id, token):
+    return store.get(f'timeout/{kind}/{room_id}') == token
 
 def _replace_timeout(timeout_store, room_id, handle):
     old = timeout_store.pop(room_id, None)
-    _cancel_timeout(old)
+    if old:
+        old.cancel()
     if handle:
         timeout_store[room_id] = handle
 
 
-def _spawn_after(delay_seconds, callback):
-    if eventlet:
-        return eventlet.spawn_after(delay_seconds, callback)
-    timer = threading.Timer(delay_seconds, callback)
-    timer.daemon = True
-    timer.start()
-    return timer
+def _own_hand(game, seat):
+    """Private part of a deal: the seat's own cards (other hands are only in hand_sizes)"""
+    return {'player_hands': {seat: [card.to_dict() for card in game.hands.get(seat, [])]}}
+
+
+def _own_hand_as(key):
+    """private= for _emit_to_seats that sends the seat's own hand under key"""
+    return lambda game, seat: {key: _own_hand(game, seat)['player_hands']}
+
+
+def _emit_to_seats(event, game, payload, private=_own_hand):
+    """
+    Emit event to each seated player's socket, adding private(game, seat) to
+    the shared payload. Hands never go to the whole room; pass shared state
+    as RawJSON so it is encoded once for all seats.
+    """
+    for seat, player in enumerate(game.players):
+        socket_id = player.get('socket_id')
+        if socket_id:
+            _emit(event, dict(payload, **private(game, seat)), room=socket_id)
+
+
+def _deal_state(game):
+    """Public state sent with a deal (plus mano and entanglement), encoded once"""
+    state = game.get_public_state()
+    state['manoIndex'] = game.state.manoIndex
+    state['entanglement'] = game.get_full_entanglement_state()
+    return wire_json.RawJSON(wire_json.dumps(state, separators=(',', ':')))
+
+
+def _seat_of(game, socket_id):
+    for seat, player in enumerate(game.players):
+        if player.get('socket_id') == socket_id:
+            return seat
+    return None
 
 
 def _broadcast_action_update(room_id, game, player_index, action, extra_data, result):
-    socketio.emit('game_update', {
-        'game_state': game.get_public_state(),
+    update = {
+        'state_delta': game.get_public_state_delta(),  # Clients not at its base request a state_sync
         'action': {
             'player_index': player_index,
             'action': action,
             'data': extra_data or {}
         },
         'result': result  # Include the full result in the broadcast
-    }, room=room_id)
+    }
+    if result.get('game_ended'):
+        # Showdown: the final hands are public now
+        update['revealed_hands'] = {i: [card.to_dict() for card in game.hands.get(i, [])] for i in range(4)}
+    _emit('game_update', update, room=room_id)
 
     if result.get('round_ended') and result.get('round_result') is not None:
-        socketio.emit('round_ended', {
+        _emit('round_ended', {
             'result': result['round_result']
         }, room=room_id)
 
     if result.get('hand_ended'):
-        updated_state = game.get_public_state()
-        updated_state['player_hands'] = {
-            i: [card.to_dict() for card in game.hands.get(i, [])]
-            for i in range(4)
-        }
-        updated_state['manoIndex'] = game.state['manoIndex']
-        updated_state['entanglement'] = game.get_full_entanglement_state()
-        socketio.emit('hand_started', {
-            'game_state': updated_state,
+        _emit_to_seats('hand_started', game, {
+            'game_state': _deal_state(game),
             'game_mode': game.game_mode
-        }, room=room_id)
+        })
 
     if result.get('game_ended'):
-        socketio.emit('game_ended', {
+        _emit('game_ended', {
             'winner': result.get('winner_team'),
             'final_scores': {
-                'team1': game.state['teams']['team1']['score'],
-                'team2': game.state['teams']['team2']['score']
+                'team1': game.state.teams['team1'].score,
+                'team2': game.state.teams['team2'].score
             },
             'reason': 'ordago' if result.get('bet_type') == 'ordago' else 'score_limit'
         }, room=room_id)
@@ -157,7 +576,7 @@ def _broadcast_action_update(room_id, game, player_index, action, extra_data, re
 def _check_and_emit_auto_declaration(room_id, game, round_name):
     """
     Check if current active player can auto-declare and emit declaration if so.
-    Recursively checks until finding a player that needs manual declaration or all are done.
+    Repeats until finding a player that needs manual declaration or all are done.
     Returns True if auto-declaration was emitted, False otherwise.
     """
     if not game:
@@ -168,66 +587,29 @@ def _check_and_emit_auto_declaration(room_id, game, round_name):
         return False
     
     # Only check for declaration if we're in declaration phase (not betting)
-    key = 'paresDeclarations' if current_round == 'PARES' else 'juegoDeclarations'
-    if key not in game.state:
-        game.state[key] = {}
-    
-    declarations = game.state[key]
+    declarations = game.state[game.declaration_key(current_round)]
     
     # If all players have declared, check if we need to transition or start betting
     if len(declarations) >= 4:
-        if current_round == 'PARES':
-            _handle_pares_declarations_complete(room_id, game)
-        elif current_round == 'JUEGO':
-            _handle_juego_declarations_complete(room_id, game)
+        _handle_declarations_complete(room_id, game, current_round)
         return False
     
-    # Keep checking players until finding one that needs manual declaration
-    max_checks = 4  # Prevent infinite loops
-    checks = 0
     auto_declared_count = 0
-    
-    while checks < max_checks and len(declarations) < 4:
-        checks += 1
-        
-        player_index = game.state.get('activePlayerIndex')
-        if player_index is None:
-            break
-        
-        # Check if this player has already declared
-        if player_index in declarations:
-            # This player already declared, move to next
-            game.next_player()
-            continue
-        
-        # Check if player should auto-declare
-        should_auto = game.should_auto_declare(player_index, current_round)
-        if not should_auto:
+    while len(declarations) < 4:
+        declared = game.auto_declare_next(current_round)
+        if declared is None:
             # This player needs manual declaration, stop here
             break
-        
-        # Get the auto-declaration value
-        auto_value = game.get_auto_declaration_value(player_index, current_round)
-        if auto_value is None:
-            # Uncertain outcome, needs manual declaration
-            break
-        
-        # Store declaration
-        declarations[player_index] = auto_value
-        
-        # Advance turn (auto-declarations don't require collapse)
-        game.next_player()
-        
-        logger.info(f"Auto-declared for player {player_index} in {current_round}: {auto_value}")
+        player_index, auto_value = declared
         
         # Broadcast auto-declaration
-        socketio.emit('declaration_made', {
+        _emit('declaration_made', {
             'success': True,
             'player_index': player_index,
             'declaration': auto_value,
             'round_name': current_round,
             'declarations': dict(declarations),  # Copy to avoid mutation issues
-            'next_player': game.state['activePlayerIndex'],
+            'next_player': game.state.activePlayerIndex,
             'is_auto_declared': True,
             'timestamp': datetime.utcnow().isoformat()
         }, room=room_id)
@@ -241,203 +623,40 @@ def _check_and_emit_auto_declaration(room_id, game, round_name):
     return auto_declared_count > 0
 
 
-def _handle_pares_declarations_complete(room_id, game):
+def _handle_declarations_complete(room_id, game, round_name):
     """
-    Handle completion of all PARES declarations.
-    Determine if we should start PARES betting or transition to JUEGO.
-    Implements the same logic as frontend's handleAllParesDeclarationsDone().
+    Handle completion of all PARES/JUEGO declarations: start the round's
+    betting or announce the round that follows (see QuantumMusGame.finish_declarations).
     """
-    declarations = game.state.get('paresDeclarations', {})
+    declarations = game.state.get(game.declaration_key(round_name))
     if len(declarations) < 4:
         return  # Not all declarations complete yet
     
-    # Mark declaration phase as complete and reset active player to mano
-    game.complete_declaration_phase()
-    game.set_phase('VALIDATION')
+    transition = game.finish_declarations(round_name)
+    logger.info(f"{round_name} declarations complete in room {room_id}: {transition}")
     
-    # Helper functions to check declaration types
-    def is_tengo(val):
-        return val in [True, 'tengo_after_penalty']
-    
-    def is_puede(val):
-        return val == 'puede'
-    
-    def is_no_tengo(val):
-        return val == False
-    
-    # Count declarations per team
-    team1_players = game.state['teams']['team1']['players']
-    team2_players = game.state['teams']['team2']['players']
-    
-    team1_tengo = sum(1 for p in team1_players if is_tengo(declarations.get(p)))
-    team1_puede = sum(1 for p in team1_players if is_puede(declarations.get(p)))
-    team1_no_tengo = sum(1 for p in team1_players if is_no_tengo(declarations.get(p)))
-    
-    team2_tengo = sum(1 for p in team2_players if is_tengo(declarations.get(p)))
-    team2_puede = sum(1 for p in team2_players if is_puede(declarations.get(p)))
-    team2_no_tengo = sum(1 for p in team2_players if is_no_tengo(declarations.get(p)))
-    
-    logger.info(f"PARES declarations complete - Team1: {team1_tengo} tengo, {team1_puede} puede, {team1_no_tengo} no tengo | Team2: {team2_tengo} tengo, {team2_puede} puede, {team2_no_tengo} no tengo")
-    
-    # Determine if betting should happen
-    # Betting is ONLY skipped if:
-    # - 1-2 players from SAME team say "tengo"/"puede"
-    # - AND both players from OTHER team say "no tengo"
-    team1_has_interest = (team1_tengo + team1_puede >= 1)
-    team2_has_interest = (team2_tengo + team2_puede >= 1)
-    team1_all_no_tengo = (team1_no_tengo == 2)
-    team2_all_no_tengo = (team2_no_tengo == 2)
-    
-    # Betting is skipped only if one team has interest and other team all said no
-    should_skip_betting = (team1_has_interest and team2_all_no_tengo) or (team2_has_interest and team1_all_no_tengo)
-    
-    # Betting happens if we shouldn't skip it
-    can_bet = not should_skip_betting
-    
-    logger.info(f"PARES betting decision: team1HasInterest={team1_has_interest}, team2HasInterest={team2_has_interest}, team1AllNoTengo={team1_all_no_tengo}, team2AllNoTengo={team2_all_no_tengo}, shouldSkipBetting={should_skip_betting}, canBet={can_bet}")
-    
-    if can_bet:
-        # Start PARES betting (only TENGO and PUEDE players can bet)
-        logger.info('Starting PARES betting - both teams can compete')
-        
-        # Set betting phase
-        game.state['paresPhase'] = 'betting'
-        game.set_phase('BETTING')
-        
-        # Reset bet state for betting phase
-        game.state['currentBet'] = {
-            'amount': 0,
-            'previousAmount': 0,
-            'bettingTeam': None,
-            'betType': None,
-            'isRaise': False,
-            'responses': {}
+    # Active player already set to manoIndex by complete_declaration_phase()
+    if transition['betting']:
+        started = {
+            'round': transition['round'],
+            'active_player': game.state.manoIndex,
+            'game_state': game.get_public_state_json()
         }
-        
-        # Active player already set to manoIndex by complete_declaration_phase()
-        # Broadcast betting phase started
-        socketio.emit('betting_phase_started', {
-            'round': 'PARES',
-            'active_player': game.state['manoIndex'],
-            'game_state': game.get_public_state(),
-            'declarations': declarations
-        }, room=room_id)
-        
-        logger.info(f"PARES betting started with Player {game.state['manoIndex']}")
-    else:
-        # Skip betting and proceed to JUEGO declaration phase
-        logger.info('Skipping PARES betting - proceeding to JUEGO declaration phase')
-        
-        # Clear PARES declaration state
-        game.state['paresDeclarations'] = {}
-        game.state['currentRound'] = 'JUEGO'
-        game.state['juegoDeclarations'] = {}
-        game.set_phase('DECLARATION')
-        
-        # Reset bet state
-        game.reset_round_state()
-        
-        # Active player already set to manoIndex by complete_declaration_phase()
-        # Broadcast round transition
-        socketio.emit('round_transition', {
-            'round': 'JUEGO',
-            'reason': 'pares_complete_no_betting',
-            'active_player': game.state['manoIndex'],
-            'game_state': game.get_public_state()
-        }, room=room_id)
-        
-        # Check for auto-declarations in JUEGO
-        _check_and_emit_auto_declaration(room_id, game, 'JUEGO')
-
-
-def _handle_juego_declarations_complete(room_id, game):
-    """
-    Handle completion of all JUEGO declarations. 
-    Determine if we should start JUEGO betting, PUNTO betting, or move to CONTEO.
-    """
-    declarations = game.state.get('juegoDeclarations', {})
-    if len(declarations) < 4:
-        return  # Not all declarations complete yet
-    
-    # Mark declaration phase as complete and reset active player to mano
-    game.complete_declaration_phase()
-    game.set_phase('VALIDATION')
-    
-    # Count declarations per team
-    team1_players = game.state['teams']['team1']['players']
-    team2_players = game.state['teams']['team2']['players']
-    
-    team1_tengo = sum(1 for p in team1_players if declarations.get(p) in [True, 'tengo_after_penalty'])
-    team1_puede = sum(1 for p in team1_players if declarations.get(p) == 'puede')
-    team1_no_tengo = sum(1 for p in team1_players if declarations.get(p) == False)
-    
-    team2_tengo = sum(1 for p in team2_players if declarations.get(p) in [True, 'tengo_after_penalty'])
-    team2_puede = sum(1 for p in team2_players if declarations.get(p) == 'puede')
-    team2_no_tengo = sum(1 for p in team2_players if declarations.get(p) == False)
-    
-    logger.info(f"JUEGO declarations complete - Team1: {team1_tengo} tengo, {team1_puede} puede, {team1_no_tengo} no tengo | Team2: {team2_tengo} tengo, {team2_puede} puede, {team2_no_tengo} no tengo")
-    
-    # Check if everyone said "puede" → start PUNTO betting
-    everyone_puede = (team1_puede == 2 and team2_puede == 2)
-    if everyone_puede:
-        logger.info('Everyone said PUEDE - transitioning to PUNTO betting')
-        game.state['currentRound'] = 'PUNTO'
-        game.set_phase('BETTING')
-        # activePlayerIndex already set to manoIndex by complete_declaration_phase()
-        socketio.emit('round_transition', {
-            'round': 'PUNTO',
-            'reason': 'everyone_puede',
-            'active_player': game.state['manoIndex'],
-            'game_state': game.get_public_state()
-        }, room=room_id)
+        if round_name == 'PARES':
+            started['declarations'] = declarations
+        _emit('betting_phase_started', started, room=room_id)
         return
     
-    # Check if no one has JUEGO (all said "no tengo") → start PUNTO betting
-    no_one_has_juego = (team1_tengo == 0 and team2_tengo == 0 and team1_puede == 0 and team2_puede == 0)
-    if no_one_has_juego:
-        logger.info('No one has JUEGO (all NO TENGO) - transitioning to PUNTO betting')
-        game.state['currentRound'] = 'PUNTO'
-        game.set_phase('BETTING')
-        # activePlayerIndex already set to manoIndex by complete_declaration_phase()
-        socketio.emit('round_transition', {
-            'round': 'PUNTO',
-            'reason': 'no_juego',
-            'active_player': game.state['manoIndex'],
-            'game_state': game.get_public_state()
-        }, room=room_id)
-        return
+    _emit('round_transition', {
+        'round': transition['round'],
+        'reason': transition['reason'],
+        'active_player': game.state.manoIndex,
+        'game_state': game.get_public_state_json()
+    }, room=room_id)
     
-    # Check betting conditions
-    team1_has_interest = (team1_tengo + team1_puede >= 1)
-    team2_has_interest = (team2_tengo + team2_puede >= 1)
-    team1_all_no_tengo = (team1_no_tengo == 2)
-    team2_all_no_tengo = (team2_no_tengo == 2)
-    
-    should_skip_betting = (team1_has_interest and team2_all_no_tengo) or (team2_has_interest and team1_all_no_tengo)
-    
-    if should_skip_betting:
-        # Only one team has interest - start PUNTO betting (no competition for JUEGO)
-        logger.info('Only one team has interest - transitioning to PUNTO betting')
-        game.state['currentRound'] = 'PUNTO'
-        game.set_phase('BETTING')
-        # activePlayerIndex already set to manoIndex by complete_declaration_phase()
-        socketio.emit('round_transition', {
-            'round': 'PUNTO',
-            'reason': 'one_team_interest',
-            'active_player': game.state['manoIndex'],
-            'game_state': game.get_public_state()
-        }, room=room_id)
-    else:
-        # Both teams have interest - start JUEGO betting
-        logger.info('Both teams have interest - starting JUEGO betting')
-        game.state['juegoPhase'] = 'betting'
-        game.set_phase('BETTING')
-        # activePlayerIndex already set to manoIndex by complete_declaration_phase()
-        socketio.emit('betting_phase_started', {
-            'round': 'JUEGO',
-            'active_player': game.state['manoIndex'],
-            'game_state': game.get_public_state()
-        }, room=room_id)
+    if transition['round'] == 'JUEGO':
+        # Check for auto-declarations in JUEGO
+        _check_and_emit_auto_declaration(room_id, game, 'JUEGO')
 
 
 def _schedule_discard_timeout(room_id):
@@ -448,7 +667,12 @@ def _schedule_discard_timeout(room_id):
         _replace_timeout(discard_timeouts, room_id, None)
         return
 
+    token = _timeout_token('discard', room_id, DISCARD_TIMEOUT)
+
+    @coalesced
     def on_timeout():
+        if not _timeout_is_current('discard', room_id, token):
+            return
         current_game = game_manager.get_game(room_id)
         if not current_game:
             return
@@ -460,32 +684,29 @@ def _schedule_discard_timeout(room_id):
                 continue
             result = current_game.discard_cards(player_idx, [0, 1, 2, 3])
             if result.get('success'):
-                socketio.emit('cards_discarded', {
+                _emit('cards_discarded', {
                     'player_index': player_idx,
                     'num_cards': 4,
-                    'game_state': current_game.get_public_state()
+                    'game_state': current_game.get_public_state_json()
                 }, room=room_id)
 
         if len(current_game.state.get('cardsDiscarded', {})) == current_game.num_players:
             deal_result = current_game.deal_new_cards()
             if deal_result and deal_result.get('success'):
-                socketio.emit('new_cards_dealt', {
+                _emit_to_seats('new_cards_dealt', current_game, {
                     'success': True,
-                    'game_state': current_game.get_public_state(),
-                    'player_hands': {
-                        i: [card.to_dict() for card in current_game.hands.get(i, [])]
-                        for i in range(4)
-                    }
-                }, room=room_id)
+                    'game_state': current_game.get_public_state_json()
+                })
             else:
-                socketio.emit('game_error', {
+                _emit('game_error', {
                     'error': 'Failed to deal new cards'
                 }, room=room_id)
 
         _replace_timeout(discard_timeouts, room_id, None)
         _schedule_turn_timeout(room_id)
 
-    _replace_timeout(discard_timeouts, room_id, _spawn_after(DISCARD_TIMEOUT, on_timeout))
+    _replace_timeout(discard_timeouts, room_id,
+                     timers.call_later(DISCARD_TIMEOUT, functools.partial(room_actors.post, room_id, on_timeout)))
 
 
 def _schedule_turn_timeout(room_id):
@@ -503,7 +724,12 @@ def _schedule_turn_timeout(room_id):
     if active_player is None:
         return
 
+    token = _timeout_token('turn', room_id, TURN_TIMEOUT)
+
+    @coalesced
     def on_timeout():
+        if not _timeout_is_current('turn', room_id, token):
+            return
         current_game = game_manager.get_game(room_id)
         if not current_game:
             return
@@ -527,7 +753,8 @@ def _schedule_turn_timeout(room_id):
         _broadcast_action_update(room_id, current_game, active_player, timeout_action, {}, result)
         _schedule_turn_timeout(room_id)
 
-    _replace_timeout(turn_timeouts, room_id, _spawn_after(TURN_TIMEOUT, on_timeout))
+    _replace_timeout(turn_timeouts, room_id,
+                     timers.call_later(TURN_TIMEOUT, functools.partial(room_actors.post, room_id, on_timeout)))
 
 # Create tables
 with app.app_context():
@@ -551,18 +778,42 @@ VALID_CHARACTERS = {
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    if shard_router is not None:
+        counts = shard_router.collect('counts')
+        active_games, active_rooms = sum(c['games'] for c in counts), sum(c['rooms'] for c in counts)
+    else:
+        active_games, active_rooms = game_manager.count_games(), room_manager.count_rooms()
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
-        'active_games': len(game_manager.games),
-        'active_rooms': len(room_manager.rooms)
+        'active_games': active_games,
+        'active_rooms': active_rooms
     })
 
 @app.route('/api/rooms', methods=['GET'])
 def get_rooms():
-    """Get list of available rooms"""
-    rooms = room_manager.get_available_rooms()
-    return jsonify({'rooms': rooms})
+    """
+    Joinable rooms, a page at a time: ?game_mode=4|8, ?min_seats=N (open
+    seats, default 1), ?offset= and ?limit= (default 50, max 200). Served
+    with an ETag and cacheable for LOBBY_CACHE_SECONDS.
+    """
+    try:
+        min_seats = int(request.args.get('min_seats', 1))
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'min_seats, offset and limit must be integers'}), 400
+    index = lobby
+    if store.shared:
+        index = LobbyIndex()
+        for room in room_manager.get_available_rooms():
+            index.put(room, notify=False)
+    body, etag = index.page(request.args.get('game_mode'), min_seats, offset, limit)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = LOBBY_CACHE_SECONDS
+    return response.make_conditional(request)
 
 @app.route('/api/rooms', methods=['POST'])
 def create_room():
@@ -573,7 +824,11 @@ def create_room():
     max_players = 4
     # Instrumentation: measure server processing time for room creation
     recv_ts = time.time()
-    room = room_manager.create_room(room_name, game_mode, max_players)
+    if shard_router is not None:
+        room = shard_router.call_new_room('create_room', room_name, game_mode)
+        shard_router.learn_room(room)
+    else:
+        room = room_manager.create_room(room_name, game_mode, max_players)
     send_ts = time.time()
     processing_ms = int((send_ts - recv_ts) * 1000)
 
@@ -595,9 +850,50 @@ def get_stats():
     return jsonify({
         'total_games': total_games,
         'total_players': total_players,
-        'active_games': len(game_manager.games)
+        'active_games': (sum(c['games'] for c in shard_router.collect('counts')) if shard_router is not None
+                         else game_manager.count_games())
     })
 
+@app.route('/api/analytics/entanglement', methods=['GET'])
+def get_entanglement_analytics():
+    """Entanglement/collapse statistics merged across all games (?refresh=1 forces a merge)"""
+    force = request.args.get('refresh') in ('1', 'true')
+    if shard_router is not None:
+        return jsonify(get_analytics().combine(shard_router.collect('analytics')))
+    return jsonify(get_analytics().snapshot(force=force))
+
+
+@app.route('/api/shards', methods=['GET'])
+def get_shards():
+    """Per-shard load (rooms, games, players, requests, latency) when GAME_SHARDS is set"""
+    if shard_router is None:
+        return jsonify({'workers': 0, 'shards': []})
+    return jsonify(shard_router.metrics())
+
+
+@app.route('/api/load', methods=['GET'])
+def get_load():
+    """Overload: refused events (rate limits, full room queues) and the room queues' backlog"""
+    parts = [_load()] + (shard_router.collect('load') if shard_router is not None else [])
+    refused, refused_by_event, queues = {}, {}, {}
+    for part in parts:
+        for totals, counts in ((refused, part['refused']), (refused_by_event, part['refused_by_event'])):
+            for key, count in counts.items():
+                totals[key] = totals.get(key, 0) + count
+        for key, value in part['queues'].items():
+            queues[key] = max(queues.get(key, 0), value) if key == 'max_depth' else queues.get(key, 0) + value
+    return jsonify({
+        'limits': {'socket': [SOCKET_RATE, SOCKET_BURST], 'room': [ROOM_RATE, ROOM_BURST],
+                   'room_queue': ROOM_QUEUE_LIMIT, 'heavy_event_cost': HEAVY_EVENT_COST},
+        'refused': refused,
+        'refused_by_event': refused_by_event,
+        'queues': queues,
+    })
+
+
+def _load():
+    return dict(overload.snapshot(), queues=room_actors.stats())
+
 
 # ==================== FRONTEND ESTÁTICO ====================
 @app.route('/')
@@ -625,16 +921,40 @@ def default_error_handler(e):
     emit('socket_error', {'error': str(e)})
 
 @socketio.on('connect')
-def handle_connect():
-    """Handle client connection"""
+def handle_connect(auth=None):
+    """Handle client connection (auth/query 'wire': 'msgpack' opts in to binary events)"""
     logger.info(f"Client connected: {request.sid}")
-    emit('connected', {'sid': request.sid})
+    requested = (auth or {}).get('wire') if isinstance(auth, dict) else None
+    requested = requested or request.args.get('wire', 'json')
+    # Other workers encode their emits as JSON, so binary needs a single worker
+    wire = 'msgpack' if requested == 'msgpack' and wire_msgpack.available() and not MESSAGE_QUEUE else 'json'
+    if wire == 'msgpack':
+        msgpack_sids.add(request.sid)
+    # Always JSON: the client learns its wire encoding from this reply
+    socketio.emit('connected', {'sid': request.sid, 'wire': wire,
+                                'card_keys': wire_msgpack.CARD_KEYS if wire == 'msgpack' else None},
+                  to=request.sid)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     logger.info(f"Client disconnected: {request.sid}")
-    
+    msgpack_sids.discard(request.sid)
+    socket_limiter.forget(request.sid)
+    if shard_router is None:
+        _release_player({})
+        return
+    # Sharded: the socket's game room decides which worker cleans up
+    for room_id in socketio.server.rooms(request.sid, namespace='/'):
+        if room_id != request.sid:
+            _release_player({'room_id': room_id})
+
+
+@sharded
+@serialized
+@coalesced
+def _release_player(data):
+    """Remove a disconnected socket from its room and notify the other players"""
     try:
         # Remove player from any rooms/games
         room_id = room_manager.get_player_room(request.sid)
@@ -646,13 +966,32 @@ def handle_disconnect():
             # Notify remaining players of room update
             remaining_room = room_manager.get_room(room_id)
             if remaining_room:
-                socketio.emit('room_updated', {
+                _emit('room_updated', {
                     'room': remaining_room
                 }, room=room_id)
     except Exception as e:
         logger.error(f"Error during disconnect cleanup for {request.sid}: {e}")
 
+@socketio.on('subscribe_lobby')
+@throttled
+def handle_subscribe_lobby(data=None):
+    """Lobby feed: the joinable rooms now (lobby_snapshot), then a lobby_delta on every change"""
+    if store.shared:
+        emit('lobby_snapshot', {'version': 0, 'rooms': room_manager.get_available_rooms(), 'live': False})
+        return
+    join_room(LOBBY_ROOM)  # Before the snapshot, so no change falls in between
+    emit('lobby_snapshot', dict(lobby.snapshot(), live=True))
+
+
+@socketio.on('unsubscribe_lobby')
+def handle_unsubscribe_lobby(data=None):
+    leave_room(LOBBY_ROOM)
+
+
 @socketio.on('create_room')
+@throttled
+@sharded
+@serialized
 def handle_create_room(data):
     """Create a new game room"""
     # Instrumentation: measure server-side receive -> response time
@@ -675,6 +1014,10 @@ def handle_create_room(data):
     })
 
 @socketio.on('join_room')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_join_room(data):
     """Join a game room"""
     room_id = data.get('room_id')
@@ -692,7 +1035,7 @@ def handle_join_room(data):
     result = room_manager.add_player(room_id, request.sid, player_name, character)
     
     if result['success']:
-        join_room(room_id)
+        _join_room(room_id)
         
         # Notify player
         emit('joined_room', {
@@ -703,7 +1046,7 @@ def handle_join_room(data):
         })
         
         # Notify all players in room
-        socketio.emit('room_updated', {
+        _emit('room_updated', {
             'room': room_manager.get_room(room_id)
         }, room=room_id)
     else:
@@ -713,6 +1056,10 @@ def handle_join_room(data):
         })
 
 @socketio.on('set_character')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_set_character(data):
     """Update player's character in the room"""
     room_id = data.get('room_id')
@@ -738,13 +1085,17 @@ def handle_set_character(data):
     
     team = data.get('team')  # 1 = Copenhaguen, 2 = Bohmian
     if room_manager.set_player_character(room_id, request.sid, character, team=team):
-        socketio.emit('room_updated', {
+        _emit('room_updated', {
             'room': room_manager.get_room(room_id)
         }, room=room_id)
     else:
         emit('game_error', {'error': 'Failed to update character'})
 
 @socketio.on('update_game_mode')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_update_game_mode(data):
     """Update game mode in the room (host only)"""
     room_id = data.get('room_id')
@@ -765,15 +1116,20 @@ def handle_update_game_mode(data):
         return
     
     # Update game mode
-    room['game_mode'] = game_mode
+    room_manager.set_game_mode(room_id, game_mode)
+    room = room_manager.get_room(room_id)
     logger.info(f"Room {room_id} game mode updated to: {game_mode}")
     
     # Notify all players
-    socketio.emit('room_updated', {
+    _emit('room_updated', {
         'room': room
     }, room=room_id)
 
 @socketio.on('join_room_by_code')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_join_room_by_code(data):
     """Join a room using room code"""
     room_code = data.get('room_code', '').upper()
@@ -793,7 +1149,7 @@ def handle_join_room_by_code(data):
     result = room_manager.add_player(room['id'], request.sid, player_name, None)
     
     if result['success']:
-        join_room(room['id'])
+        _join_room(room['id'])
         
         # Notify player
         emit('joined_room', {
@@ -804,7 +1160,7 @@ def handle_join_room_by_code(data):
         })
         
         # Notify all players in room
-        socketio.emit('room_updated', {
+        _emit('room_updated', {
             'room': room_manager.get_room(room['id'])
         }, room=room['id'])
     else:
@@ -814,6 +1170,10 @@ def handle_join_room_by_code(data):
         })
 
 @socketio.on('leave_room')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_leave_room(data):
     """Leave a game room"""
     room_id = data.get('room_id')
@@ -821,7 +1181,7 @@ def handle_leave_room(data):
     try:
         if room_manager.remove_player(room_id, request.sid):
             try:
-                leave_room(room_id)
+                _leave_room(room_id)
             except Exception as e:
                 logger.warning(f"Could not leave room {room_id}: {e}")
             
@@ -829,7 +1189,7 @@ def handle_leave_room(data):
             emit('left_room', {'success': True})
             
             # Notify remaining players
-            socketio.emit('room_updated', {
+            _emit('room_updated', {
                 'room': room_manager.get_room(room_id)
             }, room=room_id)
     except Exception as e:
@@ -837,6 +1197,10 @@ def handle_leave_room(data):
         emit('game_error', {'error': 'Failed to leave room'})
 
 @socketio.on('return_to_lobby')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_return_to_lobby(data):
     """Return to lobby after game ends - cleanup game but keep room"""
     room_id = data.get('room_id')
@@ -854,7 +1218,7 @@ def handle_return_to_lobby(data):
         room = room_manager.get_room(room_id)
         if room:
             # Emit to all players in room that game ended and they're back in lobby
-            socketio.emit('returned_to_lobby', {
+            _emit('returned_to_lobby', {
                 'success': True,
                 'room': room,
                 'message': 'Game ended. Ready to start a new game!'
@@ -867,6 +1231,10 @@ def handle_return_to_lobby(data):
         emit('game_error', {'error': 'Failed to return to lobby'})
 
 @socketio.on('start_game')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_start_game(data):
     """Start the game in a room"""
     room_id = data.get('room_id')
@@ -892,8 +1260,8 @@ def handle_start_game(data):
     game = game_manager.create_game(room_id, room['players'], room['game_mode'])
     # Server-authoritative mano for all clients - use quantum randomness
     qrng = QuantumRNG()
-    game.state['manoIndex'] = qrng.random_int(0, game.num_players - 1)
-    game.state['activePlayerIndex'] = game.state['manoIndex']
+    game.state.manoIndex = qrng.random_int(0, game.num_players - 1)
+    game.state.activePlayerIndex = game.state.manoIndex
     
     # Deal initial cards
     deal_result = game.deal_cards()
@@ -902,34 +1270,23 @@ def handle_start_game(data):
         game_manager.remove_game(room_id)
         return
     
-    # Build comprehensive game state with all player hands
-    game_state = game.get_public_state()
-    
-    # Add player-specific hands for each player
-    game_state['player_hands'] = {
-        i: [card.to_dict() for card in game.hands.get(i, [])]
-        for i in range(4)
-    }
-    
-    # Add mano index explicitly
-    game_state['manoIndex'] = game.state['manoIndex']
-    
-    # Add initial entanglement state
-    game_state['entanglement'] = game.get_full_entanglement_state()
-    
     # Log game start
-    logger.info(f"Game started in room {room_id}, mode: {room['game_mode']}, mano: {game.state['manoIndex']}")
+    logger.info(f"Game started in room {room_id}, mode: {room['game_mode']}, mano: {game.state.manoIndex}")
     
-    # Notify all players with complete initial state
-    socketio.emit('game_started', {
+    # Notify all players with the initial state; each seat only gets its own hand
+    _emit_to_seats('game_started', game, {
         'success': True,
-        'game_state': game_state,
+        'game_state': _deal_state(game),
         'game_mode': room['game_mode']
-    }, room=room_id)
+    })
 
     _schedule_turn_timeout(room_id)
 
 @socketio.on('player_action')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_player_action(data):
     """Handle player action (MUS, PASO, ENVIDO, ORDAGO, etc.)"""
     room_id = data.get('room_id')
@@ -943,7 +1300,7 @@ def handle_player_action(data):
         return
     
     # Validate it's player's turn
-    if game.state['activePlayerIndex'] != player_index:
+    if game.state.activePlayerIndex != player_index:
         emit('game_error', {'error': 'Not your turn'})
         return
     
@@ -962,6 +1319,10 @@ def handle_player_action(data):
         emit('game_error', {'error': result.get('error', 'Invalid action')})
 
 @socketio.on('discard_cards')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_discard_cards(data):
     """Handle card discard during MUS phase"""
     room_id = data.get('room_id')
@@ -981,7 +1342,7 @@ def handle_discard_cards(data):
         return
     
     # Validate not in discard phase
-    if not game.state['waitingForDiscard']:
+    if not game.state.waitingForDiscard:
         logger.warning(f"Player {player_index} tried to discard outside discard phase")
         emit('game_error', {'error': 'Not in discard phase'})
         return
@@ -1003,7 +1364,7 @@ def handle_discard_cards(data):
         return
     
     # Validate player hasn't already discarded
-    if player_index in game.state['cardsDiscarded']:
+    if player_index in game.state.cardsDiscarded:
         logger.warning(f"Player {player_index} tried to discard twice")
         emit('game_error', {'error': 'You have already discarded'})
         return
@@ -1015,10 +1376,10 @@ def handle_discard_cards(data):
         logger.info(f"Player {player_index} discarded {len(card_indices)} cards in room {room_id}")
         
         # Notify all players with card dealer info (num cards only, not indices)
-        socketio.emit('cards_discarded', {
+        _emit('cards_discarded', {
             'player_index': player_index,
             'num_cards': len(card_indices),
-            'game_state': game.get_public_state()
+            'game_state': game.get_public_state_json()
         }, room=room_id)
         
         # If all players discarded, deal new cards and send to all
@@ -1026,43 +1387,59 @@ def handle_discard_cards(data):
             logger.info(f"All players discarded in room {room_id} - dealing new cards")
             deal_result = game.deal_new_cards()
             if deal_result and deal_result.get('success'):
-                # Send new game state to all players (includes new cards)
-                socketio.emit('new_cards_dealt', {
+                # Send new game state to all players (each with only their new cards)
+                _emit_to_seats('new_cards_dealt', game, {
                     'success': True,
-                    'game_state': game.get_public_state(),
-                    'player_hands': {
-                        i: [card.to_dict() for card in game.hands.get(i, [])]
-                        for i in range(4)
-                    }
-                }, room=room_id)
+                    'game_state': game.get_public_state_json()
+                })
                 _replace_timeout(discard_timeouts, room_id, None)
                 _schedule_turn_timeout(room_id)
             else:
                 logger.error(f"Failed to deal new cards in room {room_id}")
-                socketio.emit('game_error', {'error': 'Failed to deal new cards'}, room=room_id)
+                _emit('game_error', {'error': 'Failed to deal new cards'}, room=room_id)
     else:
         logger.error(f"Discard failed for player {player_index}: {result.get('error')}")
         emit('game_error', {'error': result.get('error', 'Failed to discard')})
 
 @socketio.on('get_game_state')
+@throttled
+@sharded
+@serialized
 def handle_get_game_state(data):
     """Get current game state"""
     room_id = data.get('room_id')
-    player_index = data.get('player_index', 0)
     
     game = game_manager.get_game(room_id)
     if game:
+        # A seated player only gets their own hand; other sockets only the public state
+        seat = _seat_of(game, request.sid)
         emit('game_state', {
-            'game_state': game.get_player_state(player_index),
+            'game_state': game.get_player_state(seat) if seat is not None else game.get_public_state_json(),
             'game_mode': game.game_mode
         })
     else:
         emit('game_error', {'error': 'Game not found'})
 
 
+@socketio.on('request_state_sync')
+@throttled
+@sharded
+@serialized
+def handle_request_state_sync(data):
+    """Full public state for a client that missed a game_update delta"""
+    game = game_manager.get_game(data.get('room_id'))
+    if game:
+        emit('state_sync', game.get_public_state_sync())
+    else:
+        emit('game_error', {'error': 'Game not found'})
+
+
 # ==================== ENTANGLEMENT EVENTS ====================
 
 @socketio.on('get_entanglement_state')
+@throttled
+@sharded
+@serialized
 def handle_get_entanglement_state(data):
     """Get current entanglement state for all pairs"""
     room_id = data.get('room_id')
@@ -1081,16 +1458,24 @@ def handle_get_entanglement_state(data):
     })
 
 @socketio.on('get_player_entanglement')
+@throttled
+@sharded
+@serialized
 def handle_get_player_entanglement(data):
-    """Get entanglement information for a specific player"""
+    """Get entanglement information for the requesting player's seat"""
     room_id = data.get('room_id')
-    player_index = data.get('player_index', 0)
     
     game = game_manager.get_game(room_id)
     if not game:
         emit('game_error', {'error': 'Game not found'})
         return
     
+    # Entangled cards are part of the hand: only the seat's own socket gets them
+    player_index = _seat_of(game, request.sid)
+    if player_index is None:
+        emit('game_error', {'error': 'Not seated in this game'})
+        return
+    
     entanglement_info = game.get_entanglement_info_for_player(player_index)
     entangled_cards = game.get_player_entangled_cards(player_index)
     
@@ -1100,7 +1485,35 @@ def handle_get_player_entanglement(data):
         'entangled_cards': entangled_cards
     })
 
+@socketio.on('get_outcome_probabilities')
+@throttled
+@sharded
+@serialized
+def handle_get_outcome_probabilities(data):
+    """Exact pares/juego/grande/chica probabilities from the requesting seat's view (client hint)"""
+    room_id = data.get('room_id')
+
+    game = game_manager.get_game(room_id)
+    if not game:
+        emit('game_error', {'error': 'Game not found'})
+        return
+
+    # Always the socket's own seat: the odds are computed from what that seat can see
+    player_index = _seat_of(game, request.sid)
+    if player_index is None:
+        emit('game_error', {'error': 'Not seated in this game'})
+        return
+
+    emit('outcome_probabilities', {
+        'player_index': player_index,
+        'probabilities': game.get_outcome_probabilities(player_index)
+    })
+
 @socketio.on('play_card_with_entanglement')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_play_card_with_entanglement(data):
     """Handle card play and check for entanglement activation"""
     room_id = data.get('room_id')
@@ -1118,27 +1531,28 @@ def handle_play_card_with_entanglement(data):
     if result['success']:
         # If entanglement was triggered, broadcast to all players
         if result['entanglement']:
-            socketio.emit('entanglement_activated', {
+            _emit('entanglement_activated', {
                 'entanglement_data': result['entanglement'],
                 'card_played': result['card'],
                 'player_index': player_index,
-                'round': game.state['currentRound']
+                'round': game.state.currentRound
             }, room=room_id)
             
             logger.info(f"Entanglement activated in room {room_id}: "
                        f"Player {player_index} played entangled card")
         
-        # Broadcast game state update
-        socketio.emit('game_update', {
-            'game_state': game.get_public_state(),
-            'player_states': {
-                i: game.get_player_state(i) for i in range(4)
-            }
-        }, room=room_id)
+        # Broadcast game state update; each seat gets its own player state
+        _emit_to_seats('game_update', game, {
+            'state_delta': game.get_public_state_delta()
+        }, private=lambda game, seat: {'player_state': game.get_player_state(seat)})
     else:
         emit('game_error', {'error': result.get('error', 'Failed to play card')})
 
 @socketio.on('player_declaration')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_player_declaration(data):
     """Handle player declaration in PARES/JUEGO rounds (tengo/no tengo/puede)"""
     room_id = data.get('room_id')
@@ -1152,59 +1566,47 @@ def handle_player_declaration(data):
         logger.error(f"Game not found for room {room_id} in declaration event")
         return
     
-    # Set phase to DECLARATION if not already set
-    if game.state.get('currentPhase') != 'DECLARATION':
-        game.set_phase('DECLARATION')
-    
-    if player_index != game.state['activePlayerIndex']:
-        emit('game_error', {'error': 'Not your turn'})
-        return
-    
     # Check if this is an auto-declaration (indicated by client)
     is_auto_declared = data.get('is_auto_declared', False)
     
-    # Store declaration in game state
-    key = 'paresDeclarations' if round_name == 'PARES' else 'juegoDeclarations'
-    if key not in game.state:
-        game.state[key] = {}
-    game.state[key][player_index] = declaration
+    result = game.declare(player_index, round_name, declaration, is_auto_declared)
+    if not result['success']:
+        emit('game_error', {'error': result['error']})
+        return
     
     logger.info(f"Player {player_index} declared '{declaration}' in {round_name} for room {room_id} (auto: {is_auto_declared})")
     
-    # Advance turn for 'puede' declarations OR auto-declarations
-    # (manual tengo/no tengo will wait for collapse event to advance)
-    advance_turn = (declaration == 'puede') or is_auto_declared
-    if advance_turn:
-        game.next_player()
-    
     # Broadcast declaration to all players
-    socketio.emit('declaration_made', {
+    # (manual tengo/no tengo keep the turn until the collapse event)
+    _emit('declaration_made', {
         'success': True,
         'player_index': player_index,
         'declaration': declaration,
         'round_name': round_name,
-        'declarations': game.state[key],
-        'next_player': game.state['activePlayerIndex'] if advance_turn else None,
+        'declarations': result['declarations'],
+        'next_player': result['next_player'],
         'is_auto_declared': is_auto_declared,
         'timestamp': datetime.utcnow().isoformat()
     }, room=room_id)
     
-    # Check if all declarations are complete
-    if len(game.state[key]) >= 4:
-        # All declarations complete - handle transition
-        if round_name == 'PARES':
-            # For PARES, call dedicated handler to determine betting or transition
-            _handle_pares_declarations_complete(room_id, game)
-        elif round_name == 'JUEGO':
-            # For JUEGO, call dedicated handler  
-            _handle_juego_declarations_complete(room_id, game)
+    # A manual tengo/no tengo is complete once its cards collapse
+    if result['next_player'] is not None:
+        _after_declaration(room_id, game, round_name)
+
+
+def _after_declaration(room_id, game, round_name):
+    """A declaration passed the turn: finish the round's declarations or auto-declare for the next players"""
+    if len(game.state[game.declaration_key(round_name)]) >= 4:
+        _handle_declarations_complete(room_id, game, round_name)
     else:
-        # Not all declarations complete yet - check if next player can auto-declare
-        if advance_turn and len(game.state[key]) < 4:
-            _check_and_emit_auto_declaration(room_id, game, round_name)
+        _check_and_emit_auto_declaration(room_id, game, round_name)
 
 
 @socketio.on('trigger_declaration_collapse')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_trigger_declaration_collapse(data):
     """Handle card collapse when player makes a declaration"""
     room_id = data.get('room_id')
@@ -1218,41 +1620,37 @@ def handle_trigger_declaration_collapse(data):
         logger.error(f"Game not found for room {room_id} in collapse event")
         return
     
-    if player_index != game.state['activePlayerIndex']:
-        emit('game_error', {'error': 'Not your turn'})
-        return
-    
-    # Trigger collapse
-    collapse_result = game.trigger_collapse_on_declaration(player_index, declaration, round_name)
+    # Collapse and advance the turn
+    collapse_result = game.collapse_declaration(player_index, declaration, round_name)
     
     if collapse_result['success']:
-        # Advance turn after successful collapse
-        game.next_player()
-        next_player_index = game.state['activePlayerIndex']
+        next_player_index = collapse_result['next_player']
         
-        # Broadcast collapse event to ALL players in the room
-        socketio.emit('cards_collapsed', {
+        # Collapse event to ALL players; each seat only gets its own updated hand
+        _emit_to_seats('cards_collapsed', game, {
             'success': True,
             'collapse_event': collapse_result['collapse_event'],
             'penalty': collapse_result['penalty'],
             'player_index': player_index,
             'declaration': declaration,
             'round_name': round_name,
-            'updated_hands': collapse_result['updated_hands'],
             'next_player': next_player_index,
             'timestamp': datetime.utcnow().isoformat()
-        }, room=room_id)
+        }, private=_own_hand_as('updated_hands'))
         
         logger.info(f"Collapse broadcast in room {room_id}: Player {player_index} made declaration '{declaration}' in {round_name}, next player: {next_player_index}")
         
-        # Check if next player can auto-declare
-        key = 'paresDeclarations' if round_name == 'PARES' else 'juegoDeclarations'
-        if len(game.state.get(key, {})) < 4:
-            _check_and_emit_auto_declaration(room_id, game, round_name)
+        _after_declaration(room_id, game, round_name)
+    elif collapse_result.get('error') == 'Not your turn':
+        emit('game_error', {'error': 'Not your turn'})
     else:
-        socketio.emit('game_error', {'error': collapse_result.get('error', 'Failed to collapse cards')}, room=room_id)
+        _emit('game_error', {'error': collapse_result.get('error', 'Failed to collapse cards')}, room=room_id)
 
 @socketio.on('trigger_bet_collapse')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_trigger_bet_collapse(data):
     """Handle card collapse when player places/accepts a bet"""
     room_id = data.get('room_id')
@@ -1269,21 +1667,24 @@ def handle_trigger_bet_collapse(data):
     collapse_result = game.trigger_collapse_on_bet_acceptance(player_index, round_name)
     
     if collapse_result['success']:
-        # Broadcast collapse event to ALL players in the room
-        socketio.emit('bet_collapse_completed', {
+        # Collapse event to ALL players; each seat only gets its own updated hand
+        _emit_to_seats('bet_collapse_completed', game, {
             'success': True,
             'collapse_event': collapse_result['collapse_event'],
             'player_index': player_index,
             'round_name': round_name,
-            'updated_hands': collapse_result['updated_hands'],
             'timestamp': datetime.utcnow().isoformat()
-        }, room=room_id)
+        }, private=_own_hand_as('updated_hands'))
         
         logger.info(f"Bet collapse broadcast in room {room_id}: Player {player_index} in {round_name}")
     else:
-        socketio.emit('game_error', {'error': collapse_result.get('error', 'Failed to collapse cards')}, room=room_id)
+        _emit('game_error', {'error': collapse_result.get('error', 'Failed to collapse cards')}, room=room_id)
 
 @socketio.on('trigger_final_collapse')
+@throttled
+@sharded
+@serialized
+@coalesced
 def handle_trigger_final_collapse(data):
     """Handle final collapse of all remaining entangled cards at hand end"""
     room_id = data.get('room_id')
@@ -1297,17 +1698,25 @@ def handle_trigger_final_collapse(data):
     collapse_result = game.trigger_final_collapse()
     
     if collapse_result['success']:
-        # Broadcast final collapse to ALL players
-        socketio.emit('final_cards_collapsed', {
+        # Final collapse to ALL players; each seat only gets its own final hand
+        _emit_to_seats('final_cards_collapsed', game, {
             'success': True,
             'collapse_event': collapse_result['collapse_event'],
-            'final_hands': collapse_result['final_hands'],
             'timestamp': datetime.utcnow().isoformat()
-        }, room=room_id)
+        }, private=_own_hand_as('final_hands'))
         
         logger.info(f"Final collapse broadcast in room {room_id}: All remaining cards collapsed")
     else:
-        socketio.emit('game_error', {'error': collapse_result.get('error', 'Failed to collapse cards')}, room=room_id)
+        _emit('game_error', {'error': collapse_result.get('error', 'Failed to collapse cards')}, room=room_id)
+
+
+# ==================== ROOM SHARDS ====================
+
+if GAME_SHARDS:
+    # Workers keep their rooms in memory: no shared store or message queue
+    shard_router = room_sharding.ShardRouter(GAME_SHARDS, on_push=_apply_shard_events,
+                                             env={'STATE_STORE_URL': '', 'SOCKETIO_MESSAGE_QUEUE': ''})
+    atexit.register(shard_router.close)
 
 
 # ==================== RUN SERVER ====================
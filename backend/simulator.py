@@ -0,0 +1,538 @@
+"""
+Headless Batch Simulator for Quantum Mus
+Plays complete games with bot policies, without Flask or Socket.IO
+
+Drives QuantumMusGame through deal, MUS/discard, GRANDE, CHICA, PARES,
+JUEGO/PUNTO and calculate_final_scores exactly as the server does, but with
+the fast RNG backend and no network layer. Useful as:
+- a statistics tool (win rates, points per round, órdagos, penalties)
+- a load generator (hands/sec of the game engine)
+- a correctness check at scale (invariants are verified every hand)
+
+Usage:
+    python simulator.py --games 500 --workers 4 --mode 8 --team1 heuristic --team2 random
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Logica_cuantica.quantum_random import set_rng_backend
+from entanglement_analytics import get_analytics
+from game_logic import QuantumMusGame
+from hand_evaluator import encode_game_hands, evaluate_batch, summarize
+
+logger = logging.getLogger(__name__)
+
+BETTING_ROUNDS = ('GRANDE', 'CHICA', 'PARES', 'JUEGO')
+PHASE_KEYS = {
+    'GRANDE': 'grandePhase',
+    'CHICA': 'chicaPhase',
+    'PARES': 'paresPhase',
+    'JUEGO': 'juegoPhase'
+}
+MAX_RAISES = 3
+
+
+# ==================== BOT POLICIES ====================
+
+class BotPolicy:
+    """
+    Base bot policy: passive play.
+
+    Subclasses override the decisions they care about. Every decision gets
+    the game and the seat, and must return a legal action for that moment.
+    """
+
+    name = 'passive'
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def mus(self, game: QuantumMusGame, seat: int) -> str:
+        """'mus' or 'no_mus' (also accepted: 'envido', 'ordago')"""
+        return 'no_mus'
+
+    def discard(self, game: QuantumMusGame, seat: int) -> List[int]:
+        """Indices to discard (at least one)"""
+        return [0]
+
+    def open_bet(self, game: QuantumMusGame, seat: int, round_name: str) -> Tuple[str, Optional[Dict]]:
+        """No bet yet: 'paso', 'envido' or 'ordago'"""
+        return 'paso', None
+
+    def respond(self, game: QuantumMusGame, seat: int, round_name: str, phase: Dict) -> Tuple[str, Optional[Dict]]:
+        """Facing a bet: 'accept', 'paso' (reject), 'envido' (raise) or 'ordago'"""
+        return 'accept', None
+
+    def declare(self, game: QuantumMusGame, seat: int, round_name: str) -> str:
+        """Uncertain PARES/JUEGO hand: 'tengo', 'no_tengo' or 'puede'"""
+        return 'puede'
+
+
+class RandomPolicy(BotPolicy):
+    """Uniformly random (but legal) play"""
+
+    name = 'random'
+
+    def mus(self, game, seat):
+        return 'mus' if self.rng.random() < 0.5 else 'no_mus'
+
+    def discard(self, game, seat):
+        count = self.rng.randint(1, 4)
+        return sorted(self.rng.sample(range(len(game.hands[seat])), count))
+
+    def open_bet(self, game, seat, round_name):
+        roll = self.rng.random()
+        if roll < 0.03:
+            return 'ordago', None
+        if roll < 0.3:
+            return 'envido', {'amount': 2}
+        return 'paso', None
+
+    def respond(self, game, seat, round_name, phase):
+        roll = self.rng.random()
+        if phase.get('raiseCount', 0) < MAX_RAISES and phase.betType != 'ordago':
+            if roll < 0.02:
+                return 'ordago', None
+            if roll < 0.12:
+                return 'envido', {'amount': phase.currentBetAmount + 2}
+        return ('accept', None) if roll < 0.6 else ('paso', None)
+
+    def declare(self, game, seat, round_name):
+        return self.rng.choice(['tengo', 'no_tengo', 'puede'])
+
+
+class HeuristicPolicy(BotPolicy):
+    """Bets on visibly strong hands, discards weak cards"""
+
+    name = 'heuristic'
+
+    def _strength(self, game, seat, round_name):
+        values = [card.valor for card in game.hands[seat]]
+        top = (12, 3) if game.game_mode == '8' else (12,)
+        low = (1, 2) if game.game_mode == '8' else (1,)
+        if round_name == 'GRANDE':
+            return sum(1 for v in values if v in top) / 2
+        if round_name == 'CHICA':
+            return sum(1 for v in values if v in low) / 2
+        if round_name == 'PARES':
+            return (len(values) - len(set(values))) / 2
+        points = sum(10 if v >= 10 else v for v in values)
+        return 1.0 if points == 31 else (0.6 if points >= 31 else 0.0)
+
+    def mus(self, game, seat):
+        values = [card.valor for card in game.hands[seat]]
+        strong = values.count(12) >= 2 or len(values) != len(set(values))
+        return 'no_mus' if strong else 'mus'
+
+    def discard(self, game, seat):
+        hand = game.hands[seat]
+        weak = [i for i, card in enumerate(hand) if card.valor not in (12, 11, 1)]
+        return weak or [min(range(len(hand)), key=lambda i: hand[i].valor)]
+
+    def open_bet(self, game, seat, round_name):
+        strength = self._strength(game, seat, round_name)
+        if strength >= 1.5 and self.rng.random() < 0.2:
+            return 'ordago', None
+        if strength >= 1:
+            return 'envido', {'amount': 2}
+        return 'paso', None
+
+    def respond(self, game, seat, round_name, phase):
+        strength = self._strength(game, seat, round_name)
+        if phase.betType == 'ordago':
+            return ('accept', None) if strength >= 1.5 else ('paso', None)
+        if strength >= 1.5 and phase.get('raiseCount', 0) < MAX_RAISES:
+            return 'envido', {'amount': phase.currentBetAmount + 2}
+        return ('accept', None) if strength >= 0.5 else ('paso', None)
+
+    def declare(self, game, seat, round_name):
+        probability = game.get_outcome_probabilities(seat)[round_name.lower()]
+        return 'tengo' if probability >= 0.5 else 'no_tengo'
+
+
+POLICIES = {
+    'passive': BotPolicy,
+    'random': RandomPolicy,
+    'heuristic': HeuristicPolicy
+}
+
+
+# ==================== STATISTICS ====================
+
+class SimulationStats:
+    """Aggregate results; merged across worker processes"""
+
+    MAX_VIOLATION_SAMPLES = 20
+
+    def __init__(self):
+        self.games = 0
+        self.finished_games = 0
+        self.hands = 0
+        self.actions = 0
+        self.failed_actions = 0
+        self.elapsed = 0.0
+        self.wins = Counter()               # team -> games won
+        self.points_by_round = {}           # round -> Counter(team -> points)
+        self.ordagos = Counter()            # 'offered' / 'accepted' / 'games_ended'
+        self.declarations = Counter()       # round -> manual declarations
+        self.penalties = Counter()          # round -> penalized declarations
+        self.penalty_points = Counter()     # round -> points deducted
+        self.violations = 0
+        self.violation_samples: List[str] = []
+        self.deals = bytearray()            # Dealt hands, 16 card values each
+        self.manos = bytearray()            # Mano seat of each dealt hand
+
+    def add_points(self, round_name: str, team: str, points: int) -> None:
+        self.points_by_round.setdefault(round_name, Counter())[team] += points
+
+    def violation(self, message: str) -> None:
+        self.violations += 1
+        if len(self.violation_samples) < self.MAX_VIOLATION_SAMPLES:
+            self.violation_samples.append(message)
+
+    def record_deal(self, encoded_deal: np.ndarray, mano: int) -> None:
+        self.deals += encoded_deal.tobytes()
+        self.manos.append(mano)
+
+    def deal_analysis(self, game_mode: str) -> Dict:
+        """Score every dealt hand at once with the vectorized evaluator"""
+        deals = np.frombuffer(bytes(self.deals), dtype=np.int8).reshape(-1, 4, 4)
+        manos = np.frombuffer(bytes(self.manos), dtype=np.uint8)
+        return summarize(evaluate_batch(deals, game_mode, mano=manos))
+
+    def merge(self, other: 'SimulationStats') -> None:
+        for name in ('games', 'finished_games', 'hands', 'actions', 'failed_actions', 'violations'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.elapsed = max(self.elapsed, other.elapsed)
+        for name in ('wins', 'ordagos', 'declarations', 'penalties', 'penalty_points'):
+            getattr(self, name).update(getattr(other, name))
+        for round_name, counter in other.points_by_round.items():
+            self.points_by_round.setdefault(round_name, Counter()).update(counter)
+        room = self.MAX_VIOLATION_SAMPLES - len(self.violation_samples)
+        self.violation_samples.extend(other.violation_samples[:room])
+        self.deals += other.deals
+        self.manos += other.manos
+
+    def to_dict(self) -> Dict:
+        finished = self.finished_games or 1
+        hands = self.hands or 1
+        declarations = sum(self.declarations.values())
+        return {
+            'games': self.games,
+            'finished_games': self.finished_games,
+            'hands': self.hands,
+            'actions': self.actions,
+            'failed_actions': self.failed_actions,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'hands_per_second': round(self.hands / self.elapsed, 1) if self.elapsed else 0.0,
+            'win_rates': {team: self.wins[team] / finished for team in ('team1', 'team2')},
+            'points_per_hand': {
+                round_name: {team: counter[team] / hands for team in ('team1', 'team2')}
+                for round_name, counter in sorted(self.points_by_round.items())
+            },
+            'ordago': {
+                'offered': self.ordagos['offered'],
+                'accepted': self.ordagos['accepted'],
+                'games_ended': self.ordagos['games_ended'],
+                'offers_per_hand': self.ordagos['offered'] / hands
+            },
+            'collapse_penalties': {
+                'declarations': declarations,
+                'penalized': sum(self.penalties.values()),
+                'frequency': sum(self.penalties.values()) / declarations if declarations else 0.0,
+                'points_by_round': dict(self.penalty_points)
+            },
+            'invariant_violations': self.violations,
+            'violation_samples': self.violation_samples
+        }
+
+
+# ==================== ENGINE ====================
+
+class HeadlessSimulator:
+    """Plays games between two policies (one per team) in the current process"""
+
+    def __init__(self, team1_policy: BotPolicy, team2_policy: BotPolicy, game_mode: str = '8',
+                 max_hands: int = 200, max_discards: int = 3, max_actions_per_hand: int = 500):
+        self.policies = {'team1': team1_policy, 'team2': team2_policy}
+        self.game_mode = game_mode
+        self.max_hands = max_hands
+        self.max_discards = max_discards
+        self.max_actions_per_hand = max_actions_per_hand
+
+    def play_game(self, room_id: str, stats: SimulationStats) -> Optional[str]:
+        """Play one game to the end (or max_hands). Returns the winning team."""
+        players = [
+            {'id': f'{room_id}_p{i}', 'name': f'Bot {i}', 'team': 1 if i % 2 == 0 else 2}
+            for i in range(4)
+        ]
+        game = QuantumMusGame(room_id, players, game_mode=self.game_mode)
+        game.deal_cards()
+        stats.games += 1
+        winner = None
+        try:
+            for _ in range(self.max_hands):
+                winner = self._play_hand(game, stats)
+                if winner:
+                    break
+        finally:
+            get_analytics().retire(room_id)
+
+        if winner:
+            stats.finished_games += 1
+            stats.wins[winner] += 1
+        return winner
+
+    # -------------------------
+    # Hand flow
+    # -------------------------
+    def _policy(self, game, seat) -> BotPolicy:
+        return self.policies[game.get_player_team(seat)]
+
+    def _act(self, game, seat, action, extra, stats) -> Dict:
+        stats.actions += 1
+        if action == 'ordago':
+            stats.ordagos['offered'] += 1
+        result = game.process_action(seat, action, extra)
+        if not result.get('success'):
+            stats.failed_actions += 1
+            stats.violation(f"{game.state.currentRound}: seat {seat} '{action}' failed: {result.get('error')}")
+        return result
+
+    def _play_hand(self, game, stats) -> Optional[str]:
+        """Play the current hand. Returns the winner if the game ended."""
+        self._check_deal(game, stats)
+        scores_before = {team: game.state.teams[team].score for team in ('team1', 'team2')}
+        stats.hands += 1
+
+        self._play_mus(game, stats)
+        declared_rounds = set()
+        for _ in range(self.max_actions_per_hand):
+            current_round = game.state.currentRound
+            if current_round == 'MUS':
+                # start_new_hand() already dealt the next hand
+                self._record_hand_result(game, scores_before, stats)
+                return self._winner(game)
+            if current_round in ('PARES', 'JUEGO') and current_round not in declared_rounds:
+                declared_rounds.add(current_round)
+                self._play_declarations(game, current_round, stats)
+                continue
+            if current_round == 'PUNTO':
+                # PUNTO has no betting handler: resolve as all-pass and end the hand
+                game.move_to_next_round()
+                continue
+
+            result = self._play_betting_action(game, current_round, stats)
+            if result.get('game_ended'):
+                if result.get('bet_type') == 'ordago':
+                    stats.ordagos['accepted'] += 1
+                    stats.ordagos['games_ended'] += 1
+                if result.get('winner_team') and result.get('points'):
+                    stats.add_points(current_round, result['winner_team'], result['points'])
+                return result.get('winner') or result.get('winner_team') or self._winner(game)
+
+        stats.violation(f"Hand did not finish after {self.max_actions_per_hand} actions "
+                        f"(round {game.state.currentRound})")
+        game.start_new_hand()
+        return None
+
+    def _play_mus(self, game, stats):
+        discards = 0
+        while game.state.currentRound == 'MUS':
+            if game.state.waitingForDiscard:
+                for seat in range(game.num_players):
+                    game.discard_cards(seat, self._policy(game, seat).discard(game, seat))
+                result = game.deal_new_cards()
+                if not result['success']:
+                    stats.violation(f"deal_new_cards failed: {result.get('error')}")
+                discards += 1
+                continue
+            seat = game.state.activePlayerIndex
+            action = self._policy(game, seat).mus(game, seat)
+            if action == 'mus' and discards >= self.max_discards:
+                action = 'no_mus'
+            extra = {'amount': 2} if action == 'envido' else None
+            self._act(game, seat, action, extra, stats)
+
+    def _play_betting_action(self, game, round_name, stats) -> Dict:
+        seat = game.state.activePlayerIndex
+        policy = self._policy(game, seat)
+        phase = game.state[PHASE_KEYS[round_name]]
+        eligible = self._is_eligible(game, seat, round_name)
+
+        if phase.phaseState == 'NO_BET':
+            action, extra = policy.open_bet(game, seat, round_name) if eligible else ('paso', None)
+        else:
+            action, extra = policy.respond(game, seat, round_name, phase) if eligible else ('paso', None)
+
+        result = self._act(game, seat, action, extra, stats)
+        if result.get('reason') == 'Both defenders rejected':
+            stats.add_points(round_name, result['winner_team'], result['points'])
+        return result
+
+    def _is_eligible(self, game, seat, round_name) -> bool:
+        if round_name not in ('PARES', 'JUEGO'):
+            return True
+        key = 'paresDeclarations' if round_name == 'PARES' else 'juegoDeclarations'
+        return game.state.get(key, {}).get(seat) in [True, 'tengo_after_penalty', 'puede']
+
+    def _play_declarations(self, game, round_name, stats):
+        """The server's declaration flow: auto-declarations, player_declaration + trigger_declaration_collapse"""
+        declarations = game.state[game.declaration_key(round_name)]
+        for _ in range(game.num_players * 2):
+            if len(declarations) >= 4:
+                break
+            if game.auto_declare_next(round_name) is not None:
+                continue
+            if len(declarations) >= 4:
+                break
+            seat = game.state.activePlayerIndex
+            declaration = self._policy(game, seat).declare(game, seat, round_name)
+            if declaration == 'puede':
+                game.declare(seat, round_name, 'puede')
+                continue
+            stats.declarations[round_name] += 1
+            game.declare(seat, round_name, declaration == 'tengo')
+            collapse = game.collapse_declaration(seat, declaration, round_name)
+            penalty = collapse.get('penalty')
+            if penalty:
+                stats.penalties[round_name] += 1
+                stats.penalty_points[round_name] += penalty['points_deducted']
+        game.finish_declarations(round_name)
+
+    # -------------------------
+    # Results and invariants
+    # -------------------------
+    def _winner(self, game) -> Optional[str]:
+        win_check = game.check_win_condition()
+        return win_check.get('winner') if win_check.get('game_ended') else None
+
+    def _record_hand_result(self, game, scores_before, stats):
+        result = game.last_hand_result or {}
+        for item in result.get('results', []):
+            stats.add_points(item['round'], item['winner'], item['points'])
+        for team in ('team1', 'team2'):
+            if game.state.teams[team].score < scores_before[team]:
+                stats.violation(f"{team} score decreased during a hand")
+
+    def _check_deal(self, game, stats):
+        card_ids = []
+        for seat in range(game.num_players):
+            hand = game.hands.get(seat, [])
+            if len(hand) != 4:
+                stats.violation(f"Seat {seat} has {len(hand)} cards after deal")
+            card_ids.extend(card.card_id for card in hand)
+        if len(card_ids) != len(set(card_ids)):
+            stats.violation("Duplicate card dealt")
+        stats.record_deal(encode_game_hands(game), game.state.manoIndex)
+
+
+# ==================== BATCH RUNNER ====================
+
+def _run_chunk(args) -> SimulationStats:
+    """Play a range of games in this process (process-pool entry point)"""
+    first_game, num_games, game_mode, team1, team2, seed, max_hands = args
+    set_rng_backend('fast', seed=None if seed is None else seed + first_game)
+    rng = random.Random(None if seed is None else seed * 7919 + first_game)
+    simulator = HeadlessSimulator(POLICIES[team1](rng), POLICIES[team2](rng),
+                                  game_mode=game_mode, max_hands=max_hands)
+    stats = SimulationStats()
+    started = time.perf_counter()
+    for game_number in range(first_game, first_game + num_games):
+        simulator.play_game(f'sim_{game_number}', stats)
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _init_worker():
+    # Game logic logs every action; the simulator reports problems in its own stats
+    logging.disable(logging.WARNING)
+
+
+def run_batch(num_games: int, game_mode: str = '8', team1: str = 'heuristic', team2: str = 'random',
+              workers: int = 1, seed: Optional[int] = None, max_hands: int = 200) -> Dict:
+    """
+    Simulate num_games games split across a process pool.
+
+    Returns:
+        SimulationStats.to_dict() with hands_per_second measured on wall time
+    """
+    if team1 not in POLICIES or team2 not in POLICIES:
+        raise ValueError(f"Unknown policy; choose from {sorted(POLICIES)}")
+
+    workers = max(1, min(workers, num_games))
+    base, extra = divmod(num_games, workers)
+    chunks = []
+    first_game = 0
+    for worker in range(workers):
+        count = base + (1 if worker < extra else 0)
+        chunks.append((first_game, count, game_mode, team1, team2, seed, max_hands))
+        first_game += count
+
+    started = time.perf_counter()
+    if workers == 1:
+        previous_disable = logging.root.manager.disable
+        _init_worker()
+        try:
+            results = [_run_chunk(chunks[0])]
+        finally:
+            logging.disable(previous_disable)
+            set_rng_backend('quantum')
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            results = pool.map(_run_chunk, chunks)
+
+    stats = SimulationStats()
+    for chunk_stats in results:
+        stats.merge(chunk_stats)
+    stats.elapsed = time.perf_counter() - started
+
+    report = stats.to_dict()
+    report['deal_analysis'] = stats.deal_analysis(game_mode)
+    report.update({'game_mode': game_mode, 'team1_policy': team1, 'team2_policy': team2, 'workers': workers})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless Quantum Mus batch simulator')
+    parser.add_argument('--games', type=int, default=100, help='Number of games to simulate')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='Worker processes')
+    parser.add_argument('--mode', choices=['4', '8'], default='8', help='Game mode (4 or 8 reyes)')
+    parser.add_argument('--team1', choices=sorted(POLICIES), default='heuristic', help='Policy for team1')
+    parser.add_argument('--team2', choices=sorted(POLICIES), default='random', help='Policy for team2')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible runs')
+    parser.add_argument('--max-hands', type=int, default=200, help='Hand limit per game')
+    parser.add_argument('--json', action='store_true', help='Print the raw JSON report')
+    args = parser.parse_args()
+
+    report = run_batch(args.games, args.mode, args.team1, args.team2, args.workers, args.seed, args.max_hands)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Games: {report['games']} ({report['finished_games']} finished), hands: {report['hands']}")
+    print(f"Throughput: {report['hands_per_second']} hands/sec on {report['workers']} worker(s)")
+    print(f"Win rates: team1 ({args.team1}) {report['win_rates']['team1']:.1%}, "
+          f"team2 ({args.team2}) {report['win_rates']['team2']:.1%}")
+    for round_name, points in report['points_per_hand'].items():
+        print(f"  {round_name:<7} points/hand: team1 {points['team1']:.2f}, team2 {points['team2']:.2f}")
+    print(f"Órdagos: {report['ordago']['offered']} offered, {report['ordago']['accepted']} accepted")
+    penalties = report['collapse_penalties']
+    print(f"Collapse penalties: {penalties['penalized']}/{penalties['declarations']} declarations "
+          f"({penalties['frequency']:.1%})")
+    print(f"Invariant violations: {report['invariant_violations']}, failed actions: {report['failed_actions']}")
+    for sample in report['violation_samples']:
+        print(f"  - {sample}")
+
+
+if __name__ == '__main__':
+    main()
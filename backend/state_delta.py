@@ -0,0 +1,180 @@
+"""
+State Deltas for Quantum Mus
+Versioned changes between public game states, for game_update broadcasts
+
+An action usually changes one or two fields of get_public_state() (active
+player, a score, the current bet), but game_update used to carry all of it.
+A StateDeltaStream remembers the public state last broadcast to a room, and
+each update carries only the paths that changed since, with the version they
+apply to:
+
+    {'base': 6, 'version': 7, 'changes': [[['state', 'activePlayerIndex'], 2],
+                                          [['hand_sizes', '0'], 4]]}
+
+A change is [path, value], or [path] when the key was removed; the empty
+path replaces the whole state (the first update of a stream). Dict keys are
+strings in paths, as in JSON; lists are replaced as a whole. A client whose
+state is not at 'base' (it joined late or missed an update) ignores the
+delta and asks for a full resync (request_state_sync -> state_sync), which
+returns the last broadcast state and its version.
+
+Benchmark (bytes and encoding time per game_update, full state vs delta):
+    python state_delta.py --hands 200
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+Change = list  # [path] or [path, value]
+
+
+def diff(old, new) -> List[Change]:
+    """Changes that turn old into new (both JSON-like values)"""
+    changes = []
+    _diff(old, new, [], changes)
+    return changes
+
+
+def _diff(old, new, path: list, changes: list) -> None:
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, path + [str(key)], changes)
+            else:
+                changes.append([path + [str(key)], value])
+        for key in old:
+            if key not in new:
+                changes.append([path + [str(key)]])
+    elif type(old) is not type(new) or old != new:
+        changes.append([path, new])
+
+
+def apply_delta(state, changes: List[Change]):
+    """Apply changes to a JSON-decoded state (in place); returns the new state"""
+    for change in changes:
+        path = change[0]
+        if not path:
+            state = change[1]
+            continue
+        target = state
+        for key in path[:-1]:
+            target = target[key]
+        if len(change) == 1:
+            target.pop(path[-1], None)
+        else:
+            target[path[-1]] = change[1]
+    return state
+
+
+class StateDeltaStream:
+    """Public states broadcast to one room, as a sequence of versioned deltas"""
+
+    def __init__(self):
+        self.version = 0
+        self._state: Optional[Dict] = None
+
+    def update(self, state: Dict) -> Dict:
+        """Delta from the last broadcast state to state (the version advances if anything changed)"""
+        changes = [[[], state]] if self._state is None else diff(self._state, state)
+        base = self.version
+        if changes:
+            self.version += 1
+        self._state = state
+        return {'base': base, 'version': self.version, 'changes': changes}
+
+    def sync(self, state: Dict) -> Dict:
+        """Full resync: the last broadcast state (or state, if nothing was broadcast yet)"""
+        if self._state is None:
+            self.update(state)
+        return {'version': self.version, 'game_state': self._state}
+
+    def to_dict(self) -> Dict:
+        return {'version': self.version, 'state': self._state}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StateDeltaStream':
+        """Continue a stream saved with to_dict (another worker's broadcasts)"""
+        stream = cls()
+        stream.version = data['version']
+        stream._state = data['state']
+        return stream
+
+
+# ==================== BENCHMARK ====================
+
+def benchmark(hands: int = 200, seed: int = None) -> Dict:
+    """
+    Compare full-state and delta game_update payloads over simulated games,
+    one broadcast per accepted player action.
+    """
+    from Logica_cuantica.quantum_random import get_rng_backend, set_rng_backend
+    from entanglement_analytics import get_analytics
+    from game_logic import QuantumMusGame
+    from simulator import HeadlessSimulator, RandomPolicy, SimulationStats
+
+    rng = random.Random(seed)
+    backend = get_rng_backend()
+    set_rng_backend('fast', seed=seed)
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    full_bytes = delta_bytes = updates = 0
+    full_time = delta_time = 0.0
+    try:
+        simulator = HeadlessSimulator(RandomPolicy(rng), RandomPolicy(rng))
+        stats = SimulationStats()
+        players = [{'id': f'bench_p{i}', 'name': f'Bot {i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+        played = 0
+        while played < hands:
+            game = QuantumMusGame(f'delta_bench_{played}', players)
+            process_action = game.process_action
+
+            def broadcast(*args, **kwargs):
+                nonlocal full_bytes, delta_bytes, updates, full_time, delta_time
+                result = process_action(*args, **kwargs)
+                if result.get('success'):
+                    started = time.perf_counter()
+                    full = json.dumps({'game_state': game.get_public_state()}, separators=(',', ':'))
+                    full_time += time.perf_counter() - started
+                    started = time.perf_counter()
+                    delta = json.dumps({'state_delta': game.get_public_state_delta()}, separators=(',', ':'))
+                    delta_time += time.perf_counter() - started
+                    full_bytes += len(full)
+                    delta_bytes += len(delta)
+                    updates += 1
+                return result
+
+            game.process_action = broadcast
+            game.deal_cards()
+            game.get_public_state_delta()  # First update carries the whole state
+            while played < hands:
+                played += 1
+                if simulator._play_hand(game, stats):
+                    break
+            get_analytics().retire(game.room_id)
+    finally:
+        logging.disable(previous_disable)
+        set_rng_backend(backend)
+
+    return {
+        'hands': hands,
+        'updates': updates,
+        'full': {'bytes_per_update': round(full_bytes / updates), 'encode_us': round(full_time / updates * 1e6, 1)},
+        'delta': {'bytes_per_update': round(delta_bytes / updates),
+                  'encode_us': round(delta_time / updates * 1e6, 1)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantum Mus game_update full-state vs delta benchmark')
+    parser.add_argument('--hands', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.hands, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+"""
+State Store for Quantum Mus
+Room and game state shared by several server workers
+
+RoomManager and GameManager keep rooms and games in process-local dicts,
+which pins the server to one worker. With a shared store they keep those
+dicts as a cache instead and every worker reads and writes the same state:
+- rooms are JSON under room/<id>, with code/<code> and player/<sid> indexes
+- games are game_snapshot bytes under game/<id>, their delta stream under
+  stream/<id> and a version token under gamever/<id>; a worker reloads its
+  cached game when the token changed
+- one lock per room (lock/room/<id>) serializes handlers across workers
+
+Stores:
+- MemoryStore: in-process dict, the default. Not shared unless created with
+  shared=True (several managers in one process, e.g. tests).
+- RedisStore: any server speaking the Redis protocol (GET/SET NX PX/DEL/SCAN),
+  over one socket per worker. No client library needed.
+
+A server handler runs inside transaction(store): the room locks it takes
+with hold() stay held and the games it touched are saved when it returns.
+Cross-worker emits go through the Socket.IO message queue
+(SOCKETIO_MESSAGE_QUEUE), not through this store.
+"""
+
+import logging
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+LOCK_TTL = 10.0  # Seconds a crashed worker can keep a room locked
+LOCK_TIMEOUT = 5.0  # Seconds to wait for a room lock
+
+
+class StoreError(RuntimeError):
+    """The state store failed or a lock could not be taken"""
+
+
+class StateStore:
+    """Key -> bytes store; shared stores are seen by every worker"""
+
+    shared = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def keys(self, prefix: str) -> List[str]:
+        raise NotImplementedError
+
+    def try_lock(self, name: str, token: str, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def unlock(self, name: str, token: str) -> None:
+        raise NotImplementedError
+
+    def acquire(self, name: str, ttl: float = LOCK_TTL, timeout: float = LOCK_TIMEOUT) -> str:
+        """Take lock name, waiting up to timeout; returns the token to release it with"""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while not self.try_lock(name, token, ttl):
+            if time.monotonic() >= deadline:
+                raise StoreError(f"Timed out waiting for lock {name}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        return token
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStore(StateStore):
+    """In-process store (the default)"""
+
+    def __init__(self, shared: bool = False):
+        self.shared = shared
+        self._data: Dict[str, tuple] = {}  # key -> (value, expires_at or None)
+        self._mutex = threading.Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._mutex:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        with self._mutex:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def delete(self, *keys):
+        with self._mutex:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def keys(self, prefix):
+        with self._mutex:
+            return [key for key in list(self._data) if key.startswith(prefix) and self._live(key)]
+
+    def try_lock(self, name, token, ttl):
+        with self._mutex:
+            if self._live(name):
+                return False
+            self._data[name] = (token.encode(), time.monotonic() + ttl)
+            return True
+
+    def unlock(self, name, token):
+        with self._mutex:
+            entry = self._live(name)
+            if entry and entry[0] == token.encode():
+                del self._data[name]
+
+
+class RedisStore(StateStore):
+    """Store on a Redis-protocol server: redis://[:password@]host[:port][/db]"""
+
+    shared = True
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self._address = (parsed.hostname or 'localhost', parsed.port or 6379)
+        self._password = parsed.password
+        self._db = int(parsed.path.lstrip('/') or 0)
+        self._sock = None
+        self._reader = None
+        self._mutex = threading.Lock()  # One request/reply at a time on the socket
+
+    def _connect(self):
+        self._sock = socket.create_connection(self._address, timeout=LOCK_TIMEOUT)
+        self._reader = self._sock.makefile('rb')
+        if self._password:
+            self._call('AUTH', self._password)
+        if self._db:
+            self._call('SELECT', self._db)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            finally:
+                self._sock = self._reader = None
+
+    def execute(self, *args):
+        """Send one command and return its decoded reply"""
+        with self._mutex:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._call(*args)
+            except (OSError, EOFError) as e:
+                self.close()  # Reconnect on the next command
+                raise StoreError(f"State store connection failed: {e}") from e
+
+    def _call(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise EOFError("connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode('utf-8')
+        if kind == b'-':
+            raise StoreError(rest.decode('utf-8'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise EOFError("connection closed")
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise StoreError(f"Unexpected reply {line!r}")
+
+    def get(self, key):
+        return self.execute('GET', key)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.execute('SET', key, value, 'PX', int(ttl * 1000))
+        else:
+            self.execute('SET', key, value)
+
+    def delete(self, *keys):
+        if keys:
+            self.execute('DEL', *keys)
+
+    def keys(self, prefix):
+        pattern = ''.join('\\' + char if char in '*?[]\\' else char for char in prefix) + '*'
+        found, cursor = [], b'0'
+        while True:
+            cursor, batch = self.execute('SCAN', cursor, 'MATCH', pattern, 'COUNT', 500)
+            found.extend(key.decode('utf-8') for key in batch)
+            if cursor in (b'0', 0):
+                return sorted(set(found))
+
+    def try_lock(self, name, token, ttl):
+        return self.execute('SET', name, token, 'NX', 'PX', int(ttl * 1000)) is not None
+
+    def unlock(self, name, token):
+        # Only the holder deletes; an expired lock may already belong to someone else
+        if self.execute('GET', name) == token.encode('utf-8'):
+            self.execute('DEL', name)
+
+
+def open_store(url: str = None) -> StateStore:
+    """Store for a STATE_STORE_URL: unset or memory:// -> MemoryStore, redis:// -> RedisStore"""
+    if not url or url.startswith('memory:'):
+        return MemoryStore()
+    if url.startswith(('redis://', 'rediss://')):
+        if url.startswith('rediss://'):
+            raise StoreError("TLS (rediss://) state stores are not supported")
+        return RedisStore(url)
+    raise StoreError(f"Unknown state store URL: {url}")
+
+
+# ==================== TRANSACTIONS ====================
+
+_local = threading.local()
+
+
+class _Transaction:
+    def __init__(self, store: StateStore):
+        self.store = store
+        self.locks: Dict[str, str] = {}  # lock name -> token
+        self.commits: Dict[object, Callable[[], None]] = {}
+        self.aborts: Dict[object, Callable[[], None]] = {}
+
+
+@contextmanager
+def transaction(store: StateStore):
+    """
+    Scope of one inbound message. Locks taken with hold() are kept until it
+    ends; on_commit() callbacks run when it returns, on_abort() ones if it
+    raises. Does nothing for stores that are not shared; nested uses join
+    the outermost.
+    """
+    if not store.shared or getattr(_local, 'transaction', None) is not None:
+        yield
+        return
+    current = _local.transaction = _Transaction(store)
+    try:
+        yield
+        for callback in current.commits.values():
+            callback()
+    except BaseException:
+        for callback in current.aborts.values():
+            callback()
+        raise
+    finally:
+        _local.transaction = None
+        for name, token in current.locks.items():
+            try:
+                store.unlock(name, token)
+            except StoreError as e:
+                logger.warning(f"Could not release {name}: {e}")
+
+
+def _current(store: StateStore) -> Optional[_Transaction]:
+    current = getattr(_local, 'transaction', None)
+    return current if current is not None and current.store is store else None
+
+
+def hold(store: StateStore, name: str) -> bool:
+    """Take lock name until the current transaction ends (False outside one)"""
+    current = _current(store)
+    if current is None:
+        return False
+    if name not in current.locks:
+        current.locks[name] = store.acquire(name)
+    return True
+
+
+def on_commit(store: StateStore, key, callback: Callable[[], None], abort: Callable[[], None] = None) -> bool:
+    """Run callback (once per key) when the current transaction returns; False outside one"""
+    current = _current(store)
+    if current is None:
+        return False
+    current.commits[key] = callback
+    if abort is not None:
+        current.aborts[key] = abort
+    return True
+
+
+def room_lock(room_id: str) -> str:
+    return f'lock/room/{room_id}'
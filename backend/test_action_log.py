@@ -0,0 +1,198 @@
+"""
+Tests for the event-sourced action log (action_log.py)
+A game restored from snapshot + tail matches the live game
+"""
+
+import json
+import random
+
+import pytest
+
+from Logica_cuantica.quantum_random import set_rng_backend
+from action_log import ActionLog, ActionLogError, BufferedLogWriter, encode_record, read_log, restore_game
+from game_logic import QuantumMusGame
+from game_manager import GameManager
+from simulator import HeadlessSimulator, RandomPolicy, SimulationStats
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+        self.closed = False
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        self.closed = True
+
+
+def _players():
+    return [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+
+
+def _snapshot(game):
+    return (game.state.to_dict(),
+            {seat: [card.to_dict() for card in hand] for seat, hand in game.hands.items()},
+            [card.card_id for card in game.deck.cards[game.deck.deck_index:]])
+
+
+def _play(game, hands):
+    set_rng_backend('fast', seed=7)
+    simulator = HeadlessSimulator(RandomPolicy(random.Random(1)), RandomPolicy(random.Random(2)))
+    stats = SimulationStats()
+    game.deal_cards()
+    try:
+        for _ in range(hands):
+            if simulator._play_hand(game, stats):
+                break
+    finally:
+        set_rng_backend('quantum')
+    return stats
+
+
+def _logged_game(snapshot_every=64):
+    set_rng_backend('fast', seed=3)
+    game = QuantumMusGame('log-room', _players(), game_mode='8')
+    set_rng_backend('quantum')
+    writer = ListWriter()
+    ActionLog(game, writer, snapshot_every=snapshot_every)
+    return game, writer
+
+
+def test_replay_from_first_snapshot_matches_live_game():
+    game, writer = _logged_game(snapshot_every=10 ** 6)
+    game.state.manoIndex = 1  # Server-side write, logged as a state event
+    _play(game, hands=3)
+
+    kinds = [kind for _, kind, _ in writer.records]
+    assert kinds.count('snapshot') == 1
+    assert {'state', 'deal', 'action', 'declaration', 'collapse', 'score'} <= set(kinds)
+
+    restored, last_seq = restore_game(writer.records)
+    assert last_seq == writer.records[-1][0]
+    assert _snapshot(restored) == _snapshot(game)
+
+
+def test_restore_uses_latest_snapshot_and_tail():
+    game, writer = _logged_game(snapshot_every=5)
+    _play(game, hands=2)
+    snapshots = [seq for seq, kind, _ in writer.records if kind == 'snapshot']
+    assert len(snapshots) > 3
+
+    restored, _ = restore_game(writer.records)
+    assert _snapshot(restored) == _snapshot(game)
+    assert restored.action_log is None and restored.analytics is not None
+
+    # Point-in-time restore replays up to the requested event only
+    middle = snapshots[len(snapshots) // 2] + 2
+    partial, last_seq = restore_game(writer.records, upto=middle)
+    assert last_seq <= middle
+
+
+def test_reads_and_rejected_actions_are_not_logged():
+    game, writer = _logged_game()
+    game.deal_cards()
+    count = len(writer.records)
+    game.get_public_state()
+    game.get_player_state(0)
+    result = game.process_action((game.state.activePlayerIndex + 1) % 4, 'mus')
+    assert not result['success']
+    assert len(writer.records) == count
+
+
+def test_buffered_file_log_and_recovery(tmp_path):
+    manager = GameManager(log_dir=str(tmp_path))
+    game = manager.create_game('file-room', _players(), '4')
+    _play(game, hands=1)
+    expected = _snapshot(game)
+    game.action_log.writer.flush()
+
+    lines = (tmp_path / 'file-room.log').read_text().splitlines()
+    assert all(isinstance(json.loads(line), list) for line in lines)
+
+    # A crash leaves the in-memory games behind; the log is enough to recover
+    manager.games.clear()
+    recovered = manager.recover_game('file-room')
+    assert _snapshot(recovered) == expected
+    assert isinstance(recovered.action_log.writer, BufferedLogWriter)
+
+    recovered.process_action(recovered.state.activePlayerIndex, 'paso')
+    manager.remove_game('file-room')
+    restored, _ = restore_game(read_log(str(tmp_path / 'file-room.log')))
+    assert _snapshot(restored) == _snapshot(recovered)
+
+
+def test_discard_and_draw_replay_recorded_shuffles():
+    game, writer = _logged_game()
+    game.deal_cards()
+    for _ in range(4):
+        game.process_action(game.state.activePlayerIndex, 'mus')
+    for seat in range(4):
+        game.discard_cards(seat, [0, 1])
+    game.deal_new_cards()
+    assert [kind for _, kind, _ in writer.records][-5:] == ['discard'] * 4 + ['draw']
+
+    restored, _ = restore_game(writer.records)
+    assert _snapshot(restored) == _snapshot(game)
+
+
+def test_state_events_hold_only_changed_fields():
+    game, writer = _logged_game()
+    game.deal_cards()
+    game.state.manoIndex = 2
+    game.state.paresDeclarations = {0: True}
+    game.process_action(game.state.activePlayerIndex, 'mus')
+    changes = [payload for _, kind, payload in writer.records if kind == 'state'][-1]
+    assert sorted(change[0][0] for change in changes) == ['manoIndex', 'paresDeclarations']
+
+    restored, _ = restore_game(writer.records)
+    assert restored.state.paresDeclarations == {0: True}
+    assert _snapshot(restored) == _snapshot(game)
+
+
+def test_non_json_payloads_are_refused():
+    with pytest.raises(TypeError):
+        encode_record((1, 'action', [[object()], {}, [], None]))
+
+
+def test_replay_fails_when_the_outcome_differs():
+    game, writer = _logged_game()
+    game.deal_cards()
+    records = [list(record) for record in writer.records]
+    deal = next(record for record in records if record[1] == 'deal')
+    assert deal[2][3] is None  # The deal did not raise
+    deal[2][3] = 'KeyError'
+    with pytest.raises(ActionLogError):
+        restore_game(records)
+
+
+def test_snapshots_are_taken_by_the_flusher(tmp_path):
+    game = QuantumMusGame('flush-room', _players(), game_mode='4')
+    writer = BufferedLogWriter(str(tmp_path / 'flush-room.log'))
+    log = ActionLog(game, writer, snapshot_every=2)
+    writer.flush()
+    game.deal_cards()
+    for _ in range(3):
+        game.process_action(game.state.activePlayerIndex, 'mus')
+    assert all(kind != 'snapshot' for _, kind, _ in writer._pending)  # Only requested on the command path
+    log.close()
+    records = list(read_log(writer.path))
+    assert [kind for _, kind, _ in records].count('snapshot') >= 2  # The first and the one due at close
+    assert records[-1][1] == 'snapshot' and records[-1][0] == log.seq
+
+
+def test_new_game_rotates_the_log_and_only_unfinished_games_recover(tmp_path):
+    manager = GameManager(log_dir=str(tmp_path))
+    manager.create_game('old-room', _players(), '4').deal_cards()
+    manager.remove_game('old-room')
+    game = manager.create_game('old-room', _players(), '4')
+    game.action_log.writer.flush()
+    assert (tmp_path / 'old-room.log.1').exists()
+    assert [record[0] for record in read_log(str(tmp_path / 'old-room.log'))] == [0]
+
+    manager.create_game('live-room', _players(), '4').deal_cards()
+    manager.remove_game('old-room')  # Finished: its log ends with an 'end' record
+    manager.games['live-room'].action_log.writer.flush()
+    manager.games.clear()
+    assert manager.recover_games() == ['live-room']
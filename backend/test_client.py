@@ -8,6 +8,8 @@ import time
 import json
 import os
 
+from state_delta import apply_delta
+
 # Create a Socket.IO client
 sio = socketio.Client()
 
@@ -16,7 +18,9 @@ client_state = {
     'sid': None,
     'room_id': None,
     'player_index': None,
-    'game_state': None
+    'game_state': None,
+    'public_state': None,  # Kept current by game_update deltas
+    'state_version': 0
 }
 
 
@@ -38,6 +42,15 @@ def on_connected(data):
     print(f'✓ Server confirmed connection: {data}')
 
 
+@sio.on('batch')
+def on_batch(events):
+    # Every event produced by one action arrives in one frame, in order
+    for event, data in events:
+        handler = sio.handlers['/'].get(event)
+        if handler:
+            handler(data)
+
+
 @sio.on('room_created')
 def on_room_created(data):
     print(f'✓ Room created: {json.dumps(data, indent=2)}')
@@ -67,11 +80,23 @@ def on_game_started(data):
 
 @sio.on('game_update')
 def on_game_update(data):
+    delta = data['state_delta']
+    if delta['base'] != client_state['state_version']:
+        print(f'ℹ Missed a state version, requesting a full resync')
+        sio.emit('request_state_sync', {'room_id': client_state['room_id']})
+        return
+    client_state['public_state'] = apply_delta(client_state['public_state'], delta['changes'])
+    client_state['state_version'] = delta['version']
     print(f'ℹ Game updated:')
-    print(f'  Action: {data["action"]}')
-    print(f'  Current round: {data["game_state"]["state"]["currentRound"]}')
-    print(f'  Active player: {data["game_state"]["state"]["activePlayerIndex"]}')
-    client_state['game_state'] = data['game_state']
+    print(f'  Action: {data.get("action")}')
+    print(f'  Current round: {client_state["public_state"]["state"]["currentRound"]}')
+    print(f'  Active player: {client_state["public_state"]["state"]["activePlayerIndex"]}')
+
+
+@sio.on('state_sync')
+def on_state_sync(data):
+    client_state['public_state'] = data['game_state']
+    client_state['state_version'] = data['version']
 
 
 @sio.on('cards_discarded')
@@ -0,0 +1,77 @@
+"""
+Tests for QuantumDealer pair-link collapse
+Verifies the card_id -> pending link index and the single-pass hand collapse
+"""
+
+import pytest
+
+from Logica_cuantica.cartas import QuantumCard
+from Logica_cuantica.dealer import QuantumDealer
+
+
+def _card(palo, valor, card_id):
+    return QuantumCard(palo, valor, card_id=card_id)
+
+
+def test_linked_cards_collapse_together():
+    dealer = QuantumDealer(num_players=4)
+    player = dealer.players[0]
+    card_a = _card('Oro', 4, 1001)
+    card_b = _card('Copa', 6, 1002)
+    player.receive_cards([card_a, card_b, _card('Espada', 5, 1003), _card('Basto', 7, 1004)])
+
+    dealer.register_pair_link(card_a, card_b)
+    dealer.collapse_player_hand(player)
+
+    assert card_a.get_valor() == card_b.get_valor()
+    assert dealer.pair_links[frozenset({1001, 1002})] is True
+    assert dealer._pending_links == {}
+    assert all(card.measured_state is not None for card in player.hand)
+
+
+def test_link_waits_for_both_cards():
+    """A link whose partner is in another hand stays pending"""
+    dealer = QuantumDealer(num_players=4)
+    card_a = _card('Oro', 4, 2001)
+    card_b = _card('Copa', 6, 2002)
+    dealer.players[0].receive_card(card_a)
+    dealer.players[1].receive_card(card_b)
+    dealer.register_pair_link(card_a, card_b)
+
+    dealer.collapse_player_hand(dealer.players[0])
+
+    assert dealer.pair_links[frozenset({2001, 2002})] is False
+    assert dealer._pending_links[2002] == frozenset({2001, 2002})
+    assert card_a.get_valor() == 4
+
+
+def test_collapse_ignores_unrelated_links():
+    """Hands without linked cards never touch the registered links"""
+    dealer = QuantumDealer(num_players=4)
+    for i in range(500):
+        dealer.register_pair_link(_card('Oro', 4, 10000 + 2 * i), _card('Copa', 4, 10001 + 2 * i))
+    player = dealer.players[0]
+    player.receive_cards([_card('Oro', 12, 3001), _card('Copa', 3, 3002), _card('Espada', 5, 3003)])
+
+    dealer.collapse_player_hand(player)
+
+    assert all(card.measured_state is not None for card in player.hand)
+    assert not any(dealer.pair_links.values())
+    assert len(dealer._pending_links) == 1000
+
+
+def test_duplicate_registration_is_rejected():
+    """A card can only wait on one link; after collapsing it may be linked again"""
+    dealer = QuantumDealer(num_players=4)
+    card_a, card_b, card_c = _card('Oro', 4, 4001), _card('Copa', 6, 4002), _card('Basto', 5, 4003)
+    dealer.register_pair_link(card_a, card_b)
+    for pair in ((card_a, card_c), (card_c, card_b), (card_b, card_a)):
+        with pytest.raises(ValueError):
+            dealer.register_pair_link(*pair)
+    assert dealer._pending_links == {4001: frozenset({4001, 4002}), 4002: frozenset({4001, 4002})}
+
+    dealer.players[0].receive_cards([card_a, card_b])
+    dealer.collapse_player_hand(dealer.players[0])
+    assert dealer._pending_links == {}
+    dealer.register_pair_link(card_a, card_c)
+    assert dealer._pending_links[4001] == frozenset({4001, 4003})
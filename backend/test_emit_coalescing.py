@@ -0,0 +1,69 @@
+"""
+Tests for per-message emit coalescing in server.py
+Events produced while handling one inbound message reach each socket as one frame
+
+Runs in a subprocess, like test_private_hands.py: importing server
+monkey-patches the process with eventlet.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+_SCENARIO = r"""
+import json, os
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+import server
+from server import app, socketio
+
+def frames(client):
+    return [[m['name'], m['args'][0]] for m in client.get_received()]
+
+clients = [socketio.test_client(app) for _ in range(3)]
+sids = [socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/') for client in clients]
+for sid in sids[:2]:
+    socketio.server.manager.enter_room(sid, '/', 'table')
+for client in clients:
+    client.get_received()
+
+report = {}
+with server._coalesced_emits():
+    server._emit('game_update', {'n': 1}, room='table')
+    with server._coalesced_emits():  # Nested: flushed by the outer block
+        server._emit('hand_started', {'hand': 'own'}, room=sids[0])
+    server._emit('game_ended', {'n': 2}, room='table')
+    server._emit('room_updated', {'n': 3}, room=sids[2])
+    report['buffered'] = [frames(client) for client in clients]
+report['flushed'] = [frames(client) for client in clients]
+
+with server._coalesced_emits():
+    server._emit('game_update', {'n': 4}, room='table')
+report['single'] = [frames(client) for client in clients]
+
+server._emit('game_update', {'n': 5}, room='table')
+report['direct'] = [frames(client) for client in clients]
+print(json.dumps(report))
+"""
+
+
+def _run():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=120).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_handler_events_flush_as_one_frame_per_socket():
+    report = _run()
+    assert report['buffered'] == [[], [], []]
+    seat0, seat1, other = report['flushed']
+    assert seat0 == [['batch', [['game_update', {'n': 1}], ['hand_started', {'hand': 'own'}],
+                                ['game_ended', {'n': 2}]]]]
+    assert seat1 == [['batch', [['game_update', {'n': 1}], ['game_ended', {'n': 2}]]]]
+    assert other == [['room_updated', {'n': 3}]]
+
+    # A lone event is sent as itself, and outside a handler nothing is buffered
+    assert report['single'] == [[['game_update', {'n': 4}]]] * 2 + [[]]
+    assert report['direct'] == [[['game_update', {'n': 5}]]] * 2 + [[]]
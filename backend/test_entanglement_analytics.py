@@ -0,0 +1,94 @@
+"""
+Tests for the cross-game entanglement analytics aggregator
+"""
+
+from entanglement_analytics import EntanglementAnalytics, get_analytics
+from game_manager import GameManager
+from quantum_collapse import CollapseEvent
+
+
+def _players():
+    return [{'id': f'p{i}', 'name': f'Player {i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+
+
+def test_room_counters_merge():
+    analytics = EntanglementAnalytics(merge_interval=3600)
+    room_a = analytics.room('room_a')
+    room_b = analytics.room('room_b')
+    assert analytics.room('room_a') is room_a
+
+    room_a.record_hand(8)
+    room_b.record_hand(8)
+    room_a.record_activation('pair_rey_as_oros')
+    event = CollapseEvent('declaration', 0, 'PARES')
+    event.collapsed_cards = [(0, 1, 'K', 'A'), (2, 3, 'A', 'K')]
+    room_a.record_collapse(event)
+    room_a.record_declaration('PARES', -1)
+    room_b.record_declaration('PARES', 0)
+    room_b.record_declaration('JUEGO', -2)
+
+    snapshot = analytics.snapshot()
+    assert snapshot['active_rooms'] == 2
+    assert snapshot['hands'] == 2
+    assert snapshot['pairs']['dealt'] == 16
+    assert snapshot['pairs']['activation_rate'] == 1 / 16
+    assert snapshot['collapses']['by_trigger'] == {'declaration': 1}
+    assert snapshot['collapses']['value_distribution'] == {'A': 1, 'K': 1}
+    assert snapshot['declarations']['total'] == 3
+    assert snapshot['declarations']['by_round']['PARES']['penalty_frequency'] == 0.5
+    assert snapshot['declarations']['by_round']['JUEGO']['points_deducted'] == 2
+
+
+def test_snapshot_is_cached_until_interval():
+    analytics = EntanglementAnalytics(merge_interval=3600)
+    room = analytics.room('room_cached')
+    room.record_hand(4)
+    assert analytics.snapshot()['hands'] == 1
+
+    room.record_hand(4)
+    assert analytics.snapshot()['hands'] == 1  # Not merged yet
+    assert analytics.snapshot(force=True)['hands'] == 2
+
+
+def test_retired_rooms_are_kept():
+    analytics = EntanglementAnalytics(merge_interval=0)
+    analytics.room('room_gone').record_declaration('JUEGO', -2)
+    analytics.retire('room_gone')
+
+    snapshot = analytics.snapshot()
+    assert snapshot['active_rooms'] == 0
+    assert snapshot['declarations']['penalized'] == 1
+
+
+def test_games_report_to_global_analytics():
+    manager = GameManager()
+    game = manager.create_game('analytics_room', _players(), game_mode='8')
+    game.deal_cards()
+    game.trigger_collapse_on_declaration(0, 'tengo', 'PARES')
+
+    room = get_analytics().room('analytics_room')
+    assert room.hands == 1
+    assert room.pairs_dealt == 8
+    assert room.declarations['PARES'] == 1
+
+    manager.remove_game('analytics_room')
+    snapshot = get_analytics().snapshot(force=True)
+    assert snapshot['declarations']['by_round']['PARES']['declarations'] >= 1
+    assert 'analytics_room' not in get_analytics()._rooms
+
+
+def test_ordago_records_the_last_hands_bell_pairs():
+    game = GameManager().create_game('ordago_room', _players(), game_mode='8')
+    game.deal_cards()
+    game.trigger_final_collapse()  # Measures every dealt pair
+    game.state['currentRound'] = 'GRANDE'
+    game.round_handler.grande_handler.initialize_grande_phase()
+    game.process_action(game.state['activePlayerIndex'], 'ordago')
+    result = game.process_action(game.state['activePlayerIndex'], 'accept')
+    assert result['game_ended']
+
+    room = get_analytics().room('ordago_room')
+    materialized = game.deck.get_entanglement_stats()['materialized']
+    assert materialized > 0 and room.pairs_materialized == materialized
+    game._record_bell_pairs()  # Each dealt deck is recorded once
+    assert room.pairs_materialized == materialized
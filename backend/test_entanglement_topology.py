@@ -0,0 +1,57 @@
+"""
+Tests for the shared entanglement topology
+Games of the same mode share one immutable pair layout and only keep
+their own activation state
+"""
+
+import pytest
+
+from entanglement_system import EntanglementSystem, get_topology
+
+
+def test_topology_shared_per_mode():
+    system_a = EntanglementSystem('8')
+    system_b = EntanglementSystem('8')
+    assert system_a.topology is system_b.topology is get_topology('8')
+    assert system_a.topology is not EntanglementSystem('4').topology
+    assert len(get_topology('4').pairs) == 4
+    assert len(get_topology('8').pairs) == 8
+
+
+def test_topology_is_read_only():
+    system = EntanglementSystem('4')
+    with pytest.raises(TypeError):
+        system.card_to_pair[('5', 'oros')] = 'pair_fake'
+    assert system.card_to_pair[('K', 'oros')] == 'pair_rey_as_oros'
+
+
+def test_activation_is_per_game():
+    system_a = EntanglementSystem('8')
+    system_b = EntanglementSystem('8')
+
+    data = system_a.activate_entanglement('3', 'copas', 2)
+    assert data['pair_id'] == 'pair_dos_tres_copas'
+    assert data['partner_card'] == {'value': '2', 'suit': 'copas'}
+
+    pair = system_a.entangled_pairs['pair_dos_tres_copas']
+    assert pair.state == 'collapsed'
+    assert pair.activated_by == 2
+    assert pair.activated_card == 2
+    assert system_a.get_statistics()['activated_pairs'] == 1
+    assert system_b.get_statistics()['activated_pairs'] == 0
+
+
+def test_reset_pair_states():
+    system = EntanglementSystem('4')
+    system.activate_entanglement('K', 'bastos', 0)
+    system.activate_entanglement('A', 'oros', 1)
+    system.reset_pair_states()
+    assert all(pair['state'] == 'superposition' for pair in system.get_all_pairs())
+    assert system.get_statistics()['activated_pairs'] == 0
+
+
+def test_non_entangled_card():
+    system = EntanglementSystem('4')
+    assert not system.is_card_entangled('2', 'oros')
+    assert system.activate_entanglement('2', 'oros', 0) is None
+    assert system.get_partner_card('5', 'copas') is None
@@ -0,0 +1,75 @@
+"""
+Tests for the compact game snapshot (game_snapshot.py)
+"""
+
+import pytest
+
+from Logica_cuantica.quantum_random import get_rng_backend
+from game_logic import QuantumMusGame
+from game_snapshot import MAGIC, SnapshotError, benchmark, dump_game, load_game
+
+
+def _game():
+    players = [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+    game = QuantumMusGame('snapshot-room', players, game_mode='8')
+    game.deal_cards()
+    return game
+
+
+def _view(game):
+    return (game.state.to_dict(),
+            {seat: [card.to_dict() for card in hand] for seat, hand in game.hands.items()},
+            [card.to_dict() for card in game.deck.cards], game.deck.deck_index,
+            game.deck.quantum_state.get_outcomes(),
+            [event.to_dict() for event in game.collapse_manager.collapse_history],
+            game.entanglement.get_all_pairs())
+
+
+def test_round_trip_keeps_hands_collapses_and_state():
+    game = _game()
+    game.state.teams['team2'].score = 7
+    for seat in range(4):
+        game.play_card_and_check_entanglement(seat, 0)
+    game.trigger_final_collapse()
+    data = dump_game(game)
+    restored = load_game(data)
+
+    assert _view(restored) == _view(game)
+    assert restored.state.version == game.state.version
+    assert len(data) < 4096
+
+    # Cards are relinked to their Bell partner and the deck's hand state
+    for card in restored.deck.cards:
+        if card.is_entangled:
+            assert card.entangled_partner_card.entangled_partner_card is card
+            assert card.bell_state is restored.deck.quantum_state
+    assert {id(card) for hand in restored.hands.values() for card in hand} <= {id(c) for c in restored.deck.cards}
+
+
+def test_restored_game_keeps_playing():
+    game = _game()
+    restored = load_game(dump_game(game))
+    seat = restored.state.activePlayerIndex
+    assert restored.process_action(seat, 'paso' if restored.state.currentRound != 'MUS' else 'no_mus')['success']
+    assert restored.get_public_state()['hand_sizes'] == game.get_public_state()['hand_sizes']
+    # The original is untouched
+    assert game.state.activePlayerIndex == seat
+
+
+def test_rejects_foreign_data():
+    with pytest.raises(SnapshotError):
+        load_game(b'not a snapshot')
+
+
+def test_rejects_snapshots_of_another_interpreter():
+    data = bytearray(dump_game(_game()))
+    data[len(MAGIC) + 1] ^= 0xff  # Another Python minor version
+    with pytest.raises(SnapshotError, match='Python'):
+        load_game(bytes(data))
+
+
+def test_benchmark_round_trips():
+    backend = get_rng_backend()
+    report = benchmark(games=20, seed=3, repeat=5)
+    assert report['mismatches'] == 0
+    assert get_rng_backend() == backend
@@ -0,0 +1,105 @@
+"""
+Tests for the typed game state (game_state.py)
+Every mutation bumps the version; the dict interface keeps working
+"""
+
+import json
+import pickle
+
+import pytest
+
+from game_logic import QuantumMusGame
+from game_state import BetState, GameState, PhaseState, TeamState, TrackedDict, TrackedList
+
+
+def _state():
+    return GameState(teams={
+        'team1': {'players': [0, 2], 'score': 0, 'name': 'Copenhaguen'},
+        'team2': {'players': [1, 3], 'score': 0, 'name': 'Bohmian'},
+    })
+
+
+def test_dicts_become_typed_records():
+    state = _state()
+    assert isinstance(state.teams['team1'], TeamState)
+    assert isinstance(state.currentBet, BetState)
+    state['grandePhase'] = {'phaseState': 'BET_PLACED', 'currentBetAmount': 2}
+    assert isinstance(state.grandePhase, PhaseState)
+    assert state.grandePhase.isFirstBet is True
+    state.grandePhase.result = {'winner': 'team1'}
+    assert isinstance(state.grandePhase.result, TrackedDict)
+    assert isinstance(state.deferredResults, TrackedList)
+
+    with pytest.raises(KeyError):
+        state['unknownKey'] = 1
+    with pytest.raises(KeyError):
+        state['currentBet'] = {'amount': 1, 'typo': True}
+
+
+def test_every_mutation_bumps_version():
+    state = _state()
+    mutations = [
+        lambda: setattr(state, 'manoIndex', 2),
+        lambda: state.__setitem__('activePlayerIndex', 3),
+        lambda: state.teams['team1'].__setitem__('score', 5),
+        lambda: state.teams['team2'].players.append(4),
+        lambda: state.roundActions.__setitem__(0, 'mus'),
+        lambda: state.__setitem__('grandePhase', PhaseState()),
+        lambda: state.grandePhase.defendersResponded.append(1),
+        lambda: setattr(state.grandePhase, 'result', {'resolved': False}),
+        lambda: state.grandePhase.result.__setitem__('resolved', True),
+        lambda: state.deferredResults.append({'round': 'GRANDE'}),
+        lambda: state.deferredResults[0].__setitem__('resolved', True),
+        lambda: state.paresDeclarations.pop(0, None),
+        lambda: state.touch(),
+    ]
+    for mutate in mutations:
+        version = state.version
+        mutate()
+        assert state.version == version + 1
+
+    # Reads never bump
+    version = state.version
+    _ = (state['manoIndex'], state.get('currentRound'), 'teams' in state, state.to_dict())
+    assert state.version == version
+
+
+def test_mapping_interface_and_json():
+    state = _state()
+    state.teams['team1']['score'] += 3
+    assert state['teams']['team1']['score'] == 3
+    assert state.get('paresDeclarations', None) == {}
+    assert 'grandePhase' in state and 'nope' not in state
+    assert state.currentBet == {'amount': 0, 'bettingTeam': None, 'betType': None, 'responses': {},
+                                'previousAmount': 0, 'isRaise': False}
+    data = json.loads(json.dumps(state.to_dict()))
+    assert data['teams']['team1'] == {'players': [0, 2], 'score': 3, 'name': 'Copenhaguen'}
+
+
+def test_pickle_keeps_version_and_tracking():
+    state = _state()
+    state.grandePhase = {'phaseState': 'RESOLVED', 'result': {'resolved': False}}
+    restored = pickle.loads(pickle.dumps(state))
+    assert restored.version == state.version
+    assert restored.to_dict() == state.to_dict()
+    version = restored.version
+    restored.grandePhase.result['resolved'] = True
+    assert restored.version == version + 1
+    assert state.grandePhase.result['resolved'] is False
+
+
+def test_game_version_follows_play():
+    players = [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+    game = QuantumMusGame('state-room', players, game_mode='4')
+    version = game.state.version
+    game.deal_cards()
+    assert game.state.version > version
+
+    version = game.state.version
+    public = game.get_public_state()
+    json.dumps(public)
+    assert game.get_public_state() == public
+    assert game.state.version == version
+
+    game.process_action(game.state.activePlayerIndex, 'paso')
+    assert game.state.version > version
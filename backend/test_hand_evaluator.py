@@ -0,0 +1,110 @@
+"""
+Tests for the vectorized hand evaluator (hand_evaluator.py)
+Checks known hands and agreement with the per-hand card_deck comparisons
+"""
+
+import numpy as np
+import pytest
+
+from card_deck import compare_cards, get_highest_card, get_lowest_card
+from hand_evaluator import (
+    NO_WINNER, PARES_DUPLES, PARES_MEDIAS, PARES_NONE, PARES_PAR, TEAM1, TEAM2,
+    encode_hands, evaluate_batch, random_deals, summarize
+)
+
+
+def _evaluate(deal, game_mode='4', mano=0):
+    return evaluate_batch(encode_hands([deal]), game_mode, mano=mano)
+
+
+def test_pares_classes():
+    deal = [
+        [12, 12, 5, 4],    # par
+        [7, 7, 7, 1],      # medias
+        [11, 11, 6, 6],    # duples
+        [4, 4, 4, 4],      # four of a kind counts as duples
+    ]
+    result = _evaluate(deal)
+    assert result['pares'][0].tolist() == [PARES_PAR, PARES_MEDIAS, PARES_DUPLES, PARES_DUPLES]
+    # Duples beat medias: seat 2 (team1) wins
+    assert result['pares_winner'][0] == TEAM1
+
+
+def test_mode_8_equivalences():
+    # 3 = Rey and 2 = As in mode '8', both for pares and juego points
+    deal = [[3, 12, 5, 4], [2, 1, 6, 7], [10, 11, 4, 5], [3, 3, 12, 1]]
+    mode_4 = _evaluate(deal, '4')
+    mode_8 = _evaluate(deal, '8')
+    assert mode_4['pares'][0].tolist() == [PARES_NONE, PARES_NONE, PARES_NONE, PARES_PAR]
+    assert mode_8['pares'][0].tolist() == [PARES_PAR, PARES_PAR, PARES_NONE, PARES_MEDIAS]
+    assert mode_4['juego'][0].tolist() == [22, 16, 29, 17]
+    assert mode_8['juego'][0].tolist() == [29, 15, 29, 31]
+
+
+def test_juego_and_punto():
+    deal = [[12, 11, 10, 1], [12, 11, 5, 7], [4, 4, 4, 1], [5, 5, 5, 1]]
+    result = _evaluate(deal)
+    assert result['juego'][0].tolist() == [31, 32, 13, 16]
+    assert result['has_juego'][0].tolist() == [True, True, False, False]
+    assert result['juego_winner'][0] == TEAM1  # 31 beats 32
+    assert result['punto_winner'][0] == NO_WINNER
+
+    no_juego = [[4, 4, 5, 1], [6, 6, 5, 1], [4, 5, 5, 1], [7, 6, 5, 1]]
+    result = _evaluate(no_juego)
+    assert result['juego_winner'][0] == NO_WINNER
+    assert result['punto_winner'][0] == TEAM2  # 19 beats 15
+
+
+def test_ties_go_to_mano_team():
+    deal = [[12, 4, 5, 6], [12, 4, 5, 6], [7, 4, 5, 6], [7, 4, 5, 6]]
+    assert _evaluate(deal, mano=0)['grande'][0] == TEAM1
+    assert _evaluate(deal, mano=1)['grande'][0] == TEAM2
+    assert _evaluate(deal, mano=3)['chica'][0] == TEAM2
+
+
+def test_encode_accepts_letters_and_card_dicts():
+    deal = [['K', 'Q', 'J', 'A'], [{'value': 12}] * 4, [1, 2, 3, 4], [{'valor': 7}, 6, '5', None]]
+    encoded = encode_hands([deal])
+    assert encoded.shape == (1, 4, 4)
+    assert encoded[0, 0].tolist() == [12, 11, 10, 1]
+    assert encoded[0, 3].tolist() == [7, 6, 5, 0]
+    with pytest.raises(ValueError):
+        encode_hands([[[8, 1, 1, 1], [], [], []]])
+
+
+@pytest.mark.parametrize('game_mode', ['4', '8'])
+def test_grande_chica_match_card_deck(game_mode):
+    """Team winners agree with get_highest_card/get_lowest_card + compare_cards"""
+    deals = random_deals(300, game_mode, np.random.default_rng(5))
+    manos = np.arange(300) % 4
+    result = evaluate_batch(deals, game_mode, mano=manos)
+    for i, deal in enumerate(deals.tolist()):
+        mano_team = TEAM1 if manos[i] % 2 == 0 else TEAM2
+        team_cards = [[{'value': v} for seat in (t, t + 2) for v in deal[seat]] for t in (0, 1)]
+
+        outcome = compare_cards(get_highest_card(team_cards[0], game_mode)['value'],
+                                get_highest_card(team_cards[1], game_mode)['value'], game_mode)
+        expected = TEAM1 if outcome > 0 else TEAM2 if outcome < 0 else mano_team
+        assert result['grande'][i] == expected
+
+        outcome = compare_cards(get_lowest_card(team_cards[0], game_mode)['value'],
+                                get_lowest_card(team_cards[1], game_mode)['value'], game_mode, lower_wins=True)
+        expected = TEAM1 if outcome > 0 else TEAM2 if outcome < 0 else mano_team
+        assert result['chica'][i] == expected
+
+
+def test_batch_shape_and_summary():
+    deals = random_deals(1000, '8', np.random.default_rng(0))
+    result = evaluate_batch(deals, '8')
+    assert result['pares'].shape == (1000, 4)
+    assert result['juego'].shape == (1000, 4)
+    assert set(np.unique(result['grande'])) <= {TEAM1, TEAM2}
+    # Punto is only played when nobody has juego
+    assert np.all((result['juego_winner'] == NO_WINNER) != (result['punto_winner'] == NO_WINNER))
+
+    summary = summarize(result)
+    assert summary['hands'] == 1000
+    assert abs(sum(summary['pares_classes'].values()) - 1.0) < 1e-9
+
+    with pytest.raises(ValueError):
+        evaluate_batch(deals[:, :3], '8')
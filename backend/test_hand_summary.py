@@ -0,0 +1,149 @@
+"""
+Tests for incremental hand summaries (hand_summary.py)
+Summaries must agree with the batch evaluator and follow deal/discard/collapse
+"""
+
+import pytest
+
+from card_rules import PARES_DUPLES, PARES_MEDIAS, PARES_NONE, PARES_PAR
+from game_logic import QuantumMusGame
+from Logica_cuantica.cartas import QuantumCard
+from hand_evaluator import TEAM1, TEAM2, card_value, encode_game_hands, evaluate_batch
+
+
+def _game(game_mode='4'):
+    players = [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+    game = QuantumMusGame('summary-room', players, game_mode=game_mode)
+    game.deal_cards()
+    return game
+
+
+def _collapse_all(game):
+    for hand in game.hands.values():
+        for card in hand:
+            if not card.is_collapsed:
+                card.collapse()
+
+
+def _set_hands(game, hands):
+    """Give each seat the listed card values (suits cycle so every card is distinct)"""
+    suits = ('Oro', 'Copa', 'Espada', 'Basto')
+    card_id = 5000
+    for seat, values in enumerate(hands):
+        cards = []
+        for i, value in enumerate(values):
+            card_id += 1
+            cards.append(QuantumCard(suits[(seat + i) % 4], value, card_id=card_id))
+        game.hands[seat] = cards
+    game.hand_summaries.invalidate()
+
+
+@pytest.mark.parametrize('game_mode', ['4', '8'])
+def test_seat_summaries_match_evaluator(game_mode):
+    for _ in range(10):
+        game = _game(game_mode)
+        _collapse_all(game)
+        game.hand_summaries.invalidate()
+        result = evaluate_batch(encode_game_hands(game), game_mode, mano=game.state['manoIndex'])
+        for seat in range(4):
+            summary = game.hand_summaries.seat(seat)
+            if game_mode == '4':  # The evaluator pairs 3 with Rey and 2 with As in mode '8'
+                assert summary.pares == result['pares'][0, seat]
+            assert summary.juego == result['juego'][0, seat]
+            assert summary.has_juego == result['has_juego'][0, seat]
+
+        for round_name, key in (('GRANDE', 'grande'), ('CHICA', 'chica')):
+            outcome = game.hand_summaries.compare(round_name)
+            if outcome:
+                assert result[key][0] == (TEAM1 if outcome > 0 else TEAM2)
+
+
+def test_summaries_are_cached_and_invalidated():
+    game = _game('4')
+    summaries = game.hand_summaries
+    summaries.compare('PARES')
+    rebuilds = summaries.rebuilds
+    for round_name in ('GRANDE', 'CHICA', 'PARES', 'JUEGO', 'PUNTO'):
+        summaries.compare(round_name)
+    summaries.best_cards('CHICA')
+    assert summaries.rebuilds == rebuilds
+
+    # Discarding drops the seat's summary; redealing drops every summary
+    game.state['waitingForDiscard'] = True
+    assert game.discard_cards(0, [0, 1])['success']
+    assert summaries.seat(0).values == tuple(card_value(card) for card in game.hands[0])
+    assert len(summaries.seat(0).values) == 2
+    assert summaries.rebuilds == rebuilds + 1
+    for seat in (1, 2, 3):
+        game.discard_cards(seat, [0])
+    assert game.deal_new_cards()['success']
+    assert len(summaries.seat(0).values) == 4
+    assert summaries.rebuilds == rebuilds + 2
+
+    # A collapse goes through the collapse manager and drops every summary
+    card_index = next((i for i, card in enumerate(game.hands[0]) if card.is_entangled and not card.is_collapsed), None)
+    if card_index is not None:
+        before = summaries.seat(0)
+        game.collapse_manager.collapse_entangled_pair(0, card_index)
+        assert summaries.seat(0) is not before
+        assert summaries.seat(0).values[card_index] == game.hands[0][card_index].collapsed_value
+
+
+def test_final_scores_award_each_round():
+    game = _game('8')
+    _collapse_all(game)
+    game.state['paresDeclarations'] = {}
+    game.state['juegoDeclarations'] = {}
+    scores = game.calculate_final_scores()
+    total = game.state['teams']['team1']['score'] + game.state['teams']['team2']['score']
+    # Grande, Chica and Punto are always played; nobody declared pares or juego
+    assert total == 3
+    assert scores is not None
+
+
+def test_pares_match_cards_physically():
+    game = _game('8')
+    # 3 and Rey rank alike for Grande/Chica but do not pair
+    _set_hands(game, [(3, 12, 1, 2), (4, 5, 6, 7), (4, 5, 6, 7), (10, 11, 4, 5)])
+    summaries = game.hand_summaries
+    assert summaries.seat(0).pares == PARES_NONE
+    assert summaries.team('team1').pares == PARES_NONE  # Pooled 3, Rey, As, 2, 4..7
+
+    # Team cards are pooled: one 7 in each hand makes a team pair
+    _set_hands(game, [(7, 1, 4, 10), (5, 5, 6, 6), (7, 2, 11, 12), (4, 4, 1, 3)])
+    assert summaries.seat(0).pares == summaries.seat(2).pares == PARES_NONE
+    assert summaries.team('team1').pares == PARES_PAR
+    assert summaries.team('team2').pares == PARES_DUPLES
+    assert summaries.compare('PARES') == -1
+
+    # Medias beat a pair; equal classes go to the highest matched value
+    _set_hands(game, [(6, 6, 6, 1), (12, 12, 1, 2), (4, 5, 7, 10), (4, 5, 7, 11)])
+    assert summaries.team('team1').pares == PARES_MEDIAS
+    assert summaries.compare('PARES', [0], [1]) == 1
+    _set_hands(game, [(6, 6, 1, 2), (12, 12, 1, 2), (4, 5, 7, 10), (4, 5, 7, 11)])
+    assert summaries.compare('PARES', [0], [1]) == -1
+
+
+def test_juego_compares_raw_pooled_sums():
+    game = _game('4')
+    summaries = game.hand_summaries
+    # 40 beats 31 on the raw sum
+    _set_hands(game, [(10, 10, 10, 10), (10, 10, 10, 1), (1, 1, 1, 1), (1, 1, 1, 1)])
+    assert summaries.compare('JUEGO', [0], [1]) == 1
+    # Team sums pool both hands: 4 + 40 beats 31 + 12
+    assert summaries.team('team1').juego == 44 and summaries.team('team2').juego == 35
+    assert summaries.compare('JUEGO') == 1
+    assert summaries.compare('PUNTO') == 1
+
+
+def test_final_scores_pool_declared_seats():
+    game = _game('8')
+    _set_hands(game, [(7, 1, 4, 10), (5, 6, 12, 3), (7, 2, 11, 12), (4, 1, 10, 11)])
+    game.state['manoIndex'] = 1
+    game.state['paresDeclarations'] = {0: True, 1: False, 2: True, 3: False}
+    game.state['juegoDeclarations'] = {0: False, 1: True, 2: True, 3: True}
+    result = game.calculate_final_scores()
+    winners = {item['round']: item['winner'] for item in result['results']}
+    # Grande: Rey ties the 3 (a Rey in mode '8') and goes to the mano's team; Chica: both hold an As, mano again
+    # Pares: only team1 declared and pools a pair of 7; Juego: seat 2's 28 vs seats 1 and 3 (31 + 25)
+    assert winners == {'GRANDE': 'team2', 'CHICA': 'team2', 'PARES': 'team1', 'JUEGO': 'team2'}
@@ -0,0 +1,51 @@
+"""
+Import-time guard for the game engine
+The engine modules load without Flask, SQLAlchemy, Qiskit or NumPy (the batch
+simulator and hand_evaluator use NumPy on purpose and are not part of it)
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+ENGINE_MODULES = ('game_logic', 'game_manager', 'action_log', 'game_snapshot', 'replay',
+                  'hand_summary', 'outcome_probabilities')
+HEAVY_MODULES = ('qiskit', 'qiskit_aer', 'numpy', 'flask', 'flask_socketio', 'flask_sqlalchemy', 'sqlalchemy')
+
+# Cold import of all engine modules, in milliseconds (about 100 ms here; Qiskit alone is ~500 ms)
+IMPORT_BUDGET_MS = 400
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{'ms': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _probe():
+    code = _PROBE.format(modules=ENGINE_MODULES, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_engine_does_not_import_heavy_dependencies():
+    assert _probe()['loaded'] == []
+
+
+def test_engine_import_time_budget():
+    # Best of three cold starts, so a busy machine does not fail the check
+    elapsed = min(_probe()['ms'] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET_MS, f"Engine import took {elapsed:.0f} ms (budget {IMPORT_BUDGET_MS} ms)"
+
+
+def test_quantum_rng_loads_qiskit_on_first_sample():
+    from Logica_cuantica.quantum_random import QuantumRNG
+    rng = QuantumRNG()
+    assert rng._simulator is None
+    assert rng.random_int(0, 1) in (0, 1)
+    assert rng._simulator is not None
@@ -0,0 +1,144 @@
+"""
+Tests for the lobby index (lobby.py)
+RoomManager keeps the joinable rooms indexed; /api/rooms pages them with ETags
+and the lobby feed pushes the same changes as deltas
+
+The server test runs in a subprocess (it imports server, which monkey-patches
+the process with eventlet).
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from lobby import LobbyIndex
+from room_manager import RoomManager
+
+
+def _apply(rooms, delta):
+    rooms = {room['id']: room for room in rooms}
+    for entry in delta['upsert']:
+        rooms[entry['id']] = entry
+    for room_id in delta['remove']:
+        rooms.pop(room_id, None)
+    return list(rooms.values())
+
+
+def test_index_follows_rooms_and_filters():
+    manager = RoomManager()
+    deltas = []
+    manager.lobby.listener = deltas.append
+    four = [manager.create_room(f'Four {i}', '4') for i in range(3)]
+    eight = manager.create_room('Eight', '8')
+    for i in range(3):
+        manager.add_player(four[0]['id'], f'sid{i}', f'P{i}')
+    manager.add_player(four[1]['id'], 'sid9', 'P9')
+    manager.set_room_status(four[2]['id'], 'playing')
+
+    rooms = manager.get_available_rooms()
+    assert [room['id'] for room in rooms] == [four[0]['id'], four[1]['id'], eight['id']]
+    assert rooms[0]['open_seats'] == 1 and rooms[0]['player_names'] == ['P0', 'P1', 'P2']
+    assert all('socket_id' not in json.dumps(room) for room in rooms)
+    assert [room['id'] for room in manager.lobby.query('4', min_seats=2)] == [four[1]['id']]
+    assert [room['id'] for room in manager.lobby.query('8')] == [eight['id']]
+
+    manager.add_player(four[0]['id'], 'sid3', 'P3')  # Full: leaves the lobby
+    manager.set_player_character(four[1]['id'], 'sid9', 'preskill')  # Summary unchanged: no delta
+    manager.remove_player(four[1]['id'], 'sid9')  # Empty: room removed
+    assert [room['id'] for room in manager.get_available_rooms()] == [eight['id']]
+
+    # The feed: one delta per change, in version order, replaying to the index's contents
+    assert [delta['version'] for delta in deltas] == list(range(1, manager.lobby.version + 1))
+    replayed = []
+    for delta in deltas:
+        replayed = _apply(replayed, delta)
+    assert replayed == manager.lobby.snapshot()['rooms']
+
+    # Moving a room to another process is not announced as a removal
+    before = len(deltas)
+    room = manager.export_room(eight['id'])
+    assert len(deltas) == before and len(manager.lobby) == 0
+    other = RoomManager()
+    other.import_room(room)
+    assert [entry['id'] for entry in other.get_available_rooms()] == [eight['id']]
+
+
+def test_pages_are_cached_until_the_index_changes():
+    index = LobbyIndex()
+    for i in range(5):
+        index.put({'id': f'r{i}', 'code': f'C{i}', 'name': str(i), 'game_mode': '4', 'max_players': 4,
+                   'players': 1, 'open_seats': 3, 'player_names': ['P'], 'created_at': f'2026-01-0{i + 1}'})
+    body, etag = index.page(limit=2, offset=2)
+    page = json.loads(body)
+    assert [room['id'] for room in page['rooms']] == ['r2', 'r3']
+    assert (page['total'], page['next_offset'], page['version']) == (5, 4, 5)
+    assert index.page(limit=2, offset=2)[0] is body  # Served from the cache
+    assert json.loads(index.page(limit=2, offset=4)[0])['next_offset'] is None
+
+    index.discard('r0')
+    body_after, etag_after = index.page(limit=2, offset=2)
+    assert etag_after != etag and [room['id'] for room in json.loads(body_after)['rooms']] == ['r3', 'r4']
+
+
+_SCENARIO = r"""
+import json, os
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+import server
+from server import app, socketio
+
+http = app.test_client()
+watcher = socketio.test_client(app)
+watcher.emit('subscribe_lobby')
+snapshot = [m['args'][0] for m in watcher.get_received() if m['name'] == 'lobby_snapshot'][0]
+
+for i in range(6):
+    http.post('/api/rooms', json={'name': f'Room {i}', 'game_mode': '4' if i % 2 else '8'})
+first = http.get('/api/rooms?limit=4')
+etag = first.headers['ETag']
+cached = http.get('/api/rooms?limit=4', headers={'If-None-Match': etag})
+page = first.get_json()
+
+players = [socketio.test_client(app) for _ in range(4)]
+for i, client in enumerate(players):
+    client.emit('join_room', {'room_id': page['rooms'][0]['id'], 'player_name': f'P{i}'})
+changed = http.get('/api/rooms?limit=4', headers={'If-None-Match': etag})
+fours = http.get('/api/rooms?game_mode=4&limit=100').get_json()
+bad = http.get('/api/rooms?limit=many')
+
+deltas = [m['args'][0] for m in watcher.get_received() if m['name'] == 'lobby_delta']
+rooms = {room['id']: room for room in snapshot['rooms']}
+for delta in deltas:
+    if delta['version'] > snapshot['version']:
+        for entry in delta['upsert']:
+            rooms[entry['id']] = entry
+        for room_id in delta['remove']:
+            rooms.pop(room_id, None)
+listing = http.get('/api/rooms?limit=200').get_json()
+print(json.dumps({
+    'snapshot': snapshot, 'page': page, 'cache_control': first.headers['Cache-Control'],
+    'cached_status': cached.status_code, 'changed_status': changed.status_code,
+    'fours': fours, 'bad_status': bad.status_code, 'deltas': len(deltas),
+    'fed': sorted(rooms), 'listing': sorted(room['id'] for room in listing['rooms']),
+}))
+"""
+
+
+def test_server_lobby_pages_etags_and_feed():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=120).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+
+    assert report['snapshot'] == {'version': 0, 'rooms': [], 'live': True}
+    page = report['page']
+    assert (page['total'], page['limit'], page['next_offset'], len(page['rooms'])) == (6, 4, 4, 4)
+    assert 'max-age=2' in report['cache_control'] and 'public' in report['cache_control']
+    assert report['cached_status'] == 304 and report['changed_status'] == 200
+    assert report['fours']['total'] == 3 and all(room['game_mode'] == '4' for room in report['fours']['rooms'])
+    assert report['bad_status'] == 400
+
+    # Room 0 filled up: the feed replayed over the snapshot matches the listing
+    assert report['deltas'] >= 6 + 4
+    assert report['fed'] == report['listing'] and len(report['listing']) == 5
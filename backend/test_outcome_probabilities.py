@@ -0,0 +1,169 @@
+"""
+Tests for exact outcome probabilities (outcome_probabilities.py)
+Hands are built from real Logica_cuantica decks so Bell pairs are shared
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from game_logic import QuantumMusGame
+from Logica_cuantica.baraja import QuantumDeck
+from outcome_probabilities import cache_info, get_hand_probabilities
+
+
+def _cards(deck, *specs):
+    return [next(c for c in deck.cards if c.palo == palo and c.valor == valor) for palo, valor in specs]
+
+
+def _game(game_mode='4'):
+    players = [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+    game = QuantumMusGame('prob-room', players, game_mode=game_mode)
+    game.deal_cards()
+    return game
+
+
+def test_same_pair_in_one_hand_is_correlated():
+    """Rey and As of the same suit swap together, so they never make pares"""
+    deck = QuantumDeck(game_mode='4')
+    hand = _cards(deck, ('Oro', 12), ('Oro', 1), ('Copa', 4), ('Copa', 5))
+    assert get_hand_probabilities(hand, '4') == {'pares': 0.0, 'juego': 0.0, 'uncollapsed_pairs': 1}
+
+
+def test_independent_pairs():
+    deck = QuantumDeck(game_mode='4')
+    hand = _cards(deck, ('Oro', 12), ('Copa', 12), ('Espada', 11), ('Basto', 10))
+    result = get_hand_probabilities(hand, '4')
+    # Both Reyes keep or both swap: 2 of 4 outcomes
+    assert result['pares'] == 0.5
+    # Sums 40, 31, 31, 22
+    assert result['juego'] == 0.75
+    assert result['uncollapsed_pairs'] == 2
+
+
+def test_mode_8_two_three_pairs():
+    deck = QuantumDeck(game_mode='8')
+    hand = _cards(deck, ('Oro', 3), ('Copa', 12), ('Espada', 6), ('Basto', 7))
+    # 3 = Rey and 2 = As: pares when both keep (3+Rey) or both swap (2+As)
+    result = get_hand_probabilities(hand, '8')
+    assert result['pares'] == 0.5
+    # 10+10+6+7 = 33 only when both keep
+    assert result['juego'] == 0.25
+    # In mode '4' the 3 is not entangled
+    deck = QuantumDeck(game_mode='4')
+    hand = _cards(deck, ('Oro', 3), ('Copa', 12), ('Espada', 6), ('Basto', 7))
+    assert get_hand_probabilities(hand, '4') == {'pares': 0.0, 'juego': 0.0, 'uncollapsed_pairs': 1}
+
+
+def test_collapsed_cards_use_collapsed_value():
+    deck = QuantumDeck(game_mode='4')
+    hand = _cards(deck, ('Oro', 12), ('Copa', 12), ('Espada', 4), ('Basto', 5))
+    for card in hand[:2]:
+        card.collapse_bell_pair()
+    result = get_hand_probabilities(hand, '4')
+    same = hand[0].collapsed_value == hand[1].collapsed_value
+    assert result == {'pares': 1.0 if same else 0.0, 'juego': 0.0, 'uncollapsed_pairs': 0}
+
+
+def test_auto_declaration_follows_probability():
+    game = _game('4')
+    deck = game.deck
+    game.hands[0] = _cards(deck, ('Oro', 12), ('Oro', 1), ('Copa', 4), ('Copa', 5))
+    game.hands[1] = _cards(deck, ('Copa', 12), ('Espada', 12), ('Espada', 11), ('Basto', 10))
+    game.hands[2] = _cards(deck, ('Oro', 7), ('Copa', 7), ('Espada', 5), ('Basto', 4))
+    assert game.get_auto_declaration_value(0, 'PARES') is False
+    assert game.get_auto_declaration_value(1, 'PARES') is None
+    assert game.get_auto_declaration_value(1, 'JUEGO') is None
+    assert game.get_auto_declaration_value(2, 'PARES') is True
+    assert game.get_auto_declaration_value(2, 'GRANDE') is None
+
+
+def _collapse(card, value):
+    card.is_collapsed = True
+    card.collapsed_value = value
+
+
+def test_grande_chica_only_use_what_the_seat_sees():
+    """Unseen hands are a draw from the unseen cards: shuffling them changes nothing"""
+    game = _game('4')
+    deck = game.deck
+    game.hands[0] = _cards(deck, ('Oro', 12), ('Copa', 4), ('Copa', 5), ('Copa', 6))
+    game.hands[1] = _cards(deck, ('Oro', 1), ('Espada', 4), ('Espada', 5), ('Espada', 6))
+    game.hands[2] = _cards(deck, ('Basto', 7), ('Basto', 4), ('Basto', 5), ('Basto', 6))
+    game.hands[3] = _cards(deck, ('Oro', 7), ('Oro', 4), ('Oro', 5), ('Oro', 6))
+    game.state['manoIndex'] = 0
+    first = game.get_outcome_probabilities(0)
+    assert 0.0 < first['grande'] < 1.0 and 0.0 < first['chica'] < 1.0
+
+    game.hands[1], game.hands[2], game.hands[3] = game.hands[3], game.hands[1], game.hands[2]
+    assert game.get_outcome_probabilities(0) == first
+
+
+def test_collapsed_cards_are_seen_by_every_seat():
+    """Four Reyes that stayed Reyes win Grande: no other card ranks as high in mode '4'"""
+    game = _game('4')
+    deck = game.deck
+    game.hands[0] = _cards(deck, ('Oro', 12), ('Copa', 12), ('Espada', 12), ('Basto', 12))
+    game.hands[1] = _cards(deck, ('Copa', 7), ('Espada', 4), ('Espada', 5), ('Espada', 6))
+    game.hands[2] = _cards(deck, ('Basto', 7), ('Basto', 4), ('Basto', 5), ('Basto', 6))
+    game.hands[3] = _cards(deck, ('Oro', 7), ('Oro', 4), ('Oro', 5), ('Oro', 6))
+    for card in game.hands[0]:
+        _collapse(card, 12)
+    game.state['manoIndex'] = 1
+
+    assert game.get_outcome_probabilities(0)['grande'] == 1.0
+    assert game.get_outcome_probabilities(2)['grande'] == 1.0  # The partner sees the collapsed Reyes
+    assert game.get_outcome_probabilities(1)['grande'] == 0.0
+
+    # A Rey that collapsed to As leaves its partner As (now a Rey) among the unseen cards
+    _collapse(game.hands[0][0], 1)
+    assert 0.0 < game.get_outcome_probabilities(1)['grande'] < 1.0
+
+
+@pytest.mark.parametrize('game_mode', ['4', '8'])
+def test_probabilities_are_cached(game_mode):
+    game = _game(game_mode)
+    first = game.get_outcome_probabilities(0)
+    hits = cache_info()['seat']['hits']
+    assert game.get_outcome_probabilities(0) == first
+    assert cache_info()['seat']['hits'] > hits
+    for key in ('pares', 'juego', 'grande', 'chica'):
+        assert 0.0 <= first[key] <= 1.0
+
+
+_SCENARIO = r"""
+import json, os
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+from server import app, socketio
+
+clients = [socketio.test_client(app) for _ in range(5)]
+clients[0].emit('create_room', {'name': 'Odds', 'game_mode': '4'})
+room = [m['args'][0] for m in clients[0].get_received() if m['name'] == 'room_created'][0]['room']
+for i, client in enumerate(clients[:4]):
+    client.emit('join_room', {'room_id': room['id'], 'player_name': f'P{i}'})
+    client.emit('set_character', {'room_id': room['id'], 'character': ['preskill', 'zoller', 'cirac', 'deutsch'][i],
+                                  'team': 1 + i % 2})
+clients[0].emit('start_game', {'room_id': room['id']})
+for client in clients:
+    client.get_received()
+
+clients[2].emit('get_outcome_probabilities', {'room_id': room['id'], 'player_index': 1})
+own = [m['args'][0] for m in clients[2].get_received() if m['name'] == 'outcome_probabilities']
+clients[4].emit('get_outcome_probabilities', {'room_id': room['id'], 'player_index': 1})
+outsider = [m['args'][0] for m in clients[4].get_received()]
+print(json.dumps({'own': own, 'outsider': outsider}))
+"""
+
+
+def test_server_answers_for_the_sockets_own_seat():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=120).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    assert len(report['own']) == 1 and report['own'][0]['player_index'] != 1
+    assert set(report['own'][0]['probabilities']) >= {'pares', 'juego', 'grande', 'chica'}
+    assert report['outsider'] == [{'error': 'Not seated in this game'}]
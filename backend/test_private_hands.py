@@ -0,0 +1,105 @@
+"""
+Tests for per-seat private hand delivery
+Deals and collapses go to each seat's socket with only that seat's hand
+
+The server is driven with Flask-SocketIO test clients in a subprocess:
+importing server monkey-patches the process with eventlet, which must not
+leak into the rest of the test session.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+_SCENARIO = r"""
+import json, os
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+from server import app, game_manager, socketio
+
+def received(client, name):
+    return [m['args'][0] for m in client.get_received() if m['name'] == name]
+
+clients = [socketio.test_client(app) for _ in range(4)]
+clients[0].emit('create_room', {'name': 'Private', 'game_mode': '4'})
+room_id = received(clients[0], 'room_created')[0]['room']['id']
+for i, client in enumerate(clients):
+    client.emit('join_room', {'room_id': room_id, 'player_name': f'P{i}'})
+for i, client in enumerate(clients):
+    client.emit('set_character', {'room_id': room_id, 'character': ['preskill', 'zoller', 'cirac', 'deutsch'][i],
+                                  'team': 1 + i % 2})
+for client in clients:
+    client.get_received()
+clients[0].emit('start_game', {'room_id': room_id})
+game = game_manager.get_game(room_id)
+seats = {player['socket_id']: seat for seat, player in enumerate(game.players)}
+
+report = {'hands': {seat: [card.to_dict() for card in game.hands[seat]] for seat in range(4)}, 'seats': []}
+for client in clients:
+    seat = seats[socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')]
+    started = received(client, 'game_started')
+    client.emit('get_game_state', {'room_id': room_id, 'player_index': (seat + 1) % 4})
+    state = received(client, 'game_state')
+    report['seats'].append({'seat': seat, 'started': started, 'state': state})
+
+client = clients[0]
+client.emit('trigger_final_collapse', {'room_id': room_id})
+report['final'] = [received(c, 'final_cards_collapsed') for c in clients]
+
+spectator = socketio.test_client(app)
+spectator.emit('get_game_state', {'room_id': room_id, 'player_index': 1})
+report['spectator'] = received(spectator, 'game_state')
+spectator.emit('get_player_entanglement', {'room_id': room_id, 'player_index': 1})
+report['spectator_entanglement'] = received(spectator, 'game_error')
+print(json.dumps(report))
+"""
+
+_report = None
+
+
+def _run():
+    global _report
+    if _report is None:
+        output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True, timeout=120).stdout
+        _report = json.loads(output.strip().splitlines()[-1])
+    return _report
+
+
+def test_each_seat_gets_only_its_own_hand():
+    report = _run()
+    assert sorted(entry['seat'] for entry in report['seats']) == [0, 1, 2, 3]
+    for entry in report['seats']:
+        seat = str(entry['seat'])
+        started, = entry['started']
+        assert list(started['player_hands']) == [seat]
+        assert started['player_hands'][seat] == report['hands'][seat]
+        assert started['game_state']['hand_sizes'] == {str(i): 4 for i in range(4)}
+
+        # Asking for another seat's state still returns the caller's own hand
+        state, = entry['state']
+        assert state['game_state']['my_index'] == entry['seat']
+
+
+def test_collapse_results_are_per_seat():
+    report = _run()
+    for events in report['final']:
+        final, = events
+        assert len(final['final_hands']) == 1
+
+
+def test_unseated_socket_gets_public_state_only():
+    report = _run()
+    state, = report['spectator']
+    assert 'my_hand' not in state['game_state'] and 'hand_sizes' in state['game_state']
+    assert report['spectator_entanglement']
+
+
+def test_deal_bytes_per_seat_drop():
+    report = _run()
+    started = report['seats'][0]['started'][0]
+    private = len(json.dumps(started['player_hands']))
+    every_hand = len(json.dumps(report['hands']))
+    assert private * 3.5 < every_hand
@@ -0,0 +1,60 @@
+"""
+Tests for the versioned public state cache and pre-serialized emits
+"""
+
+import json
+
+from game_logic import QuantumMusGame
+import wire_json
+
+
+def _game():
+    players = [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+    game = QuantumMusGame('cache-room', players, game_mode='4')
+    game.deal_cards()
+    return game
+
+
+def test_public_state_is_cached_per_version():
+    game = _game()
+    first = game.get_public_state()
+    second = game.get_public_state()
+    assert first == second
+    assert first is not second  # Callers may add top-level keys
+    assert first['state'] is second['state']
+
+    # Adding keys to a returned copy does not leak into the cache
+    first['player_hands'] = {}
+    assert 'player_hands' not in game.get_public_state()
+
+    game.process_action(game.state.activePlayerIndex, 'paso')
+    third = game.get_public_state()
+    assert third['state'] is not first['state']
+    assert third['state']['activePlayerIndex'] == game.state.activePlayerIndex
+
+
+def test_direct_hand_edits_invalidate():
+    game = _game()
+    assert game.get_public_state()['hand_sizes'][0] == 4
+    game.hands[0] = game.hands[0][:2]
+    assert game.get_public_state()['hand_sizes'][0] == 2
+
+
+def test_json_is_cached_and_matches_state():
+    game = _game()
+    raw = game.get_public_state_json()
+    assert game.get_public_state_json() is raw
+    assert json.loads(raw.text) == json.loads(json.dumps(game.get_public_state()))
+
+    game.state.teams['team1'].score += 1
+    assert game.get_public_state_json() is not raw
+    assert json.loads(game.get_public_state_json().text)['state']['teams']['team1']['score'] == 1
+
+
+def test_wire_json_embeds_fragments():
+    game = _game()
+    payload = {'game_state': game.get_public_state_json(), 'action': {'action': 'paso', 'text': 'x\x00y'}}
+    decoded = wire_json.loads(wire_json.dumps(payload, separators=(',', ':')))
+    assert decoded['game_state'] == json.loads(json.dumps(game.get_public_state()))
+    assert decoded['action'] == {'action': 'paso', 'text': 'x\x00y'}
+    assert wire_json.loads(wire_json.dumps([1, {'a': None}])) == [1, {'a': None}]
@@ -0,0 +1,134 @@
+"""
+Tests for the stabilizer Bell-pair engine (Logica_cuantica.estado_cuantico)
+Ensures entangled partners always collapse together and that collapsing
+does not depend on AerSimulator
+"""
+
+import pytest
+
+from Logica_cuantica.baraja import QuantumDeck
+from Logica_cuantica.estado_cuantico import QuantumHandState
+
+
+def _entangled_pairs(deck):
+    seen = set()
+    pairs = []
+    for card in deck.cards:
+        if card.is_entangled and id(card) not in seen:
+            seen.add(id(card))
+            seen.add(id(card.entangled_partner_card))
+            pairs.append((card, card.entangled_partner_card))
+    return pairs
+
+
+def test_pair_counts_per_mode():
+    """4 pairs (Rey-As) in mode '4', 8 pairs (+ Tres-Dos) in mode '8'"""
+    assert QuantumDeck(game_mode='4').quantum_state.num_pairs == 4
+    assert QuantumDeck(game_mode='8').quantum_state.num_pairs == 8
+
+
+def test_partners_collapse_correlated():
+    """Measuring one card of a |Φ+⟩ pair fixes its partner to the correlated value"""
+    for _ in range(20):
+        deck = QuantumDeck(game_mode='8')
+        for card, partner in _entangled_pairs(deck):
+            value, partner_value = card.collapse_bell_pair()
+            assert partner.is_collapsed
+            assert partner.collapsed_value == partner_value
+            # Both keep their values or both swap
+            assert {value, partner_value} == {card.valor, partner.valor}
+            assert (value == card.valor) == (partner_value == partner.valor)
+
+
+def test_repeated_measurement_is_stable():
+    state = QuantumHandState()
+    index = state.add_pair(1, 2)
+    first = state.measure(index)
+    assert all(state.measure(index) == first for _ in range(10))
+    assert state.get_outcomes() == {index: first}
+
+
+def test_measure_rejects_unknown_pairs():
+    """A bad index raises even when its bit happens to be set in the measured mask"""
+    state = QuantumHandState()
+    state.add_pair(1, 2)
+    state._measured = 0b11  # e.g. a mask restored from a larger hand
+    for bad in (1, 5, -1):
+        with pytest.raises(IndexError):
+            state.measure(bad)
+
+
+def test_collapse_does_not_use_aer(monkeypatch):
+    """The default backend never builds an AerSimulator"""
+    deck = QuantumDeck(game_mode='8')
+
+    def fail(*args, **kwargs):
+        raise AssertionError("AerSimulator must not be used by the stabilizer backend")
+
+    monkeypatch.setattr(QuantumHandState, '_get_simulator', fail)
+    for card, _ in _entangled_pairs(deck):
+        card.collapse_bell_pair()
+    for palo in ('Oro', 'Copa', 'Espada', 'Basto'):
+        deck.collapse_king_pit(palo)
+        deck.collapse_tres_dos(palo)
+
+
+def test_deck_collapse_matches_card_collapse():
+    """collapse_king_pit reads the same Bell pair the cards use"""
+    deck = QuantumDeck(game_mode='4')
+    for card, partner in _entangled_pairs(deck):
+        card.collapse_bell_pair()
+    for palo in ('Oro', 'Copa', 'Espada', 'Basto'):
+        rey_state, _ = deck.collapse_king_pit(palo)
+        rey = next(c for c in deck.cards if c.palo == palo and c.valor == 12)
+        swapped = rey.collapsed_value != rey.valor
+        assert swapped == (rey_state != deck.PALO_CODE[palo] + deck.VALOR_CODE[12])
+
+
+def test_reset_returns_pairs_to_bell_state():
+    deck = QuantumDeck(game_mode='4')
+    for card, _ in _entangled_pairs(deck):
+        card.collapse_bell_pair()
+    deck.reset_entanglement_states()
+    assert deck.quantum_state.get_outcomes() == {}
+    assert not any(card.is_collapsed for card in deck.cards if card.is_entangled)
+
+
+def test_invalid_backend_rejected():
+    with pytest.raises(ValueError):
+        QuantumHandState(backend='statevector')
+
+
+def test_qiskit_cross_check():
+    """Optional: the Bell circuits agree with the stabilizer model in Aer"""
+    pytest.importorskip('qiskit_aer')
+    deck = QuantumDeck(game_mode='4')
+    counts = deck.quantum_state.cross_check(shots=64)
+    assert len(counts) == 4
+    for pair_counts in counts.values():
+        assert set(pair_counts) <= {'00', '11'}
+
+
+def test_pairs_materialize_lazily():
+    """No circuits are built on deal; only measured pairs count as materialized"""
+    deck = QuantumDeck(game_mode='8')
+    assert deck.get_entanglement_stats() == {'pairs': 8, 'materialized': 0, 'skipped': 8}
+    assert all(circuit is None for circuit in deck.quantum_state._circuits)
+
+    card, _ = _entangled_pairs(deck)[0]
+    card.collapse_bell_pair()
+    card.collapse_bell_pair()
+    assert deck.get_entanglement_stats() == {'pairs': 8, 'materialized': 1, 'skipped': 7}
+    # The stabilizer backend never needs the circuit
+    assert all(circuit is None for circuit in deck.quantum_state._circuits)
+
+    deck.reset_entanglement_states()
+    assert deck.get_entanglement_stats()['materialized'] == 0
+
+
+def test_bell_circuit_built_on_demand():
+    pytest.importorskip('qiskit')
+    deck = QuantumDeck(game_mode='4')
+    card, partner = _entangled_pairs(deck)[0]
+    assert card.bell_circuit is partner.bell_circuit
+    assert card.bell_circuit.num_qubits == 2
@@ -0,0 +1,115 @@
+"""
+Tests for inbound rate limiting (rate_limit.py)
+Token buckets refuse bursts past their size and refill over time; the server
+refuses per socket and per room and reports it in /api/load
+
+The server test runs in a subprocess (it imports server, which monkey-patches
+the process with eventlet).
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from rate_limit import OverloadStats, RateLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 50.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_burst_refill_and_prune():
+    clock = _Clock()
+    limiter = RateLimiter(rate=2, burst=4, clock=clock)
+    assert [limiter.take('a') for _ in range(4)] == [0, 0, 0, 0]
+    assert limiter.take('a') == 0.5  # One token comes back every 0.5s
+    assert limiter.take('a', cost=3) == 1.5
+    assert limiter.take('b', cost=4) == 0  # Keys do not share tokens
+
+    clock.now += 1.0
+    assert limiter.take('a', cost=2) == 0 and limiter.take('a') == 0.5
+
+    limiter.forget('b')
+    assert len(limiter) == 1
+    clock.now += 10.0  # Full buckets ('a' refilled, 'c' never spent) are dropped at the next sweep
+    for _ in range(RateLimiter.PRUNE_EVERY - limiter._calls % RateLimiter.PRUNE_EVERY):
+        limiter.take('c', cost=0)
+    assert len(limiter) == 0
+
+
+def test_overload_stats():
+    stats = OverloadStats()
+    stats.refused('socket', 'player_action')
+    stats.refused('socket', 'get_game_state')
+    stats.refused('queue', 'player_action')
+    assert stats.snapshot() == {'refused': {'socket': 2, 'queue': 1},
+                                'refused_by_event': {'player_action': 2, 'get_game_state': 1}}
+
+
+_SCENARIO = r"""
+import json, os
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+import rate_limit
+import server
+from server import app, socketio
+
+def received(client, name):
+    return [m['args'][0] for m in client.get_received() if m['name'] == name]
+
+clients = [socketio.test_client(app) for _ in range(4)]
+clients[0].emit('create_room', {'name': 'Limits', 'game_mode': '4'})
+room = received(clients[0], 'room_created')[0]['room']
+for i, client in enumerate(clients):
+    client.emit('join_room', {'room_id': room['id'], 'player_name': f'P{i}'})
+    client.emit('set_character', {'room_id': room['id'], 'character': ['preskill', 'zoller', 'cirac', 'deutsch'][i],
+                                  'team': 1 + i % 2})
+clients[0].emit('start_game', {'room_id': room['id']})
+for client in clients:
+    client.get_received()
+
+# One socket floods a heavy read: a bucket of 20 tokens lets 5 through at cost 4
+server.socket_limiter = rate_limit.RateLimiter(rate=0.01, burst=20)
+for _ in range(8):
+    clients[1].emit('get_entanglement_state', {'room_id': room['id']})
+flood = clients[1].get_received()
+served = sum(m['name'] == 'entanglement_state' for m in flood)
+limited = [m['args'][0] for m in flood if m['name'] == 'rate_limited']
+clients[2].emit('get_game_state', {'room_id': room['id']})
+other = [m['name'] for m in clients[2].get_received()]
+
+# A small room bucket: the room's third read is refused whoever sends it
+server.socket_limiter = rate_limit.RateLimiter(rate=100, burst=100)
+server.room_limiter = rate_limit.RateLimiter(rate=0.01, burst=2)
+for client in clients[:3]:
+    client.emit('get_game_state', {'room_id': room['id']})
+room_limited = [received(client, 'rate_limited') for client in clients[:3]]
+load = app.test_client().get('/api/load').get_json()
+print(json.dumps({'served': served, 'limited': limited, 'other': other, 'room_limited': room_limited, 'load': load}))
+"""
+
+
+def test_server_refuses_floods_per_socket_and_room():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=120).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+
+    assert report['served'] == 5 and len(report['limited']) == 3
+    assert all(item['event'] == 'get_entanglement_state' and item['reason'] == 'socket' and item['retry_after'] > 0
+               for item in report['limited'])
+    assert report['other'] == ['game_state']  # The flood did not cost the rest of the table anything
+
+    assert [len(items) for items in report['room_limited']] == [0, 0, 1]
+    assert report['room_limited'][2][0]['reason'] == 'room'
+
+    load = report['load']
+    assert load['refused'] == {'socket': 3, 'room': 1}
+    assert load['refused_by_event'] == {'get_entanglement_state': 3, 'get_game_state': 1}
+    assert load['queues']['rejected'] == 0 and load['queues']['pending'] == 0
+    assert load['limits']['heavy_event_cost'] == 4
@@ -0,0 +1,51 @@
+"""
+Tests for the offline replay/profiling tool (replay.py)
+"""
+
+import os
+
+from game_manager import GameManager
+from replay import replay_log
+from test_action_log import _play, _players
+
+
+def _recorded_game(tmp_path):
+    manager = GameManager(log_dir=str(tmp_path))
+    game = manager.create_game('replay-room', _players(), '8')
+    game.action_log.snapshot_every = 4
+    _play(game, hands=3)
+    scores = {name: team.score for name, team in game.state.teams.items()}
+    manager.remove_game('replay-room')
+    return str(tmp_path / 'replay-room.log'), scores
+
+
+def test_replay_reports_timing_and_matches_checkpoints(tmp_path):
+    path, scores = _recorded_game(tmp_path)
+    report = replay_log(path)
+
+    assert report['start_seq'] == 0
+    assert report['scores'] == scores
+    assert report['checkpoints']['checked'] >= 1
+    assert report['checkpoints']['mismatched'] == []
+    timing = report['timing']
+    assert {'deal', 'action'} <= set(timing['per_kind'])
+    assert sum(kind['count'] for kind in timing['per_kind'].values()) == timing['events']
+    assert 'profile' not in report and 'allocations' not in report
+
+
+def test_replay_profile_and_allocations(tmp_path):
+    path, _ = _recorded_game(tmp_path)
+    profile_path = str(tmp_path / 'replay.prof')
+    report = replay_log(path, profile_path=profile_path, alloc_top=5)
+
+    assert os.path.getsize(profile_path) > 0
+    assert 'apply_event' in report['profile']['top']
+    assert report['allocations']['peak_kb'] > 0
+    assert len(report['allocations']['top']) <= 5
+
+
+def test_replay_from_latest_snapshot(tmp_path):
+    path, scores = _recorded_game(tmp_path)
+    report = replay_log(path, from_latest=True)
+    assert report['start_seq'] > 0
+    assert report['scores'] == scores
@@ -0,0 +1,124 @@
+"""
+Tests for per-room serialized execution (room_executor.py)
+One room's jobs never overlap and keep their order; different rooms run in parallel
+
+The server test runs in a subprocess (it imports server, which monkey-patches
+the process with eventlet).
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from room_executor import RoomBusy, RoomExecutor
+
+
+def test_room_jobs_run_one_at_a_time_in_order():
+    executor = RoomExecutor(workers=8)
+    seen = {room: [] for room in range(4)}
+    running = {room: 0 for room in range(4)}
+    overlaps = []
+
+    def job(room, index):
+        running[room] += 1
+        if running[room] > 1:
+            overlaps.append(room)
+        time.sleep(0.0005)
+        seen[room].append(index)
+        running[room] -= 1
+
+    futures = [executor.submit(index % 4, job, index % 4, index) for index in range(200)]
+    for future in futures:
+        future.result(timeout=10)
+    assert not overlaps
+    assert all(indices == sorted(indices) and len(indices) == 50 for indices in seen.values())
+    assert executor.pending() == 0
+
+
+def test_rooms_run_in_parallel():
+    executor = RoomExecutor(workers=2)
+    barrier = threading.Barrier(2, timeout=5)
+    # Each room's job only returns once the other room's job is running too
+    futures = [executor.submit(room, barrier.wait) for room in ('a', 'b')]
+    assert sorted(future.result(timeout=10) for future in futures) == [0, 1]
+
+
+def test_call_reentrancy_errors_and_post(caplog):
+    executor = RoomExecutor(workers=1)
+    assert executor.call('a', lambda: (executor.current(), executor.call('a', executor.current))) == ('a', 'a')
+    assert executor.current() is None
+
+    with pytest.raises(ZeroDivisionError):
+        executor.call('a', lambda: 1 / 0)
+    with caplog.at_level(logging.ERROR, logger='room_executor'):
+        executor.post('a', lambda: 1 / 0)
+        executor.call('a', lambda: None)  # Runs after the posted job
+        time.sleep(0.05)
+    assert 'Room job failed' in caplog.text
+
+
+_SCENARIO = r"""
+import json, os, time
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+import server
+from server import app, socketio
+
+# Record which actor every game access runs on
+actors = []
+get_game = server.game_manager.get_game
+server.game_manager.get_game = lambda room_id: (actors.append((room_id, server.room_actors.current())),
+                                                get_game(room_id))[1]
+
+server.TURN_TIMEOUT = 0.3
+clients = [socketio.test_client(app) for _ in range(4)]
+clients[0].emit('create_room', {'name': 'Actors', 'game_mode': '4'})
+room = [m['args'][0] for m in clients[0].get_received() if m['name'] == 'room_created'][0]['room']
+for i, client in enumerate(clients):
+    client.emit('join_room_by_code', {'room_code': room['code'], 'player_name': f'P{i}'})
+    client.emit('set_character', {'room_id': room['id'], 'character': ['preskill', 'zoller', 'cirac', 'deutsch'][i],
+                                  'team': 1 + i % 2})
+clients[0].emit('start_game', {'room_id': room['id']})
+clients[1].emit('get_game_state', {'room_id': room['id']})
+time.sleep(0.45)  # The turn timeout plays 'mus' on the room's actor
+clients[2].emit('player_action', {'room_id': room['id'], 'player_index': -1, 'action': 'mus'})
+joined = [sum(m['name'] == 'room_updated' for m in client.get_received()) > 0 for client in clients]
+print(json.dumps({'room': room['id'], 'actors': actors, 'joined': joined}))
+"""
+
+
+def test_server_runs_room_handlers_and_timeouts_on_the_room_actor():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=120).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    assert len(report['actors']) >= 4  # start_game, get_game_state, the timeout and player_action
+    assert all(room_id == actor == report['room'] for room_id, actor in report['actors'])
+    assert all(report['joined'])
+
+
+def test_full_room_queue_refuses_and_reads_coalesce():
+    executor = RoomExecutor(workers=2, max_pending=3)
+    gate = threading.Event()
+    calls = []
+    blocked = executor.submit('a', gate.wait, 5)  # Holds the room's actor
+    read = executor.submit('a', calls.append, 'read', key=('get_game_state', 'sid1'))
+    assert executor.submit('a', calls.append, 'again', key=('get_game_state', 'sid1')) is read
+    executor.submit('a', calls.append, 'action')
+    with pytest.raises(RoomBusy):
+        executor.submit('a', calls.append, 'refused')
+    executor.submit('b', calls.append, 'other room').result(timeout=5)  # Only room 'a' is full
+    executor.post('a', calls.append, 'timer')  # Timer callbacks are never refused
+
+    gate.set()
+    blocked.result(timeout=5)
+    executor.call('a', lambda: None)
+    assert calls == ['other room', 'read', 'action', 'timer']
+    stats = executor.stats()
+    assert (stats['rejected'], stats['coalesced'], stats['max_depth'], stats['pending']) == (1, 1, 4, 0)
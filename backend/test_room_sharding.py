@@ -0,0 +1,122 @@
+"""
+Tests for room-affinity sharding (room_sharding.py)
+Rooms hash to one worker process; adding a worker moves only its share of them
+
+The server test runs in a subprocess (it imports server, which monkey-patches
+the process with eventlet) and starts real shard worker processes.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from room_sharding import HashRing
+
+
+def test_ring_spreads_rooms_and_moves_few_on_growth():
+    keys = [f'room{i:05d}' for i in range(8000)]
+    ring = HashRing(range(4))
+    owners = {key: ring.owner(key) for key in keys}
+    load = Counter(owners.values())
+    assert set(load) == {0, 1, 2, 3}
+    assert max(load.values()) < 1.5 * len(keys) / 4
+
+    grown = ring.copy()
+    grown.add(4)
+    moved = [key for key in keys if grown.owner(key) != owners[key]]
+    assert all(grown.owner(key) == 4 for key in moved)  # Rooms only move to the new worker
+    assert 0.1 < len(moved) / len(keys) < 0.3  # About 1/5 of them
+    assert all(ring.owner(key) == owners[key] for key in keys)  # copy() left the old ring alone
+
+
+_SCENARIO = r"""
+import json, os
+os.environ['GAME_SHARDS'] = '2'
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+import server
+from server import app, socketio
+
+def received(client, name):
+    return [m['args'][0] for m in client.get_received() if m['name'] == name]
+
+def frames(client):
+    return [m['name'] for m in client.get_received()]
+
+http = app.test_client()
+watcher = socketio.test_client(app)
+watcher.emit('subscribe_lobby')
+for i in range(40):
+    http.post('/api/rooms', json={'name': f'Lobby {i}', 'game_mode': '4'})
+
+clients = [socketio.test_client(app) for _ in range(4)]
+clients[0].emit('create_room', {'name': 'Sharded', 'game_mode': '4'})
+room = received(clients[0], 'room_created')[0]['room']
+clients[0].emit('join_room', {'room_id': room['id'], 'player_name': 'P0'})
+for i, client in enumerate(clients[1:], 1):
+    client.emit('join_room_by_code', {'room_code': room['code'], 'player_name': f'P{i}'})
+for i, client in enumerate(clients):
+    client.emit('set_character', {'room_id': room['id'], 'character': ['preskill', 'zoller', 'cirac', 'deutsch'][i],
+                                  'team': 1 + i % 2})
+for client in clients:
+    client.get_received()
+clients[0].emit('start_game', {'room_id': room['id']})
+seats = {}
+for client in clients:
+    started = received(client, 'game_started')[0]
+    seats[int(next(iter(started['player_hands'])))] = client
+    active = started['game_state']['state']['activePlayerIndex']
+
+def play(active):
+    seats[active].emit('player_action', {'room_id': room['id'], 'player_index': active, 'action': 'mus'})
+    return [frames(client) for client in clients]
+
+report = {'room': room, 'codes': sorted(server.shard_router.room_codes)}
+report['first'] = play(active)
+report['before'] = http.get('/api/shards').get_json()
+report['owner_before'] = server.shard_router.owner(room['id'])
+report['moved'] = server.shard_router.add_worker()
+report['owner_after'] = server.shard_router.owner(room['id'])
+clients[0].emit('get_game_state', {'room_id': room['id']})
+moved_state = received(clients[0], 'game_state')[0]['game_state']
+report['second'] = play(moved_state['state']['activePlayerIndex'])
+report['after'] = http.get('/api/shards').get_json()
+report['lobby'] = len(http.get('/api/rooms').get_json()['rooms'])
+fed = {}
+for message in watcher.get_received():
+    if message['name'] == 'lobby_delta':
+        for entry in message['args'][0]['upsert']:
+            fed[entry['id']] = entry
+        for room_id in message['args'][0]['remove']:
+            fed.pop(room_id, None)
+report['fed'] = len(fed)
+report['health'] = http.get('/health').get_json()
+print(json.dumps(report))
+server.shard_router.close()
+"""
+
+
+def test_sharded_server_routes_and_rebalances():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=240).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+
+    # Codes carry their worker's prefix; the room joined by code is the one created
+    assert len(report['codes']) == 41 and {code[0] for code in report['codes']} == {'A', 'B'}
+    assert report['room']['code'] in report['codes']
+
+    # Every seat saw each action, routed to whichever worker owned the room at the time
+    assert all('game_update' in events for events in report['first'])
+    assert all('game_update' in events for events in report['second'])
+
+    before, after = report['before'], report['after']
+    assert before['workers'] == 2 and after['workers'] == 3
+    assert before['rooms'] == after['rooms'] == 41 and before['games'] == after['games'] == 1
+    assert all(shard['rooms'] > 0 and shard['requests'] > 0 for shard in before['shards'])
+    assert 0 < report['moved'] == after['moved_rooms'] == after['shards'][2]['rooms'] < 41
+    assert report['owner_after'] in (report['owner_before'], 2)
+    assert report['lobby'] == 40 and report['health']['active_rooms'] == 41
+    assert report['fed'] == 40  # Workers' lobby deltas reach the front's feed, across the rebalance
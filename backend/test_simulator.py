@@ -0,0 +1,65 @@
+"""
+Tests for the headless batch simulator
+"""
+
+import subprocess
+import sys
+import os
+
+from game_logic import QuantumMusGame
+from simulator import run_batch
+
+
+def test_batch_runs_clean():
+    """A small batch finishes games without failed actions or broken invariants"""
+    for mode in ('4', '8'):
+        report = run_batch(6, game_mode=mode, team1='heuristic', team2='random', seed=3)
+        assert report['games'] == 6
+        assert report['hands'] > 0
+        assert report['failed_actions'] == 0
+        assert report['invariant_violations'] == 0, report['violation_samples']
+        assert report['finished_games'] == 6
+        assert abs(sum(report['win_rates'].values()) - 1.0) < 1e-9
+
+
+def test_seeded_runs_are_reproducible():
+    first = run_batch(3, team1='random', team2='random', seed=42)
+    second = run_batch(3, team1='random', team2='random', seed=42)
+    for key in ('hands', 'actions', 'win_rates', 'points_per_hand', 'ordago', 'collapse_penalties'):
+        assert first[key] == second[key]
+
+
+def test_process_pool():
+    report = run_batch(4, team1='passive', team2='heuristic', workers=2, seed=7)
+    assert report['workers'] == 2
+    assert report['games'] == 4
+    assert report['failed_actions'] == 0
+
+
+def test_declarations_use_the_game_flow():
+    """The server handlers and the simulator share QuantumMusGame's declaration flow"""
+    players = [{'id': f'p{i}', 'name': f'Bot {i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+    game = QuantumMusGame('declaration_flow', players, game_mode='4')
+    game.deal_cards()
+    game.state.currentRound = 'PARES'
+    game.round_handler.pares_handler.initialize_round()
+    mano = game.state.activePlayerIndex
+
+    assert game.declare((mano + 1) % 4, 'PARES', 'puede') == {'success': False, 'error': 'Not your turn'}
+    assert game.declare(mano, 'PARES', True)['next_player'] is None  # tengo keeps the turn until the collapse
+    collapse = game.collapse_declaration(mano, 'tengo', 'PARES')
+    assert collapse['success'] and collapse['next_player'] == game.state.activePlayerIndex != mano
+    assert game.state.paresDeclarations[mano] == ('tengo_after_penalty' if collapse['penalty'] else True)
+
+    for _ in range(3):
+        game.declare(game.state.activePlayerIndex, 'PARES', 'puede')
+    assert game.finish_declarations('PARES') == {'round': 'PARES', 'betting': True, 'reason': None}
+    assert game.state.currentPhase == 'BETTING' and game.state.activePlayerIndex == mano
+
+
+def test_no_web_stack_imports():
+    """The simulator must not pull in Flask or Socket.IO"""
+    code = "import sys, simulator; print(any(m.split('.')[0] in ('flask', 'flask_socketio', 'socketio') for m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.strip() == 'False', result.stderr
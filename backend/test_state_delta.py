@@ -0,0 +1,96 @@
+"""
+Tests for delta-encoded game_update state (state_delta.py)
+A client applying every delta holds the same public state as the server
+"""
+
+import json
+import random
+
+from Logica_cuantica.quantum_random import get_rng_backend, set_rng_backend
+from game_logic import QuantumMusGame
+from game_snapshot import dump_game, load_game
+from simulator import HeadlessSimulator, RandomPolicy, SimulationStats
+from state_delta import apply_delta, benchmark, diff
+
+
+def _players():
+    return [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+
+
+def _wire(value):
+    return json.loads(json.dumps(value))
+
+
+def test_diff_and_apply():
+    old = {'a': 1, 'b': {'c': [1, 2], 'd': True}, 'gone': 0, 'n': {1: 'x'}}
+    new = {'a': 1, 'b': {'c': [1, 3], 'd': 1}, 'added': None, 'n': {1: 'y'}}
+    changes = diff(old, new)
+    assert [['b', 'c'], [1, 3]] in changes
+    assert [['b', 'd'], 1] in changes  # True -> 1 is a change
+    assert [['gone']] in changes
+    assert [['n', '1'], 'y'] in changes
+    assert apply_delta(_wire(old), _wire(changes)) == _wire(new)
+    assert diff(new, dict(new)) == []
+
+
+def test_client_mirror_follows_game():
+    set_rng_backend('fast', seed=5)
+    try:
+        game = QuantumMusGame('delta-room', _players(), game_mode='8')
+        mirror, version = None, 0
+        process_action = game.process_action
+
+        def broadcast(*args, **kwargs):
+            nonlocal mirror, version
+            result = process_action(*args, **kwargs)
+            if result.get('success'):
+                delta = _wire(game.get_public_state_delta())
+                assert delta['base'] == version
+                mirror = apply_delta(mirror, delta['changes'])
+                version = delta['version']
+                assert mirror == _wire(game.get_public_state())
+            return result
+
+        game.process_action = broadcast
+        game.deal_cards()
+        simulator = HeadlessSimulator(RandomPolicy(random.Random(1)), RandomPolicy(random.Random(2)))
+        stats = SimulationStats()
+        for _ in range(3):
+            if simulator._play_hand(game, stats):
+                break
+        assert version > 10
+    finally:
+        set_rng_backend('quantum')
+
+
+def test_resync_after_missed_update():
+    game = QuantumMusGame('sync-room', _players(), game_mode='4')
+    game.deal_cards()
+    first = _wire(game.get_public_state_delta())
+    assert first['base'] == 0 and first['changes'][0][0] == []
+    client = apply_delta(None, first['changes'])
+
+    game.process_action(game.state.activePlayerIndex, 'paso')
+    missed = game.get_public_state_delta()
+    assert missed['base'] == first['version'] and missed['changes']
+    assert game.get_public_state_delta()['changes'] == []  # Nothing changed, same version
+
+    # The client never saw `missed`: it resyncs to the last broadcast state
+    game.process_action(game.state.activePlayerIndex, 'paso')  # Not broadcast yet
+    sync = _wire(game.get_public_state_sync())
+    assert sync['version'] == missed['version'] != first['version']
+    client = sync['game_state']
+    delta = _wire(game.get_public_state_delta())
+    assert delta['base'] == sync['version']
+    assert apply_delta(client, delta['changes']) == _wire(game.get_public_state())
+
+    # A restored game starts a new stream; clients resync with it
+    restored = load_game(dump_game(game))
+    assert _wire(restored.get_public_state_sync()['game_state']) == _wire(game.get_public_state())
+
+
+def test_delta_is_smaller_than_full_state():
+    backend = get_rng_backend()
+    result = benchmark(hands=20, seed=3)
+    assert result['delta']['bytes_per_update'] * 3 < result['full']['bytes_per_update']
+    assert get_rng_backend() == backend
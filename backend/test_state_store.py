@@ -0,0 +1,196 @@
+"""
+Tests for the shared state store (state_store.py)
+Two managers on one store behave like two server workers
+
+RedisStore runs against a small in-test server speaking the Redis protocol
+(the commands the store uses), so no Redis installation is needed.
+"""
+
+import fnmatch
+import socketserver
+import threading
+import time
+
+import pytest
+
+import state_store
+from game_manager import GameManager
+from room_manager import RoomManager
+from state_store import MemoryStore, RedisStore, StoreError, transaction
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def _reply(self, value):
+        if value is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(value, int):
+            self.wfile.write(b':%d\r\n' % value)
+        elif isinstance(value, list):
+            self.wfile.write(b'*%d\r\n' % len(value))
+            for item in value:
+                self._reply(item)
+        elif value == 'OK':
+            self.wfile.write(b'+OK\r\n')
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+
+    def handle(self):
+        data, mutex = self.server.data, self.server.mutex
+        while True:
+            header = self.rfile.readline()
+            if not header:
+                return
+            args = []
+            for _ in range(int(header[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            command, args = args[0].upper(), args[1:]
+            with mutex:
+                now = time.monotonic()
+                for key in [key for key, (_, expires) in data.items() if expires and expires <= now]:
+                    del data[key]
+                if command == b'GET':
+                    reply = data.get(args[0], (None,))[0]
+                elif command == b'SET':
+                    options = [arg.upper() for arg in args[2:]]
+                    expires = now + int(options[options.index(b'PX') + 1]) / 1000 if b'PX' in options else None
+                    if b'NX' in options and args[0] in data:
+                        reply = None
+                    else:
+                        data[args[0]] = (args[1], expires)
+                        reply = 'OK'
+                elif command == b'DEL':
+                    reply = sum(data.pop(key, None) is not None for key in args)
+                elif command == b'SCAN':
+                    pattern = args[args.index(b'MATCH') + 1].decode().replace('\\', '')
+                    reply = [b'0', [key for key in data if fnmatch.fnmatchcase(key.decode(), pattern)]]
+                else:
+                    self.wfile.write(b'-ERR unknown command\r\n')
+                    continue
+            self._reply(reply)
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _RespHandler)
+    server.daemon_threads = True
+    server.data, server.mutex = {}, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'redis://127.0.0.1:{server.server_address[1]}/0'
+    server.shutdown()
+    server.server_close()
+
+
+def _players():
+    return [{'id': f'p{i}', 'name': f'P{i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+
+
+def test_redis_store_commands(resp_server):
+    store = state_store.open_store(resp_server)
+    assert isinstance(store, RedisStore) and store.shared
+    store.set('room/a', b'{"x":1}')
+    store.set('room/b', b'2', ttl=0.05)
+    store.set('code/a', b'a')
+    assert store.get('room/a') == b'{"x":1}' and store.get('missing') is None
+    assert store.keys('room/') == ['room/a', 'room/b']
+    time.sleep(0.1)
+    assert store.keys('room/') == ['room/a']
+    store.delete('room/a', 'missing')
+    assert store.keys('room/') == []
+
+    token = store.acquire('lock/room/a')
+    with pytest.raises(StoreError):
+        store.acquire('lock/room/a', timeout=0.05)
+    store.unlock('lock/room/a', 'not-the-holder')
+    assert store.get('lock/room/a') == token.encode()
+    store.unlock('lock/room/a', token)
+    store.acquire('lock/room/a', ttl=0.05)
+    store.acquire('lock/room/a', timeout=1)  # The first holder's lock expired
+    store.close()
+
+
+def test_workers_share_rooms_and_games(resp_server):
+    workers = []
+    for _ in range(2):
+        store = RedisStore(resp_server)
+        workers.append((store, RoomManager(store=store), GameManager(store=store)))
+    (store_a, rooms_a, games_a), (store_b, rooms_b, games_b) = workers
+
+    room = rooms_a.create_room('Shared', '4')
+    assert rooms_b.get_room_by_code(room['code'])['id'] == room['id']
+    for i in range(4):
+        with transaction((store_a, store_b)[i % 2]):
+            ((rooms_a, rooms_b)[i % 2]).add_player(room['id'], f'sid{i}', f'P{i}', 'preskill')
+    assert [player['socket_id'] for player in rooms_a.get_room(room['id'])['players']] == [f'sid{i}' for i in range(4)]
+    assert rooms_b.get_player_room('sid3') == room['id']
+    assert rooms_a.get_available_rooms() == []
+
+    with transaction(store_a):
+        game = games_a.create_game(room['id'], _players(), '4')
+        assert games_a.get_game(room['id']) is game  # Not dropped before the first commit
+        game.deal_cards()
+        first = game.get_public_state_delta()
+
+    # Worker B plays the next action on its own copy of the game
+    with transaction(store_b):
+        game_b = games_b.get_game(room['id'])
+        assert game_b is not games_a.games[room['id']]
+        assert game_b.process_action(game_b.state.activePlayerIndex, 'mus')['success']
+        delta = game_b.get_public_state_delta()
+    assert delta['base'] == first['version'] and delta['changes']
+
+    # ...and worker A picks it up, continuing the same delta stream
+    with transaction(store_a):
+        game_a = games_a.get_game(room['id'])
+        assert game_a.get_public_state() == game_b.get_public_state()
+        assert game_a.process_action(game_a.state.activePlayerIndex, 'mus')['success']
+        assert game_a.get_public_state_delta()['base'] == delta['version']
+    assert games_b.get_game(room['id']).get_public_state() == game_a.get_public_state()
+    assert games_a.count_games() == games_b.count_games() == 1
+
+    games_b.remove_game(room['id'])
+    assert games_a.get_game(room['id']) is None and games_a.count_games() == 0
+
+
+def test_failed_handler_is_not_saved():
+    store = MemoryStore(shared=True)
+    worker_a, worker_b = GameManager(store=store), GameManager(store=store)
+    worker_a.create_game('r1', _players(), '4')
+    with transaction(store):
+        worker_a.get_game('r1').deal_cards()
+    saved = worker_b.get_game('r1').get_public_state()
+
+    with pytest.raises(RuntimeError):
+        with transaction(store):
+            game = worker_a.get_game('r1')
+            game.process_action(game.state.activePlayerIndex, 'mus')
+            raise RuntimeError('handler failed')
+    # The half-applied change stays out of the store and worker A reloads it
+    assert worker_b.get_game('r1').get_public_state() == saved
+    assert worker_a.get_game('r1').get_public_state() == saved
+
+
+def test_room_lock_serializes_workers():
+    store = MemoryStore(shared=True)
+    rooms_a, rooms_b = RoomManager(store=store), RoomManager(store=store)
+    room = rooms_a.create_room('Locked')
+    order = []
+    entered = threading.Event()
+
+    def worker_b():
+        entered.wait()
+        with transaction(store):
+            rooms_b.add_player(room['id'], 'sid_b', 'B')
+            order.append('b')
+
+    thread = threading.Thread(target=worker_b)
+    thread.start()
+    with transaction(store):
+        rooms_a.get_room(room['id'])
+        entered.set()
+        time.sleep(0.05)
+        rooms_a.add_player(room['id'], 'sid_a', 'A')
+        order.append('a')
+    thread.join(5)
+    assert order == ['a', 'b']
+    assert [player['socket_id'] for player in rooms_a.get_room(room['id'])['players']] == ['sid_a', 'sid_b']
@@ -0,0 +1,111 @@
+"""
+Tests for the timing wheel (timing_wheel.py)
+Timers fire within a tick of their deadline at every level, and cancel is final
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from timing_wheel import SLOTS, TICK, TimingWheel
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fired_at(delays, levels):
+    clock = _Clock()
+    wheel = TimingWheel(levels=levels, clock=clock, driver=False)
+    start = clock.now
+    fired = {}
+    for delay in delays:
+        wheel.call_later(delay, lambda delay=delay: fired.setdefault(delay, clock.now - start))
+    while len(wheel):
+        clock.now += TICK
+        wheel.advance()
+    return fired
+
+
+def test_timers_fire_on_time_across_levels():
+    # Delays within level 0, across level boundaries, and past the last level (parked, re-cascaded)
+    for levels, delays in [(3, [0, 0.01, 1.0, 3.2, 3.25, 10.0, 10.0 + TICK / 2, 250.0]),
+                           (2, [10.0, TICK * SLOTS ** 2 * 2.5])]:
+        fired = _fired_at(delays, levels)
+        assert set(fired) == set(delays)
+        for delay, elapsed in fired.items():
+            assert delay <= elapsed + 1e-9 < max(delay, TICK) + TICK + 1e-6
+
+
+def test_cancel_and_order():
+    clock = _Clock()
+    wheel = TimingWheel(clock=clock, driver=False)
+    fired = []
+    handles = {name: wheel.call_later(delay, lambda name=name: fired.append(name))
+               for name, delay in [('late', 10.0), ('cancelled', 5.0), ('early', 4.99), ('rearmed', 1.0)]}
+    assert handles['cancelled'].cancel() and not handles['cancelled'].cancel()
+    handles['rearmed'].cancel()
+    wheel.call_later(7.0, lambda: fired.append('rearmed'))
+    assert len(wheel) == 3
+
+    clock.now += 5.0
+    assert wheel.advance() == 1 and fired == ['early']
+    clock.now += 60.0
+    wheel.call_later(0, lambda: 1 / 0)  # A failing callback is logged, not raised
+    assert wheel.advance() == 3
+    assert fired == ['early', 'rearmed', 'late'] and len(wheel) == 0
+    assert not handles['late'].active and not handles['late'].cancel()
+
+
+def test_driver_thread_fires_callbacks():
+    wheel = TimingWheel(tick=0.01)
+    done, cancelled = threading.Event(), threading.Event()
+    wheel.call_later(0.02, cancelled.set).cancel()
+    wheel.call_later(0.05, done.set)
+    assert done.wait(2)
+    wheel.stop()
+    assert not cancelled.is_set() and len(wheel) == 0
+
+
+_SCENARIO = r"""
+import json, os, time
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+import server
+from server import app, socketio
+
+server.TURN_TIMEOUT = 0.3
+clients = [socketio.test_client(app) for _ in range(4)]
+clients[0].emit('create_room', {'name': 'Timers', 'game_mode': '4'})
+room = [m['args'][0] for m in clients[0].get_received() if m['name'] == 'room_created'][0]['room']
+for i, client in enumerate(clients):
+    client.emit('join_room', {'room_id': room['id'], 'player_name': f'P{i}'})
+    client.emit('set_character', {'room_id': room['id'], 'character': ['preskill', 'zoller', 'cirac', 'deutsch'][i],
+                                  'team': 1 + i % 2})
+for client in clients:
+    client.get_received()
+clients[0].emit('start_game', {'room_id': room['id']})
+armed = [len(server.timers), room['id'] in server.turn_timeouts]
+for client in clients:
+    client.get_received()
+time.sleep(0.45)  # Green sleep: the wheel's driver plays 'mus' for the idle seat
+updates = [[m['args'][0]['action'] for m in client.get_received() if m['name'] == 'game_update'] for client in clients]
+print(json.dumps({'armed': armed, 'updates': updates, 'live': len(server.timers)}))
+"""
+
+
+def test_server_turn_timeout_fires_from_the_wheel():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=120).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    assert report['armed'] == [1, True]
+    assert all(actions == [{'player_index': actions[0]['player_index'], 'action': 'mus', 'data': {}}]
+               for actions in report['updates'])
+    assert report['live'] == 1  # Re-armed for the next seat, the fired handle is gone
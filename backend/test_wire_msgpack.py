@@ -0,0 +1,78 @@
+"""
+Tests for the opt-in MessagePack wire encoding (wire_msgpack.py)
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from Logica_cuantica.baraja import QuantumDeck
+from Logica_cuantica.quantum_random import FastRNG
+import wire_json
+import wire_msgpack
+
+pytestmark = pytest.mark.skipif(not wire_msgpack.available(), reason="msgpack is not installed")
+
+
+def test_card_keys_match_card_dicts():
+    card = QuantumDeck(game_mode='8', rng=FastRNG(1)).cards[0]
+    assert tuple(card.to_dict()) == wire_msgpack.CARD_KEYS
+
+
+def test_round_trip_matches_json():
+    cards = [card.to_dict() for card in QuantumDeck(game_mode='4', rng=FastRNG(2)).cards[:4]]
+    payload = {
+        'game_state': wire_json.RawJSON('{"hand_sizes":{"0":4},"players":[{"id":"p0"}]}'),
+        'player_hands': {2: cards},
+        'result': {'success': True, 'points': 1.5, 'winner': None},
+    }
+    packed = wire_msgpack.packb(payload)
+    assert wire_msgpack.unpackb(packed) == json.loads(wire_json.dumps(payload))
+    assert len(packed) * 2 < len(wire_json.dumps(payload))
+
+
+def test_benchmark_on_recorded_traffic():
+    result = wire_msgpack.benchmark(hands=10, seed=4, repeat=1)
+    assert result['mismatches'] == 0
+    assert result['size_ratio'] < 0.6
+
+
+_SCENARIO = r"""
+import json, os
+os.environ.setdefault('SECRET_KEY', 'test')
+import logging
+logging.disable(logging.WARNING)
+from server import app, socketio
+import wire_msgpack
+
+def received(client, name):
+    return [m['args'][0] for m in client.get_received() if m['name'] == name]
+
+clients = [socketio.test_client(app, auth={'wire': 'msgpack'} if i == 1 else None) for i in range(4)]
+connected = [received(client, 'connected')[0] for client in clients]
+clients[0].emit('create_room', {'name': 'Wire', 'game_mode': '4'})
+room_id = received(clients[0], 'room_created')[0]['room']['id']
+for i, client in enumerate(clients):
+    client.emit('join_room', {'room_id': room_id, 'player_name': f'P{i}'})
+for i, client in enumerate(clients):
+    client.emit('set_character', {'room_id': room_id, 'character': ['preskill', 'zoller', 'cirac', 'deutsch'][i],
+                                  'team': 1 + i % 2})
+updates = [received(client, 'room_updated')[-1] for client in clients]
+print(json.dumps({
+    'wires': [entry['wire'] for entry in connected],
+    'binary': [isinstance(update, bytes) for update in updates],
+    'same': wire_msgpack.unpackb(updates[1]) == updates[0],
+}))
+"""
+
+
+def test_negotiated_per_connection():
+    output = subprocess.run([sys.executable, '-c', _SCENARIO], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True, timeout=120).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    assert report['wires'] == ['json', 'msgpack', 'json', 'json']
+    assert report['binary'] == [False, True, False, False]
+    assert report['same']
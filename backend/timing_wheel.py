@@ -0,0 +1,210 @@
+"""
+Timing Wheel for Quantum Mus
+One hierarchical timing wheel drives every turn and discard timeout
+
+The server used to start one eventlet greenthread or threading.Timer per room
+per turn, and cancel and recreate it on every action. A TimingWheel keeps all
+timers of the process in buckets instead, and one driver thread advances it
+every tick:
+- level 0 has one bucket per tick (SLOTS of them); each higher level has
+  buckets SLOTS times as wide. A timer goes into the finest level whose range
+  covers its delay, and is moved down a level (cascaded) when the wheel
+  reaches its bucket, so it fires within one tick of its deadline.
+- arming and cancelling are O(1): a bucket is a dict, a TimerHandle knows
+  its bucket.
+- callbacks run on the driver thread (a greenthread under eventlet's monkey
+  patching), one after another; an exception is logged and the wheel goes on.
+
+With TICK = 50ms and 4 levels of 64 slots, delays up to ~10 days are tracked
+exactly; longer ones are parked in the last level and re-cascaded.
+
+Benchmark (arm + cancel per action, wheel vs one threading.Timer each):
+    python timing_wheel.py --timers 20000
+"""
+
+import argparse
+import json
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TICK = 0.05  # Seconds per level-0 slot
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS  # Buckets per level
+LEVELS = 4
+
+
+class TimerHandle:
+    """A timer armed on a TimingWheel; cancel() stops it if it has not fired"""
+
+    __slots__ = ('wheel', 'deadline', 'callback', 'expires', '_bucket')
+
+    def __init__(self, wheel: 'TimingWheel', deadline: float, callback: Callable[[], None], expires: int):
+        self.wheel = wheel
+        self.deadline = deadline
+        self.callback = callback
+        self.expires = expires  # Wheel tick it fires at
+        self._bucket: Optional[Dict] = None
+
+    @property
+    def active(self) -> bool:
+        return self._bucket is not None
+
+    def cancel(self) -> bool:
+        """Stop the timer; False if it already fired or was cancelled"""
+        return self.wheel.cancel(self)
+
+
+class TimingWheel:
+    """Hierarchical timing wheel with one driver thread (started on first use)"""
+
+    def __init__(self, tick: float = TICK, levels: int = LEVELS, clock: Callable[[], float] = time.monotonic,
+                 driver: bool = True):
+        self.tick = tick
+        self.levels = levels
+        self._clock = clock
+        self._origin = clock()
+        self._current = 0  # Last tick processed
+        self._levels: List[List[Dict]] = [[{} for _ in range(SLOTS)] for _ in range(levels)]
+        self._count = 0
+        self._mutex = threading.Lock()
+        self._driver = None if driver else False  # False: advanced by hand (tests, benchmark)
+        self._stopped = False
+
+    def __len__(self):
+        return self._count
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        """Run callback (on the driver thread) after delay seconds"""
+        deadline = self._clock() + max(delay, 0.0)
+        expires = math.ceil((deadline - self._origin) / self.tick - 1e-9)  # Not a tick late on float error
+        with self._mutex:
+            handle = TimerHandle(self, deadline, callback, expires)
+            self._insert(handle)
+            self._count += 1
+            if self._driver is None:
+                self._driver = threading.Thread(target=self._run, name='timing-wheel', daemon=True)
+                self._driver.start()
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        with self._mutex:
+            bucket = handle._bucket
+            if bucket is None:
+                return False
+            del bucket[handle]
+            handle._bucket = None
+            self._count -= 1
+            return True
+
+    def _insert(self, handle: TimerHandle, cascading: bool = False) -> None:
+        # A cascade runs before the current tick's bucket fires, so it may still land there
+        expires = max(handle.expires, self._current if cascading else self._current + 1)
+        delta = expires - self._current
+        level = 0
+        while level < self.levels - 1 and delta >= SLOTS << (SLOT_BITS * level):
+            level += 1
+        if delta >= SLOTS << (SLOT_BITS * level):
+            expires = self._current + (SLOTS << (SLOT_BITS * level)) - 1  # Parked; re-cascaded later
+        bucket = self._levels[level][(expires >> (SLOT_BITS * level)) & (SLOTS - 1)]
+        bucket[handle] = None
+        handle._bucket = bucket
+
+    def _due(self, until: int) -> List[TimerHandle]:
+        """Advance to tick until; returns the handles that fired, in deadline order"""
+        fired = []
+        with self._mutex:
+            if not self._count:
+                self._current = max(self._current, until)  # Nothing to cascade on the way
+                return fired
+            while self._current < until:
+                self._current += 1
+                tick = self._current
+                level = 0
+                while level < self.levels - 1 and (tick >> (SLOT_BITS * level)) & (SLOTS - 1) == 0:
+                    level += 1
+                    self._cascade(level, (tick >> (SLOT_BITS * level)) & (SLOTS - 1))
+                bucket = self._levels[0][tick & (SLOTS - 1)]
+                if not bucket:
+                    continue
+                handles = list(bucket)
+                bucket.clear()
+                for handle in handles:
+                    handle._bucket = None
+                    if handle.expires <= tick:
+                        fired.append(handle)
+                        self._count -= 1
+                    else:
+                        self._insert(handle)
+        fired.sort(key=lambda handle: handle.deadline)
+        return fired
+
+    def _cascade(self, level: int, slot: int) -> None:
+        bucket = self._levels[level][slot]
+        handles = list(bucket)
+        bucket.clear()
+        for handle in handles:
+            self._insert(handle, cascading=True)
+
+    def advance(self, now: float = None) -> int:
+        """Fire every timer due by now (default: the clock); returns how many fired"""
+        now = self._clock() if now is None else now
+        fired = self._due(int((now - self._origin) / self.tick + 1e-9))
+        for handle in fired:
+            try:
+                handle.callback()
+            except Exception:
+                logger.exception("Timer callback failed")
+        return len(fired)
+
+    def _run(self):
+        while not self._stopped:
+            time.sleep(self.tick)
+            self.advance()
+
+    def stop(self) -> None:
+        """Stop the driver thread; armed timers no longer fire"""
+        self._stopped = True
+
+
+# ==================== BENCHMARK ====================
+
+def benchmark(timers: int = 20000) -> Dict:
+    """
+    Per-action timer churn: arm a 10s timeout and cancel it on the next
+    action, with the wheel and with one threading.Timer per timeout.
+    """
+    wheel = TimingWheel(driver=False)
+    started = time.perf_counter()
+    for _ in range(timers):
+        wheel.call_later(10.0, lambda: None).cancel()
+    wheel_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(timers):
+        timer = threading.Timer(10.0, lambda: None)
+        timer.daemon = True
+        timer.start()
+        timer.cancel()
+    thread_time = time.perf_counter() - started
+
+    return {
+        'timers': timers,
+        'wheel_us': round(wheel_time / timers * 1e6, 2),
+        'thread_timer_us': round(thread_time / timers * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantum Mus timing wheel vs per-timeout threads benchmark')
+    parser.add_argument('--timers', type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.timers), indent=2))
+
+
+if __name__ == '__main__':
+    main()
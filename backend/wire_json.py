@@ -0,0 +1,46 @@
+"""
+Socket.IO JSON codec that embeds pre-serialized fragments
+
+Passed to SocketIO(json=wire_json). A RawJSON value anywhere in an emitted
+payload is written verbatim instead of being encoded again, so a cached
+serialization (QuantumMusGame.get_public_state_json) costs a string splice
+per emit. Everything else is encoded by the standard json module.
+"""
+
+import json
+
+_TOKEN = '\x00raw%d\x00'
+
+
+class RawJSON:
+    """Already-serialized JSON text to embed as-is"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self):
+        return f"RawJSON({self.text[:40]!r})"
+
+
+def dumps(obj, **kwargs) -> str:
+    fragments = []
+    user_default = kwargs.pop('default', None)
+
+    def default(value):
+        if isinstance(value, RawJSON):
+            fragments.append(value.text)
+            return _TOKEN % (len(fragments) - 1)
+        if user_default is not None:
+            return user_default(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    text = json.dumps(obj, default=default, **kwargs)
+    for index, fragment in enumerate(fragments):
+        text = text.replace(json.dumps(_TOKEN % index), fragment, 1)
+    return text
+
+
+def loads(text, **kwargs):
+    return json.loads(text, **kwargs)
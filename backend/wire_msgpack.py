@@ -0,0 +1,210 @@
+"""
+Socket.IO MessagePack codec for Quantum Mus
+Opt-in binary encoding of server events, negotiated per connection
+
+A client that connects with auth {'wire': 'msgpack'} (or ?wire=msgpack) gets
+every broadcast game event as one binary argument instead of a JSON object;
+other clients keep JSON. The binary form is MessagePack with two extension
+types:
+- CARD_EXT: a card's to_dict() as the list of its values, in CARD_KEYS
+  order. Card keys (entangled_partner_suit, collapse_reason...) are the bulk
+  of a JSON hand; the key list is sent once, in the 'connected' reply.
+- PACKED_EXT: an already-packed MessagePack value. A cached RawJSON fragment
+  (QuantumMusGame.get_public_state_json) is converted and packed once and
+  then embedded as-is, like wire_json does for JSON.
+
+msgpack is optional: when it is not installed every client gets JSON.
+
+Benchmark (payload size and encode time vs JSON on simulated game traffic):
+    python wire_msgpack.py --hands 200
+"""
+
+import argparse
+import functools
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Tuple
+
+from wire_json import RawJSON
+import wire_json
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON only
+    msgpack = None
+
+CARD_EXT = 1
+PACKED_EXT = 2
+
+# QuantumCard.to_dict() keys, in order
+CARD_KEYS = ('palo', 'valor', 'value', 'suit', 'card_id', 'measured_state', 'repr', 'is_entangled',
+             'entangled_partner_value', 'entangled_partner_suit', 'is_superposed', 'superposed_value',
+             'coefficient_a', 'coefficient_b', 'is_collapsed', 'collapsed_value', 'collapse_reason')
+
+
+def available() -> bool:
+    return msgpack is not None
+
+
+def _intern(value):
+    """
+    Copy of value with card dicts as CARD_EXT and RawJSON as PACKED_EXT.
+    Int dict keys (seat indices) become strings, as they would in JSON.
+    """
+    if isinstance(value, dict):
+        if len(value) == len(CARD_KEYS) and tuple(value) == CARD_KEYS:
+            return msgpack.ExtType(CARD_EXT, msgpack.packb([_intern(item) for item in value.values()]))
+        return {(str(key) if isinstance(key, int) else key): _intern(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_intern(item) for item in value]
+    if isinstance(value, RawJSON):
+        return msgpack.ExtType(PACKED_EXT, _packed_fragment(value.text))
+    return value
+
+
+@functools.lru_cache(maxsize=256)
+def _packed_fragment(text: str) -> bytes:
+    # The same cached RawJSON text goes to every seat and every binary client
+    return packb(json.loads(text))
+
+
+def packb(payload) -> bytes:
+    """MessagePack encoding of an event payload"""
+    return msgpack.packb(_intern(payload), default=_default)
+
+
+def _default(value):
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def _ext_hook(code: int, data: bytes):
+    if code == CARD_EXT:
+        return dict(zip(CARD_KEYS, msgpack.unpackb(data, ext_hook=_ext_hook)))
+    if code == PACKED_EXT:
+        return unpackb(data)
+    return msgpack.ExtType(code, data)
+
+
+def unpackb(data: bytes):
+    """Decode packb() output back to plain values (clients and tests)"""
+    return msgpack.unpackb(data, ext_hook=_ext_hook)
+
+
+# ==================== BENCHMARK ====================
+
+def record_traffic(hands: int = 200, seed: int = None) -> List[Tuple[str, Dict]]:
+    """
+    Event payloads the server would broadcast over simulated games: a
+    game_update delta per accepted action, a deal (one seat's hand plus the
+    deal state) per hand and a final_cards_collapsed per hand.
+    """
+    from Logica_cuantica.quantum_random import get_rng_backend, set_rng_backend
+    from entanglement_analytics import get_analytics
+    from game_logic import QuantumMusGame
+    from simulator import HeadlessSimulator, RandomPolicy, SimulationStats
+
+    rng = random.Random(seed)
+    previous_backend = get_rng_backend()
+    set_rng_backend('fast', seed=seed)
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    traffic = []
+    try:
+        simulator = HeadlessSimulator(RandomPolicy(rng), RandomPolicy(rng))
+        stats = SimulationStats()
+        players = [{'id': f'bench_p{i}', 'name': f'Bot {i}', 'team': 1 if i % 2 == 0 else 2} for i in range(4)]
+        played = 0
+        while played < hands:
+            game = QuantumMusGame(f'wire_bench_{played}', players)
+            process_action = game.process_action
+
+            def record(player_index, action, extra_data=None):
+                result = process_action(player_index, action, extra_data)
+                if result.get('success'):
+                    traffic.append(('game_update', {
+                        'state_delta': game.get_public_state_delta(),
+                        'action': {'player_index': player_index, 'action': action, 'data': extra_data or {}},
+                        'result': result,
+                    }))
+                return result
+
+            def deal():
+                state = game.get_public_state()
+                state['entanglement'] = game.get_full_entanglement_state()
+                traffic.append(('hand_started', {
+                    'game_state': RawJSON(json.dumps(state, separators=(',', ':'))),
+                    'game_mode': game.game_mode,
+                    'player_hands': {0: [card.to_dict() for card in game.hands[0]]},
+                }))
+
+            game.process_action = record
+            game.deal_cards()
+            game.get_public_state_delta()
+            while played < hands:
+                played += 1
+                deal()
+                ended = simulator._play_hand(game, stats)
+                game.trigger_final_collapse()
+                traffic.append(('final_cards_collapsed', {
+                    'success': True,
+                    'final_hands': {0: [card.to_dict() for card in game.hands[0]]},
+                }))
+                if ended:
+                    break
+            get_analytics().retire(game.room_id)
+    finally:
+        logging.disable(previous_disable)
+        set_rng_backend(previous_backend)
+    return traffic
+
+
+def benchmark(hands: int = 200, seed: int = None, repeat: int = 5) -> Dict:
+    """Bytes and encode time per event, JSON (wire_json) vs MessagePack"""
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    traffic = record_traffic(hands, seed)
+
+    def measure(encode):
+        size, started = 0, time.perf_counter()
+        for _ in range(repeat):
+            for _, payload in traffic:
+                size += len(encode(payload))
+        elapsed = time.perf_counter() - started
+        return {'bytes': size // repeat, 'encode_us_per_event': round(elapsed / repeat / len(traffic) * 1e6, 1)}
+
+    _packed_fragment.cache_clear()
+    json_result = measure(lambda payload: wire_json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    msgpack_result = measure(packb)
+    mismatches = sum(
+        unpackb(packb(payload)) != json.loads(wire_json.dumps(payload))
+        for _, payload in traffic
+    )
+    per_event = {}
+    for event, payload in traffic:
+        entry = per_event.setdefault(event, {'count': 0, 'json_bytes': 0, 'msgpack_bytes': 0})
+        entry['count'] += 1
+        entry['json_bytes'] += len(wire_json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        entry['msgpack_bytes'] += len(packb(payload))
+    return {
+        'events': len(traffic),
+        'json': json_result,
+        'msgpack': msgpack_result,
+        'size_ratio': round(msgpack_result['bytes'] / json_result['bytes'], 3),
+        'per_event': per_event,
+        'mismatches': mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantum Mus MessagePack vs JSON wire benchmark')
+    parser.add_argument('--hands', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.hands, args.seed, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -869,7 +869,7 @@ function initGame() {
     const socket = window.QuantumMusSocket;
     const roomId = window.QuantumMusOnlineRoom;
 
-    function renderHandsFromServer(playerHands, gameMode) {
+    function renderHandsFromServer(playerHands, gameMode, handSizes) {
       const suitMap = {
         oros: ['theta', 'θ', '#f5c518'],
         copas: ['phi', 'φ', '#ff6b6b'],
@@ -877,6 +877,12 @@ function initGame() {
         bastos: ['psi', 'ψ', '#2ec4b6']
       };
       const mappedHands = {};
+      // The server only sends our own hand; other seats are face-down cards from hand_sizes
+      Object.keys(handSizes || {}).forEach((sIdx) => {
+        const serverIdx = parseInt(sIdx, 10);
+        if (Number.isNaN(serverIdx) || (playerHands && playerHands[sIdx])) return;
+        mappedHands[serverToLocal(serverIdx)] = Array.from({ length: handSizes[sIdx] || 0 }, () => ({}));
+      });
       Object.keys(playerHands || {}).forEach((sIdx) => {
         const serverIdx = parseInt(sIdx, 10);
         if (Number.isNaN(serverIdx)) return;
@@ -937,9 +943,9 @@ function initGame() {
         updateEntanglementState(gs.entanglement);
       }
       if (payload.game_state && payload.game_state.player_hands) {
-        renderHandsFromServer(payload.game_state.player_hands, payload.game_mode || window.currentGameMode || '8');
+        renderHandsFromServer(payload.game_state.player_hands, payload.game_mode || window.currentGameMode || '8', gs.hand_sizes);
       } else if (payload.player_hands) {
-        renderHandsFromServer(payload.player_hands, payload.game_mode || window.currentGameMode || '8');
+        renderHandsFromServer(payload.player_hands, payload.game_mode || window.currentGameMode || '8', gs.hand_sizes);
       }
       updateManoIndicators();
       updateRoundDisplay();
@@ -993,7 +999,7 @@ function initGame() {
       }
       });
     });
-    socket.on('game_update', (data) => {
+    const handleGameUpdate = (data) => {
       const gs = data.game_state || {};
       const st = gs.state || gs;
       if (st) {
@@ -1010,6 +1016,11 @@ function initGame() {
             gameState.teams.team2.score = st.teams.team2?.score ?? 0;
           }
           
+          // Opponents' cards are only sent at the showdown
+          if (data.revealed_hands) {
+            renderHandsFromServer(data.revealed_hands, window.currentGameMode || '8');
+          }
+          
           // Collapse and reveal all cards
           collapseAllRemaining().then(() => {
             revealAllCards(true);
@@ -1176,6 +1187,62 @@ function initGame() {
         updateScoreboard();
         startPlayerTurnTimer(gameState.activePlayerIndex);
       }
+    };
+    // Public state mirror, kept current by the game_update deltas (backend state_delta.py)
+    let serverPublicState = null;
+    let serverStateVersion = 0;
+    let pendingStateUpdates = []; // Updates received while a resync is in flight
+    let stateSyncInFlight = false;
+    function applyStateChanges(state, changes) {
+      (changes || []).forEach((change) => {
+        const path = change[0];
+        if (!path.length) { state = change[1]; return; }
+        let target = state;
+        for (let i = 0; i < path.length - 1; i++) target = target[path[i]];
+        if (change.length === 1) delete target[path[path.length - 1]];
+        else target[path[path.length - 1]] = change[1];
+      });
+      return state;
+    }
+    function requestStateSync() {
+      if (stateSyncInFlight) return;
+      stateSyncInFlight = true;
+      socket.emit('request_state_sync', { room_id: roomId });
+    }
+    function applyStateUpdate(data) {
+      const delta = data.state_delta;
+      serverPublicState = applyStateChanges(serverPublicState, delta.changes);
+      serverStateVersion = delta.version;
+      handleGameUpdate({ ...data, game_state: serverPublicState });
+    }
+    function queueStateUpdate(data) {
+      pendingStateUpdates.push(data);
+      requestStateSync();
+    }
+    socket.on('game_update', (data) => {
+      const delta = data.state_delta;
+      if (!delta) { handleGameUpdate(data); return; }
+      if (stateSyncInFlight || delta.base !== serverStateVersion) {
+        // Missed a version (or joined late): queue updates until state_sync replaces the mirror
+        queueStateUpdate(data);
+        return;
+      }
+      applyStateUpdate(data);
+    });
+    socket.on('state_sync', (data) => {
+      serverPublicState = data.game_state;
+      serverStateVersion = data.version;
+      stateSyncInFlight = false;
+      const queued = pendingStateUpdates.sort((a, b) => a.state_delta.version - b.state_delta.version);
+      pendingStateUpdates = [];
+      // The synced state already includes the older updates; replay the latest of them for its action
+      const included = queued.filter((update) => update.state_delta.version <= serverStateVersion);
+      handleGameUpdate({ ...(included[included.length - 1] || {}), game_state: serverPublicState });
+      // Newer updates apply on top in version order (a gap starts another resync)
+      queued.filter((update) => update.state_delta.version > serverStateVersion).forEach((update) => {
+        if (stateSyncInFlight || update.state_delta.base !== serverStateVersion) queueStateUpdate(update);
+        else applyStateUpdate(update);
+      });
     });
     socket.on('hand_started', (data) => {
       console.log('DEBUG FRONTEND: Recibido evento de juego. Datos crudos:', data);
@@ -1593,7 +1660,7 @@ function initGame() {
         
         // Update player hands from server and re-render
         if (data.player_hands) {
-          renderHandsFromServer(data.player_hands, window.currentGameMode || (window.onlineMode ? '8' : '4'));
+          renderHandsFromServer(data.player_hands, window.currentGameMode || (window.onlineMode ? '8' : '4'), gs.hand_sizes);
         }
         
         // Remove discard button if it exists
@@ -32,6 +32,11 @@ document.addEventListener('DOMContentLoaded', () => {
       const socket = io(url, { transports: ['websocket', 'polling'], reconnection: true });
       gameState.socket = socket;
 
+      // Eventos agrupados: el servidor envía en un solo frame todo lo que produce una acción
+      socket.on('batch', (events) => {
+        events.forEach(([event, data]) => socket.listeners(event).forEach((listener) => listener(data)));
+      });
+
       socket.on('connect', () => {
         gameState.onlineMode = true;
         window.QuantumMusSocket = socket;
@@ -108,6 +113,10 @@ document.addEventListener('DOMContentLoaded', () => {
         alert(data.error || 'Error en el juego');
       });
 
+      socket.on('rate_limited', (data) => {
+        console.warn(`[RATE LIMITED] ${data.event} (${data.reason}), retry after ${data.retry_after ?? '?'}s`);
+      });
+
       socket.on('returned_to_lobby', (data) => {
         console.log('[RETURNED TO LOBBY] All players returned to lobby:', data);
         